@@ -2,7 +2,7 @@
 // Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 // Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 // Date: 11 Feb 2020
-// Rev.: 17 Apr 2020
+// Rev.: 19 Oct 2026
 //
 // I2C functions on the ATLAS MDT Trigger Processor (TP) Command Module (CM)
 // MCU.
@@ -128,12 +128,14 @@ uint32_t I2CMasterRead(tI2C *psI2C, uint8_t ui8SlaveAddr, uint8_t *pui8Data, uin
 
 
 // Read data from an I2C master (advanced).
-uint32_t I2CMasterReadAdv(tI2C *psI2C, uint8_t ui8SlaveAddr, uint8_t *pui8Data, uint8_t ui8Length, bool bRepeatedStart, bool bStop)
+// The length is 16 bit wide, so that long SMBus block reads with up to 255
+// data bytes plus the byte count fit into one transaction.
+uint32_t I2CMasterReadAdv(tI2C *psI2C, uint8_t ui8SlaveAddr, uint8_t *pui8Data, uint16_t ui16Length, bool bRepeatedStart, bool bStop)
 {
     uint32_t ui32I2CMasterInt, ui32I2CMasterErr;
     uint32_t ui32Timeout = psI2C->ui32Timeout + 10;     // Guarantee some minimum timeout value.
 
-    if (ui8Length < 1) return 1;
+    if (ui16Length < 1) return 1;
 
     // Clear all I2C master interrupts.
     I2CMasterIntClearEx(psI2C->ui32BaseI2C, 0xffffffffU);
@@ -153,12 +155,12 @@ uint32_t I2CMasterReadAdv(tI2C *psI2C, uint8_t ui8SlaveAddr, uint8_t *pui8Data,
     }
 
     // Receive data.
-    for (int i = 0; i < ui8Length; i++) {
-        if (ui8Length == 1 && bStop) {
+    for (int i = 0; i < ui16Length; i++) {
+        if (ui16Length == 1 && bStop) {
             I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_SINGLE_RECEIVE);
         } else {
             if (i == 0) I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_BURST_RECEIVE_START);
-            else if ((i == ui8Length - 1) && bStop) I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_BURST_RECEIVE_FINISH);
+            else if ((i == ui16Length - 1) && bStop) I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_BURST_RECEIVE_FINISH);
             else I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_BURST_RECEIVE_CONT);
         }
         // Wait until the transfer is finished.
@@ -194,6 +196,85 @@ uint32_t I2CMasterReadAdv(tI2C *psI2C, uint8_t ui8SlaveAddr, uint8_t *pui8Data,
 
 
 
+// Read an SMBus block from an I2C master (advanced). The first byte received
+// is the byte count, which determines the number of data bytes to follow. The
+// byte count and the data bytes are read in one transaction. The byte count
+// is stored in pui8Data[0] and the total number of bytes read in
+// pui16Length. Blocks longer than ui16LengthMax are truncated.
+uint32_t I2CMasterReadBlockAdv(tI2C *psI2C, uint8_t ui8SlaveAddr, uint8_t *pui8Data, uint16_t ui16LengthMax, uint16_t *pui16Length, bool bRepeatedStart)
+{
+    uint32_t ui32I2CMasterInt = 0, ui32I2CMasterErr;
+    uint32_t ui32Timeout = psI2C->ui32Timeout + 10;     // Guarantee some minimum timeout value.
+    uint16_t ui16Length = ui16LengthMax;
+
+    *pui16Length = 0;
+    if (ui16LengthMax < 1) return 1;
+
+    // Clear all I2C master interrupts.
+    I2CMasterIntClearEx(psI2C->ui32BaseI2C, 0xffffffffU);
+
+    // Set the I2C slave address.
+    I2CMasterSlaveAddrSet(psI2C->ui32BaseI2C, ui8SlaveAddr, true);    // false = write; true = read
+
+    // Wait until the I2C bus is free, if no repeated start.
+    if (!bRepeatedStart) {
+        for (int i = 0; i <= ui32Timeout; i++) {
+            if (!I2CMasterBusBusy(psI2C->ui32BaseI2C)) break;
+            SysCtlDelay(psI2C->ui32I2CClk / 3e5);   // 10 us delay.
+                                                    // Note: The SysCtlDelay executes a simple 3 instruction cycle loop.
+            // Timeout while waiting for the I2C bus to be free.
+            if (i == ui32Timeout) return I2C_MASTER_INT_ARB_LOST;
+        }
+    }
+
+    // Receive the byte count and the data.
+    for (int i = 0; i < ui16Length; i++) {
+        if (i == 0) I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_BURST_RECEIVE_START);
+        else if (i == ui16Length - 1) I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_BURST_RECEIVE_FINISH);
+        else I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_BURST_RECEIVE_CONT);
+        // Wait until the transfer is finished.
+        SysCtlDelay(psI2C->ui32I2CClk / 3e5);   // 10 us delay.
+        for (int j = 0; j <= ui32Timeout; j++) {
+            if (!I2CMasterBusy(psI2C->ui32BaseI2C)) break;
+            SysCtlDelay(psI2C->ui32I2CClk / 3e5);   // 10 us delay.
+            // Timeout while waiting for the I2C master to be ready.
+            if (j == ui32Timeout) {
+                I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_BURST_SEND_ERROR_STOP);
+                return I2C_MASTER_INT_TIMEOUT;
+            }
+        }
+        // Read I2C master interrupts.
+        ui32I2CMasterInt = I2CMasterIntStatusEx(psI2C->ui32BaseI2C, false);
+        ui32I2CMasterInt &= I2C_MASTER_INT_ARB_LOST | I2C_MASTER_INT_NACK | I2C_MASTER_INT_TIMEOUT;
+        if (ui32I2CMasterInt) {
+            I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_BURST_RECEIVE_ERROR_STOP);
+            break;
+        }
+        // Check for I2C errors.
+        ui32I2CMasterErr = I2CMasterErr(psI2C->ui32BaseI2C);
+        if (ui32I2CMasterErr != I2C_MASTER_ERR_NONE) {
+            I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_BURST_RECEIVE_ERROR_STOP);
+            return 1;
+        }
+        // Get the data byte from the I2C master.
+        pui8Data[i] = I2CMasterDataGet(psI2C->ui32BaseI2C);
+        *pui16Length = i + 1;
+        // The byte count determines the number of bytes to read.
+        if (i == 0) {
+            if (pui8Data[0] + 1 < ui16Length) ui16Length = pui8Data[0] + 1;
+            // Empty block: Terminate the transaction.
+            if (ui16Length == 1) {
+                I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_BURST_RECEIVE_ERROR_STOP);
+                break;
+            }
+        }
+    }
+
+    return ui32I2CMasterInt;
+}
+
+
+
 // Send a quick command.
 uint32_t I2CMasterQuickCmd(tI2C *psI2C, uint8_t ui8SlaveAddr, bool bReceive)
 {
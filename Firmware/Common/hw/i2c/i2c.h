@@ -2,7 +2,7 @@
 // Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 // Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 // Date: 11 Feb 2020
-// Rev.: 14 Apr 2020
+// Rev.: 19 Oct 2026
 //
 // Header file for the I2C functions on the ATLAS MDT Trigger Processor (TP)
 // Command Module (CM) MCU.
@@ -37,7 +37,8 @@ void I2CMasterInit(tI2C *psI2C);
 uint32_t I2CMasterWrite(tI2C *pcI2C, uint8_t ui8SlaveAddr, uint8_t *ui8Data, uint8_t ui8Length);
 uint32_t I2CMasterWriteAdv(tI2C *psI2C, uint8_t ui8SlaveAddr, uint8_t *pui8Data, uint8_t ui8Length, bool bRepeatedStart, bool bStop);
 uint32_t I2CMasterRead(tI2C *psI2C, uint8_t ui8SlaveAddr, uint8_t *ui8Data, uint8_t ui8Length);
-uint32_t I2CMasterReadAdv(tI2C *psI2C, uint8_t ui8SlaveAddr, uint8_t *ui8Data, uint8_t ui8Length, bool bRepeatedStart, bool bStop);
+uint32_t I2CMasterReadAdv(tI2C *psI2C, uint8_t ui8SlaveAddr, uint8_t *ui8Data, uint16_t ui16Length, bool bRepeatedStart, bool bStop);
+uint32_t I2CMasterReadBlockAdv(tI2C *psI2C, uint8_t ui8SlaveAddr, uint8_t *pui8Data, uint16_t ui16LengthMax, uint16_t *pui16Length, bool bRepeatedStart);
 uint32_t I2CMasterQuickCmd(tI2C *psI2C, uint8_t ui8SlaveAddr, bool bReceive);
 uint32_t I2CMasterQuickCmdAdv(tI2C *psI2C, uint8_t ui8SlaveAddr, bool bReceive, bool bRepeatedStart);
 
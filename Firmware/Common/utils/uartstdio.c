@@ -49,25 +49,26 @@
 //
 //*****************************************************************************
 
-//*****************************************************************************
-//
-// If buffered mode is defined, set aside RX and TX buffers and read/write
-// pointers to control them.
-//
-//*****************************************************************************
-#ifdef UART_BUFFERED
-
 //*****************************************************************************
 //
 // This global controls whether or not we are echoing characters back to the
 // transmitter.  By default, echo is enabled but if using this module as a
 // convenient method of implementing a buffered serial interface over which
 // you will be running an application protocol, you are likely to want to
-// disable echo by calling UARTEchoSet(false).
+// disable echo by calling UARTEchoSet(false).  In unbuffered mode, this also
+// suppresses the CRLF sent at the end of a line received by UARTgets().
 //
 //*****************************************************************************
 static bool g_bDisableEcho;
 
+//*****************************************************************************
+//
+// If buffered mode is defined, set aside RX and TX buffers and read/write
+// pointers to control them.
+//
+//*****************************************************************************
+#ifdef UART_BUFFERED
+
 //*****************************************************************************
 //
 // Output ring buffer.  Buffer is full if g_ui32UARTTxReadIndex is one ahead of
@@ -714,7 +715,10 @@ UARTgets(char *pcBuf, uint32_t ui32Len)
                 //
                 // Rub out the previous character.
                 //
-                UARTwrite("\b \b", 3);
+                if(!g_bDisableEcho)
+                {
+                    UARTwrite("\b \b", 3);
+                }
 
                 //
                 // Decrement the number of characters in the buffer.
@@ -779,7 +783,10 @@ UARTgets(char *pcBuf, uint32_t ui32Len)
             //
             // Reflect the character back to the user.
             //
-            MAP_UARTCharPut(g_ui32Base, cChar);
+            if(!g_bDisableEcho)
+            {
+                MAP_UARTCharPut(g_ui32Base, cChar);
+            }
         }
     }
 
@@ -791,7 +798,10 @@ UARTgets(char *pcBuf, uint32_t ui32Len)
     //
     // Send a CRLF pair to the terminal to end the line.
     //
-    UARTwrite("\r\n", 2);
+    if(!g_bDisableEcho)
+    {
+        UARTwrite("\r\n", 2);
+    }
 
     //
     // Return the count of int8_ts in the buffer, not counting the trailing 0.
@@ -1545,9 +1555,8 @@ UARTFlushTx(bool bDiscard)
 //! \param bEnable must be set to \b true to enable echo or \b false to
 //! disable it.
 //!
-//! This function, available only when the module is built to operate in
-//! buffered mode using \b UART_BUFFERED, may be used to control whether or not
-//! received characters are automatically echoed back to the transmitter.  By
+//! This function may be used to control whether or not received characters
+//! are automatically echoed back to the transmitter.  By
 //! default, echo is enabled and this is typically the desired behavior if
 //! the module is being used to support a serial command line.  In applications
 //! where this module is being used to provide a convenient, buffered serial
@@ -1558,13 +1567,27 @@ UARTFlushTx(bool bDiscard)
 //! \return None.
 //
 //*****************************************************************************
-#if defined(UART_BUFFERED) || defined(DOXYGEN)
 void
 UARTEchoSet(bool bEnable)
 {
     g_bDisableEcho = !bEnable;
 }
-#endif
+
+//*****************************************************************************
+//
+//! Returns the echo state of the UART.
+//!
+//! This function returns whether the characters received by the UART are
+//! echoed, as set with UARTEchoSet().
+//!
+//! \return Returns \b true if echo is enabled and \b false otherwise.
+//
+//*****************************************************************************
+bool
+UARTEchoGet(void)
+{
+    return !g_bDisableEcho;
+}
 
 //*****************************************************************************
 //
@@ -65,13 +65,14 @@ extern unsigned char UARTgetc(void);
 extern void UARTprintf(const char *pcString, ...);
 extern void UARTvprintf(const char *pcString, va_list vaArgP);
 extern int UARTwrite(const char *pcBuf, uint32_t ui32Len);
+extern void UARTEchoSet(bool bEnable);
+extern bool UARTEchoGet(void);
 #ifdef UART_BUFFERED
 extern int UARTPeek(unsigned char ucChar);
 extern void UARTFlushTx(bool bDiscard);
 extern void UARTFlushRx(void);
 extern int UARTRxBytesAvail(void);
 extern int UARTTxBytesFree(void);
-extern void UARTEchoSet(bool bEnable);
 #endif
 
 //*****************************************************************************
@@ -2,7 +2,7 @@
 // Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 // Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 // Date: 03 Jun 2022
-// Rev.: 09 Jun 2026
+// Rev.: 19 Oct 2026
 //
 // Hardware test firmware running on the ATLAS MDT Trigger Processor (TP)
 // Command Module (CM) prototype MCU.
@@ -31,9 +31,11 @@
 #include "sm_cm.h"
 #include "cm_mcu_hwtest.h"
 #include "cm_mcu_hwtest_aux.h"
+#include "cm_mcu_hwtest_bin.h"
 #include "cm_mcu_hwtest_gpio.h"
 #include "cm_mcu_hwtest_i2c.h"
 #include "cm_mcu_hwtest_io.h"
+#include "cm_mcu_hwtest_prog.h"
 #include "cm_mcu_hwtest_qssi.h"
 #include "cm_mcu_hwtest_uart.h"
 
@@ -171,6 +173,12 @@ int main(void)
         // Delay execution for a given number of microseconds.
         } else if (!strcasecmp(pcUartCmd, "delay")) {
             DelayUsCmd(pcUartCmd, pcUartParam);
+        // Set the baud rate of the UART UI.
+        } else if (!strcasecmp(pcUartCmd, "baud")) {
+            UiBaudSet(pcUartCmd, pcUartParam);
+        // Enable or disable the echo of the UART UI.
+        } else if (!strcasecmp(pcUartCmd, "echo")) {
+            UiEchoSet(pcUartCmd, pcUartParam);
         // Reset the MCU.
         } else if (!strcasecmp(pcUartCmd, "reset")) {
             McuReset(pcUartCmd, pcUartParam);
@@ -183,10 +191,20 @@ int main(void)
         // I2C based functions.
         } else if (!strcasecmp(pcUartCmd, "i2c")) {
             I2CAccess(pcUartCmd, pcUartParam);
+        } else if (!strcasecmp(pcUartCmd, "i2c-br")) {
+            I2CBlockRead(pcUartCmd, pcUartParam);
         } else if (!strcasecmp(pcUartCmd, "i2c-bw")) {
             I2CBurstWrite(pcUartCmd, pcUartParam);
         } else if (!strcasecmp(pcUartCmd, "i2c-det")) {
             I2CDetect(pcUartCmd, pcUartParam);
+        } else if (!strcasecmp(pcUartCmd, "i2c-ml")) {
+            I2CMultiList(pcUartCmd, pcUartParam);
+        // Transaction programs.
+        } else if (!strcasecmp(pcUartCmd, "prog")) {
+            ProgRun(pcUartCmd, pcUartParam);
+        // Binary frame mode.
+        } else if (!strcasecmp(pcUartCmd, "bin")) {
+            BinMode(pcUartCmd, pcUartParam);
         // QSSI based functions.
         } else if (!strcasecmp(pcUartCmd, "qssi")) {
             QssiAccess(pcUartCmd, pcUartParam);
@@ -219,14 +237,24 @@ void Help(void)
 {
     UARTprintf("Available commands:\n");
     UARTprintf("  help                                Show this help text.\n");
+    UARTprintf("  baud    [BAUD] [TIMEOUT]            Show/Set the baud rate of this console.\n");
+    UARTprintf("  bin                                 Enter the binary frame mode.\n");
     UARTprintf("  bootldr                             Enter the boot loader for firmware update.\n");
     UARTprintf("  delay   MICROSECONDS                Delay execution.\n");
+    UARTprintf("  echo    [0|1]                       Show/Set the echo of this console.\n");
     UARTprintf("  gpio    TYPE [VALUE]                Get/Set the value of a GPIO type.\n");
     UARTprintf("  i2c     PORT SLV-ADR ACC NUM|DATA   I2C access (ACC bits: R/W, Sr, nP, Q).\n");
+    UARTprintf("  i2c-br  PORT SLV-ADR CMD NUM        I2C block read of NUM bytes after CMD\n");
+    UARTprintf("                                          (NUM = 0: SMBus block read).\n");
     UARTprintf("  i2c-bw  PORT SLV-ADR DATA [,DATA]   I2C burst write. Send chunks of DATA.\n");
     UARTprintf("  i2c-det PORT [MODE]                 I2C detect devices (MODE: 0 = auto,\n");
     UARTprintf("                                          1 = quick command, 2 = read).\n");
+    UARTprintf("  i2c-ml  TRANS [,TRANS]              I2C transaction lists executed concurrently\n");
+    UARTprintf("                                          on several ports (TRANS: PORT SLV-ADR\n");
+    UARTprintf("                                          NUM [DATA]).\n");
     UARTprintf("  info                                Show information about this firmware.\n");
+    UARTprintf("  prog    OP [,OP]                    Run a transaction program of I2C, GPIO and\n");
+    UARTprintf("                                          delay operations in one go.\n");
     UARTprintf("  qssi    PORT MODE RW END NUM|DATA   QSSI/QSPI access (MODE: 0 = SSI, 1 = QSSI;\n");
     UARTprintf("                                      END: 0 = no, 1 = yes; RW: 0 = wr, 1 = rd).\n");
     UARTprintf("  qssi-s  PORT FREQ                   Set up the QSSI port.\n");
@@ -243,6 +271,7 @@ void Info(void)
 {
     UARTprintf("MDT-TP CM prototype MCU `%s' firmware version %s.\n", FW_NAME, FW_VERSION);
     UARTprintf("Release date: %s\n", FW_RELEASEDATE);
+    UARTprintf("Command line length: %d characters.\n", UI_STR_BUF_SIZE - 1);
     UARTprintf("It was compiled using gcc %s at %s on %s.", __VERSION__, __TIME__, __DATE__);
 }
 
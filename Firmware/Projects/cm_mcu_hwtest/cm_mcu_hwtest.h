@@ -2,7 +2,7 @@
 // Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 // Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 // Date: 03 Jun 2022
-// Rev.: 12 Jun 2026
+// Rev.: 19 Oct 2026
 //
 // Header file of the firmware running on the ATLAS MDT Trigger Processor (TP)
 // Command Module (CM) prototype MCU.
@@ -20,8 +20,8 @@
 // ******************************************************************
 
 #define FW_NAME                     "cm_mcu_hwtest"
-#define FW_VERSION                  "0.0.10"
-#define FW_RELEASEDATE              "12 Jun 2026"
+#define FW_VERSION                  "0.0.18"
+#define FW_RELEASEDATE              "19 Oct 2026"
 
 
 
@@ -54,6 +54,18 @@
 // SM SoC UART. If not defined, the default will be the front-panel USB UART.
 #define UI_UART_SELECT
 #define UI_UART_SELECT_TIMEOUT      10
+// Baud rate switching.
+#define UI_BAUD_PING                "ping"
+#define UI_BAUD_TIMEOUT             1000    // Timeout for the ping from the host in milliseconds.
+// Transaction programs.
+#define PROG_OP_NUM_MAX             16      // Operations per transaction program.
+#define PROG_DATA_LEN_MAX           32      // Data bytes written or read per I2C operation.
+// Binary frame mode.
+#define BIN_FRAME_SOF_REQ           0xa5    // Start of a request frame (host -> MCU).
+#define BIN_FRAME_SOF_RSP           0x5a    // Start of a response frame (MCU -> host).
+#define BIN_FRAME_HEADER_LEN        4       // Opcode, bus, address and flags.
+#define BIN_FRAME_DATA_MAX          64      // Data bytes per frame.
+#define BIN_FRAME_TIMEOUT           100000  // Inter-byte timeout in microseconds.
 
 
 
@@ -63,6 +75,11 @@
 
 // I2C parameters.
 #define I2C_MASTER_NUM              8
+#define I2C_BLOCK_LEN_MAX           256     // Byte count plus 255 data bytes.
+#define I2C_BLOCK_LINE_BYTES        32      // Data bytes per response line of a block read.
+#define I2C_ML_TRANS_MAX            32      // Transactions per multi-bus transaction list.
+#define I2C_ML_WRITE_LEN_MAX        8       // Data bytes written per transaction of a list.
+#define I2C_ML_READ_LEN_MAX         32      // Data bytes read per transaction of a list.
 
 // QSSI parameters.
 #define QSSI_FREQ_MIN               2000
@@ -2,7 +2,7 @@
 // Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 // Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 // Date: 03 Jun 2022
-// Rev.: 09 Jun 2026
+// Rev.: 19 Oct 2026
 //
 // Auxiliary functions of the hardware test firmware running on the ATLAS MDT
 // Trigger Processor (TP) Command Module (CM) prototype MCU.
@@ -151,6 +151,108 @@ int JumpToBootLoader(char *pcCmd, char *pcParam)
 
 
 
+// Set the baud rate of the UART UI. The host must confirm the new baud rate by
+// sending `ping' within the timeout. Otherwise the previous baud rate is
+// restored, so that the host can always fall back to it.
+int UiBaudSet(char *pcCmd, char *pcParam)
+{
+    uint32_t ui32BaudOld = g_psUartUi->ui32Baud;
+    uint32_t ui32BaudNew;
+    uint32_t ui32TimeoutMs = UI_BAUD_TIMEOUT;
+    uint32_t ui32Wait;
+    int32_t i32Char;
+    char pcPing[8];
+    int iPingLen = 0;
+    bool bPing = false;
+
+    // Show the current baud rate.
+    if (pcParam == NULL) {
+        UARTprintf("%s. Baud rate: %d", UI_STR_OK, ui32BaudOld);
+        return 0;
+    }
+    ui32BaudNew = (uint32_t) strtoul(pcParam, (char **) NULL, 0);
+    // The UART supports at most 1/8 of its source clock (high-speed mode).
+    if ((ui32BaudNew < UART_BAUD_MIN) || (ui32BaudNew > UART_BAUD_MAX) || (ui32BaudNew > g_psUartUi->ui32SrcClock / 8)) {
+        UARTprintf("%s: UART baud rate %d outside of valid range %d..%d.\n", UI_STR_ERROR, ui32BaudNew, UART_BAUD_MIN,
+                   (UART_BAUD_MAX < g_psUartUi->ui32SrcClock / 8) ? UART_BAUD_MAX : g_psUartUi->ui32SrcClock / 8);
+        UiBaudSetHelp();
+        return -1;
+    }
+    pcParam = strtok(NULL, UI_STR_DELIMITER);
+    if (pcParam != NULL) ui32TimeoutMs = (uint32_t) strtoul(pcParam, (char **) NULL, 0);
+    if (ui32TimeoutMs == 0 || ui32TimeoutMs > 10000) ui32TimeoutMs = UI_BAUD_TIMEOUT;
+
+    UARTprintf("%s. Switching the baud rate to %d. Send `%s' within %d ms.\n", UI_STR_OK, ui32BaudNew, UI_BAUD_PING, ui32TimeoutMs);
+    // Wait until the message has been sent out before switching.
+    while (UARTBusy(g_psUartUi->ui32Base));
+    UARTConfigSetExpClk(g_psUartUi->ui32Base, g_psUartUi->ui32SrcClock, ui32BaudNew,
+                        (UART_CONFIG_PAR_NONE | UART_CONFIG_STOP_ONE | UART_CONFIG_WLEN_8));
+    while (UARTCharsAvail(g_psUartUi->ui32Base)) {
+        UARTCharGetNonBlocking(g_psUartUi->ui32Base);
+    }
+
+    // Wait for the ping from the host at the new baud rate. Garbage received
+    // during the switch is discarded line by line.
+    for (ui32Wait = 0; ui32Wait < ui32TimeoutMs * 100 && !bPing; ui32Wait++) {
+        while ((i32Char = UARTCharGetNonBlocking(g_psUartUi->ui32Base)) >= 0) {
+            if (i32Char == '\r' || i32Char == '\n') {
+                pcPing[iPingLen] = 0;
+                if (iPingLen > 0 && !strcasecmp(pcPing, UI_BAUD_PING)) {
+                    bPing = true;
+                    break;
+                }
+                iPingLen = 0;
+            } else if (iPingLen < (int) sizeof(pcPing) - 1) {
+                pcPing[iPingLen++] = (char) i32Char;
+            }
+        }
+        DelayUs(10);
+    }
+
+    if (bPing) {
+        g_psUartUi->ui32Baud = ui32BaudNew;
+        UARTprintf("%s. Baud rate set to %d.", UI_STR_OK, ui32BaudNew);
+    } else {
+        UARTConfigSetExpClk(g_psUartUi->ui32Base, g_psUartUi->ui32SrcClock, ui32BaudOld,
+                            (UART_CONFIG_PAR_NONE | UART_CONFIG_STOP_ONE | UART_CONFIG_WLEN_8));
+        UARTprintf("%s: No `%s' received within %d ms. Baud rate restored to %d.", UI_STR_WARNING, UI_BAUD_PING, ui32TimeoutMs, ui32BaudOld);
+    }
+
+    return 0;
+}
+
+
+
+// Show help on the baud rate command.
+void UiBaudSetHelp(void)
+{
+    UARTprintf("Baud rate command:\n");
+    UARTprintf("  baud    [BAUD] [TIMEOUT]\n");
+    UARTprintf("Without parameters, the current baud rate is shown. After switching to the new\n");
+    UARTprintf("baud rate, `%s' must be sent within TIMEOUT ms (default: %d ms). Otherwise\n", UI_BAUD_PING, UI_BAUD_TIMEOUT);
+    UARTprintf("the previous baud rate is restored.");
+}
+
+
+
+// Enable or disable the echo of the characters received by the UART UI. With
+// echo disabled, the host does not need to remove the echo of its commands
+// from the responses.
+int UiEchoSet(char *pcCmd, char *pcParam)
+{
+    // Show the echo setting.
+    if (pcParam == NULL) {
+        UARTprintf("%s. Echo: %d", UI_STR_OK, UARTEchoGet() ? 1 : 0);
+        return 0;
+    }
+    UARTEchoSet(strtoul(pcParam, (char **) NULL, 0) ? true : false);
+    UARTprintf("%s. Echo %s.", UI_STR_OK, UARTEchoGet() ? "enabled" : "disabled");
+
+    return 0;
+}
+
+
+
 // Update the status LEDs.
 int LedCmStatusUpdated(void)
 {
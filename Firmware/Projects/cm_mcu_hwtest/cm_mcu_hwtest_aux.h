@@ -23,6 +23,9 @@ int DelayUs(uint32_t ui32DelayUs);
 int DelayUsCmd(char *pcCmd, char *pcParam);
 int McuReset(char *pcCmd, char *pcParam);
 int JumpToBootLoader(char *pcCmd, char *pcParam);
+int UiBaudSet(char *pcCmd, char *pcParam);
+void UiBaudSetHelp(void);
+int UiEchoSet(char *pcCmd, char *pcParam);
 int LedCmStatusUpdated(void);
 
 
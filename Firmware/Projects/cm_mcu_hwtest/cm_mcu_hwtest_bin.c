@@ -0,0 +1,250 @@
+// File: cm_mcu_hwtest_bin.c
+// Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+// Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+// Date: 19 Oct 2026
+// Rev.: 19 Oct 2026
+//
+// Binary frame mode of the hardware test firmware running on the ATLAS MDT
+// Trigger Processor (TP) Command Module (CM) prototype MCU.
+//
+// Frame format:
+// - Request (host -> MCU):
+//   SOF (0xa5) | LEN | OPCODE | BUS | ADDR | FLAGS | DATA[LEN-4] | CRC16
+// - Response (MCU -> host):
+//   SOF (0x5a) | LEN | OPCODE | STATUS | DATA[LEN-2] | CRC16
+// - LEN is the number of bytes between LEN and CRC16.
+// - CRC16 is the CRC-16/CCITT-FALSE (polynomial 0x1021, initial value 0xffff)
+//   over LEN and all following bytes up to CRC16. It is sent MSB first.
+//
+
+
+
+#include <stdbool.h>
+#include <stdint.h>
+#include <stdlib.h>
+#include "driverlib/i2c.h"
+#include "driverlib/rom_map.h"
+#include "driverlib/sysctl.h"
+#include "driverlib/uart.h"
+#include "utils/uartstdio.h"
+#include "hw/i2c/i2c.h"
+#include "uart_ui.h"
+#include "cm_mcu_hwtest.h"
+#include "cm_mcu_hwtest_aux.h"
+#include "cm_mcu_hwtest_bin.h"
+#include "cm_mcu_hwtest_io.h"
+
+
+
+// Opcodes.
+#define BIN_OP_PING                 0x00    // Return the data unchanged.
+#define BIN_OP_I2C                  0x01    // I2C access. FLAGS: Access mode of the `i2c' command.
+#define BIN_OP_EXIT                 0x7f    // Return to the command console.
+
+// Response status codes.
+#define BIN_STATUS_OK               0x00
+#define BIN_STATUS_CRC              0x01    // CRC error.
+#define BIN_STATUS_FRAME            0x02    // Invalid frame length.
+#define BIN_STATUS_OPCODE           0x03    // Unknown opcode.
+#define BIN_STATUS_PARAM            0x04    // Invalid parameter.
+#define BIN_STATUS_I2C              0x05    // I2C error. DATA: I2C master status (32 bit, MSB first).
+
+// Escape character to leave the binary frame mode from a terminal.
+#define BIN_CHAR_ESC                0x1b
+
+
+
+extern tUartUi *g_psUartUi;
+
+
+
+// Calculate the CRC-16/CCITT-FALSE of a data buffer.
+uint16_t BinCrc16(uint8_t *pui8Data, uint32_t ui32Length)
+{
+    int i;
+    uint16_t ui16Crc = 0xffff;
+
+    while (ui32Length--) {
+        ui16Crc ^= (uint16_t) *pui8Data++ << 8;
+        for (i = 0; i < 8; i++) {
+            if (ui16Crc & 0x8000) ui16Crc = (ui16Crc << 1) ^ 0x1021;
+            else ui16Crc <<= 1;
+        }
+    }
+
+    return ui16Crc;
+}
+
+
+
+// Receive one byte from the UI UART. Wait at most ui32Timeout microseconds, or
+// forever if ui32Timeout is 0.
+static int BinGetByte(uint8_t *pui8Byte, uint32_t ui32Timeout)
+{
+    int32_t i32Char;
+    uint32_t ui32Wait = 0;
+
+    while ((i32Char = UARTCharGetNonBlocking(g_psUartUi->ui32Base)) < 0) {
+        if (ui32Timeout && ++ui32Wait > ui32Timeout) return -1;
+        DelayUs(1);
+    }
+    *pui8Byte = (uint8_t) i32Char;
+
+    return 0;
+}
+
+
+
+// Send a response frame to the UI UART.
+static void BinPutFrame(uint8_t ui8Opcode, uint8_t ui8Status, uint8_t *pui8Data, uint8_t ui8DataNum)
+{
+    int i;
+    uint8_t pui8Frame[BIN_FRAME_DATA_MAX + 6];
+    uint16_t ui16Crc;
+
+    pui8Frame[0] = BIN_FRAME_SOF_RSP;
+    pui8Frame[1] = ui8DataNum + 2;
+    pui8Frame[2] = ui8Opcode;
+    pui8Frame[3] = ui8Status;
+    for (i = 0; i < ui8DataNum; i++) pui8Frame[4 + i] = pui8Data[i];
+    ui16Crc = BinCrc16(&pui8Frame[1], ui8DataNum + 3);
+    pui8Frame[4 + ui8DataNum] = (ui16Crc >> 8) & 0xff;
+    pui8Frame[5 + ui8DataNum] = ui16Crc & 0xff;
+    for (i = 0; i < ui8DataNum + 6; i++) UARTCharPut(g_psUartUi->ui32Base, pui8Frame[i]);
+}
+
+
+
+// Execute an I2C access request. The access mode in ui8Flags is the same as
+// for the `i2c' command. A write sends the data bytes, a read gets the number
+// of bytes given in the first data byte (default: 1).
+static uint8_t BinI2CAccess(uint8_t ui8I2CPort, uint8_t ui8I2CSlaveAddr, uint8_t ui8Flags, uint8_t *pui8Data, uint8_t *pui8DataNum)
+{
+    int i;
+    tI2C *psI2C = NULL;
+    uint8_t ui8I2CRw = ui8Flags & 0x1;
+    bool bI2CRepeatedStart = (ui8Flags & 0x2) ? true : false;
+    bool bI2CStop = (ui8Flags & 0x4) ? false : true;
+    bool bI2CQuickCmd = (ui8Flags & 0x8) ? true : false;
+    uint8_t ui8I2CDataNum;
+    uint32_t ui32I2CMasterStatus;
+
+    // Look up the I2C port without printing an error message.
+    for (i = 0; i < I2C_MASTER_NUM; i++) {
+        if (ui8I2CPort == g_ui8I2CMasterPorts[i]) {
+            psI2C = &g_psI2C[i];
+            break;
+        }
+    }
+    if (psI2C == NULL) return BIN_STATUS_PARAM;
+    // I2C quick command.
+    if (bI2CQuickCmd) {
+        ui32I2CMasterStatus = I2CMasterQuickCmdAdv(psI2C, ui8I2CSlaveAddr, ui8I2CRw, bI2CRepeatedStart);
+        *pui8DataNum = 0;
+    // I2C write.
+    } else if (ui8I2CRw == 0) {
+        if (*pui8DataNum == 0) return BIN_STATUS_PARAM;
+        ui32I2CMasterStatus = I2CMasterWriteAdv(psI2C, ui8I2CSlaveAddr, pui8Data, *pui8DataNum, bI2CRepeatedStart, bI2CStop);
+        *pui8DataNum = 0;
+    // I2C read.
+    } else {
+        ui8I2CDataNum = *pui8DataNum ? pui8Data[0] : 1;
+        if (ui8I2CDataNum == 0 || ui8I2CDataNum > BIN_FRAME_DATA_MAX) return BIN_STATUS_PARAM;
+        ui32I2CMasterStatus = I2CMasterReadAdv(psI2C, ui8I2CSlaveAddr, pui8Data, ui8I2CDataNum, bI2CRepeatedStart, bI2CStop);
+        *pui8DataNum = ui8I2CDataNum;
+    }
+    // Return the I2C master status as data on error.
+    if (ui32I2CMasterStatus) {
+        pui8Data[0] = (ui32I2CMasterStatus >> 24) & 0xff;
+        pui8Data[1] = (ui32I2CMasterStatus >> 16) & 0xff;
+        pui8Data[2] = (ui32I2CMasterStatus >> 8) & 0xff;
+        pui8Data[3] = ui32I2CMasterStatus & 0xff;
+        *pui8DataNum = 4;
+        return BIN_STATUS_I2C;
+    }
+
+    return BIN_STATUS_OK;
+}
+
+
+
+// Binary frame mode: Receive request frames and send response frames until an
+// exit frame or the escape character is received. Bytes outside of a frame
+// are ignored. Incomplete frames are dropped after an inter-byte timeout, so
+// that the host can resynchronize by simply sending the next frame.
+int BinMode(char *pcCmd, char *pcParam)
+{
+    int i;
+    uint8_t ui8Byte;
+    uint8_t ui8Len;
+    uint8_t pui8Frame[BIN_FRAME_HEADER_LEN + BIN_FRAME_DATA_MAX + 3];
+    uint8_t ui8Opcode;
+    uint8_t ui8Status;
+    uint8_t ui8DataNum;
+    uint8_t *pui8Data;
+    uint16_t ui16Crc;
+
+    if (pcParam != NULL) {
+        UARTprintf("%s: Command `%s' has no parameters.\n", UI_STR_ERROR, pcCmd);
+        BinModeHelp();
+        return -1;
+    }
+
+    UARTprintf("%s. Entering binary frame mode.\n", UI_STR_OK);
+
+    while (1) {
+        // Wait for the start of a frame.
+        BinGetByte(&ui8Byte, 0);
+        if (ui8Byte == BIN_CHAR_ESC) break;
+        if (ui8Byte != BIN_FRAME_SOF_REQ) continue;
+        // Get the length, the payload and the CRC.
+        if (BinGetByte(&ui8Len, BIN_FRAME_TIMEOUT)) continue;
+        pui8Frame[0] = ui8Len;
+        if (ui8Len < BIN_FRAME_HEADER_LEN || ui8Len > BIN_FRAME_HEADER_LEN + BIN_FRAME_DATA_MAX) {
+            BinPutFrame(0, BIN_STATUS_FRAME, NULL, 0);
+            continue;
+        }
+        for (i = 1; i < ui8Len + 3; i++) {
+            if (BinGetByte(&pui8Frame[i], BIN_FRAME_TIMEOUT)) break;
+        }
+        if (i < ui8Len + 3) continue;
+        ui8Opcode = pui8Frame[1];
+        ui16Crc = ((uint16_t) pui8Frame[ui8Len + 1] << 8) | pui8Frame[ui8Len + 2];
+        if (BinCrc16(pui8Frame, ui8Len + 1) != ui16Crc) {
+            BinPutFrame(ui8Opcode, BIN_STATUS_CRC, NULL, 0);
+            continue;
+        }
+        // Execute the request. The response data replace the request data.
+        pui8Data = &pui8Frame[1 + BIN_FRAME_HEADER_LEN];
+        ui8DataNum = ui8Len - BIN_FRAME_HEADER_LEN;
+        if (ui8Opcode == BIN_OP_PING) {
+            ui8Status = BIN_STATUS_OK;
+        } else if (ui8Opcode == BIN_OP_I2C) {
+            ui8Status = BinI2CAccess(pui8Frame[2], pui8Frame[3], pui8Frame[4], pui8Data, &ui8DataNum);
+        } else if (ui8Opcode == BIN_OP_EXIT) {
+            BinPutFrame(ui8Opcode, BIN_STATUS_OK, NULL, 0);
+            break;
+        } else {
+            ui8Status = BIN_STATUS_OPCODE;
+        }
+        if (ui8Status != BIN_STATUS_OK && ui8Status != BIN_STATUS_I2C) ui8DataNum = 0;
+        BinPutFrame(ui8Opcode, ui8Status, pui8Data, ui8DataNum);
+    }
+
+    UARTprintf("%s. Leaving binary frame mode.", UI_STR_OK);
+
+    return 0;
+}
+
+
+
+// Show help on binary frame mode command.
+void BinModeHelp(void)
+{
+    UARTprintf("Binary frame mode command:\n");
+    UARTprintf("  bin\n");
+    UARTprintf("Request:  0x%02x LEN OPCODE BUS ADDR FLAGS DATA CRC16\n", BIN_FRAME_SOF_REQ);
+    UARTprintf("Response: 0x%02x LEN OPCODE STATUS DATA CRC16\n", BIN_FRAME_SOF_RSP);
+    UARTprintf("Opcodes: 0x%02x = ping, 0x%02x = I2C access, 0x%02x = exit.\n", BIN_OP_PING, BIN_OP_I2C, BIN_OP_EXIT);
+    UARTprintf("Send ESC (0x%02x) to return to the command console from a terminal.", BIN_CHAR_ESC);
+}
@@ -0,0 +1,28 @@
+// File: cm_mcu_hwtest_bin.h
+// Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+// Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+// Date: 19 Oct 2026
+// Rev.: 19 Oct 2026
+//
+// Header file for the binary frame mode of the firmware running on the ATLAS
+// MDT Trigger Processor (TP) Command Module (CM) prototype MCU.
+//
+
+
+
+#ifndef __CM_MCU_HWTEST_BIN_H__
+#define __CM_MCU_HWTEST_BIN_H__
+
+
+
+// ******************************************************************
+// Function prototypes.
+// ******************************************************************
+
+uint16_t BinCrc16(uint8_t *pui8Data, uint32_t ui32Length);
+int BinMode(char *pcCmd, char *pcParam);
+void BinModeHelp(void);
+
+
+
+#endif  // __CM_MCU_HWTEST_BIN_H__
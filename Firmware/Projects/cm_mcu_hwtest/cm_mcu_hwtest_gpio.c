@@ -2,7 +2,7 @@
 // Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 // Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 // Date: 03 Jun 2022
-// Rev.: 07 Jun 2022
+// Rev.: 19 Oct 2026
 //
 // GPIO functions of the hardware test firmware running on the ATLAS MDT
 // Trigger Processor (TP) Command Module (CM) prototype MCU.
@@ -39,6 +39,7 @@ int GpioGetSet(char *pcCmd, char *pcParam)
 {
     char *pcGpioType = pcParam;
     bool bGpioWrite;
+    int iRet;
     uint32_t ui32GpioSet = 0, ui32GpioGet = 0;
 
     if (pcGpioType == NULL) {
@@ -58,87 +59,84 @@ int GpioGetSet(char *pcCmd, char *pcParam)
     if (!strcasecmp(pcGpioType, "help")) {
         GpioGetSetHelp();
         return 0;
-    } else if (!strcasecmp(pcGpioType, "sm-pwr-en")) {
-        if (bGpioWrite) {
-            UARTprintf("%s: GPIO %s is read-only!", UI_STR_WARNING, pcGpioType);
-            return 1;
+    }
+    iRet = GpioTypeAccess(pcGpioType, bGpioWrite, ui32GpioSet, &ui32GpioGet);
+    if (iRet > 0) {
+        UARTprintf("%s: GPIO %s is read-only!", UI_STR_WARNING, pcGpioType);
+        return 1;
+    } else if (iRet < 0) {
+        UARTprintf("%s: Unknown GPIO type `%s'!\n", UI_STR_ERROR, pcGpioType);
+        GpioGetSetHelp();
+        return -1;
+    }
+    if (bGpioWrite) {
+        if (ui32GpioGet == ui32GpioSet) {
+            UARTprintf("%s: GPIO %s set to 0x%02x.", UI_STR_OK, pcGpioType, ui32GpioGet);
+        } else {
+            UARTprintf("%s: Setting GPIO %s to 0x%02x failed!", UI_STR_ERROR, pcGpioType, ui32GpioSet);
+            UARTprintf(" It was set to 0x%02x instead.", ui32GpioGet);
         }
-        ui32GpioGet = GpioGet_SmPowerEna();
+    } else {
+        UARTprintf("%s: Current GPIO %s value: 0x%02x", UI_STR_OK, pcGpioType, ui32GpioGet);
+    }
+    return 0;
+}
+
+
+
+// Get/Set the value of a GPIO type without any output. Returns 0 on success, 1
+// if a read-only GPIO type should be written and -1 for an unknown GPIO type.
+int GpioTypeAccess(char *pcGpioType, bool bGpioWrite, uint32_t ui32GpioSet, uint32_t *pui32GpioGet)
+{
+    // GPIO type.
+    if (!strcasecmp(pcGpioType, "sm-pwr-en")) {
+        if (bGpioWrite) return 1;
+        *pui32GpioGet = GpioGet_SmPowerEna();
     } else if (!strcasecmp(pcGpioType, "cm-ready")) {
         if (bGpioWrite) GpioSet_CmReady(ui32GpioSet);
-        ui32GpioGet =  GpioGet_CmReady();
+        *pui32GpioGet = GpioGet_CmReady();
     } else if (!strcasecmp(pcGpioType, "sm-ps-rst")) {
-        if (bGpioWrite) {
-            UARTprintf("%s: GPIO %s is read-only!", UI_STR_WARNING, pcGpioType);
-            return 1;
-        }
-        ui32GpioGet = GpioGet_SmPsReset();
+        if (bGpioWrite) return 1;
+        *pui32GpioGet = GpioGet_SmPsReset();
     } else if (!strcasecmp(pcGpioType, "sm-gpio")) {
         if (bGpioWrite) GpioSet_SmGpio(ui32GpioSet);
-        ui32GpioGet =  GpioGet_SmGpio();
+        *pui32GpioGet = GpioGet_SmGpio();
     } else if (!strcasecmp(pcGpioType, "led-status")) {
         if (bGpioWrite) GpioSet_LedCmStatus(ui32GpioSet);
-        ui32GpioGet = GpioGet_LedCmStatus();
+        *pui32GpioGet = GpioGet_LedCmStatus();
     } else if (!strcasecmp(pcGpioType, "led-user")) {
         if (bGpioWrite) GpioSet_LedMcuUser(ui32GpioSet);
-        ui32GpioGet = GpioGet_LedMcuUser();
+        *pui32GpioGet = GpioGet_LedMcuUser();
     } else if (!strcasecmp(pcGpioType, "power-ctrl")) {
         if (bGpioWrite) GpioSet_PowerCtrl(ui32GpioSet);
-        ui32GpioGet = GpioGet_PowerCtrl();
+        *pui32GpioGet = GpioGet_PowerCtrl();
     } else if (!strcasecmp(pcGpioType, "power-good")) {
-        if (bGpioWrite) {
-            UARTprintf("%s: GPIO %s is read-only!", UI_STR_WARNING, pcGpioType);
-            return 1;
-        }
-        ui32GpioGet = GpioGet_PowerGood();
+        if (bGpioWrite) return 1;
+        *pui32GpioGet = GpioGet_PowerGood();
     } else if (!strcasecmp(pcGpioType, "power-fault")) {
-        if (bGpioWrite) {
-            UARTprintf("%s: GPIO %s is read-only!", UI_STR_WARNING, pcGpioType);
-            return 1;
-        }
-        ui32GpioGet = GpioGet_PowerFault();
+        if (bGpioWrite) return 1;
+        *pui32GpioGet = GpioGet_PowerFault();
     } else if (!strcasecmp(pcGpioType, "power-i2c-alert")) {
-        if (bGpioWrite) {
-            UARTprintf("%s: GPIO %s is read-only!", UI_STR_WARNING, pcGpioType);
-            return 1;
-        }
-        ui32GpioGet = GpioGet_PowerI2CAlert();
+        if (bGpioWrite) return 1;
+        *pui32GpioGet = GpioGet_PowerI2CAlert();
     } else if (!strcasecmp(pcGpioType, "power-reserved-ctrl")) {
         if (bGpioWrite) GpioSet_PowerReservedCtrl(ui32GpioSet);
-        ui32GpioGet = GpioGet_PowerReservedCtrl();
+        *pui32GpioGet = GpioGet_PowerReservedCtrl();
     } else if (!strcasecmp(pcGpioType, "temp-alert")) {
-        if (bGpioWrite) {
-            UARTprintf("%s: GPIO %s is read-only!", UI_STR_WARNING, pcGpioType);
-            return 1;
-        }
-        ui32GpioGet = GpioGet_TempAlert();
+        if (bGpioWrite) return 1;
+        *pui32GpioGet = GpioGet_TempAlert();
     } else if (!strcasecmp(pcGpioType, "fpga")) {
         if (bGpioWrite) GpioSet_FPGACtrlStat(ui32GpioSet);
-        ui32GpioGet = GpioGet_FPGACtrlStat();
+        *pui32GpioGet = GpioGet_FPGACtrlStat();
     } else if (!strcasecmp(pcGpioType, "i2c-reset")) {
         if (bGpioWrite) GpioSet_I2CReset(ui32GpioSet);
-        ui32GpioGet = GpioGet_I2CReset();
+        *pui32GpioGet = GpioGet_I2CReset();
     } else if (!strcasecmp(pcGpioType, "i2c-int")) {
-        if (bGpioWrite) {
-            UARTprintf("%s: GPIO %s is read-only!", UI_STR_WARNING, pcGpioType);
-            return 1;
-        }
-        ui32GpioGet = GpioGet_I2CInt();
+        if (bGpioWrite) return 1;
+        *pui32GpioGet = GpioGet_I2CInt();
     } else {
-        UARTprintf("%s: Unknown GPIO type `%s'!\n", UI_STR_ERROR, pcGpioType);
-        GpioGetSetHelp();
         return -1;
     }
-    if (bGpioWrite) {
-        if (ui32GpioGet == ui32GpioSet) {
-            UARTprintf("%s: GPIO %s set to 0x%02x.", UI_STR_OK, pcGpioType, ui32GpioGet);
-        } else {
-            UARTprintf("%s: Setting GPIO %s to 0x%02x failed!", UI_STR_ERROR, pcGpioType, ui32GpioSet);
-            UARTprintf(" It was set to 0x%02x instead.", ui32GpioGet);
-        }
-    } else {
-        UARTprintf("%s: Current GPIO %s value: 0x%02x", UI_STR_OK, pcGpioType, ui32GpioGet);
-    }
     return 0;
 }
 
@@ -2,7 +2,7 @@
 // Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 // Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 // Date: 03 Jun 2022
-// Rev.: 03 Jun 2022
+// Rev.: 19 Oct 2026
 //
 // Header file for the FPIO functions of the firmware running on the ATLAS MDT
 // Trigger Processor (TP) Command Module (CM) prototype MCU.
@@ -21,6 +21,7 @@
 
 int GpioGetSet(char *pcCmd, char *pcParam);
 void GpioGetSetHelp(void);
+int GpioTypeAccess(char *pcGpioType, bool bGpioWrite, uint32_t ui32GpioSet, uint32_t *pui32GpioGet);
 
 
 
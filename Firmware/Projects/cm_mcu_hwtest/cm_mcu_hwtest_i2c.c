@@ -2,7 +2,7 @@
 // Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 // Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 // Date: 03 Jun 2022
-// Rev.: 09 Jun 2026
+// Rev.: 19 Oct 2026
 //
 // I2C functions of the hardware test firmware running on the ATLAS MDT Trigger
 // Processor (TP) Command Module (CM) prototype MCU.
@@ -35,6 +35,28 @@
 
 
 
+// Transaction of an I2C transaction list: Write data bytes (if any) and read
+// data bytes (if any) with repeated start.
+typedef struct {
+    uint8_t ui8I2CPortIdx;
+    uint8_t ui8I2CSlaveAddr;
+    uint8_t ui8I2CWriteNum;
+    uint8_t ui8I2CReadNum;
+    uint8_t pui8I2CWriteData[I2C_ML_WRITE_LEN_MAX];
+    uint8_t pui8I2CReadData[I2C_ML_READ_LEN_MAX];
+    uint32_t ui32I2CMasterStatus;
+} tI2CMultiTrans;
+
+// State of an I2C master while executing the transaction lists.
+typedef struct {
+    int iTrans;                     // Current transaction; -1 = list done.
+    uint16_t ui16Step;              // Current byte of the transaction.
+    bool bIssued;                   // Byte transfer issued.
+    uint32_t ui32Wait;              // Number of 10 us poll rounds waited.
+} tI2CMultiBus;
+
+
+
 // I2C access.
 int I2CAccess(char *pcCmd, char *pcParam)
 {
@@ -236,6 +258,336 @@ int I2CBurstWrite(char *pcCmd, char *pcParam)
 
 
 
+// I2C block read: Write the command code and read the data with repeated
+// start in one I2C transaction. This allows SMBus/PMBus block reads longer
+// than the data buffer of the `i2c' command, e.g. fault logs. If the number of
+// bytes is 0, an SMBus block read is performed: The first byte read is the
+// byte count, which determines the number of data bytes to follow. The data
+// are sent back in lines of I2C_BLOCK_LINE_BYTES bytes.
+int I2CBlockRead(char *pcCmd, char *pcParam)
+{
+    int i;
+    tI2C *psI2C;
+    uint8_t ui8I2CPort = 0;
+    uint8_t ui8I2CSlaveAddr = 0;
+    uint8_t ui8I2CCmdCode = 0;
+    uint16_t ui16I2CDataNum = 0;
+    static uint8_t pui8I2CData[I2C_BLOCK_LEN_MAX];
+    uint32_t ui32I2CMasterStatus;
+
+    // Parse parameters.
+    for (i = 0; i < 4; i++) {
+        if (i != 0) pcParam = strtok(NULL, UI_STR_DELIMITER);
+        if (pcParam == NULL) {
+            if (i == 0) UARTprintf("%s: I2C port number required after command `%s'.\n", UI_STR_ERROR, pcCmd);
+            else if (i == 1) UARTprintf("%s: I2C slave address required after command `%s'.\n", UI_STR_ERROR, pcCmd);
+            else if (i == 2) UARTprintf("%s: Command code required after command `%s'.\n", UI_STR_ERROR, pcCmd);
+            else UARTprintf("%s: Number of bytes to read required after command `%s'.\n", UI_STR_ERROR, pcCmd);
+            I2CBlockReadHelp();
+            return -1;
+        }
+        if (i == 0) ui8I2CPort = (uint8_t) strtoul(pcParam, (char **) NULL, 0) & 0xff;
+        else if (i == 1) ui8I2CSlaveAddr = (uint8_t) strtoul(pcParam, (char **) NULL, 0) & 0xff;
+        else if (i == 2) ui8I2CCmdCode = (uint8_t) strtoul(pcParam, (char **) NULL, 0) & 0xff;
+        else ui16I2CDataNum = (uint16_t) strtoul(pcParam, (char **) NULL, 0);
+    }
+    if (ui16I2CDataNum > I2C_BLOCK_LEN_MAX) {
+        UARTprintf("%s: Number of bytes to read %d out of valid range 0..%d.", UI_STR_ERROR, ui16I2CDataNum, I2C_BLOCK_LEN_MAX);
+        return -1;
+    }
+    // Check if the I2C port number is valid. If so, set the psI2C pointer to the selected I2C port struct.
+    if (I2CPortCheck(ui8I2CPort, &psI2C)) return -1;
+    // Write the command code without stop condition.
+    ui32I2CMasterStatus = I2CMasterWriteAdv(psI2C, ui8I2CSlaveAddr, &ui8I2CCmdCode, 1, false, false);
+    // Read the data with repeated start.
+    if (!ui32I2CMasterStatus) {
+        if (ui16I2CDataNum) {
+            ui32I2CMasterStatus = I2CMasterReadAdv(psI2C, ui8I2CSlaveAddr, pui8I2CData, ui16I2CDataNum, true, true);
+        // SMBus block read with the byte count read first.
+        } else {
+            ui32I2CMasterStatus = I2CMasterReadBlockAdv(psI2C, ui8I2CSlaveAddr, pui8I2CData, I2C_BLOCK_LEN_MAX, &ui16I2CDataNum, true);
+        }
+    }
+    // Check the I2C status.
+    if (ui32I2CMasterStatus) {
+        UARTprintf("%s: Error flags from I2C the master %d: 0x%08x", UI_STR_ERROR, ui8I2CPort, ui32I2CMasterStatus);
+        if (ui32I2CMasterStatus & I2C_MASTER_INT_TIMEOUT) UARTprintf("\n%s: I2C timeout.", UI_STR_ERROR);
+        if (ui32I2CMasterStatus & I2C_MASTER_INT_NACK) UARTprintf("\n%s: NACK received.", UI_STR_ERROR);
+        if (ui32I2CMasterStatus & I2C_MASTER_INT_ARB_LOST) UARTprintf("\n%s: I2C bus arbitration lost.", UI_STR_ERROR);
+        if (ui32I2CMasterStatus & 0x1) UARTprintf("\n%s: Unknown error.", UI_STR_ERROR);
+        return -1;
+    }
+    UARTprintf("%s. Data:", UI_STR_OK);
+    for (i = 0; i < ui16I2CDataNum; i++) {
+        if (i && !(i % I2C_BLOCK_LINE_BYTES)) UARTprintf("\n");
+        UARTprintf(" 0x%02x", pui8I2CData[i]);
+    }
+
+    return 0;
+}
+
+
+
+// Find the next transaction of a transaction list for the I2C master with the
+// index ui8I2CPortIdx, starting at the transaction iStart.
+static int I2CMultiTransNext(tI2CMultiTrans *psTrans, int iTransNum, uint8_t ui8I2CPortIdx, int iStart)
+{
+    for (int i = iStart; i < iTransNum; i++) {
+        if (psTrans[i].ui8I2CPortIdx == ui8I2CPortIdx) return i;
+    }
+    return -1;
+}
+
+
+
+// Issue the byte transfer ui16Step of a transaction without waiting for it to
+// finish. The write phase is followed by the read phase with repeated start.
+static void I2CMultiTransIssue(tI2CMultiTrans *psTrans, uint16_t ui16Step, tI2C *psI2C)
+{
+    uint8_t ui8WriteNum = psTrans->ui8I2CWriteNum;
+    uint8_t ui8ReadNum = psTrans->ui8I2CReadNum;
+    uint16_t ui16ReadStep;
+
+    // Clear all I2C master interrupts at the start of the transaction.
+    if (ui16Step == 0) I2CMasterIntClearEx(psI2C->ui32BaseI2C, 0xffffffffU);
+    // Write phase.
+    if (ui16Step < ui8WriteNum) {
+        if (ui16Step == 0) I2CMasterSlaveAddrSet(psI2C->ui32BaseI2C, psTrans->ui8I2CSlaveAddr, false);   // false = write; true = read
+        I2CMasterDataPut(psI2C->ui32BaseI2C, psTrans->pui8I2CWriteData[ui16Step]);
+        if (ui8WriteNum == 1 && ui8ReadNum == 0) I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_SINGLE_SEND);
+        else if (ui16Step == 0) I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_BURST_SEND_START);
+        else if (ui16Step == ui8WriteNum - 1 && ui8ReadNum == 0) I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_BURST_SEND_FINISH);
+        else I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_BURST_SEND_CONT);
+    // Read phase.
+    } else {
+        ui16ReadStep = ui16Step - ui8WriteNum;
+        if (ui16ReadStep == 0) I2CMasterSlaveAddrSet(psI2C->ui32BaseI2C, psTrans->ui8I2CSlaveAddr, true);    // false = write; true = read
+        if (ui8ReadNum == 1) I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_SINGLE_RECEIVE);
+        else if (ui16ReadStep == 0) I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_BURST_RECEIVE_START);
+        else if (ui16ReadStep == ui8ReadNum - 1) I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_BURST_RECEIVE_FINISH);
+        else I2CMasterControl(psI2C->ui32BaseI2C, I2C_MASTER_CMD_BURST_RECEIVE_CONT);
+    }
+}
+
+
+
+// Check the result of the finished byte transfer ui16Step of a transaction
+// and get the data byte in the read phase.
+static uint32_t I2CMultiTransComplete(tI2CMultiTrans *psTrans, uint16_t ui16Step, tI2C *psI2C)
+{
+    uint32_t ui32I2CMasterInt;
+    bool bRead = ui16Step >= psTrans->ui8I2CWriteNum;
+
+    // Read I2C master interrupts.
+    ui32I2CMasterInt = I2CMasterIntStatusEx(psI2C->ui32BaseI2C, false);
+    ui32I2CMasterInt &= I2C_MASTER_INT_ARB_LOST | I2C_MASTER_INT_NACK | I2C_MASTER_INT_TIMEOUT;
+    if (ui32I2CMasterInt) {
+        I2CMasterControl(psI2C->ui32BaseI2C, bRead ? I2C_MASTER_CMD_BURST_RECEIVE_ERROR_STOP : I2C_MASTER_CMD_BURST_SEND_ERROR_STOP);
+        return ui32I2CMasterInt;
+    }
+    // Check for I2C errors.
+    if (I2CMasterErr(psI2C->ui32BaseI2C) != I2C_MASTER_ERR_NONE) {
+        I2CMasterControl(psI2C->ui32BaseI2C, bRead ? I2C_MASTER_CMD_BURST_RECEIVE_ERROR_STOP : I2C_MASTER_CMD_BURST_SEND_ERROR_STOP);
+        return 1;
+    }
+    // Get the data byte from the I2C master.
+    if (bRead) psTrans->pui8I2CReadData[ui16Step - psTrans->ui8I2CWriteNum] = I2CMasterDataGet(psI2C->ui32BaseI2C);
+    return 0;
+}
+
+
+
+// I2C transaction lists: Execute lists of transactions on several I2C ports
+// concurrently. The transactions are separated by comma. The transactions for
+// the same port are executed in the given order, while the transactions for
+// different ports run in parallel. Instead of waiting for each byte transfer
+// to finish, the next byte transfer is issued on all I2C masters with pending
+// transactions in each poll round. Hence, the total execution time is bounded
+// by the busiest I2C bus. The results are returned with one line per
+// transaction, tagged with the transaction index and the I2C port.
+int I2CMultiList(char *pcCmd, char *pcParam)
+{
+    int i, j;
+    int iParam;
+    int iTransNum = 0;
+    tI2C *psI2C;
+    static tI2CMultiTrans psTrans[I2C_ML_TRANS_MAX];
+    tI2CMultiTrans *psT;
+    tI2CMultiBus psBus[I2C_MASTER_NUM];
+    bool bBusActive;
+    bool bRead;
+    uint32_t ui32Value;
+    char *pcParamLastToken;
+    char *pcParamTemp;
+    char *pcTransBlock;
+    char *pcSaveptrTransBlock;
+    char *pcData;
+    char *pcSaveptrData;
+
+    if (pcParam == NULL) {
+        UARTprintf("%s: At least one transaction required after command `%s'.\n", UI_STR_ERROR, pcCmd);
+        I2CMultiListHelp();
+        return -1;
+    }
+
+    // Recombine pcParam into one string, which is required for searching and
+    // processing the transactions.
+    pcParamLastToken = pcParam;
+    while ((pcParamTemp = strtok(NULL, UI_STR_DELIMITER)) != NULL) {
+        pcParamLastToken = pcParamTemp;
+    }
+    pcParamTemp = pcParam;
+    while (pcParamTemp < pcParamLastToken) {
+        if (*pcParamTemp == 0) {
+            *pcParamTemp = UI_STR_DELIMITER[0];
+        }
+        pcParamTemp++;
+    }
+
+    // Parse the transactions.
+    pcTransBlock = strtok_r(pcParam, UI_STR_DELIMITER_DATABLOCK, &pcSaveptrTransBlock);
+    while (pcTransBlock != NULL) {
+        pcData = strtok_r(pcTransBlock, UI_STR_DELIMITER, &pcSaveptrData);
+        // Skip empty transactions.
+        if (pcData != NULL) {
+            if (iTransNum >= I2C_ML_TRANS_MAX) {
+                UARTprintf("%s: Too many transactions. At most %d transactions are supported.", UI_STR_ERROR, I2C_ML_TRANS_MAX);
+                return -1;
+            }
+            psT = &psTrans[iTransNum];
+            psT->ui8I2CWriteNum = 0;
+            psT->ui8I2CReadNum = 0;
+            psT->ui32I2CMasterStatus = 0;
+            for (iParam = 0; pcData != NULL; iParam++) {
+                ui32Value = strtoul(pcData, (char **) NULL, 0);
+                if (iParam == 0) {
+                    // Check if the I2C port number is valid. If so, set the psI2C pointer to the selected I2C port struct.
+                    if (I2CPortCheck((uint8_t) ui32Value & 0xff, &psI2C)) return -1;
+                    psT->ui8I2CPortIdx = psI2C - g_psI2C;
+                } else if (iParam == 1) {
+                    psT->ui8I2CSlaveAddr = (uint8_t) ui32Value & 0xff;
+                } else if (iParam == 2) {
+                    if (ui32Value > I2C_ML_READ_LEN_MAX) {
+                        UARTprintf("%s: Number of bytes to read %d of transaction %d out of valid range 0..%d.", UI_STR_ERROR, ui32Value, iTransNum, I2C_ML_READ_LEN_MAX);
+                        return -1;
+                    }
+                    psT->ui8I2CReadNum = (uint8_t) ui32Value;
+                } else {
+                    if (psT->ui8I2CWriteNum >= I2C_ML_WRITE_LEN_MAX) {
+                        UARTprintf("%s: Too many data bytes for transaction %d. At most %d bytes can be written.", UI_STR_ERROR, iTransNum, I2C_ML_WRITE_LEN_MAX);
+                        return -1;
+                    }
+                    psT->pui8I2CWriteData[psT->ui8I2CWriteNum++] = (uint8_t) ui32Value & 0xff;
+                }
+                pcData = strtok_r(NULL, UI_STR_DELIMITER, &pcSaveptrData);
+            }
+            if (iParam < 3) {
+                UARTprintf("%s: I2C port number, slave address and number of bytes to read required for transaction %d.\n", UI_STR_ERROR, iTransNum);
+                I2CMultiListHelp();
+                return -1;
+            }
+            if (psT->ui8I2CWriteNum == 0 && psT->ui8I2CReadNum == 0) {
+                UARTprintf("%s: Transaction %d neither writes nor reads data.", UI_STR_ERROR, iTransNum);
+                return -1;
+            }
+            iTransNum++;
+        }
+        // Look for next transaction.
+        pcTransBlock = strtok_r(NULL, UI_STR_DELIMITER_DATABLOCK, &pcSaveptrTransBlock);
+    }
+    if (iTransNum == 0) {
+        UARTprintf("%s: At least one transaction required after command `%s'.\n", UI_STR_ERROR, pcCmd);
+        I2CMultiListHelp();
+        return -1;
+    }
+
+    // Start with the first transaction of each I2C master.
+    for (i = 0; i < I2C_MASTER_NUM; i++) {
+        psBus[i].iTrans = I2CMultiTransNext(psTrans, iTransNum, i, 0);
+        psBus[i].ui16Step = 0;
+        psBus[i].bIssued = false;
+        psBus[i].ui32Wait = 0;
+    }
+
+    // Execute the transactions.
+    while (true) {
+        // Issue the next byte transfer on all I2C masters with pending
+        // transactions.
+        bBusActive = false;
+        for (i = 0; i < I2C_MASTER_NUM; i++) {
+            if (psBus[i].iTrans < 0) continue;
+            bBusActive = true;
+            if (psBus[i].bIssued) continue;
+            // Wait until the I2C bus is free before starting a transaction.
+            if (psBus[i].ui16Step == 0 && I2CMasterBusBusy(g_psI2C[i].ui32BaseI2C)) continue;
+            I2CMultiTransIssue(&psTrans[psBus[i].iTrans], psBus[i].ui16Step, &g_psI2C[i]);
+            psBus[i].bIssued = true;
+        }
+        if (!bBusActive) break;
+        SysCtlDelay(g_psI2C[0].ui32I2CClk / 3e5);   // 10 us delay.
+                                                    // Note: The SysCtlDelay executes a simple 3 instruction cycle loop.
+        // Check the byte transfers of all I2C masters.
+        for (i = 0; i < I2C_MASTER_NUM; i++) {
+            if (psBus[i].iTrans < 0) continue;
+            psT = &psTrans[psBus[i].iTrans];
+            // Byte transfer not finished yet or I2C bus not free.
+            if (!psBus[i].bIssued || I2CMasterBusy(g_psI2C[i].ui32BaseI2C)) {
+                if (++psBus[i].ui32Wait <= g_psI2C[i].ui32Timeout + 10) continue;   // Guarantee some minimum timeout value.
+                // Timeout while waiting for the I2C master to be ready.
+                if (psBus[i].bIssued) {
+                    // Stop the current phase of the transaction: write or read.
+                    bRead = psBus[i].ui16Step >= psT->ui8I2CWriteNum;
+                    I2CMasterControl(g_psI2C[i].ui32BaseI2C, bRead ? I2C_MASTER_CMD_BURST_RECEIVE_ERROR_STOP : I2C_MASTER_CMD_BURST_SEND_ERROR_STOP);
+                    psT->ui32I2CMasterStatus = I2C_MASTER_INT_TIMEOUT;
+                // Timeout while waiting for the I2C bus to be free.
+                } else {
+                    psT->ui32I2CMasterStatus = I2C_MASTER_INT_ARB_LOST;
+                }
+            } else {
+                psT->ui32I2CMasterStatus = I2CMultiTransComplete(psT, psBus[i].ui16Step, &g_psI2C[i]);
+                psBus[i].ui16Step++;
+            }
+            psBus[i].bIssued = false;
+            psBus[i].ui32Wait = 0;
+            // Continue with the next transaction on this I2C master when the
+            // current one is finished or has failed.
+            if (psT->ui32I2CMasterStatus || psBus[i].ui16Step >= psT->ui8I2CWriteNum + psT->ui8I2CReadNum) {
+                psBus[i].iTrans = I2CMultiTransNext(psTrans, iTransNum, i, psBus[i].iTrans + 1);
+                psBus[i].ui16Step = 0;
+            }
+        }
+    }
+
+    // Send the results tagged with the transaction index and the I2C port.
+    UARTprintf("%s. Data:", UI_STR_OK);
+    for (i = 0; i < iTransNum; i++) {
+        psT = &psTrans[i];
+        UARTprintf("\n#%d %d", i, g_ui8I2CMasterPorts[psT->ui8I2CPortIdx]);
+        if (psT->ui32I2CMasterStatus) {
+            UARTprintf(" %s 0x%08x", UI_STR_ERROR, psT->ui32I2CMasterStatus);
+        } else {
+            for (j = 0; j < psT->ui8I2CReadNum; j++) UARTprintf(" 0x%02x", psT->pui8I2CReadData[j]);
+        }
+    }
+
+    return 0;
+}
+
+
+
+// Show help on I2C transaction list command.
+void I2CMultiListHelp(void)
+{
+    UARTprintf("I2C transaction list command:\n");
+    UARTprintf("  i2c-ml  PORT SLV-ADR NUM [DATA] [,PORT SLV-ADR NUM [DATA]]\n");
+    UARTprintf("Every transaction writes DATA (max. %d bytes), then reads NUM bytes (max. %d)\n", I2C_ML_WRITE_LEN_MAX, I2C_ML_READ_LEN_MAX);
+    UARTprintf("with repeated start. Transactions are separated by comma `%s'. Up to %d\n", UI_STR_DELIMITER_DATABLOCK, I2C_ML_TRANS_MAX);
+    UARTprintf("transactions are executed in order per port and concurrently across ports.\n");
+    UARTprintf("Each result line starts with `#' followed by the transaction index and the port.");
+}
+
+
+
 // Show help on I2C access command.
 void I2CAccessHelp(void)
 {
@@ -261,6 +613,18 @@ void I2CBurstWriteHelp(void)
 
 
 
+// Show help on I2C block read command.
+void I2CBlockReadHelp(void)
+{
+    UARTprintf("I2C block read command:\n");
+    UARTprintf("  i2c-br  PORT SLV-ADR CMD NUM\n");
+    UARTprintf("Write the command code CMD and read NUM bytes (max. %d) with repeated start\n", I2C_BLOCK_LEN_MAX);
+    UARTprintf("in one transaction. The data are returned in lines of %d bytes.\n", I2C_BLOCK_LINE_BYTES);
+    UARTprintf("NUM = 0: SMBus block read. The first byte read is the byte count.");
+}
+
+
+
 // Check if the I2C port number is valid. If so, set the psI2C pointer to the selected I2C port struct.
 int I2CPortCheck(uint8_t ui8I2CPort, tI2C **psI2C)
 {
@@ -0,0 +1,268 @@
+// File: cm_mcu_hwtest_prog.c
+// Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+// Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+// Date: 19 Oct 2026
+// Rev.: 19 Oct 2026
+//
+// Transaction program functions of the hardware test firmware running on the
+// ATLAS MDT Trigger Processor (TP) Command Module (CM) prototype MCU.
+//
+
+
+
+#define _POSIX_C_SOURCE 200809L
+#include <stdbool.h>
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+#include <strings.h>
+#include "driverlib/i2c.h"
+#include "driverlib/rom_map.h"
+#include "driverlib/sysctl.h"
+#include "driverlib/uart.h"
+#include "utils/uartstdio.h"
+#include "utils/ustdlib.h"
+#include "hw/gpio/gpio.h"
+#include "hw/gpio/gpio_pins.h"
+#include "hw/i2c/i2c.h"
+#include "hw/uart/uart.h"
+#include "uart_ui.h"
+#include "power_control.h"
+#include "sm_cm.h"
+#include "cm_mcu_hwtest.h"
+#include "cm_mcu_hwtest_aux.h"
+#include "cm_mcu_hwtest_gpio.h"
+#include "cm_mcu_hwtest_i2c.h"
+#include "cm_mcu_hwtest_io.h"
+#include "cm_mcu_hwtest_prog.h"
+
+
+
+// Operation types of a transaction program.
+#define PROG_OP_I2C                 0
+#define PROG_OP_GPIO                1
+#define PROG_OP_DELAY               2
+
+// Operation of a transaction program.
+typedef struct {
+    uint8_t ui8Type;
+    uint8_t ui8I2CPort;
+    tI2C *psI2C;
+    uint8_t ui8I2CSlaveAddr;
+    uint8_t ui8I2CWriteNum;
+    uint8_t ui8I2CReadNum;
+    uint8_t pui8I2CData[PROG_DATA_LEN_MAX];     // Data to write, replaced by the data read.
+    char *pcGpioType;
+    bool bGpioWrite;
+    uint32_t ui32Value;                         // GPIO value or delay in microseconds.
+} tProgOp;
+
+
+
+// Run a transaction program: A list of I2C, GPIO and delay operations, which
+// are separated by comma. The program is parsed completely before it is
+// executed in one go, so that the timing between the operations is not
+// affected by the UART. The execution stops at the first failed operation.
+// Every operation has a result slot, which is returned in one line tagged with
+// the operation index: The data read by I2C operations, the current value of
+// GPIO operations and no data for delays.
+int ProgRun(char *pcCmd, char *pcParam)
+{
+    int i, j;
+    int iParam;
+    int iOpNum = 0;
+    int iRet;
+    static tProgOp psOps[PROG_OP_NUM_MAX];
+    tProgOp *psOp;
+    uint32_t ui32Value;
+    uint32_t ui32I2CMasterStatus;
+    char *pcParamLastToken;
+    char *pcParamTemp;
+    char *pcOpBlock;
+    char *pcSaveptrOpBlock;
+    char *pcData;
+    char *pcSaveptrData;
+
+    if (pcParam == NULL) {
+        UARTprintf("%s: At least one operation required after command `%s'.\n", UI_STR_ERROR, pcCmd);
+        ProgRunHelp();
+        return -1;
+    }
+
+    // Recombine pcParam into one string, which is required for searching and
+    // processing the operations.
+    pcParamLastToken = pcParam;
+    while ((pcParamTemp = strtok(NULL, UI_STR_DELIMITER)) != NULL) {
+        pcParamLastToken = pcParamTemp;
+    }
+    pcParamTemp = pcParam;
+    while (pcParamTemp < pcParamLastToken) {
+        if (*pcParamTemp == 0) {
+            *pcParamTemp = UI_STR_DELIMITER[0];
+        }
+        pcParamTemp++;
+    }
+
+    // Parse the operations.
+    pcOpBlock = strtok_r(pcParam, UI_STR_DELIMITER_DATABLOCK, &pcSaveptrOpBlock);
+    while (pcOpBlock != NULL) {
+        pcData = strtok_r(pcOpBlock, UI_STR_DELIMITER, &pcSaveptrData);
+        // Skip empty operations.
+        if (pcData != NULL) {
+            if (iOpNum >= PROG_OP_NUM_MAX) {
+                UARTprintf("%s: Too many operations. At most %d operations are supported.", UI_STR_ERROR, PROG_OP_NUM_MAX);
+                return -1;
+            }
+            psOp = &psOps[iOpNum];
+            if (!strcasecmp(pcData, "i2c")) {
+                psOp->ui8Type = PROG_OP_I2C;
+            } else if (!strcasecmp(pcData, "gpio")) {
+                psOp->ui8Type = PROG_OP_GPIO;
+            } else if (!strcasecmp(pcData, "delay")) {
+                psOp->ui8Type = PROG_OP_DELAY;
+            } else {
+                UARTprintf("%s: Unknown operation `%s' at index %d.\n", UI_STR_ERROR, pcData, iOpNum);
+                ProgRunHelp();
+                return -1;
+            }
+            psOp->ui8I2CWriteNum = 0;
+            psOp->ui8I2CReadNum = 0;
+            psOp->bGpioWrite = false;
+            psOp->ui32Value = 0;
+            pcData = strtok_r(NULL, UI_STR_DELIMITER, &pcSaveptrData);
+            for (iParam = 0; pcData != NULL; iParam++) {
+                ui32Value = strtoul(pcData, (char **) NULL, 0);
+                // I2C operation: PORT SLV-ADR NUM [DATA]
+                if (psOp->ui8Type == PROG_OP_I2C) {
+                    if (iParam == 0) {
+                        psOp->ui8I2CPort = (uint8_t) ui32Value & 0xff;
+                        // Check if the I2C port number is valid. If so, set the psI2C pointer to the selected I2C port struct.
+                        if (I2CPortCheck(psOp->ui8I2CPort, &psOp->psI2C)) return -1;
+                    } else if (iParam == 1) {
+                        psOp->ui8I2CSlaveAddr = (uint8_t) ui32Value & 0xff;
+                    } else if (iParam == 2) {
+                        if (ui32Value > PROG_DATA_LEN_MAX) {
+                            UARTprintf("%s: Number of bytes to read %d of operation %d out of valid range 0..%d.", UI_STR_ERROR, ui32Value, iOpNum, PROG_DATA_LEN_MAX);
+                            return -1;
+                        }
+                        psOp->ui8I2CReadNum = (uint8_t) ui32Value;
+                    } else {
+                        if (psOp->ui8I2CWriteNum >= PROG_DATA_LEN_MAX) {
+                            UARTprintf("%s: Too many data bytes for operation %d. At most %d bytes can be written.", UI_STR_ERROR, iOpNum, PROG_DATA_LEN_MAX);
+                            return -1;
+                        }
+                        psOp->pui8I2CData[psOp->ui8I2CWriteNum++] = (uint8_t) ui32Value & 0xff;
+                    }
+                // GPIO operation: TYPE [VALUE]
+                } else if (psOp->ui8Type == PROG_OP_GPIO) {
+                    if (iParam == 0) {
+                        psOp->pcGpioType = pcData;
+                    } else if (iParam == 1) {
+                        psOp->bGpioWrite = true;
+                        psOp->ui32Value = strtol(pcData, (char **) NULL, 0);
+                    } else {
+                        break;
+                    }
+                // Delay operation: MICROSECONDS
+                } else {
+                    if (iParam == 0) psOp->ui32Value = ui32Value;
+                    else break;
+                }
+                pcData = strtok_r(NULL, UI_STR_DELIMITER, &pcSaveptrData);
+            }
+            // Check for missing parameters.
+            if ((psOp->ui8Type == PROG_OP_I2C && iParam < 3) || iParam < 1) {
+                UARTprintf("%s: Missing parameters for operation %d.\n", UI_STR_ERROR, iOpNum);
+                ProgRunHelp();
+                return -1;
+            }
+            if (pcData != NULL) {
+                UARTprintf("%s: Too many parameters for operation %d.\n", UI_STR_ERROR, iOpNum);
+                ProgRunHelp();
+                return -1;
+            }
+            if (psOp->ui8Type == PROG_OP_I2C && psOp->ui8I2CWriteNum == 0 && psOp->ui8I2CReadNum == 0) {
+                UARTprintf("%s: I2C operation %d neither writes nor reads data.", UI_STR_ERROR, iOpNum);
+                return -1;
+            }
+            iOpNum++;
+        }
+        // Look for next operation.
+        pcOpBlock = strtok_r(NULL, UI_STR_DELIMITER_DATABLOCK, &pcSaveptrOpBlock);
+    }
+    if (iOpNum == 0) {
+        UARTprintf("%s: At least one operation required after command `%s'.\n", UI_STR_ERROR, pcCmd);
+        ProgRunHelp();
+        return -1;
+    }
+
+    // Execute the operations.
+    for (i = 0; i < iOpNum; i++) {
+        psOp = &psOps[i];
+        if (psOp->ui8Type == PROG_OP_I2C) {
+            // Write the data. Omit the stop condition if data are read afterwards.
+            ui32I2CMasterStatus = 0;
+            if (psOp->ui8I2CWriteNum) {
+                ui32I2CMasterStatus = I2CMasterWriteAdv(psOp->psI2C, psOp->ui8I2CSlaveAddr, psOp->pui8I2CData, psOp->ui8I2CWriteNum, false, psOp->ui8I2CReadNum == 0);
+            }
+            // Read the data with repeated start after a write.
+            if (!ui32I2CMasterStatus && psOp->ui8I2CReadNum) {
+                ui32I2CMasterStatus = I2CMasterReadAdv(psOp->psI2C, psOp->ui8I2CSlaveAddr, psOp->pui8I2CData, psOp->ui8I2CReadNum, psOp->ui8I2CWriteNum > 0, true);
+            }
+            if (ui32I2CMasterStatus) {
+                UARTprintf("%s: Operation %d: Error flags from I2C the master %d: 0x%08x", UI_STR_ERROR, i, psOp->ui8I2CPort, ui32I2CMasterStatus);
+                if (ui32I2CMasterStatus & I2C_MASTER_INT_TIMEOUT) UARTprintf("\n%s: I2C timeout.", UI_STR_ERROR);
+                if (ui32I2CMasterStatus & I2C_MASTER_INT_NACK) UARTprintf("\n%s: NACK received.", UI_STR_ERROR);
+                if (ui32I2CMasterStatus & I2C_MASTER_INT_ARB_LOST) UARTprintf("\n%s: I2C bus arbitration lost.", UI_STR_ERROR);
+                if (ui32I2CMasterStatus & 0x1) UARTprintf("\n%s: Unknown error.", UI_STR_ERROR);
+                return -1;
+            }
+        } else if (psOp->ui8Type == PROG_OP_GPIO) {
+            ui32Value = psOp->ui32Value;
+            iRet = GpioTypeAccess(psOp->pcGpioType, psOp->bGpioWrite, ui32Value, &psOp->ui32Value);
+            if (iRet > 0) {
+                UARTprintf("%s: Operation %d: GPIO %s is read-only!", UI_STR_ERROR, i, psOp->pcGpioType);
+                return -1;
+            } else if (iRet < 0) {
+                UARTprintf("%s: Operation %d: Unknown GPIO type `%s'!", UI_STR_ERROR, i, psOp->pcGpioType);
+                return -1;
+            }
+            if (psOp->bGpioWrite && psOp->ui32Value != ui32Value) {
+                UARTprintf("%s: Operation %d: Setting GPIO %s to 0x%02x failed!", UI_STR_ERROR, i, psOp->pcGpioType, ui32Value);
+                UARTprintf(" It was set to 0x%02x instead.", psOp->ui32Value);
+                return -1;
+            }
+        } else {
+            DelayUs(psOp->ui32Value);
+        }
+    }
+
+    // Send the results tagged with the operation index.
+    UARTprintf("%s. Data:", UI_STR_OK);
+    for (i = 0; i < iOpNum; i++) {
+        psOp = &psOps[i];
+        UARTprintf("\n#%d", i);
+        if (psOp->ui8Type == PROG_OP_I2C) {
+            for (j = 0; j < psOp->ui8I2CReadNum; j++) UARTprintf(" 0x%02x", psOp->pui8I2CData[j]);
+        } else if (psOp->ui8Type == PROG_OP_GPIO) {
+            UARTprintf(" 0x%02x", psOp->ui32Value);
+        }
+    }
+
+    return 0;
+}
+
+
+
+// Show help on transaction program command.
+void ProgRunHelp(void)
+{
+    UARTprintf("Transaction program command:\n");
+    UARTprintf("  prog    OP [,OP]\n");
+    UARTprintf("Operations (OP), separated by comma `%s' (max. %d operations):\n", UI_STR_DELIMITER_DATABLOCK, PROG_OP_NUM_MAX);
+    UARTprintf("  i2c     PORT SLV-ADR NUM [DATA]     Write DATA, then read NUM bytes with Sr.\n");
+    UARTprintf("  gpio    TYPE [VALUE]                Get/Set the value of a GPIO type.\n");
+    UARTprintf("  delay   MICROSECONDS                Delay execution.\n");
+    UARTprintf("The program runs in one go. Each result line starts with `#' and the index of\n");
+    UARTprintf("the operation, followed by the data read or the GPIO value.");
+}
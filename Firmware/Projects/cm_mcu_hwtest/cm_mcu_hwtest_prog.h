@@ -0,0 +1,27 @@
+// File: cm_mcu_hwtest_prog.h
+// Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+// Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+// Date: 19 Oct 2026
+// Rev.: 19 Oct 2026
+//
+// Header file for the transaction program functions of the firmware running
+// on the ATLAS MDT Trigger Processor (TP) Command Module (CM) prototype MCU.
+//
+
+
+
+#ifndef __CM_MCU_HWTEST_PROG_H__
+#define __CM_MCU_HWTEST_PROG_H__
+
+
+
+// ******************************************************************
+// Function prototypes.
+// ******************************************************************
+
+int ProgRun(char *pcCmd, char *pcParam);
+void ProgRunHelp(void);
+
+
+
+#endif  // __CM_MCU_HWTEST_PROG_H__
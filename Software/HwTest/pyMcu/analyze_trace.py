@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+#
+# File: analyze_trace.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 19 Oct 2026
+# Rev.: 19 Oct 2026
+#
+# Python script to find redundant I2C transactions in a trace recorded with
+# the option `-T TRACE_FILE' of pyMcuCm.py.
+#
+# Hints:
+# - A device is identified by the I2C port, the path through the I2C
+#   multiplexers and the slave address.
+# - Redundant write: The same data is written to the same register as by the
+#   previous write, e.g. repeated PMBus PAGE writes or multiplexer selects.
+#   For 1-byte writes, the byte itself is the value (no register).
+# - Unchanged re-read: The same register is read again with the same result
+#   and without any write to the device in between, within the same
+#   invocation of the call site and within a time window. Registers that
+#   returned the same value during the whole trace are classified as static,
+#   the others as changing (e.g. status or monitoring values). Re-reads in
+#   another invocation or after the time window are reported separately, as
+#   they usually poll live values like temperatures or status registers.
+# - Unchanged read-modify-write: A register is written with the value that
+#   was just read from it.
+# - The potential savings are given as number of transactions, bytes written
+#   and read, and the latency of the transactions. Unchanged re-reads of
+#   changing registers and re-reads across invocations are reported, but not
+#   counted as savings.
+#
+
+
+
+import json
+import sys
+
+
+
+# Message prefixes and separators.
+prefixError             = "ERROR: {0:s}: ".format(__file__)
+
+# Categories of redundant transactions.
+categories = ["redundant_write", "reread_static", "reread_changing", "reread_across", "rmw_unchanged"]
+categoriesSavings = ["redundant_write", "reread_static", "rmw_unchanged"]
+
+
+
+# Load the transactions of a trace file.
+def load_trace(fileName):
+    entries = []
+    try:
+        with open(fileName, "r") as f:
+            for lineNum, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except ValueError as e:
+                    print(prefixError + "Invalid transaction in line {0:d} of the trace file `{1:s}': {2:s}".format(lineNum, fileName, str(e)))
+                    return -1, []
+    except OSError as e:
+        print(prefixError + "Cannot read the trace file `{0:s}': {1:s}".format(fileName, str(e)))
+        return -1, []
+    return 0, entries
+
+
+
+# Get the device key of a transaction.
+def device_key(entry):
+    return entry["port"], tuple(tuple(mux) for mux in entry["mux"]), entry["addr"]
+
+
+
+# Get the register key and the value of a write transaction.
+def write_key(entry):
+    if len(entry["wr"]) == 1:
+        return None, tuple(entry["wr"])
+    return entry["wr"][0], tuple(entry["wr"][1:])
+
+
+
+# Classify every transaction. Re-reads count only within the same invocation
+# of the call site and within the time window in seconds. Returns a list of
+# [category, entry] of the redundant transactions.
+def analyze(entries, window):
+    lastWrite = {}      # (device, register) -> value
+    lastRead = {}       # (device, data written, length) -> [data read, invocation, time]
+    values = {}         # (device, data written, length) -> set of data read
+    findings = []
+    for entry in entries:
+        dev = device_key(entry)
+        if not entry["ok"]:
+            # The state of the device is unknown after a failed access.
+            lastWrite = {key: value for key, value in lastWrite.items() if key[0] != dev}
+            lastRead = {key: value for key, value in lastRead.items() if key[0] != dev}
+            continue
+        if entry["op"] == "write":
+            reg, value = write_key(entry)
+            if lastWrite.get((dev, reg)) == value:
+                findings.append(["redundant_write", entry])
+            elif reg is not None and lastRead.get((dev, (reg,), len(value)), [None])[0] == value:
+                findings.append(["rmw_unchanged", entry])
+            lastWrite[(dev, reg)] = value
+            # A write may change the values read from the device.
+            lastRead = {key: value for key, value in lastRead.items() if key[0] != dev}
+            if reg is not None:
+                lastRead[(dev, (reg,), len(value))] = [value, entry.get("inv"), entry["t"]]
+        elif entry["op"] in ["read", "write_read", "read_long"]:
+            key = (dev, tuple(entry["wr"]), len(entry["rd"]))
+            data = tuple(entry["rd"])
+            values.setdefault(key, set()).add(data)
+            dataLast, invLast, timeLast = lastRead.get(key, [None, None, 0])
+            if dataLast == data:
+                if invLast == entry.get("inv") and entry["t"] - timeLast <= window:
+                    findings.append([key, entry])
+                else:
+                    findings.append(["reread_across", entry])
+            lastRead[key] = [data, entry.get("inv"), entry["t"]]
+    # Classify the re-reads after all values of the registers are known.
+    for finding in findings:
+        if finding[0] not in categories:
+            finding[0] = "reread_static" if len(values[finding[0]]) == 1 else "reread_changing"
+    return findings
+
+
+
+# Summarize the transactions and the redundant transactions per call site.
+def summarize(entries, findings):
+    summary = {}
+    for entry in entries:
+        site = summary.setdefault(entry["site"] or "(unknown)", {"transactions": 0, "bytes": 0, "time": 0.0,
+                                  **{category: 0 for category in categories},
+                                  "savings": {"transactions": 0, "bytes": 0, "time": 0.0}})
+        site["transactions"] += 1
+        site["bytes"] += len(entry["wr"]) + len(entry["rd"])
+        site["time"] += entry["dur"]
+    for category, entry in findings:
+        site = summary[entry["site"] or "(unknown)"]
+        site[category] += 1
+        if category in categoriesSavings:
+            site["savings"]["transactions"] += 1
+            site["savings"]["bytes"] += len(entry["wr"]) + len(entry["rd"])
+            site["savings"]["time"] += entry["dur"]
+    return summary
+
+
+
+# Print the summary table.
+def print_summary(summary):
+    print("{0:32s} {1:>7s} {2:>8s} {3:>9s} {4:>7s} {5:>7s} {6:>7s} {7:>7s} {8:>7s} {9:>7s} {10:>8s} {11:>9s}".format(
+          "Call site", "Trans", "Bytes", "Time [s]", "RedWr", "RdStat", "RdChg", "RdAcr", "RMW", "Save", "Save [B]", "Save [s]"))
+    total = {"transactions": 0, "bytes": 0, "time": 0.0, **{category: 0 for category in categories},
+             "savings": {"transactions": 0, "bytes": 0, "time": 0.0}}
+    for name, site in sorted(summary.items(), key=lambda item: item[1]["savings"]["time"], reverse=True):
+        print_row(name, site)
+        for key in total:
+            if key == "savings":
+                for keySavings in total[key]:
+                    total[key][keySavings] += site[key][keySavings]
+            else:
+                total[key] += site[key]
+    print_row("Total", total)
+    if total["transactions"]:
+        print("Potential savings: {0:d} of {1:d} transactions ({2:.1f}%), {3:d} of {4:d} bytes, {5:.3f} of {6:.3f} s.".format(
+              total["savings"]["transactions"], total["transactions"], total["savings"]["transactions"] * 100 / total["transactions"],
+              total["savings"]["bytes"], total["bytes"], total["savings"]["time"], total["time"]))
+    return total
+
+
+
+# Print a row of the summary table.
+def print_row(name, site):
+    print("{0:32s} {1:7d} {2:8d} {3:9.3f} {4:7d} {5:7d} {6:7d} {7:7d} {8:7d} {9:7d} {10:8d} {11:9.3f}".format(
+          name[:32], site["transactions"], site["bytes"], site["time"], site["redundant_write"],
+          site["reread_static"], site["reread_changing"], site["reread_across"], site["rmw_unchanged"],
+          site["savings"]["transactions"], site["savings"]["bytes"], site["savings"]["time"]))
+
+
+
+# Print the most frequent redundant transactions.
+def print_top(findings, count):
+    groups = {}
+    for category, entry in findings:
+        key = (category, entry["site"], device_key(entry), tuple(entry["wr"]))
+        groups[key] = groups.get(key, 0) + 1
+    print("Most frequent redundant transactions:")
+    for (category, site, (port, mux, addr), wr), cnt in sorted(groups.items(), key=lambda item: item[1], reverse=True)[:count]:
+        muxStr = "".join("0x{0:02x}[0x{1:02x}]/".format(muxAddr, muxValue) for muxAddr, muxValue in mux)
+        print("  {0:6d}x {1:16s} {2:24s} port {3:d} {4:s}0x{5:02x} wr [{6:s}]".format(
+              cnt, category, site or "(unknown)", port, muxStr, addr, " ".join("0x{0:02x}".format(datum) for datum in wr)))
+
+
+
+# ===================================================================
+# Analyze the trace.
+# ===================================================================
+
+if __name__ == "__main__":
+    # Command line arguments.
+    import argparse
+    parser = argparse.ArgumentParser(description='Find redundant I2C transactions in a trace of pyMcuCm.py.')
+    parser.add_argument('traceFile', action='store', type=str,
+                        metavar='TRACE_FILE',
+                        help='Trace file recorded with `pyMcuCm.py -T TRACE_FILE\'.')
+    parser.add_argument('-n', '--top', action='store', type=int,
+                        dest='top', default=10, metavar='COUNT',
+                        help='Number of the most frequent redundant transactions to show. The default is 10.')
+    parser.add_argument('-w', '--window', action='store', type=float,
+                        dest='window', default=1.0, metavar='SECONDS',
+                        help='Time window in seconds, within which an unchanged re-read in the same invocation of a call site counts as redundant. The default is 1 s.')
+    parser.add_argument('-j', '--json', action='store_true',
+                        dest='json', default=False,
+                        help='Print the summary per call site as a JSON document.')
+    args = parser.parse_args()
+
+    ret, entries = load_trace(args.traceFile)
+    if ret:
+        sys.exit(ret)
+    findings = analyze(entries, args.window)
+    summary = summarize(entries, findings)
+
+    if args.json:
+        print(json.dumps({"transactions": len(entries), "sites": summary}, sort_keys=True))
+    else:
+        print("I2C transaction trace `{0:s}': {1:d} transactions.".format(args.traceFile, len(entries)))
+        print()
+        print_summary(summary)
+        if findings and args.top > 0:
+            print()
+            print_top(findings, args.top)
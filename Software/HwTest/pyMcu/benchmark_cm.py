@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+#
+# File: benchmark_cm.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 19 Oct 2026
+# Rev.: 19 Oct 2026
+#
+# Python script to benchmark the high-level operations of the ATLAS MDT
+# Trigger Processor (TP) Command Module (CM) against a simulated MCU.
+#
+# Hints:
+# - Every operation is a pyMcuCm.py command. It runs in a fresh session, like
+#   a single call of pyMcuCm.py, on a simulated MCU with timing models of the
+#   UART and of the I2C master ports (see hw/McuSim.py). The I2C devices of
+#   the simulated MCU are taken from the device definitions of MdtTp_CM.
+# - Reported per operation: wall clock time (median of all runs), MCU round
+#   trips (ASCII commands and binary frames), bytes sent to and received from
+#   the MCU, and I2C transactions as seen by the MCU.
+# - The results can be stored as JSON (-o) and compared with the results of
+#   another commit (-c). The round trips, bytes and I2C transactions are
+#   deterministic, so any increase is reported as regression. The wall clock
+#   time is reported as regression if it exceeds the threshold.
+#
+
+
+
+# Append hardware classes folder to Python path.
+import os
+import sys
+sys.path.append(os.path.relpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), 'hw')))
+
+
+
+# System modules.
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import time
+
+
+
+# Command Module commands and simulated MCU.
+import pyMcuCm
+from hw import MdtTp_CM
+from hw import McuSim
+
+
+
+# Message prefixes and separators.
+prefixError             = "ERROR: {0:s}: ".format(__file__)
+
+# Path of the script.
+scriptDir = os.path.dirname(os.path.realpath(__file__))
+
+# Operations to benchmark: name, command and parameters.
+operationsDefault = [
+    ["status",                  "status",                   []],
+    ["mon_temp",                "mon_temp",                 []],
+    ["power_detail",            "power_detail",             []],
+    ["pm_status",               "pm_status",                []],
+    ["ff_status",               "ff_status",                []],
+    ["clk_setup",               "clk_setup",                ["IC1", os.path.join(scriptDir, "config", "clock", "Pro_Design",
+                                                             "IC1_0x68_100IN0_100_100_100_100_100_100_100_100_NA_FB-Registers.txt")]],
+    ["clk_status_regs",         "clk_status_regs",          []],
+    ["i2c_detect",              "i2c_detect",               []],
+    ["i2c_io_exp_init",         "i2c_io_exp_init",          []],
+    ["i2c_io_exp_status",       "i2c_io_exp_status",        []],
+    ["i2c_io_exp_get_input",    "i2c_io_exp_get_input",     []],
+    ["i2c_io_exp_get_output",   "i2c_io_exp_get_output",    []],
+    ["i2c_io_exp_set_output",   "i2c_io_exp_set_output",    ["CLK_EXT_DBG_CLEAN_FRQTBL", "0"]],
+]
+
+# Counters, whose increase is reported as regression.
+countersRegression = ["round_trips", "bytes_out", "bytes_in", "i2c_transactions"]
+
+
+
+# Get the I2C devices defined by the Command Module: a list of the port,
+# the slave address and whether it is a multiplexer.
+def get_devices():
+    with contextlib.redirect_stdout(io.StringIO()):
+        mdtTp_CM = MdtTp_CM.MdtTp_CM("", 0)
+        mdtTp_CM.define_hw_all()
+    devices = set()
+    for value in vars(mdtTp_CM).values():
+        for obj in value if isinstance(value, list) else [value]:
+            if hasattr(obj, "mcuI2C") and hasattr(obj, "slaveAddr"):
+                devices.add((obj.mcuI2C.port, obj.slaveAddr & 0x7f))
+    muxes = set((mcuI2C.port, slaveAddr) for mcuI2C in mdtTp_CM.mcuI2C if mcuI2C for slaveAddr in mcuI2C.muxAddrs)
+    return [[port, slaveAddr, (port, slaveAddr) in muxes] for port, slaveAddr in sorted(devices | muxes)]
+
+
+
+# Run an operation once in a fresh session on a simulated MCU. Returns the
+# status, the wall clock time, the counters of the simulated MCU and the
+# error message of an exception raised by the operation.
+def run_operation(command, parameters, devices, settings):
+    mcuSim = McuSim.McuSim()
+    mcuSim.i2cClock = settings["i2c_clock"]
+    for port, slaveAddr, mux in devices:
+        mcuSim.device_add(port, slaveAddr, mux)
+    output = io.StringIO()
+    error = ""
+    timeStart = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        try:
+            mdtTp_CM = MdtTp_CM.MdtTp_CM("", 0)
+            mdtTp_CM.mcuSer.attach(mcuSim)
+            if settings["baud_rate"]:
+                mdtTp_CM.mcuSer.baud_switch(settings["baud_rate"])
+            if settings["no_echo"]:
+                mdtTp_CM.mcuSer.echo_set(False)
+            if settings["binary"]:
+                mdtTp_CM.mcuSer.bin_enable(True)
+            mcuSim.reset_counters()
+            timeStart = time.perf_counter()
+            ret = pyMcuCm.run_command(mdtTp_CM, command, parameters)
+        # Record the failure and continue with the next operation, so that a
+        # comparable document is always written.
+        except Exception as e:
+            ret = -1
+            error = "{0:s}: {1:s}".format(type(e).__name__, str(e))
+        wallTime = time.perf_counter() - timeStart
+    values = {"round_trips": mcuSim.cmdCount + mcuSim.frameCount,
+              "commands": mcuSim.cmdCount,
+              "frames": mcuSim.frameCount,
+              "bytes_out": mcuSim.bytesRx,
+              "bytes_in": mcuSim.bytesTx,
+              "i2c_transactions": mcuSim.i2cTransCount,
+              "i2c_nacks": mcuSim.i2cNackCount,
+              "i2c_bytes": mcuSim.i2cBytes,
+              "i2c_time": mcuSim.i2cTime}
+    return ret, wallTime, values, error
+
+
+
+# Get the commit of the working tree, if available.
+def get_commit():
+    try:
+        result = subprocess.run(["git", "-C", scriptDir, "rev-parse", "--short", "HEAD"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError:
+        return ""
+    return result.stdout.decode("utf-8").strip() if not result.returncode else ""
+
+
+
+# Print the results of all operations.
+def print_results(doc):
+    print("{0:24s} {1:>6s} {2:>10s} {3:>8s} {4:>9s} {5:>9s} {6:>8s} {7:>10s}".format(
+          "Operation", "Status", "Wall [ms]", "Trips", "Out [B]", "In [B]", "I2C", "I2C [ms]"))
+    for name, op in doc["operations"].items():
+        print("{0:24s} {1:>6s} {2:10.1f} {3:8d} {4:9d} {5:9d} {6:8d} {7:10.1f}".format(
+              name, "ok" if not op["status"] else "FAILED", op["wall_time"] * 1e3, op["round_trips"],
+              op["bytes_out"], op["bytes_in"], op["i2c_transactions"], op["i2c_time"] * 1e3))
+    for name, op in doc["operations"].items():
+        if op["error"]:
+            print(prefixError + "Operation `{0:s}' failed: {1:s}".format(name, op["error"]))
+
+
+
+# Compare the results with a baseline. Returns the names of the operations
+# with regressions.
+def compare(doc, baseline, threshold):
+    print("Comparison with the baseline of commit `{0:s}' from {1:s}:".format(
+          baseline.get("commit", "") or "unknown", time.strftime("%d %b %Y %H:%M:%S", time.localtime(baseline.get("timestamp", 0)))))
+    if baseline.get("settings") != doc["settings"]:
+        print("WARNING: The settings differ from the baseline: {0:s}".format(json.dumps(baseline.get("settings"))))
+    print("{0:24s} {1:>10s} {2:>10s} {3:>8s} {4:>13s} {5:>17s} {6:>11s}  {7:s}".format(
+          "Operation", "Base [ms]", "Wall [ms]", "Delta", "Trips", "Bytes", "I2C", "Result"))
+    regressions = []
+    for name, op in doc["operations"].items():
+        base = baseline.get("operations", {}).get(name)
+        if not base:
+            print("{0:24s} (not in the baseline)".format(name))
+            continue
+        delta = (op["wall_time"] - base["wall_time"]) / base["wall_time"] * 100 if base["wall_time"] else 0.0
+        increased = [counter for counter in countersRegression if op[counter] > base.get(counter, 0)]
+        regression = delta > threshold or increased or (op["status"] and not base["status"])
+        if regression:
+            regressions.append(name)
+        print("{0:24s} {1:10.1f} {2:10.1f} {3:+7.1f}% {4:>13s} {5:>17s} {6:>11s}  {7:s}".format(
+              name, base["wall_time"] * 1e3, op["wall_time"] * 1e3, delta,
+              "{0:d}->{1:d}".format(base["round_trips"], op["round_trips"]),
+              "{0:d}->{1:d}".format(base["bytes_out"] + base["bytes_in"], op["bytes_out"] + op["bytes_in"]),
+              "{0:d}->{1:d}".format(base["i2c_transactions"], op["i2c_transactions"]),
+              "REGRESSION" + (" (" + ", ".join(increased) + ")" if increased else "") if regression else "ok"))
+    return regressions
+
+
+
+# ===================================================================
+# Run the benchmark.
+# ===================================================================
+
+if __name__ == "__main__":
+    # Command line arguments.
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark the high-level operations of the Command Module against a simulated MCU.')
+    parser.add_argument('-O', '--operations', action='store', type=str, nargs='+',
+                        dest='operations', default=None, metavar='OPERATION',
+                        help='Operations to benchmark, e.g. "status" or "clk_setup IC1 FILE". The default are all operations.')
+    parser.add_argument('-n', '--runs', action='store', type=int,
+                        dest='runs', default=3, metavar='RUNS',
+                        help='Number of runs per operation. The wall clock time is the median. The default is 3.')
+    parser.add_argument('-o', '--output', action='store', type=str,
+                        dest='outputFile', default=None, metavar='OUTPUT_FILE',
+                        help='Store the results as JSON document in this file.')
+    parser.add_argument('-c', '--compare', action='store', type=str,
+                        dest='baselineFile', default=None, metavar='BASELINE_FILE',
+                        help='Compare the results with a JSON document stored before with -o, e.g. of another commit.')
+    parser.add_argument('-t', '--threshold', action='store', type=float,
+                        dest='threshold', default=10.0, metavar='PERCENT',
+                        help='Increase of the wall clock time reported as regression in percent. The default is 10.')
+    parser.add_argument('-b', '--binary', action='store_true',
+                        dest='binary', default=False,
+                        help='Use the binary frame mode of the MCU for I2C accesses.')
+    parser.add_argument('-e', '--no-echo', action='store_true',
+                        dest='noEcho', default=False,
+                        help='Disable the echo of the MCU console.')
+    parser.add_argument('-r', '--baud-rate', action='store', type=int,
+                        dest='baudRate', default=None, metavar='BAUD_RATE',
+                        help='Switch the MCU UART to this baud rate. The default is {0:d}.'.format(MdtTp_CM.McuSerial.McuSerial.mcuBaudDefault))
+    parser.add_argument('-i', '--i2c-clock', action='store', type=int,
+                        dest='i2cClock', default=McuSim.McuSim.i2cClock, metavar='FREQUENCY',
+                        help='I2C clock frequency of the simulated MCU in Hz. The default is {0:d}.'.format(McuSim.McuSim.i2cClock))
+    parser.add_argument('-j', '--json', action='store_true',
+                        dest='json', default=False,
+                        help='Print the results as JSON document instead of a table.')
+    args = parser.parse_args()
+
+    if args.runs < 1:
+        print(prefixError + "At least one run per operation is required!")
+        sys.exit(-1)
+    operations = operationsDefault
+    if args.operations:
+        operations = []
+        for operationStr in args.operations:
+            tokens = operationStr.split()
+            if tokens[0] not in pyMcuCm.commands:
+                print(prefixError + "Command `{0:s}' not supported!".format(tokens[0]))
+                sys.exit(-1)
+            operations.append([operationStr, tokens[0], tokens[1:]])
+    baseline = None
+    if args.baselineFile:
+        try:
+            with open(args.baselineFile, "r") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(prefixError + "Cannot read the baseline file `{0:s}': {1:s}".format(args.baselineFile, str(e)))
+            sys.exit(-1)
+
+    settings = {"baud_rate": args.baudRate or MdtTp_CM.McuSerial.McuSerial.mcuBaudDefault,
+                "i2c_clock": args.i2cClock,
+                "binary": args.binary,
+                "no_echo": args.noEcho}
+    doc = {"timestamp": time.time(),
+           "commit": get_commit(),
+           "python": platform.python_version(),
+           "runs": args.runs,
+           "settings": settings,
+           "operations": {}}
+    if not args.json:
+        print("Benchmark of {0:d} operation(s) with {1:d} run(s) each on a simulated MCU.".format(len(operations), args.runs))
+    devices = get_devices()
+    for name, command, parameters in operations:
+        wallTimes = []
+        for i in range(args.runs):
+            ret, wallTime, values, error = run_operation(command, parameters, devices, settings)
+            wallTimes.append(wallTime)
+        doc["operations"][name] = dict({"command": command,
+                                        "parameters": parameters,
+                                        "status": ret,
+                                        "error": error,
+                                        "wall_time": sorted(wallTimes)[len(wallTimes) // 2],
+                                        "wall_times": wallTimes}, **values)
+
+    if args.json:
+        print(json.dumps(doc, sort_keys=True))
+    else:
+        print_results(doc)
+    if args.outputFile:
+        try:
+            with open(args.outputFile, "w") as f:
+                json.dump(doc, f, indent=2, sort_keys=True)
+        except OSError as e:
+            print(prefixError + "Cannot write the output file `{0:s}': {1:s}".format(args.outputFile, str(e)))
+            sys.exit(-1)
+    ret = 0
+    if baseline:
+        if not args.json:
+            print()
+        with contextlib.redirect_stdout(sys.stderr if args.json else sys.stdout):
+            regressions = compare(doc, baseline, args.threshold)
+        ret = 1 if regressions else 0
+    if any(op["status"] for op in doc["operations"].values()):
+        ret = -1
+    sys.exit(ret)
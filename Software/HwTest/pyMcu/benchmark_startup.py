@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+#
+# File: benchmark_startup.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 19 Oct 2026
+# Rev.: 19 Oct 2026
+#
+# Python script to benchmark the start-up time of pyMcuCm.py for the most
+# common single commands.
+#
+# Hints:
+# - By default, the MCU access is simulated (empty serial device string), so
+#   that only the overhead of the Python interpreter, the imports and the
+#   definition of the hardware is measured.
+# - The start-up phases (import of MdtTp_CM, definition of the Command Module
+#   object, definition of all device groups) are measured separately in a
+#   fresh interpreter.
+#
+
+
+
+import os
+import subprocess
+import sys
+import time
+
+
+
+# Path of the pyMcuCm.py script and of the hardware classes.
+scriptDir = os.path.dirname(os.path.realpath(__file__))
+pyMcuCm = os.path.join(scriptDir, "pyMcuCm.py")
+
+# Most common single commands with their parameters.
+commandsDefault = [
+    ["power_up"],
+    ["power_check"],
+    ["mcu_cmd_raw", "info"],
+    ["sn"],
+    ["mon_temp"],
+    ["i2c_io_exp_get_input", "CLK_FF_79_0_LOLb"],
+    ["clk_status"],
+    ["status"],
+]
+
+# Script measuring the start-up phases in a fresh interpreter.
+phasesScript = """
+import sys, time
+timeStart = time.time()
+sys.path.insert(0, {hwDir!r})
+import MdtTp_CM
+timeImport = time.time()
+mdtTp_CM = MdtTp_CM.MdtTp_CM({device!r}, 0)
+timeDefine = time.time()
+mdtTp_CM.define_hw_all()
+timeDefineAll = time.time()
+print(timeImport - timeStart, timeDefine - timeImport, timeDefineAll - timeDefine)
+"""
+
+
+
+# Run a command and return the wall clock time in seconds.
+def run_timed(cmd):
+    timeStart = time.time()
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return time.time() - timeStart, result
+
+
+
+# Print the statistics of a list of times.
+def print_stats(name, times):
+    times = sorted(times)
+    print("{0:55s}: min {1:7.1f} ms, median {2:7.1f} ms, max {3:7.1f} ms".format(
+        name, times[0] * 1e3, times[len(times) // 2] * 1e3, times[-1] * 1e3))
+
+
+
+# ===================================================================
+# Run the benchmark.
+# ===================================================================
+
+if __name__ == "__main__":
+    # Command line arguments.
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark the start-up time of pyMcuCm.py.')
+    parser.add_argument('-d', '--device', action='store', type=str,
+                        dest='serialDevice', default='', metavar='SERIAL_DEVICE',
+                        help='Serial device to access the MCU. The default is simulated access ("").')
+    parser.add_argument('-n', '--runs', action='store', type=int,
+                        dest='runs', default=10, metavar='RUNS',
+                        help='Number of runs per command. The default is 10.')
+    parser.add_argument('-c', '--commands', action='store', type=str, nargs='+',
+                        dest='commands', default=None, metavar='COMMAND',
+                        help='Commands to benchmark, e.g. "mcu_cmd_raw info". The default are the most common commands.')
+    args = parser.parse_args()
+
+    commands = [c.split() for c in args.commands] if args.commands else commandsDefault
+    print("Start-up time of pyMcuCm.py, {0:d} runs each, serial device `{1:s}':".format(args.runs, args.serialDevice))
+
+    # Bare interpreter start-up for reference.
+    times = [run_timed([sys.executable, "-c", "pass"])[0] for i in range(args.runs)]
+    print_stats("Python interpreter only", times)
+
+    # Start-up phases.
+    phases = [[], [], []]
+    for i in range(args.runs):
+        t, result = run_timed([sys.executable, "-c", phasesScript.format(hwDir=os.path.join(scriptDir, "hw"), device=args.serialDevice)])
+        if result.returncode:
+            print("ERROR: Measuring the start-up phases failed:")
+            print(result.stderr.decode("utf-8"))
+            sys.exit(1)
+        for phase, value in zip(phases, result.stdout.decode("utf-8").split()[-3:]):
+            phase.append(float(value))
+    print_stats("Import of MdtTp_CM", phases[0])
+    print_stats("Definition of MdtTp_CM", phases[1])
+    print_stats("Definition of all device groups", phases[2])
+
+    # Single commands.
+    for command in commands:
+        cmd = [sys.executable, pyMcuCm, "-d", args.serialDevice, "-v", "0", "-c", command[0]]
+        if len(command) > 1:
+            cmd += ["-p"] + command[1:]
+        times = [run_timed(cmd)[0] for i in range(args.runs)]
+        print_stats("pyMcuCm.py -c " + " ".join(command), times)
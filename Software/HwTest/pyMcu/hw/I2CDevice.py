@@ -2,13 +2,24 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 30 Apr 2020
-# Rev.: 08 Jun 2026
+# Rev.: 19 Oct 2026
 #
 # Python class implementing generic hardware access for I2C devices.
 #
+# Hints:
+# - The latency of every access is recorded in the statistics of the serial
+#   port (category `device'), so that the devices dominating the cycle time
+#   can be identified.
+# - Accesses consisting of several MCU commands, e.g. a write without stop
+#   condition followed by a read with repeated start, are executed as one
+#   transaction by the owner thread of the serial port if the thread-safe
+#   access is enabled. The drivers use owner_required and call for their own
+#   transactions, e.g. setting the page followed by reading a register.
+#
 
 
 
+import time
 import McuI2C
 
 
@@ -41,6 +52,28 @@ class I2CDevice:
 
 
 
+    # Record an access in the statistics of the serial port.
+    def stats_record(self, op, timeStart, ret, bytesOut, bytesIn):
+        self.mcuI2C.mcuSer.stats.record("device", self.deviceName, op, time.time() - timeStart,
+                                        bytesOut, bytesIn, error=ret != 0)
+        return 0
+
+
+
+    # Check if a transaction must be passed to the owner thread of the serial
+    # port.
+    def owner_required(self):
+        return self.mcuI2C.mcuSer.owner_required()
+
+
+
+    # Execute a transaction of several MCU commands in the owner thread of the
+    # serial port, so that it is not interleaved with accesses of other threads.
+    def call(self, func, *args):
+        return self.mcuI2C.mcuSer.call(func, *args)
+
+
+
     # Write data to the I2C device.
     def write(self, dataWr):
         if self.debugLevel >= 3:
@@ -49,7 +82,9 @@ class I2CDevice:
             for datum in dataWr:
                 print(" 0x{0:02x}".format(datum), end='')
             self.print_details()
+        timeStart = time.time()
         ret = self.mcuI2C.ms_write(self.slaveAddr, dataWr)
+        self.stats_record("write", timeStart, ret, len(dataWr), 0)
         if ret:
             self.errorCount += 1
             print(self.prefixErrorDevice + "Error writing data!", end='')
@@ -63,6 +98,8 @@ class I2CDevice:
 
     # Write data to the I2C device using burst mode, i.e. send a list of blocks in one chunk.
     def write_burst(self, burstDataWr):
+        if self.owner_required():
+            return self.call(self.write_burst, burstDataWr)
         if self.debugLevel >= 3:
             print(self.prefixDebugDevice + "Writing data.", end='')
             print(self.prefixDetails + "Data:", end='')
@@ -71,7 +108,9 @@ class I2CDevice:
                     print(" 0x{0:02x}".format(datum), end='')
                 print(",".format(datum), end='')
             self.print_details()
+        timeStart = time.time()
         ret = self.mcuI2C.ms_write_burst(self.slaveAddr, burstDataWr)
+        self.stats_record("write_burst", timeStart, ret, sum(len(block) for block in burstDataWr), 0)
         if ret:
             self.errorCount += 1
             print(self.prefixErrorDevice + "Error writing data in burst mode!", end='')
@@ -90,7 +129,9 @@ class I2CDevice:
         if self.debugLevel >= 3:
             print(self.prefixDebugDevice + "Reading data.", end='')
             self.print_details()
+        timeStart = time.time()
         ret, dataRd = self.mcuI2C.ms_read(self.slaveAddr, cnt)
+        self.stats_record("read", timeStart, ret, 0, len(dataRd))
         if ret or len(dataRd) <= 0:
             self.errorCount += 1
             print(self.prefixErrorDevice + "Error reading data!", end='')
@@ -111,6 +152,8 @@ class I2CDevice:
     # Write followed by a read with repeated start. This is required for SMBus
     # and PMBus read access.
     def write_read(self, dataWr, readCnt):
+        if self.owner_required():
+            return self.call(self.write_read, dataWr, readCnt)
         if self.debugLevel >= 3:
             print(self.prefixDebugDevice + "Writing data.", end='')
             print(self.prefixDetails + "Data:", end='')
@@ -118,8 +161,10 @@ class I2CDevice:
                 print(" 0x{0:02x}".format(datum), end='')
             self.print_details()
         # No repeated start, omit stop condition after write.
+        timeStart = time.time()
         ret = self.mcuI2C.ms_write_adv(self.slaveAddr, dataWr, False, False)
         if ret:
+            self.stats_record("write_read", timeStart, ret, len(dataWr), 0)
             self.errorCount += 1
             print(self.prefixErrorDevice + "Error writing data!", end='')
             self.print_details()
@@ -132,6 +177,7 @@ class I2CDevice:
             self.print_details()
         # Repeated start, generate stop condition after write.
         ret, dataRd = self.mcuI2C.ms_read_adv(self.slaveAddr, readCnt, True, True)
+        self.stats_record("write_read", timeStart, ret, len(dataWr), len(dataRd))
         if ret or len(dataRd) <= 0:
             self.errorCount += 1
             print(self.prefixErrorDevice + "Error reading data!", end='')
@@ -149,6 +195,68 @@ class I2CDevice:
 
 
 
+    # Write a command code and read a long data block with repeated start in
+    # one transaction. This is used for long SMBus and PMBus block reads.
+    # A count of 0 performs an SMBus block read, where the firmware reads the
+    # byte count first and then the number of data bytes given by it.
+    def read_long(self, cmdCode, cnt):
+        if self.debugLevel >= 3:
+            print(self.prefixDebugDevice + "Reading a block with command code 0x{0:02x}.".format(cmdCode), end='')
+            self.print_details()
+        timeStart = time.time()
+        ret, dataRd = self.mcuI2C.ms_read_long(self.slaveAddr, cmdCode, cnt)
+        self.stats_record("read_long", timeStart, ret, 1, len(dataRd))
+        if ret or len(dataRd) <= 0:
+            self.errorCount += 1
+            print(self.prefixErrorDevice + "Error reading block data!", end='')
+            self.print_details()
+            print(self.prefixErrorDevice + "Error code: {0:d}: ".format(ret))
+            return ret, dataRd
+        self.accessWrite += 1
+        self.bytesWritten += 1
+        self.accessRead += 1
+        self.bytesRead += len(dataRd)
+        if self.debugLevel >= 3:
+            print(self.prefixDebugDevice + "Data read:", end='')
+            for datum in dataRd:
+                print(" 0x{0:02x}".format(datum), end='')
+            print()
+        return 0, dataRd
+
+
+
+    # SMBus block read of a command. Returns the data bytes without the byte
+    # count.
+    def block_read(self, cmdCode):
+        ret, dataRd = self.read_long(cmdCode, 0)
+        if ret:
+            return ret, []
+        return 0, dataRd[1:]
+
+
+
+    # SMBus block write of a command. The byte count is added.
+    def block_write(self, cmdCode, data):
+        if self.debugLevel >= 3:
+            print(self.prefixDebugDevice + "Writing a block with command code 0x{0:02x}.".format(cmdCode), end='')
+            print(self.prefixDetails + "Data:", end='')
+            for datum in data:
+                print(" 0x{0:02x}".format(datum), end='')
+            self.print_details()
+        timeStart = time.time()
+        ret = self.mcuI2C.ms_block_write(self.slaveAddr, cmdCode, data)
+        self.stats_record("block_write", timeStart, ret, len(data) + 2, 0)
+        if ret:
+            self.errorCount += 1
+            print(self.prefixErrorDevice + "Error writing block data!", end='')
+            self.print_details()
+            return ret
+        self.accessWrite += 1
+        self.bytesWritten += len(data) + 2
+        return 0
+
+
+
     # Print details.
     def print_details(self):
         print(self.prefixDetails, end='')
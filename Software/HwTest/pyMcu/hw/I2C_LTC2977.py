@@ -2,7 +2,7 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 15 Jun 2020
-# Rev.: 09 Sep 2022
+# Rev.: 19 Oct 2026
 #
 # Python class for communicating with the LTC2977 8-channel PMBus power system
 # manager IC.
@@ -15,10 +15,12 @@
 
 import McuI2C
 import I2CDevice
+import PmbusCodec
+import PmbusDevice
 
 
 
-class I2C_LTC2977:
+class I2C_LTC2977(PmbusDevice.PmbusDevice):
 
     # Message prefixes and separators.
     prefixDetails       = " - "
@@ -36,16 +38,50 @@ class I2C_LTC2977:
     hwCmdCodeClearFaults    = 0x03
     hwCmdCodeWriteProtect   = 0x10
     hwCmdCodeReadVin        = 0x88
+    hwCmdCodeMfrId          = 0x99
+    hwCmdCodeMfrModel       = 0x9a
     hwCmdCodeReadVout       = 0x8b
     hwCmdCodeReadTemp       = 0x8d
     hwCmdCodeMfrConfigChan  = 0xd0
+    hwCmdCodeMfrVoutPeak    = 0xdd
+    hwCmdCodeMfrVinPeak     = 0xde
+    hwCmdCodeMfrTempPeak    = 0xdf
+    hwCmdCodeMfrClearPeaks  = 0xe3
     hwCmdCodeMfrPageFfMask  = 0xe4
+    hwCmdCodeMfrFaultLogClear = 0xec
+    hwCmdCodeMfrFaultLogStatus = 0xed
+    hwCmdCodeMfrFaultLog    = 0xee
+    hwCmdCodeMfrVoutMin     = 0xfb
+    hwCmdCodeMfrVinMin      = 0xfc
+    hwCmdCodeMfrTempMin     = 0xfd
     hwDataLenMin            = 1
     hwDataLenMax            = 2
     hwPageMin               = 0     # Lowest hardware channel/page number.
     hwPageMax               = 7     # Highest hardware channel/page number.
     hwPage                  = 0     # Current hardware channel/page number.
     hwChannels              = 8
+    hwVoutModeExponent      = -13   # VOUT_MODE exponent of the L16 output voltages.
+    hwMfrConfigHighRes      = 0x1 << 9  # High resolution output voltage of odd channels in MFR_CONFIG_LTC2977.
+    hwFaultLogLen           = 255   # Number of data bytes of MFR_FAULT_LOG.
+    hwFaultLogPresent       = 0x01  # Fault log present bit in MFR_FAULT_LOG_STATUS.
+    hwFaultLogTimeLsb       = 200e-6    # LSB of the fault log time stamp in seconds.
+    # Layout of the fault log (see datasheet, MFR_FAULT_LOG data format). Words
+    # are sent high byte first. The header is followed by the cyclic data of
+    # the last ADC loops.
+    hwFaultLogPosPosition   = 0     # Position of the loop at the time of the fault.
+    hwFaultLogPosTime       = 1     # 48-bit time stamp.
+    hwFaultLogPosVoutPeak   = 7     # MFR_VOUT_PEAK of the channels.
+    hwFaultLogPosVinPeak    = 23
+    hwFaultLogPosTempPeak   = 25
+    hwFaultLogPosVoutMin    = 27    # MFR_VOUT_MIN of the channels.
+    hwFaultLogPosVinMin     = 43
+    hwFaultLogPosTempMin    = 45
+    hwFaultLogHeaderLen     = 47
+    hwFaultLogLoopPosVout   = 0     # READ_VOUT of the channels.
+    hwFaultLogLoopPosVin    = 16
+    hwFaultLogLoopPosTemp   = 18
+    hwFaultLogLoopPosStatusVout = 20    # STATUS_VOUT of the channels.
+    hwFaultLogLoopLen       = 28
 
 
 
@@ -77,14 +113,38 @@ class I2C_LTC2977:
             cmdName = "WRITE_PROTECT"
         elif cmdCode == cls.hwCmdCodeReadVin:
             cmdName = "READ_VIN"
+        elif cmdCode == cls.hwCmdCodeMfrId:
+            cmdName = "MFR_ID"
+        elif cmdCode == cls.hwCmdCodeMfrModel:
+            cmdName = "MFR_MODEL"
         elif cmdCode == cls.hwCmdCodeReadVout:
             cmdName = "READ_VOUT"
         elif cmdCode == cls.hwCmdCodeReadTemp:
             cmdName = "READ_TEMPERATURE_1"
         elif cmdCode == cls.hwCmdCodeMfrConfigChan:
             cmdName = "MFR_CONFIG_LTC2977"
+        elif cmdCode == cls.hwCmdCodeMfrVoutPeak:
+            cmdName = "MFR_VOUT_PEAK"
+        elif cmdCode == cls.hwCmdCodeMfrVinPeak:
+            cmdName = "MFR_VIN_PEAK"
+        elif cmdCode == cls.hwCmdCodeMfrTempPeak:
+            cmdName = "MFR_TEMPERATURE_PEAK"
+        elif cmdCode == cls.hwCmdCodeMfrClearPeaks:
+            cmdName = "MFR_CLEAR_PEAKS"
         elif cmdCode == cls.hwCmdCodeMfrPageFfMask:
             cmdName = "MFR_PAGE_FF_MASK"
+        elif cmdCode == cls.hwCmdCodeMfrFaultLogClear:
+            cmdName = "MFR_FAULT_LOG_CLEAR"
+        elif cmdCode == cls.hwCmdCodeMfrFaultLogStatus:
+            cmdName = "MFR_FAULT_LOG_STATUS"
+        elif cmdCode == cls.hwCmdCodeMfrFaultLog:
+            cmdName = "MFR_FAULT_LOG"
+        elif cmdCode == cls.hwCmdCodeMfrVoutMin:
+            cmdName = "MFR_VOUT_MIN"
+        elif cmdCode == cls.hwCmdCodeMfrVinMin:
+            cmdName = "MFR_VIN_MIN"
+        elif cmdCode == cls.hwCmdCodeMfrTempMin:
+            cmdName = "MFR_TEMPERATURE_MIN"
         elif cmdCode <= 0xfd:
             cmdName = "unknown"
         else:
@@ -219,29 +279,27 @@ class I2C_LTC2977:
     # Calculate a float value from an L11 (Linear_5s_11s) value.
     @classmethod
     def l11_to_float(cls, b):
-        # PMBus data field b[15:0]
-        # Value = Y * 2**N
-        # where N = b[15:11] is a 5-bit two’s complement integer
-        #   and Y = b[10:0] is an 11-bit two’s complement integer.
-        n = (b >> 11) & 0x1f
-        if n & 0x10:
-            n = -((~n & 0xf) + 1)
-        y = b & 0x7ff
-        if y & 0x400:
-            y = -((~y & 0x3ff) + 1)
-        return float(y * 2**n)
+        return PmbusCodec.PmbusCodec.l11_to_float(b)
 
 
 
     # Calculate a float value from an L16 (Linear_16u) value.
     @classmethod
     def l16_to_float(cls, b):
-        # PMBus data field b[15:0]
-        # Value = Y * 2**N
-        # where Y = b[15:0] is an unsigned integer
-        #   and N = Vout_mode_parameter is a 5-bit two’s complement exponent that is hardwired to –13 decimal.
-        y = b & 0xffff
-        return float(y * 2**(-13))
+        return PmbusCodec.PmbusCodec.l16_to_float(b, cls.hwVoutModeExponent)
+
+
+
+    # Decode an array of raw output voltage words of the channels in one
+    # step. Odd channels with the high resolution bit set in their
+    # configuration register are L11 encoded in mV, all others are L16
+    # encoded.
+    @classmethod
+    def vout_decode(cls, words, channels, mfrConfigs):
+        l11 = PmbusCodec.PmbusCodec.l11_decode(words)
+        l16 = PmbusCodec.PmbusCodec.l16_decode(words, cls.hwVoutModeExponent)
+        return [l11[i] / 1000 if channel & 0x1 and mfrConfig & cls.hwMfrConfigHighRes else l16[i]
+                for i, (channel, mfrConfig) in enumerate(zip(channels, mfrConfigs))]
 
 
 
@@ -277,6 +335,8 @@ class I2C_LTC2977:
 
     # Switch off all power channles simultaneously.
     def power_off_all(self):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.power_off_all)
         # Save the current write protection level.
         ret, wpSave = self.read_wp()
         # Set the write protection level to 2.
@@ -299,6 +359,8 @@ class I2C_LTC2977:
 
     # Switch on all power channles simultaneously.
     def power_on_all(self):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.power_on_all)
         # Save the current write protection level.
         ret, wpSave = self.read_wp()
         # Set the write protection level to 2.
@@ -333,20 +395,30 @@ class I2C_LTC2977:
 
     # Read the most recent ADC measured value of the channel's output voltage.
     def read_vout(self, channel):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.read_vout, channel)
         if self.set_page(channel):
             self.errorCount += 1
             return -1, float(-1)
         # Read the channel specific configuration register.
         ret, mfrConfig = self.read_mfr_config(channel)
-        # Read the VOUT value.
-        ret, data = self.read(self.hwCmdCodeReadVout, 2)
+        if ret:
+            return -1, float(-1)
+        return self.read_vout_reg(channel, mfrConfig, self.hwCmdCodeReadVout)
+
+
+
+    # Read an output voltage register (READ_VOUT, MFR_VOUT_PEAK, MFR_VOUT_MIN)
+    # of the channel. The page must already be set to the channel.
+    def read_vout_reg(self, channel, mfrConfig, cmdCode):
+        ret, data = self.read(cmdCode, 2)
         if ret:
             self.errorCount += 1
-            print(self.prefixErrorDevice + "Error reading the output voltage of channel {0:d}. Error code: 0x{1:02x}: ".format(channel, ret))
+            print(self.prefixErrorDevice + "Error reading the {0:s} output voltage of channel {1:d}. Error code: 0x{2:02x}: ".format(self.cmd_to_name(cmdCode), channel, ret))
             return -1, float(-1)
         voutRaw = (data[1] << 8) + data[0]
         # High resolution only for odd channels and only if bit 9 of the configuration register of the channel is set.
-        if channel & 0x1 == 0x1 and mfrConfig & (0x1 << 9):
+        if channel & 0x1 == 0x1 and mfrConfig & self.hwMfrConfigHighRes:
             return 0, self.l11_to_float(voutRaw) / 1000     # This value is in mV!
         return 0, self.l16_to_float(voutRaw)
 
@@ -364,8 +436,154 @@ class I2C_LTC2977:
 
 
 
+    # Read a raw word register. The page must already be set for paged
+    # registers.
+    def read_word(self, cmdCode):
+        ret, data = self.read(cmdCode, 2)
+        if ret:
+            self.errorCount += 1
+            print(self.prefixErrorDevice + "Error reading {0:s}. Error code: 0x{1:02x}: ".format(self.cmd_to_name(cmdCode), ret))
+            return -1, 0xffff
+        return 0, (data[1] << 8) + data[0]
+
+
+
+    # Read an L11 encoded value of a non-paged register.
+    def read_l11(self, cmdCode):
+        ret, data = self.read(cmdCode, 2)
+        if ret:
+            self.errorCount += 1
+            print(self.prefixErrorDevice + "Error reading {0:s}. Error code: 0x{1:02x}: ".format(self.cmd_to_name(cmdCode), ret))
+            return -1, float(-1)
+        return 0, self.l11_to_float((data[1] << 8) + data[0])
+
+
+
+    # Clear the peak and min values of all channels (MFR_CLEAR_PEAKS).
+    def clear_peaks(self):
+        return self.send_byte(self.hwCmdCodeMfrClearPeaks)
+
+
+
+    # Read the peak and min values captured by the hardware since the last
+    # clear and optionally clear them afterwards. Transients between reading
+    # and clearing are not captured. The raw words are converted in one step.
+    # Returns [temperature peak, temperature min, vin peak, vin min,
+    #          vout peak[channels], vout min[channels]].
+    def read_peaks(self, clear):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.read_peaks, clear)
+        words = []
+        for cmdCode in [self.hwCmdCodeMfrTempPeak, self.hwCmdCodeMfrTempMin, self.hwCmdCodeMfrVinPeak, self.hwCmdCodeMfrVinMin]:
+            ret, word = self.read_word(cmdCode)
+            if ret:
+                return -1, [-1]
+            words.append(word)
+        voutWords = []
+        mfrConfigs = []
+        for channel in range(self.hwChannels):
+            # Set the page and read the configuration only once per channel.
+            ret, mfrConfig = self.read_mfr_config(channel)
+            if ret:
+                return -1, [-1]
+            mfrConfigs.append(mfrConfig)
+            for cmdCode in [self.hwCmdCodeMfrVoutPeak, self.hwCmdCodeMfrVoutMin]:
+                ret, word = self.read_word(cmdCode)
+                if ret:
+                    return -1, [-1]
+                voutWords.append(word)
+        if clear and self.clear_peaks():
+            self.errorCount += 1
+            return -1, [-1]
+        # Convert the raw words. Peak and min values alternate per channel.
+        values = PmbusCodec.PmbusCodec.l11_decode(words)
+        channels = [channel for channel in range(self.hwChannels) for i in range(2)]
+        vout = self.vout_decode(voutWords, channels, [mfrConfigs[channel] for channel in channels])
+        return 0, values + [vout[0::2], vout[1::2]]
+
+
+
+    # Read the fault log status. Bit 0 is set if a fault log is present.
+    def read_fault_log_status(self):
+        ret, data = self.read(self.hwCmdCodeMfrFaultLogStatus, 1)
+        if ret:
+            self.errorCount += 1
+            print(self.prefixErrorDevice + "Error reading the fault log status. Error code: 0x{0:02x}: ".format(ret))
+            return -1, 0xff
+        return 0, data[0]
+
+
+
+    # Clear the fault log (MFR_FAULT_LOG_CLEAR).
+    def clear_fault_log(self):
+        return self.send_byte(self.hwCmdCodeMfrFaultLogClear)
+
+
+
+    # Read the raw fault log with one SMBus block read.
+    def read_fault_log(self):
+        ret, data = self.read_block(self.hwCmdCodeMfrFaultLog)
+        if ret:
+            return -1, []
+        if len(data) != self.hwFaultLogLen:
+            self.errorCount += 1
+            print(self.prefixErrorDevice + "Error reading the fault log: {0:d} bytes received, but {1:d} expected!".format(len(data), self.hwFaultLogLen))
+            return -1, []
+        return 0, data
+
+
+
+    # Decode a raw fault log. The channel configuration registers are
+    # required to decode the output voltages. All values are converted in one
+    # step. The loops are returned with the latest one first.
+    @classmethod
+    def fault_log_decode(cls, data, mfrConfigs):
+        def words(pos, cnt):
+            return [(data[pos + 2 * i] << 8) + data[pos + 2 * i + 1] for i in range(cnt)]
+        loopNum = (len(data) - cls.hwFaultLogHeaderLen) // cls.hwFaultLogLoopLen
+        position = data[cls.hwFaultLogPosPosition]
+        # Collect the words to decode.
+        voutWords = words(cls.hwFaultLogPosVoutPeak, cls.hwChannels) + words(cls.hwFaultLogPosVoutMin, cls.hwChannels)
+        l11Words = words(cls.hwFaultLogPosVinPeak, 1) + words(cls.hwFaultLogPosTempPeak, 1) + \
+                   words(cls.hwFaultLogPosVinMin, 1) + words(cls.hwFaultLogPosTempMin, 1)
+        statusVout = []
+        for i in range(loopNum):
+            # Latest loop first.
+            pos = cls.hwFaultLogHeaderLen + ((position - i) % loopNum) * cls.hwFaultLogLoopLen
+            voutWords += words(pos + cls.hwFaultLogLoopPosVout, cls.hwChannels)
+            l11Words += words(pos + cls.hwFaultLogLoopPosVin, 1) + words(pos + cls.hwFaultLogLoopPosTemp, 1)
+            statusVout.append(data[pos + cls.hwFaultLogLoopPosStatusVout:pos + cls.hwFaultLogLoopPosStatusVout + cls.hwChannels])
+        # Convert all values in one step.
+        channels = list(range(cls.hwChannels)) * (2 + loopNum)
+        vout = cls.vout_decode(voutWords, channels, [mfrConfigs[channel] for channel in channels])
+        l11 = PmbusCodec.PmbusCodec.l11_decode(l11Words)
+        faultLog = {
+            "position":     position,
+            "time":         int.from_bytes(bytes(data[cls.hwFaultLogPosTime:cls.hwFaultLogPosTime + 6]), "big") * cls.hwFaultLogTimeLsb,
+            "voutPeak":     vout[0:cls.hwChannels],
+            "voutMin":      vout[cls.hwChannels:2 * cls.hwChannels],
+            "vinPeak":      l11[0],
+            "tempPeak":     l11[1],
+            "vinMin":       l11[2],
+            "tempMin":      l11[3],
+            "loops":        [],
+        }
+        for i in range(loopNum):
+            pos = (2 + i) * cls.hwChannels
+            faultLog["loops"].append({
+                "vout":         vout[pos:pos + cls.hwChannels],
+                "vin":          l11[4 + 2 * i],
+                "temp":         l11[5 + 2 * i],
+                "statusVout":   statusVout[i],
+            })
+        return faultLog
+
+
+
     # Read the channel specific configuration register MFR_CONFIG_LTC2977.
     def read_mfr_config(self, channel):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.read_mfr_config, channel)
         if self.set_page(channel):
             self.errorCount += 1
             return -1, 0xffff
@@ -378,22 +596,40 @@ class I2C_LTC2977:
 
 
 
-    # Read status information.
-    def read_status(self):
+    # Read the raw words of the status information in one sweep.
+    # Returns [temperature, vin, vout[channels], mfr_config[channels]].
+    def read_status_raw(self):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.read_status_raw)
         # Temperature.
-        ret, temperature = self.read_temp()
+        ret, temperature = self.read_word(self.hwCmdCodeReadTemp)
         if ret:
             return -1, [-1]
         # Vin.
-        ret, vin = self.read_vin()
+        ret, vin = self.read_word(self.hwCmdCodeReadVin)
         if ret:
             return -1, [-1]
-        # Output voltages.
+        # Output voltages and configuration, setting the page once per channel.
         vout = []
+        mfrConfigs = []
         for channel in range(self.hwChannels):
-            ret, voutChannel = self.read_vout(channel)
+            ret, mfrConfig = self.read_mfr_config(channel)
+            if ret:
+                return -1, [-1]
+            mfrConfigs.append(mfrConfig)
+            ret, voutChannel = self.read_word(self.hwCmdCodeReadVout)
             if ret:
                 return -1, [-1]
             vout.append(voutChannel)
-        return 0, [temperature, vin, vout]
+        return 0, [temperature, vin, vout, mfrConfigs]
+
+
 
+    # Read status information. The raw words are converted in one step.
+    def read_status(self):
+        ret, data = self.read_status_raw()
+        if ret:
+            return -1, [-1]
+        temperature, vin = PmbusCodec.PmbusCodec.l11_decode(data[0:2])
+        vout = self.vout_decode(data[2], range(self.hwChannels), data[3])
+        return 0, [temperature, vin, vout]
@@ -2,7 +2,7 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 28 Apr 2021
-# Rev.: 09 Sep 2022
+# Rev.: 19 Oct 2026
 #
 # Python class for communicating with the LTM4700 dual 50A or single 100A
 # uModule regulator with digital power system management IC.
@@ -15,10 +15,12 @@
 
 import McuI2C
 import I2CDevice
+import PmbusCodec
+import PmbusDevice
 
 
 
-class I2C_LTM4700:
+class I2C_LTM4700(PmbusDevice.PmbusDevice):
 
     # Message prefixes and separators.
     prefixDetails       = " - "
@@ -38,12 +40,25 @@ class I2C_LTM4700:
     hwCmdCodeVOUT_OV_FAULT_LIMIT = 0x40
     hwCmdCodeVOUT_OV_FAULT_RESPONSE = 0x41
     hwCmdCodeReadVin        = 0x88
+    hwCmdCodeMfrId          = 0x99
+    hwCmdCodeMfrModel       = 0x9a
     hwCmdCodeReadIin        = 0x89
     hwCmdCodeReadVout       = 0x8b
     hwCmdCodeReadIout       = 0x8c
     hwCmdCodeReadTempExt    = 0x8d
     hwCmdCodeReadTempInt    = 0x8e
+    hwCmdCodeStatusVout     = 0x7a
+    hwCmdCodeStatusMfrSpecific = 0x80
     hwCmdCodeMfrConfigChan  = 0xd0
+    hwCmdCodeMfrPwmComp     = 0xd3
+    hwCmdCodeMfrPwmMode     = 0xd4
+    hwCmdCodeMfrPwmConfig   = 0xf5
+    hwCmdCodeMfrIoutPeak    = 0xd7
+    hwCmdCodeMfrVoutPeak    = 0xdd
+    hwCmdCodeMfrVinPeak     = 0xde
+    hwCmdCodeMfrTempExtPeak = 0xdf
+    hwCmdCodeMfrClearPeaks  = 0xe3
+    hwCmdCodeMfrTempIntPeak = 0xf4
     hwCmdStatusWord         = 0x79
     hwDataLenMin            = 1
     hwDataLenMax            = 2
@@ -51,6 +66,7 @@ class I2C_LTM4700:
     hwPageMax               = 1     # Highest hardware channel/page number.
     hwPage                  = 0     # Current hardware channel/page number.
     hwChannels              = 2
+    hwVoutModeExponent      = -12   # VOUT_MODE exponent of the L16 output voltages.
 
 
 
@@ -64,6 +80,7 @@ class I2C_LTM4700:
         self.prefixDebugDevice = self.prefixDebug + self.deviceName + ": "
         self.prefixErrorDevice = self.prefixError + self.deviceName + ": "
         self.errorCount = 0
+        self.configCache = None         # Cached configuration snapshot.
 
 
 
@@ -82,6 +99,10 @@ class I2C_LTM4700:
             cmdName = "WRITE_PROTECT"
         elif cmdCode == cls.hwCmdCodeReadVin:
             cmdName = "READ_VIN"
+        elif cmdCode == cls.hwCmdCodeMfrId:
+            cmdName = "MFR_ID"
+        elif cmdCode == cls.hwCmdCodeMfrModel:
+            cmdName = "MFR_MODEL"
         elif cmdCode == cls.hwCmdCodeReadIin:
             cmdName = "READ_IIN"
         elif cmdCode == cls.hwCmdCodeReadVout:
@@ -92,12 +113,34 @@ class I2C_LTM4700:
             cmdName = "READ_TEMPERATURE_1"
         elif cmdCode == cls.hwCmdCodeReadTempInt:
             cmdName = "READ_TEMPERATURE_2"
+        elif cmdCode == cls.hwCmdCodeStatusVout:
+            cmdName = "STATUS_VOUT"
+        elif cmdCode == cls.hwCmdCodeStatusMfrSpecific:
+            cmdName = "STATUS_MFR_SPECIFIC"
         elif cmdCode == cls.hwCmdCodeMfrConfigChan:
             cmdName = "MFR_CHAN_CONFIG"
+        elif cmdCode == cls.hwCmdCodeMfrPwmComp:
+            cmdName = "MFR_PWM_COMP"
+        elif cmdCode == cls.hwCmdCodeMfrPwmMode:
+            cmdName = "MFR_PWM_MODE"
+        elif cmdCode == cls.hwCmdCodeMfrPwmConfig:
+            cmdName = "MFR_PWM_CONFIG"
         elif cmdCode == cls.hwCmdCodeVOUT_OV_FAULT_LIMIT:
             cmdName = "VOUT_OV_FAULT_LIMIT"
         elif cmdCode == cls.hwCmdCodeVOUT_OV_FAULT_RESPONSE:
             cmdName = "VOUT_OV_FAULT_RESPONSE"
+        elif cmdCode == cls.hwCmdCodeMfrIoutPeak:
+            cmdName = "MFR_IOUT_PEAK"
+        elif cmdCode == cls.hwCmdCodeMfrVoutPeak:
+            cmdName = "MFR_VOUT_PEAK"
+        elif cmdCode == cls.hwCmdCodeMfrVinPeak:
+            cmdName = "MFR_VIN_PEAK"
+        elif cmdCode == cls.hwCmdCodeMfrTempExtPeak:
+            cmdName = "MFR_TEMPERATURE_1_PEAK"
+        elif cmdCode == cls.hwCmdCodeMfrClearPeaks:
+            cmdName = "MFR_CLEAR_PEAKS"
+        elif cmdCode == cls.hwCmdCodeMfrTempIntPeak:
+            cmdName = "MFR_TEMPERATURE_2_PEAK"
         elif cmdCode == cls.hwCmdStatusWord:
             cmdName = "STATUS_WORD"
         elif cmdCode <= 0xfd:
@@ -187,6 +230,10 @@ class I2C_LTM4700:
                 self.errorCount += 1
                 return -1
             self.hwPage = data[0]
+        # Any other write may change the configuration, so the cached
+        # configuration snapshot is invalidated.
+        else:
+            self.configCache = None
         # Assemble command and data to write.
         dataWr = []
         dataWr.append(cmdCode)
@@ -234,29 +281,14 @@ class I2C_LTM4700:
     # Calculate a float value from an L11 (Linear_5s_11s) value.
     @classmethod
     def l11_to_float(cls, b):
-        # PMBus data field b[15:0]
-        # Value = Y * 2**N
-        # where N = b[15:11] is a 5-bit two’s complement integer
-        #   and Y = b[10:0] is an 11-bit two’s complement integer.
-        n = (b >> 11) & 0x1f
-        if n & 0x10:
-            n = -((~n & 0xf) + 1)
-        y = b & 0x7ff
-        if y & 0x400:
-            y = -((~y & 0x3ff) + 1)
-        return float(y * 2**n)
+        return PmbusCodec.PmbusCodec.l11_to_float(b)
 
 
 
     # Calculate a float value from an L16 (Linear_16u) value.
     @classmethod
     def l16_to_float(cls, b):
-        # PMBus data field b[15:0]
-        # Value = Y * 2**N
-        # where Y = b[15:0] is an unsigned integer
-        #   and N = Vout_mode_parameter is a 5-bit two’s complement exponent that is hardwired to –13 decimal.
-        y = b & 0xffff
-        return float(y * 2**(-12))
+        return PmbusCodec.PmbusCodec.l16_to_float(b, cls.hwVoutModeExponent)
 
 
 
@@ -269,8 +301,10 @@ class I2C_LTM4700:
 
 
 
-    # Clear the write protection.
+    # Clear the write protection. As the configuration may be changed
+    # afterwards, the cached configuration snapshot is invalidated.
     def wp_clear(self):
+        self.configCache = None
         return self.write(self.hwCmdCodeWriteProtect, [0x00])
 
 
@@ -302,6 +336,8 @@ class I2C_LTM4700:
 
     # Switch off all power channles simultaneously.
     def power_off_all(self):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.power_off_all)
         # Save the current write protection level.
         ret, wpSave = self.read_wp()
         # Set the write protection level to 2.
@@ -320,6 +356,8 @@ class I2C_LTM4700:
 
     # Switch on all power channles simultaneously.
     def power_on_all(self):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.power_on_all)
         # Save the current write protection level.
         ret, wpSave = self.read_wp()
         # Set the write protection level to 2.
@@ -347,6 +385,8 @@ class I2C_LTM4700:
         return 0, self.l11_to_float(vinRaw)
 
     def read_vout_fault_limit(self, channel):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.read_vout_fault_limit, channel)
         if self.set_page(channel):
             self.errorCount += 1
             return -1, float(-1)
@@ -360,6 +400,8 @@ class I2C_LTM4700:
         return 0, self.l16_to_float(voutRaw)
 
     def read_vout_fault_response(self, channel):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.read_vout_fault_response, channel)
         if self.set_page(channel):
             self.errorCount += 1
             return -1, -1
@@ -372,6 +414,8 @@ class I2C_LTM4700:
         return 0, voutFaultResponse
 
     def read_byte(self, cmdCode, channel = 0):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.read_byte, cmdCode, channel)
         if self.set_page(channel):
             self.errorCount += 1
             return -1, float(-1)
@@ -393,6 +437,8 @@ class I2C_LTM4700:
         return 0, self.l11_to_float(iinRaw)
 
     def read_status_word(self, channel):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.read_status_word, channel)
         if self.set_page(channel):
             self.errorCount += 1
             return -1, float(-1)
@@ -406,6 +452,8 @@ class I2C_LTM4700:
 
     # Read the measured output voltage.
     def read_vout(self, channel):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.read_vout, channel)
         if self.set_page(channel):
             self.errorCount += 1
             return -1, float(-1)
@@ -420,6 +468,8 @@ class I2C_LTM4700:
 
     # Read the average output current in amperes.
     def read_iout(self, channel):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.read_iout, channel)
         if self.set_page(channel):
             self.errorCount += 1
             return -1, float(-1)
@@ -460,6 +510,8 @@ class I2C_LTM4700:
 
     # Read the channel specific configuration register MFR_CONFIG_LTM4700.
     def read_mfr_config(self, channel):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.read_mfr_config, channel)
         if self.set_page(channel):
             self.errorCount += 1
             return -1, 0xffff
@@ -472,90 +524,193 @@ class I2C_LTM4700:
 
 
 
-    # Read status information.
-    def read_status(self):
-        # External temperature.
-        ret, temperatureExt = self.read_temp_ext()
+    # Read a word register and convert it from L11 or L16. The page must
+    # already be set for paged registers.
+    def read_word_linear(self, cmdCode, l16):
+        ret, data = self.read(cmdCode, 2)
         if ret:
-            return -1, [-1]
-        # Internal temperature.
-        ret, temperatureInt = self.read_temp_int()
-        if ret:
-            return -1, [-1]
-        # Vin.
-        ret, vin = self.read_vin()
+            self.errorCount += 1
+            print(self.prefixErrorDevice + "Error reading {0:s}. Error code: 0x{1:02x}: ".format(self.cmd_to_name(cmdCode), ret))
+            return -1, float(-1)
+        raw = (data[1] << 8) + data[0]
+        if l16:
+            return 0, self.l16_to_float(raw)
+        return 0, self.l11_to_float(raw)
+
+
+
+    # Clear the peak values of all channels (MFR_CLEAR_PEAKS).
+    def clear_peaks(self):
+        return self.send_byte(self.hwCmdCodeMfrClearPeaks)
+
+
+
+    # Read the peak values captured by the hardware since the last clear and
+    # optionally clear them afterwards. Transients between reading and
+    # clearing are not captured. The external temperature is not read, as it
+    # is not supported on the CM demonstrator.
+    # Returns [internal temperature peak, vin peak, vout peak[channels],
+    #          iout peak[channels]].
+    def read_peaks(self, clear):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.read_peaks, clear)
+        ret, temperatureIntPeak = self.read_word_linear(self.hwCmdCodeMfrTempIntPeak, False)
         if ret:
             return -1, [-1]
-        # Iin.
-        ret, iin = self.read_iin()
+        ret, vinPeak = self.read_word_linear(self.hwCmdCodeMfrVinPeak, False)
         if ret:
             return -1, [-1]
-        # Output voltages and currents.
-        vout = []
+        voutPeak = []
+        ioutPeak = []
         for channel in range(self.hwChannels):
-            ret, voutChannel = self.read_vout(channel)
-            if ret:
+            if self.set_page(channel):
+                self.errorCount += 1
                 return -1, [-1]
-            vout.append(voutChannel)
-        # Output currents.
-        iout = []
-        for channel in range(self.hwChannels):
-            ret, ioutChannel = self.read_iout(channel)
+            ret, voutPeakChannel = self.read_word_linear(self.hwCmdCodeMfrVoutPeak, True)
             if ret:
                 return -1, [-1]
-            iout.append(ioutChannel)
-
-        vout_fault_limit = []
-        for channel in range(self.hwChannels):
-            ret, voutFaultLimit = self.read_vout_fault_limit(channel)
+            ret, ioutPeakChannel = self.read_word_linear(self.hwCmdCodeMfrIoutPeak, False)
             if ret:
                 return -1, [-1]
-            vout_fault_limit.append(voutFaultLimit)
-        vout_fault_response = []
-        status_word = []
-        status_mfr_specific = []
-        status_vout = []
-        mfr_pwr_comp = []
-        mfr_pwr_mode = []
-        mfr_pwr_config = []
+            voutPeak.append(voutPeakChannel)
+            ioutPeak.append(ioutPeakChannel)
+        if clear and self.clear_peaks():
+            self.errorCount += 1
+            return -1, [-1]
+        return 0, [temperatureIntPeak, vinPeak, voutPeak, ioutPeak]
+
+
+
+    # Read a raw word register. The page must already be set for paged
+    # registers.
+    def read_word(self, cmdCode):
+        ret, data = self.read(cmdCode, 2)
+        if ret:
+            self.errorCount += 1
+            print(self.prefixErrorDevice + "Error reading {0:s}. Error code: 0x{1:02x}: ".format(self.cmd_to_name(cmdCode), ret))
+            return -1, 0xffff
+        return 0, (data[1] << 8) + data[0]
+
+
+
+    # Invalidate the cached configuration snapshot.
+    def config_invalidate(self):
+        self.configCache = None
+        return 0
+
+
 
+    # Read the configuration snapshot. The configuration does not change at
+    # runtime, so it is read from the device only once and then taken from
+    # the cache until it is invalidated by a write or by clearing the write
+    # protection.
+    # Returns [vout fault limit[channels], vout fault response[channels],
+    #          mfr_pwm_comp[channels], mfr_pwm_mode[channels],
+    #          mfr_pwm_config[channels]].
+    def read_config(self, refresh=False):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.read_config, refresh)
+        if self.configCache and not refresh:
+            return 0, self.configCache
+        voutFaultLimit = []
+        voutFaultResponse = []
+        mfrPwmComp = []
+        mfrPwmMode = []
+        mfrPwmConfig = []
         for channel in range(self.hwChannels):
-            ret, voutFaultResponse = self.read_vout_fault_response(channel)
-            if ret:
+            if self.set_page(channel):
+                self.errorCount += 1
                 return -1, [-1]
-            vout_fault_response.append(voutFaultResponse)
-
-            # Return the status information
-            # Iin.
-            ret, statusWordResponse = self.read_status_word(channel)
+            ret, value = self.read_word_linear(self.hwCmdCodeVOUT_OV_FAULT_LIMIT, True)
             if ret:
                 return -1, [-1]
-            status_word.append(statusWordResponse)
-
-            ret, resp = self.read_byte(0x80, channel)
+            voutFaultLimit.append(value)
+            values = []
+            for cmdCode in [self.hwCmdCodeVOUT_OV_FAULT_RESPONSE, self.hwCmdCodeMfrPwmComp, self.hwCmdCodeMfrPwmMode, self.hwCmdCodeMfrPwmConfig]:
+                ret, data = self.read(cmdCode, 1)
+                if ret:
+                    self.errorCount += 1
+                    print(self.prefixErrorDevice + "Error reading {0:s} of channel {1:d}. Error code: 0x{2:02x}: ".format(self.cmd_to_name(cmdCode), channel, ret))
+                    return -1, [-1]
+                values.append(data[0])
+            voutFaultResponse.append(values[0])
+            mfrPwmComp.append(values[1])
+            mfrPwmMode.append(values[2])
+            mfrPwmConfig.append(values[3])
+        self.configCache = [voutFaultLimit, voutFaultResponse, mfrPwmComp, mfrPwmMode, mfrPwmConfig]
+        return 0, self.configCache
+
+
+
+    # Read the raw words of the live telemetry in one sweep. The page is set
+    # only once per channel.
+    # Returns [external temperature, internal temperature, vin,
+    #          vout[channels], iout[channels], status word[channels]].
+    def read_telemetry_raw(self):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.read_telemetry_raw)
+        words = []
+        for cmdCode in [self.hwCmdCodeReadTempExt, self.hwCmdCodeReadTempInt, self.hwCmdCodeReadVin]:
+            ret, word = self.read_word(cmdCode)
             if ret:
                 return -1, [-1]
-            status_mfr_specific.append(resp)
-
-            ret, resp = self.read_byte(0x7A, channel)
-            if ret:
+            words.append(word)
+        vout = []
+        iout = []
+        statusWord = []
+        for channel in range(self.hwChannels):
+            if self.set_page(channel):
+                self.errorCount += 1
                 return -1, [-1]
-            status_vout.append(resp)
+            for cmdCode, values in [[self.hwCmdCodeReadVout, vout], [self.hwCmdCodeReadIout, iout], [self.hwCmdStatusWord, statusWord]]:
+                ret, word = self.read_word(cmdCode)
+                if ret:
+                    return -1, [-1]
+                values.append(word)
+        return 0, words + [vout, iout, statusWord]
+
+
+
+    # Read the live telemetry. The raw words are converted in one step.
+    # Returns [external temperature, internal temperature, vin,
+    #          vout[channels], iout[channels], status word[channels]].
+    def read_telemetry(self):
+        ret, data = self.read_telemetry_raw()
+        if ret:
+            return -1, [-1]
+        l11 = PmbusCodec.PmbusCodec.l11_decode(data[0:3] + data[4])
+        vout = PmbusCodec.PmbusCodec.l16_decode(data[3], self.hwVoutModeExponent)
+        return 0, l11[0:3] + [vout, l11[3:], data[5]]
 
-            ret, resp = self.read_byte(0xD3, channel)
-            if ret:
-                return -1, [-1]
-            mfr_pwr_comp.append(resp)
 
-            ret, resp = self.read_byte(0xD4, channel)
+
+    # Read status information: the live telemetry, the input current, the
+    # specific status registers and the cached configuration.
+    def read_status(self):
+        ret, telemetry = self.read_telemetry()
+        if ret:
+            return -1, [-1]
+        temperatureExt, temperatureInt, vin, vout, iout, statusWord = telemetry
+        # Iin.
+        ret, iin = self.read_iin()
+        if ret:
+            return -1, [-1]
+        statusMfrSpecific = []
+        statusVout = []
+        for channel in range(self.hwChannels):
+            ret, resp = self.read_byte(self.hwCmdCodeStatusMfrSpecific, channel)
             if ret:
                 return -1, [-1]
-            mfr_pwr_mode.append(resp)
-
-            ret, resp = self.read_byte(0xF5, channel)
+            statusMfrSpecific.append(resp)
+            ret, resp = self.read(self.hwCmdCodeStatusVout, 1)
             if ret:
+                self.errorCount += 1
                 return -1, [-1]
-            mfr_pwr_config.append(resp)
-
-        return 0, [temperatureExt, temperatureInt, vin, iin, vout, iout, vout_fault_limit, vout_fault_response, status_word, status_mfr_specific, status_vout, mfr_pwr_comp, mfr_pwr_mode, mfr_pwr_config]
+            statusVout.append(resp[0])
+        # Configuration.
+        ret, config = self.read_config()
+        if ret:
+            return -1, [-1]
+        voutFaultLimit, voutFaultResponse, mfrPwmComp, mfrPwmMode, mfrPwmConfig = config
+        return 0, [temperatureExt, temperatureInt, vin, iin, vout, iout, voutFaultLimit, voutFaultResponse, statusWord, statusMfrSpecific, statusVout, mfrPwmComp, mfrPwmMode, mfrPwmConfig]
 
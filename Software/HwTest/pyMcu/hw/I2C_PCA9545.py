@@ -40,6 +40,8 @@ class I2C_PCA9545:
         self.i2cDevice.debugLevel = self.debugLevel
         self.prefixDebugDevice = self.prefixDebug + self.deviceName + ": "
         self.prefixErrorDevice = self.prefixError + self.deviceName + ": "
+        # Make the multiplexer known for tracing the I2C transactions.
+        self.mcuI2C.muxAddrs.add(self.slaveAddr & 0x7f)
 
 
 
@@ -2,7 +2,7 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 29 Apr 2020
-# Rev.: 12 Jun 2026
+# Rev.: 19 Oct 2026
 #
 # Python class for communicating with Silicon Labs Si5341/40 and Si5345/44/42
 # devices.
@@ -102,7 +102,7 @@ class I2C_Si53xx:
                 # If line includes word Delay in pos 2, then delay by 300 ms as required according to device specification.
                 if lineStripped.find("Delay") == 2:
                     # Send preamble data before delay in burst mode.
-                    if burstMode:
+                    if burstMode and burstData:
                         ret = self.i2cDevice.write_burst(burstData)
                         if ret:
                             print(self.prefixErrorDevice + "Error sending data of register map file `{0:s}' in I2C burst mode! Line number: {1:d}, Data: {2:s}".\
@@ -133,33 +133,42 @@ class I2C_Si53xx:
                 pageByte = (lineData[0] >> 8) & 0xff
                 adrByte = lineData[0] & 0xff
                 dataByte = lineData[1] & 0xff
-                # Faster burst mode.
+                # Faster burst mode. The burst data are sent before the next
+                # delay and at the end of the file. They are split into MCU
+                # commands as long as the command line of the MCU allows.
                 if burstMode:
                     burstData.append([0x01, pageByte])
                     burstData.append([adrByte, dataByte])
-                    # Send out burst data when a certain length is reached.
-                    if len(burstData) >= 20:
-                        ret = self.i2cDevice.write_burst(burstData)
-                        if ret:
-                            print(self.prefixErrorDevice + "Error sending data of register map file `{0:s}' in I2C burst mode! Line number: {1:d}, Data: {2:s}".\
-                                format(fileRegMapName, fileRegMapLineCount, lineCommentRemoved))
-                            return -1
-                        # Clear burst data after sending.
-                        burstData = []
                 # Slower step by step mode.
                 else:
-                    # Set the page register with the upper byte of the 2-byte address.
-                    ret = self.i2cDevice.write([0x01, pageByte])
-                    # Send second byte of the addresse and the data byte.
-                    ret = self.i2cDevice.write([adrByte, dataByte])
+                    ret = self.write_reg_paged(pageByte, adrByte, dataByte)
                     if ret:
                         print(self.prefixErrorDevice + "Error sending data of register map file `{0:s}'! Line number: {1:d}, Data: {2:s}".\
                             format(fileRegMapName, fileRegMapLineCount, lineCommentRemoved))
                         return -1
+        # Send the remaining burst data.
+        if burstMode and burstData:
+            ret = self.i2cDevice.write_burst(burstData)
+            if ret:
+                print(self.prefixErrorDevice + "Error sending data of register map file `{0:s}' in I2C burst mode! Line number: {1:d}".\
+                    format(fileRegMapName, fileRegMapLineCount))
+                return -1
         return 0
 
 
 
+    # Write a register value after setting the page register.
+    def write_reg_paged(self, pageByte, adrByte, dataByte):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.write_reg_paged, pageByte, adrByte, dataByte)
+        # Set the page register with the upper byte of the 2-byte address.
+        ret = self.i2cDevice.write([0x01, pageByte])
+        # Send second byte of the addresse and the data byte.
+        ret = self.i2cDevice.write([adrByte, dataByte])
+        return ret
+
+
+
     # Return the name of a register address.
     def adr_to_name(self, regAdr):
         regName = "*other/unknown*"
@@ -181,6 +190,8 @@ class I2C_Si53xx:
 
     # Read a register value.
     def read_reg(self, regAdr):
+        if self.i2cDevice.owner_required():
+            return self.i2cDevice.call(self.read_reg, regAdr)
         self.i2cDevice.debugLevel = self.debugLevel
         if self.check_adr(regAdr):
             return -1, 0xff
@@ -9,6 +9,7 @@
 
 import os
 import McuI2C
+import McuProg
 import I2CDevice
 import time
 
@@ -140,39 +141,42 @@ class I2C_Si598:
         if self.debugLevel >= 2:
             print(self.prefixDebugDevice + "Writing configuration for ic11, 240MHz", end='')
 
-        # 6) Freeze the DCO by setting Freeze DCO = 1 (bit 4 of register 137).
-        # note from datasheet: Si598: Write 0x10 to this register to Freeze DCO
-        ret = self.i2cDevice.write([0x89, 0x10])
-        if ret:
-            print(self.prefixErrorDevice + "Error Writing configuration to clock chip")
-            return -1            
-        
-        # 7) Write the new frequency configuration (RFREQ, HS_DIV, and N1)
+        # 7) The new frequency configuration (RFREQ, HS_DIV, and N1)
         if freq == "240":
-            ret = self.i2cDevice.write([0x07, 0xE0, 0x48, 0x6C, 0xC0, 0xAB, 0x7E])
+            regsFreq = [0x07, 0xE0, 0x48, 0x6C, 0xC0, 0xAB, 0x7E]
         elif freq == "240.474":
             # Here I assume that the 200MHz is perfect and so is the rate monitoring. so the first configuration is
-            # ret = self.i2cDevice.write([0x07, 0xE0, 0x48, 0x71, 0x03, 0x1F, 0xC0])
+            # regsFreq = [0x07, 0xE0, 0x48, 0x71, 0x03, 0x1F, 0xC0]
             # using that I measured a frequency of 240.479, so the registers are for 240.46823, 
             # which should give a measurement closer to 240.474
-            ret = self.i2cDevice.write([0x07, 0xE0, 0x48, 0x70, 0xF5, 0xD9, 0x95])
+            regsFreq = [0x07, 0xE0, 0x48, 0x70, 0xF5, 0xD9, 0x95]
         else :
             print(self.prefixErrorDevice + "Error frequency not recognized, user 240 or 240.474")
             return -1
-        if ret:
-            print(self.prefixErrorDevice + "Error Writing configuration to clock chip")
-            return -1
-        
+
+        # The steps 6) to 8) are executed as one transaction program on the
+        # MCU, so that the NewFreq bit is asserted within 10 ms after
+        # unfreezing the DCO, independent of the UART latency.
+        mcuProg = McuProg.McuProg(self.mcuI2C.mcuSer)
+        mcuProg.debugLevel = self.debugLevel
+        # 6) Freeze the DCO by setting Freeze DCO = 1 (bit 4 of register 137).
+        # note from datasheet: Si598: Write 0x10 to this register to Freeze DCO
+        ret = mcuProg.i2c(self.mcuI2C, self.slaveAddr, [0x89, 0x10], 0)[0]
+        # 7) Write the new frequency configuration (RFREQ, HS_DIV, and N1)
+        ret |= mcuProg.i2c(self.mcuI2C, self.slaveAddr, regsFreq, 0)[0]
         # 8) Unfreeze the DCO by setting Freeze DCO = 0 and assert the NewFreq bit (bit 6 of register 135) within 10 ms.
-        ret = self.i2cDevice.write([0x89, 0x00])
-        if ret:
-            print(self.prefixErrorDevice + "Error Writing configuration to clock chip")
-            return -1   
+        ret |= mcuProg.i2c(self.mcuI2C, self.slaveAddr, [0x89, 0x00], 0)[0]
         # New Frequency Applied.
         # Alerts the DSPLL that a new frequency configuration has been applied. This bit will
         # clear itself when the new frequency is applied. Write 0x40 to this register to assert NewFreq.
-        ret = self.i2cDevice.write([0x87, 0x40])
+        ret |= mcuProg.i2c(self.mcuI2C, self.slaveAddr, [0x87, 0x40], 0)[0]
+        # Do not run an incomplete program, e.g. unfreezing the DCO without
+        # the new frequency configuration.
+        if ret:
+            print(self.prefixErrorDevice + "Error building the program to write the configuration to clock chip")
+            return -1
+        ret = mcuProg.run()[0]
         if ret:
             print(self.prefixErrorDevice + "Error Writing configuration to clock chip")
-            return -1 
+            return -1
         return 0
@@ -2,13 +2,25 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 28 Mar 2020
-# Rev.: 09 Jun 2026
+# Rev.: 19 Oct 2026
 #
 # Python class for using the I2C ports of the TM4C1290NCPDT MCU.
 #
+# Hints:
+# - Single I2C accesses (write, read, quick command) use the binary frame mode
+#   of the MCU serial interface, if it is enabled and supported by the MCU
+#   firmware. Otherwise the ASCII command `i2c' is used.
+# - The latency of every access is recorded in the statistics of the serial
+#   port (category `i2c'). Failed accesses are counted as errors, not as
+#   read or write accesses.
+# - If tracing is enabled on the serial port, every I2C transaction is logged
+#   (see McuTrace). The I2C multiplexers register their slave addresses in
+#   muxAddrs, so that the path through the multiplexers can be traced.
+#
 
 
 
+import time
 import McuSerial
 
 
@@ -27,6 +39,10 @@ class McuI2C:
     # Hardware parameters.
     hwMarkData          = "Data:"
     hwMarkDevAdr        = "I2C device(s) found at slave address:"
+    hwBlockLenMax       = 256       # Maximum number of bytes of a block read (i2c-br).
+    hwWriteLenMax       = 29        # Maximum number of data bytes of a write access (i2c).
+    hwReadLenMax        = 32        # Maximum number of data bytes of a read access (i2c).
+    hwBurstBlockLenMax  = 128       # Maximum number of data bytes of a burst write block (i2c-bw).
 
 
 
@@ -39,6 +55,23 @@ class McuI2C:
         self.accessWrite = 0
         self.bytesRead = 0
         self.bytesWritten = 0
+        self.muxAddrs = set()
+
+
+
+    # Record an access in the statistics of the serial port.
+    def stats_record(self, op, timeStart, ret, bytesOut, bytesIn):
+        self.mcuSer.stats.record("i2c", "port {0:d}".format(self.port), op, time.time() - timeStart,
+                                 bytesOut, bytesIn, error=ret != 0)
+        return 0
+
+
+
+    # Log a transaction, if tracing is enabled.
+    def trace_record(self, op, timeStart, ret, slaveAddr, dataWr, dataRd, stop=True, repeatedStart=False):
+        if self.mcuSer.tracer:
+            self.mcuSer.tracer.record(self, slaveAddr & 0x7f, op, dataWr, dataRd, ret, time.time() - timeStart, timeStart, stop, repeatedStart)
+        return 0
 
 
 
@@ -67,6 +100,28 @@ class McuI2C:
 
 
 
+    # Perform an I2C access using the binary frame mode. The access mode is
+    # the same as for the ASCII command `i2c'.
+    def ms_bin_access(self, slaveAddr, accMode, data):
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Sending binary I2C access to the I2C master port {0:d}.".format(self.port))
+        ret, status, dataRd = self.mcuSer.bin_transfer(self.mcuSer.mcuBinOpI2C, self.port, slaveAddr & 0x7f, accMode, data)
+        if ret:
+            self.errorCount += 1
+            print(self.prefixError + "Error sending binary I2C access to the I2C master port {0:d}!".format(self.port))
+            return ret, []
+        if status == self.mcuSer.mcuBinStatusI2C:
+            self.errorCount += 1
+            print(self.prefixError + "Error flags from the I2C master port {0:d}: 0x{1:08x}".format(self.port, int.from_bytes(bytes(dataRd), 'big')))
+            return -1, []
+        if status != self.mcuSer.mcuBinStatusOk:
+            self.errorCount += 1
+            print(self.prefixError + "Error sending binary I2C access to the I2C master port {0:d}: Status 0x{1:02x}".format(self.port, status))
+            return -1, []
+        return 0, dataRd
+
+
+
     # Print details.
     def print_details(self):
         print(self.prefixDetails, end='')
@@ -111,29 +166,45 @@ class McuI2C:
                 print(" 0x{0:02x}".format(datum & 0xff), end='')
             print()
         # Send command.
-        ret = self.ms_send_cmd(cmd)
+        timeStart = time.time()
+        if len(data) <= self.mcuSer.mcuBinDataMax and self.mcuSer.bin_check():
+            ret = self.ms_bin_access(slaveAddr, accMode, data)[0]
+        elif len(data) > self.hwWriteLenMax:
+            # Do not increase the error counter here!
+            print(self.prefixError + "Error writing to the I2C master port {0:d}: At most {1:d} data bytes can be written in one access!".format(self.port, self.hwWriteLenMax))
+            return -1
+        else:
+            ret = self.ms_send_cmd(cmd)
+        self.stats_record("write", timeStart, ret, len(data), 0)
+        self.trace_record("write", timeStart, ret, slaveAddr, data, [], stop, repeatedStart)
+        if ret:
+            return ret
         self.accessWrite += 1
         self.bytesWritten += len(data)
-        return ret
+        return 0
 
 
 
-    # Write data to the I2C master port in burst mode.
+    # Write data to the I2C master port in burst mode. Each block is written
+    # in a separate I2C transaction. The blocks are packed into as few burst
+    # write commands as the command line length of the MCU allows.
     def ms_write_burst(self, slaveAddr, burstDataWr):
-        if len(burstDataWr) < 1:
+        if len(burstDataWr) < 1 or not all(0 < len(block) <= self.hwBurstBlockLenMax for block in burstDataWr):
             # Do not increase the error counter here!
             print(self.prefixError + "Error writing to the I2C master port {0:d}!".format(self.port))
             if self.debugLevel >= 1:
-                print(self.prefixError + "At least one data byte must be provided!")
+                print(self.prefixError + "Each block must contain 1..{0:d} data bytes!".format(self.hwBurstBlockLenMax))
+            return -1
+        blockStrs = ["".join(" 0x{0:02x}".format(datum & 0xff) for datum in block) + "," for block in burstDataWr]
+        cmds = self.mcuSer.pack_cmds("i2c-bw {0:d} 0x{1:02x}".format(self.port, slaveAddr & 0x7f), blockStrs)
+        if not cmds:
+            # Do not increase the error counter here!
+            print(self.prefixError + "Error writing to the I2C master port {0:d}: A block does not fit into one MCU command!".format(self.port))
             return -1
-        cmd = "i2c-bw {0:d} 0x{1:02x}".format(self.port, slaveAddr & 0x7f)
-        for block in burstDataWr:
-            for datum in block:
-                cmd += " 0x{0:02x}".format(datum & 0xff)
-            cmd += ","
         if self.debugLevel >= 2:
             print(self.prefixDebug + "Writing data to the I2C master port {0:d} in burst mode.".format(self.port), end='')
             print(self.separatorDetails + "Slave address: 0x{0:02x}".format(slaveAddr), end='')
+            print(self.separatorDetails + "Commands: {0:d}".format(len(cmds)), end='')
             print(self.separatorDetails + "Data:", end='')
             for block in burstDataWr:
                 for datum in block:
@@ -141,12 +212,23 @@ class McuI2C:
                 print(",")
                 print("      ", end='')
             print()
-        # Send command.
-        ret = self.ms_send_cmd(cmd)
-        for block in burstDataWr:
-            self.accessWrite += 1
-            self.bytesWritten += len(block)
-        return ret
+        # Send commands.
+        timeStart = time.time()
+        block = 0
+        bytesWritten = self.bytesWritten
+        for cmd in cmds:
+            timeCmd = time.time()
+            ret = self.ms_send_cmd(cmd)
+            if ret:
+                self.stats_record("write_burst", timeStart, ret, self.bytesWritten - bytesWritten, 0)
+                return ret
+            for _ in range(cmd.count(",")):
+                self.trace_record("write", timeCmd, 0, slaveAddr, burstDataWr[block], [])
+                self.accessWrite += 1
+                self.bytesWritten += len(burstDataWr[block])
+                block += 1
+        self.stats_record("write_burst", timeStart, 0, self.bytesWritten - bytesWritten, 0)
+        return 0
 
 
 
@@ -172,8 +254,24 @@ class McuI2C:
             print(self.separatorDetails + "Access mode: 0x{0:01x}".format(accMode), end='')
             print()
         # Send command.
+        timeStart = time.time()
+        if cnt <= self.mcuSer.mcuBinDataMax and self.mcuSer.bin_check():
+            ret, data = self.ms_bin_access(slaveAddr, accMode, [cnt])
+            self.stats_record("read", timeStart, ret, 0, len(data))
+            self.trace_record("read", timeStart, ret, slaveAddr, [], data, repeatedStart=repeatedStart)
+            if ret:
+                return ret, []
+            self.accessRead += 1
+            self.bytesRead += len(data)
+            return 0, data
+        if cnt > self.hwReadLenMax:
+            # Do not increase the error counter here!
+            print(self.prefixError + "Error reading from the I2C master port {0:d}: At most {1:d} data bytes can be read in one access!".format(self.port, self.hwReadLenMax))
+            return -1, []
         ret = self.ms_send_cmd(cmd)
         if ret:
+            self.stats_record("read", timeStart, ret, 0, 0)
+            self.trace_record("read", timeStart, ret, slaveAddr, [], [], repeatedStart=repeatedStart)
             return ret, []
         # Get and parse response from MCU.
         dataStr = self.mcuSer.get()
@@ -185,6 +283,8 @@ class McuI2C:
                 print(self.prefixError + "Command sent to MCU: " + cmd)
                 print(self.prefixError + "Response from MCU:")
                 print(self.mcuSer.get_full())
+            self.stats_record("read", timeStart, -1, 0, 0)
+            self.trace_record("read", timeStart, -1, slaveAddr, [], [], repeatedStart=repeatedStart)
             return -1, []
         # Get sub-string containing the data. Add the length of hwMarkData to
         # point beyond the data mark.
@@ -196,12 +296,102 @@ class McuI2C:
             for datum in data:
                 print(" 0x{0:02x}".format(datum), end='')
             print()
+        self.stats_record("read", timeStart, 0, 0, len(data))
+        self.trace_record("read", timeStart, 0, slaveAddr, [], data, repeatedStart=repeatedStart)
+        self.accessRead += 1
+        self.bytesRead += len(data)
+        return 0, data
+
+
+
+    # Write a command code and read a long data block with repeated start in
+    # one I2C transaction using the firmware block read command. The MCU
+    # returns the data in several lines. If the count is 0, an SMBus block
+    # read is performed by the firmware: The first byte read is the byte
+    # count, which determines the number of data bytes to follow. The byte
+    # count is included in the data returned.
+    def ms_read_long(self, slaveAddr, cmdCode, cnt):
+        if cnt < 0 or cnt > self.hwBlockLenMax:
+            # Do not increase the error counter here!
+            print(self.prefixError + "Error reading a block from the I2C master port {0:d}!".format(self.port))
+            if self.debugLevel >= 1:
+                print(self.prefixError + "Number of bytes {0:d} out of valid range 0..{1:d}!".format(cnt, self.hwBlockLenMax))
+            return -1, []
+        cmd = "i2c-br {0:d} 0x{1:02x} 0x{2:02x} {3:d}".format(self.port, slaveAddr & 0x7f, cmdCode & 0xff, cnt)
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Reading a block from the I2C master port {0:d}.".format(self.port), end='')
+            print(self.separatorDetails + "Slave address: 0x{0:02x}".format(slaveAddr), end='')
+            print(self.separatorDetails + "Command code: 0x{0:02x}".format(cmdCode & 0xff), end='')
+            print(self.separatorDetails + "Bytes: {0:d}".format(cnt), end='')
+            print()
+        # Send command.
+        timeStart = time.time()
+        ret = self.ms_send_cmd(cmd)
+        if ret:
+            self.stats_record("read_long", timeStart, ret, 1, 0)
+            self.trace_record("read_long", timeStart, ret, slaveAddr, [cmdCode & 0xff], [])
+            return ret, []
+        # Get and parse response from MCU.
+        dataStr = self.mcuSer.get()
+        dataPos = dataStr.find(self.hwMarkData)
+        if dataPos < 0:
+            self.errorCount += 1
+            print(self.prefixError + "Error parsing data read from the I2C master port {0:d}!".format(self.port))
+            if self.debugLevel >= 1:
+                print(self.prefixError + "Command sent to MCU: " + cmd)
+                print(self.prefixError + "Response from MCU:")
+                print(self.mcuSer.get_full())
+            self.stats_record("read_long", timeStart, -1, 1, 0)
+            self.trace_record("read_long", timeStart, -1, slaveAddr, [cmdCode & 0xff], [])
+            return -1, []
+        # Convert the data lines to a list of data bytes.
+        data = [int(i, 0) for i in dataStr[dataPos+len(self.hwMarkData):].split()]
+        if not cnt and data and data[0] == len(data) - 1:
+            cnt = len(data)
+        if len(data) != cnt:
+            self.errorCount += 1
+            print(self.prefixError + "Error reading a block from the I2C master port {0:d}: {1:d} bytes expected, but {2:d} received!".format(self.port, cnt, len(data)))
+            self.stats_record("read_long", timeStart, -1, 1, len(data))
+            self.trace_record("read_long", timeStart, -1, slaveAddr, [cmdCode & 0xff], data)
+            return -1, []
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Data read:", end='')
+            for datum in data:
+                print(" 0x{0:02x}".format(datum), end='')
+            print()
+        self.stats_record("read_long", timeStart, 0, 1, len(data))
+        self.trace_record("read_long", timeStart, 0, slaveAddr, [cmdCode & 0xff], data)
+        self.accessWrite += 1
+        self.bytesWritten += 1
         self.accessRead += 1
         self.bytesRead += len(data)
         return 0, data
 
 
 
+    # SMBus block read: Read the byte count and the data bytes in one round
+    # trip. The byte count is not included in the data returned.
+    def ms_block_read(self, slaveAddr, cmdCode):
+        ret, data = self.ms_read_long(slaveAddr, cmdCode, 0)
+        if ret:
+            return ret, []
+        return 0, data[1:]
+
+
+
+    # SMBus block write: Write the command code, the byte count and the data
+    # bytes.
+    def ms_block_write(self, slaveAddr, cmdCode, data):
+        if len(data) + 2 > self.hwWriteLenMax:
+            # Do not increase the error counter here!
+            print(self.prefixError + "Error writing a block to the I2C master port {0:d}!".format(self.port))
+            if self.debugLevel >= 1:
+                print(self.prefixError + "At most {0:d} data bytes can be written in one block!".format(self.hwWriteLenMax - 2))
+            return -1
+        return self.ms_write(slaveAddr, [cmdCode & 0xff, len(data)] + list(data))
+
+
+
     # Send a quick command.
     def ms_quick_cmd(self, slaveAddr, read):
         return self.ms_quick_cmd_adv(slaveAddr, read, False)
@@ -218,12 +408,20 @@ class McuI2C:
             print(self.separatorDetails + "Read/write: {0:d}".format(read & 0x01), end='')
             print()
         # Send command.
-        ret = self.ms_send_cmd(cmd)
+        timeStart = time.time()
+        if self.mcuSer.bin_check():
+            ret = self.ms_bin_access(slaveAddr, accMode, [])[0]
+        else:
+            ret = self.ms_send_cmd(cmd)
+        self.stats_record("quick", timeStart, ret, 0, 0)
+        self.trace_record("quick", timeStart, ret, slaveAddr, [], [])
+        if ret:
+            return ret
         if read:
             self.accessRead += 1
         else:
             self.accessWrite += 1
-        return ret
+        return 0
 
 
 
@@ -0,0 +1,209 @@
+# File: McuI2CMulti.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 19 Oct 2026
+# Rev.: 19 Oct 2026
+#
+# Python class for executing I2C transaction lists on several I2C ports of the
+# TM4C1290NCPDT MCU concurrently.
+#
+# Hints:
+# - The transactions are collected per I2C port and sent to the MCU with the
+#   firmware command `i2c-ml'. The MCU executes the transactions of different
+#   ports in parallel, so that the execution time is bounded by the busiest
+#   I2C bus instead of the sum of all buses.
+# - The transactions of the same port are executed in the order they were
+#   added. Each transaction writes data bytes (if any) and reads data bytes
+#   (if any) with repeated start.
+#
+
+
+
+import time
+import McuSerial
+
+
+
+class McuI2CMulti:
+
+    # Message prefixes and separators.
+    prefixDetails       = " - "
+    separatorDetails    = " - "
+    prefixError         = "ERROR: {0:s}: ".format(__file__)
+    prefixDebug         = "DEBUG: {0:s}: ".format(__file__)
+
+    # Debug configuration.
+    debugLevel = 0                 # Debug verbosity.
+
+    # Hardware parameters.
+    hwMarkData          = "Data:"
+    hwMarkTrans         = "#"
+    hwMarkError         = "ERROR"
+    hwCmd               = "i2c-ml"
+    hwTransMax          = 32        # Maximum number of transactions per command.
+    hwWriteLenMax       = 8         # Maximum number of data bytes written per transaction.
+    hwReadLenMax        = 32        # Maximum number of data bytes read per transaction.
+
+
+
+    # Initialize the I2C transaction lists.
+    def __init__(self, mcuSer):
+        self.mcuSer = mcuSer
+        self.transactions = []
+        self.errorCount = 0
+        self.cmdCount = 0
+        self.transCount = 0
+
+
+
+    # Add a transaction for the I2C port mcuI2C. The data bytes dataWr are
+    # written and cntRd bytes are read with repeated start. Returns the tag of
+    # the transaction, which is the index of its result.
+    def add(self, mcuI2C, slaveAddr, dataWr, cntRd):
+        if len(dataWr) > self.hwWriteLenMax or cntRd < 0 or cntRd > self.hwReadLenMax or (not dataWr and not cntRd):
+            # Do not increase the error counter here!
+            print(self.prefixError + "Error adding a transaction for the I2C master port {0:d}!".format(mcuI2C.port))
+            if self.debugLevel >= 1:
+                print(self.prefixError + "0..{0:d} bytes can be written and 0..{1:d} bytes can be read, but at least one byte must be transferred!".format(self.hwWriteLenMax, self.hwReadLenMax))
+            return -1, -1
+        self.transactions.append([mcuI2C, slaveAddr & 0x7f, [datum & 0xff for datum in dataWr], cntRd])
+        return 0, len(self.transactions) - 1
+
+
+
+    # Remove all transactions.
+    def clear(self):
+        self.transactions = []
+        return 0
+
+
+
+    # Format a transaction for the firmware command.
+    @classmethod
+    def trans_to_str(cls, trans):
+        mcuI2C, slaveAddr, dataWr, cntRd = trans
+        s = "{0:d} 0x{1:02x} {2:d}".format(mcuI2C.port, slaveAddr, cntRd)
+        for datum in dataWr:
+            s += " 0x{0:02x}".format(datum)
+        return s
+
+
+
+    # Distribute the transactions to firmware commands. The ports are served
+    # round robin, so that every command contains transactions for as many
+    # ports as possible. The order of the transactions per port is kept.
+    def pack(self):
+        cmdLenMax = self.mcuSer.get_cmd_len_max()
+        queues = {}
+        for tag, trans in enumerate(self.transactions):
+            queues.setdefault(trans[0].port, []).append(tag)
+        cmds = []
+        tags = []
+        cmd = self.hwCmd
+        while any(queues.values()):
+            for port in sorted(queues):
+                if not queues[port]:
+                    continue
+                tag = queues[port][0]
+                transStr = " " + self.trans_to_str(self.transactions[tag]) + ","
+                if tags and (len(tags) >= self.hwTransMax or len(cmd) + len(transStr) > cmdLenMax):
+                    cmds.append([cmd, tags])
+                    cmd = self.hwCmd
+                    tags = []
+                cmd += transStr
+                tags.append(queues[port].pop(0))
+        if tags:
+            cmds.append([cmd, tags])
+        return cmds
+
+
+
+    # Parse the response to a firmware command. Each result line starts with
+    # the transaction mark, the transaction index and the port, followed by
+    # the data bytes or by the error mark and the I2C master status.
+    def parse(self, tags, results):
+        dataStr = self.mcuSer.get()
+        dataPos = dataStr.find(self.hwMarkData)
+        if dataPos < 0:
+            return -1
+        lines = dataStr[dataPos+len(self.hwMarkData):].strip().splitlines()
+        if len(lines) != len(tags):
+            return -1
+        for i, (line, tag) in enumerate(zip(lines, tags)):
+            mcuI2C, slaveAddr, dataWr, cntRd = self.transactions[tag]
+            tokens = line.split()
+            if len(tokens) < 2 or tokens[0] != self.hwMarkTrans + str(i) or int(tokens[1], 0) != mcuI2C.port:
+                return -1
+            if len(tokens) > 2 and tokens[2] == self.hwMarkError:
+                mcuI2C.errorCount += 1
+                self.errorCount += 1
+                status = int(tokens[3], 0) if len(tokens) > 3 else 1
+                print(self.prefixError + "Error in transaction {0:d} on the I2C master port {1:d}, slave address 0x{2:02x}: Status 0x{3:08x}".format(tag, mcuI2C.port, slaveAddr, status))
+                results[tag] = [-1, []]
+                continue
+            data = [int(datum, 0) for datum in tokens[2:]]
+            if len(data) != cntRd:
+                return -1
+            if dataWr:
+                mcuI2C.accessWrite += 1
+                mcuI2C.bytesWritten += len(dataWr)
+            if cntRd:
+                mcuI2C.accessRead += 1
+                mcuI2C.bytesRead += cntRd
+            results[tag] = [0, data]
+        return 0
+
+
+
+    # Execute all transactions and remove them afterwards. Returns the results
+    # as a list of [ret, data] in the order of the tags.
+    def execute(self):
+        results = [[-1, []] for trans in self.transactions]
+        ret = 0
+        for cmd, tags in self.pack():
+            if self.debugLevel >= 2:
+                print(self.prefixDebug + "Sending I2C transaction lists for the ports {0:s} to the MCU: ".format(
+                    ", ".join(str(port) for port in sorted(set(self.transactions[tag][0].port for tag in tags)))) + cmd)
+            timeStart = time.time()
+            self.mcuSer.send(cmd)
+            self.cmdCount += 1
+            self.transCount += len(tags)
+            if self.debugLevel >= 3:
+                print(self.prefixDebug + "Response from MCU:")
+                print(self.mcuSer.get_full())
+            if self.mcuSer.eval() or self.parse(tags, results):
+                self.errorCount += 1
+                print(self.prefixError + "Error executing I2C transaction lists!")
+                if self.debugLevel >= 1:
+                    print(self.prefixError + "Command sent to MCU: " + cmd)
+                    print(self.prefixError + "Response from MCU:")
+                    print(self.mcuSer.get_full())
+                ret = -1
+                for tag in tags:
+                    results[tag] = [-1, []]
+            # Log the transactions, if tracing is enabled. The latency of the
+            # command is shared by its transactions.
+            if self.mcuSer.tracer:
+                duration = (time.time() - timeStart) / len(tags)
+                for tag in tags:
+                    mcuI2C, slaveAddr, dataWr, cntRd = self.transactions[tag]
+                    op = "write_read" if dataWr and cntRd else "write" if dataWr else "read"
+                    self.mcuSer.tracer.record(mcuI2C, slaveAddr, op, dataWr, results[tag][1], results[tag][0], duration, timeStart)
+        if any(result[0] for result in results):
+            ret = -1
+        self.clear()
+        return ret, results
+
+
+
+    # Print details.
+    def print_details(self):
+        print(self.prefixDetails, end='')
+        print("I2C transaction lists", end='')
+        print(self.separatorDetails + "Pending transactions: {0:d}".format(len(self.transactions)), end='')
+        if self.debugLevel >= 1:
+            print(self.separatorDetails + "Error count: {0:d}".format(self.errorCount), end='')
+            print(self.separatorDetails + "Commands sent: {0:d}".format(self.cmdCount), end='')
+            print(self.separatorDetails + "Transactions executed: {0:d}".format(self.transCount), end='')
+        print()
+        return 0
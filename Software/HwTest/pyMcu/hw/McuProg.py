@@ -0,0 +1,204 @@
+# File: McuProg.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 19 Oct 2026
+# Rev.: 19 Oct 2026
+#
+# Python class for running transaction programs on the TM4C1290NCPDT MCU.
+#
+# Hints:
+# - A transaction program is a list of I2C, GPIO and delay operations, which
+#   is sent to the MCU with the firmware command `prog'. The MCU executes all
+#   operations in one go and returns the results of all operations in one
+#   response. This saves one UART round trip per operation and guarantees
+#   the timing between the operations.
+# - Every operation has a result slot, which is returned when the operation
+#   is added to the program.
+#
+
+
+
+import time
+import McuSerial
+
+
+
+class McuProg:
+
+    # Message prefixes and separators.
+    prefixDetails       = " - "
+    separatorDetails    = " - "
+    prefixError         = "ERROR: {0:s}: ".format(__file__)
+    prefixDebug         = "DEBUG: {0:s}: ".format(__file__)
+
+    # Debug configuration.
+    debugLevel = 0                 # Debug verbosity.
+
+    # Hardware parameters.
+    hwMarkData          = "Data:"
+    hwMarkOp            = "#"
+    hwCmd               = "prog"
+    hwOpNumMax          = 16        # Maximum number of operations per program.
+    hwDataLenMax        = 32        # Maximum number of data bytes written or read per I2C operation.
+    hwDelayMax          = 10000000  # Maximum delay per operation in microseconds.
+
+
+
+    # Initialize the transaction program.
+    def __init__(self, mcuSer):
+        self.mcuSer = mcuSer
+        self.ops = []
+        self.delayTime = 0
+        self.errorCount = 0
+        self.runCount = 0
+
+
+
+    # Add an operation and return its result slot.
+    def add_op(self, op, opStr):
+        if len(self.ops) >= self.hwOpNumMax:
+            # Do not increase the error counter here!
+            print(self.prefixError + "Error adding an operation to the transaction program: At most {0:d} operations are supported!".format(self.hwOpNumMax))
+            return -1, -1
+        self.ops.append([op, opStr])
+        return 0, len(self.ops) - 1
+
+
+
+    # Add an I2C operation: Write the data bytes dataWr (if any), then read
+    # cntRd bytes (if any) with repeated start.
+    def i2c(self, mcuI2C, slaveAddr, dataWr, cntRd):
+        if len(dataWr) > self.hwDataLenMax or cntRd < 0 or cntRd > self.hwDataLenMax or (not dataWr and not cntRd):
+            # Do not increase the error counter here!
+            print(self.prefixError + "Error adding an I2C operation for the I2C master port {0:d} to the transaction program!".format(mcuI2C.port))
+            if self.debugLevel >= 1:
+                print(self.prefixError + "0..{0:d} bytes can be written and read, but at least one byte must be transferred!".format(self.hwDataLenMax))
+            return -1, -1
+        opStr = "i2c {0:d} 0x{1:02x} {2:d}".format(mcuI2C.port, slaveAddr & 0x7f, cntRd)
+        for datum in dataWr:
+            opStr += " 0x{0:02x}".format(datum & 0xff)
+        return self.add_op(["i2c", mcuI2C, len(dataWr), cntRd], opStr)
+
+
+
+    # Add a GPIO operation: Set the GPIO type to the value, if given. The
+    # result is the current value of the GPIO type.
+    def gpio(self, gpioType, value=None):
+        opStr = "gpio {0:s}".format(gpioType)
+        if value is not None:
+            opStr += " 0x{0:x}".format(value)
+        return self.add_op(["gpio", None, 0, 0], opStr)
+
+
+
+    # Add a delay operation in seconds.
+    def delay(self, seconds):
+        delayUs = int(round(seconds * 1e6))
+        if delayUs < 0 or delayUs > self.hwDelayMax:
+            # Do not increase the error counter here!
+            print(self.prefixError + "Error adding a delay of {0:.6f} s to the transaction program: Valid range is 0..{1:.0f} s!".format(seconds, self.hwDelayMax / 1e6))
+            return -1, -1
+        ret, slot = self.add_op(["delay", None, 0, 0], "delay {0:d}".format(delayUs))
+        if not ret:
+            self.delayTime += delayUs / 1e6
+        return ret, slot
+
+
+
+    # Remove all operations.
+    def clear(self):
+        self.ops = []
+        self.delayTime = 0
+        return 0
+
+
+
+    # Get the firmware command of the program.
+    def get_cmd(self):
+        return self.hwCmd + "".join(" " + opStr + "," for op, opStr in self.ops)
+
+
+
+    # Parse the response. Each result line starts with the operation mark and
+    # the operation index, followed by the data.
+    def parse(self):
+        dataStr = self.mcuSer.get()
+        dataPos = dataStr.find(self.hwMarkData)
+        if dataPos < 0:
+            return -1, []
+        lines = dataStr[dataPos+len(self.hwMarkData):].strip().splitlines()
+        if len(lines) != len(self.ops):
+            return -1, []
+        results = []
+        for i, line in enumerate(lines):
+            tokens = line.split()
+            if not tokens or tokens[0] != self.hwMarkOp + str(i):
+                return -1, []
+            results.append([int(datum, 0) for datum in tokens[1:]])
+        return 0, results
+
+
+
+    # Run the program and remove the operations afterwards. Returns the
+    # results as a list of data lists in the order of the result slots.
+    def run(self):
+        cmd = self.get_cmd()
+        cmdLenMax = self.mcuSer.get_cmd_len_max()
+        if not self.ops or len(cmd) > cmdLenMax:
+            self.errorCount += 1
+            print(self.prefixError + "Error running the transaction program: The program must contain operations and fit into {0:d} characters!".format(cmdLenMax))
+            self.clear()
+            return -1, []
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Running a transaction program with {0:d} operation(s) on the MCU: ".format(len(self.ops)) + cmd)
+        timeStart = time.time()
+        self.mcuSer.send(cmd, self.delayTime)
+        self.runCount += 1
+        if self.debugLevel >= 3:
+            print(self.prefixDebug + "Response from MCU:")
+            print(self.mcuSer.get_full())
+        results = []
+        ret = self.mcuSer.eval()
+        if not ret:
+            ret, results = self.parse()
+        if ret:
+            self.errorCount += 1
+            print(self.prefixError + "Error running the transaction program!")
+            if self.debugLevel >= 1:
+                print(self.prefixError + "Command sent to MCU: " + cmd)
+                print(self.prefixError + "Response from MCU:")
+                print(self.mcuSer.get_full())
+            self.clear()
+            return -1, []
+        # Update the access statistics of the I2C ports and log the
+        # transactions, if tracing is enabled.
+        duration = (time.time() - timeStart) / len(self.ops)
+        for (op, opStr), result in zip(self.ops, results):
+            opType, mcuI2C, cntWr, cntRd = op
+            if opType != "i2c":
+                continue
+            if self.mcuSer.tracer:
+                tokens = opStr.split()
+                self.mcuSer.tracer.record(mcuI2C, int(tokens[2], 0), "write_read" if cntWr and cntRd else "write" if cntWr else "read",
+                                          [int(datum, 0) for datum in tokens[4:]], result, 0, duration, timeStart)
+            if cntWr:
+                mcuI2C.accessWrite += 1
+                mcuI2C.bytesWritten += cntWr
+            if cntRd:
+                mcuI2C.accessRead += 1
+                mcuI2C.bytesRead += cntRd
+        self.clear()
+        return 0, results
+
+
+
+    # Print details.
+    def print_details(self):
+        print(self.prefixDetails, end='')
+        print("Transaction program", end='')
+        print(self.separatorDetails + "Operations: {0:d}".format(len(self.ops)), end='')
+        if self.debugLevel >= 1:
+            print(self.separatorDetails + "Error count: {0:d}".format(self.errorCount), end='')
+            print(self.separatorDetails + "Programs run: {0:d}".format(self.runCount), end='')
+        print()
+        return 0
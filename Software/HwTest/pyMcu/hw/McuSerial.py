@@ -2,16 +2,55 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 24 Apr 2020
-# Rev.: 06 Apr 2023
+# Rev.: 19 Oct 2026
 #
 # Python class for communicating with the TM4C1290NCPDT MCU over a serial port
 # (UART).
 #
+# Hints:
+# - Besides the ASCII command console, the MCU firmware supports a binary frame
+#   mode (command `bin'). When it is enabled with bin_enable(), the binary
+#   frame mode is negotiated on the first binary access. If the firmware does
+#   not support it, the ASCII command console is used instead.
+# - Sending an ASCII command leaves the binary frame mode automatically. It is
+#   entered again on the next binary access.
+# - The echo of the MCU console can be disabled with echo_set(). Then the
+#   phase of removing the echo of a command from the response is skipped.
+# - The maximum length of a command line is read from the firmware command
+#   `info' on first use. Longer commands are rejected instead of being
+#   truncated by the MCU. Use pack_cmds() to split long payloads.
+# - The baud rate can be switched at runtime with baud_switch(). The MCU must
+#   receive a ping at the new baud rate within a timeout, otherwise both sides
+#   fall back to the previous baud rate.
+# - Several threads can share the serial port after threadsafe_enable(). All
+#   accesses are then executed by one owner thread, which serves the requests
+#   from a priority queue. The MCU response is kept per thread, so that get()
+#   and eval() always refer to the last command of the calling thread.
+# - The priority of the requests of a thread is set with priority_set().
+#   Alarm and protection commands should use mcuPriorityAlarm to preempt
+#   routine polling (mcuPriorityPoll). Every MCU command is a request of its
+#   own, so that long operations like programming a clock chip yield to
+#   urgent requests between their commands. Use call() to execute several
+#   accesses without interruption. The device drivers do so for their
+#   transactions, e.g. a write without stop condition followed by a read with
+#   repeated start, or setting the page of a PMBus device followed by reading
+#   a register.
+# - The latency, the bytes on the wire, the errors and the timeouts of every
+#   MCU command and binary frame are recorded in the statistics object stats
+#   (see McuStats).
+# - The I2C transactions can be traced with trace_enable() (see McuTrace).
+#
 
 
 
+import importlib
+import itertools
+import queue
 import sys
+import threading
+import time
 import serial
+import McuStats
 
 
 
@@ -19,8 +58,14 @@ class McuSerial:
 
     # MCU-specific variables and parameters.
     mcuCmdPrompt = "> "
+    mcuCmdLenMax            = 255       # Default maximum length of a command line.
+    mcuMarkCmdLen           = "Command line length:"
+    mcuBaudDefault          = 115200
+    mcuCmdBaud              = "baud"
+    mcuBaudPing             = "ping"
+    mcuBaudTimeout          = 1.0       # Timeout of the MCU for the ping in seconds.
+    mcuCmdEcho              = "echo"
     mcuReadLineMax          = 100
-    mcuResponse             = ""
     mcuResponseOk           = "OK"
     mcuResponseWarning      = "WARNING"
     mcuResponseError        = "ERROR"
@@ -31,6 +76,32 @@ class McuSerial:
     mcuResponseCodeFatal    = 3
     mcuResponseCodeUnknown  = -1
 
+    # Binary frame mode.
+    mcuCmdBin               = "bin"
+    mcuBinMark              = "binary frame mode"
+    mcuBinSofReq            = 0xa5
+    mcuBinSofRsp            = 0x5a
+    mcuBinHeaderLen         = 4         # Opcode, bus, address and flags.
+    mcuBinDataMax           = 64        # Maximum number of data bytes per frame.
+    mcuBinTimeout           = 0.1       # Timeout for a response frame in seconds.
+    mcuBinCharEsc           = 0x1b      # Leave the binary frame mode.
+    mcuBinOpPing            = 0x00
+    mcuBinOpI2C             = 0x01
+    mcuBinOpExit            = 0x7f
+    mcuBinOpNames           = {mcuBinOpPing: "ping", mcuBinOpI2C: "i2c", mcuBinOpExit: "exit"}
+    mcuBinStatusOk          = 0x00
+    mcuBinStatusCrc         = 0x01
+    mcuBinStatusFrame       = 0x02
+    mcuBinStatusOpcode      = 0x03
+    mcuBinStatusParam       = 0x04
+    mcuBinStatusI2C         = 0x05
+
+    # Request priorities for the thread-safe access. Lower values are served
+    # first.
+    mcuPriorityAlarm        = 0         # Alarm and protection commands.
+    mcuPriorityControl      = 1         # Default priority.
+    mcuPriorityPoll         = 2         # Routine polling.
+
     # Message prefixes and separators.
     prefixDetails       = " - "
     separatorDetails    = " - "
@@ -50,7 +121,7 @@ class McuSerial:
     def __init__(self, port):
         self.ser = serial.Serial()
         self.ser.port = port
-        self.ser.baudrate = 115200
+        self.ser.baudrate = self.mcuBaudDefault
         self.ser.bytesize = serial.EIGHTBITS
         self.ser.parity = serial.PARITY_NONE
         self.ser.stopbits = serial.STOPBITS_ONE
@@ -65,6 +136,21 @@ class McuSerial:
         self.accessWrite = 0
         self.bytesRead = 0
         self.bytesWritten = 0
+        self.mcuEcho = True
+        self.cmdLenMax = self.mcuCmdLenMax
+        self.cmdLenQueried = False
+        self.binEnable = False
+        self.binActive = False
+        self.binFrames = 0
+        self.local = threading.local()
+        self.owner = None
+        self.requests = None
+        self.requestSeq = itertools.count()
+        self.requestCount = 0
+        self.timeoutCount = 0
+        self.timeEcho = 0.0
+        self.stats = McuStats.McuStats()
+        self.tracer = None
 
         try:
             if port:
@@ -81,6 +167,144 @@ class McuSerial:
 
 
 
+    # MCU response of the last command sent by the calling thread.
+    @property
+    def mcuResponse(self):
+        return getattr(self.local, "mcuResponse", "")
+
+    @mcuResponse.setter
+    def mcuResponse(self, value):
+        self.local.mcuResponse = value
+
+
+
+    # Enable or disable the thread-safe access. When it is disabled, the
+    # pending requests are served before the owner thread is stopped.
+    def threadsafe_enable(self, enable):
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + ("Enabling" if enable else "Disabling") + " the thread-safe access.")
+        if enable and not self.owner:
+            self.requests = queue.PriorityQueue()
+            self.owner = threading.Thread(target=self.owner_run, name="McuSerial " + str(self.ser.port), daemon=True)
+            self.owner.start()
+        elif not enable and self.owner:
+            self.requests.put((sys.maxsize, next(self.requestSeq), None))
+            self.owner.join()
+            self.owner = None
+            self.requests = None
+        return 0
+
+
+
+    # Check if the thread-safe access is enabled.
+    def threadsafe_get(self):
+        return self.owner is not None
+
+
+
+    # Set the priority of the requests of the calling thread. Returns the
+    # previous priority.
+    def priority_set(self, priority):
+        priorityOld = self.priority_get()
+        self.local.priority = priority
+        return priorityOld
+
+
+
+    # Get the priority of the requests of the calling thread.
+    def priority_get(self):
+        return getattr(self.local, "priority", self.mcuPriorityControl)
+
+
+
+    # Check if an access must be passed to the owner thread.
+    def owner_required(self):
+        return self.owner is not None and threading.current_thread() is not self.owner
+
+
+
+    # Serve the requests of all threads by priority. Requests with the same
+    # priority are served in the order of arrival.
+    def owner_run(self):
+        while True:
+            _, _, request = self.requests.get()
+            if request is None:
+                break
+            func, args, done, result = request
+            try:
+                result[:] = [func(*args), None, self.mcuResponse]
+            except BaseException as e:
+                result[:] = [None, e, self.mcuResponse]
+            self.requestCount += 1
+            done.set()
+
+
+
+    # Execute a function with its arguments without interruption by other
+    # threads and return its result. The MCU response is passed to the
+    # calling thread. If priority is None, the priority of the calling thread
+    # is used.
+    def call(self, func, *args, priority=None):
+        if not self.owner_required():
+            return func(*args)
+        if priority is None:
+            priority = self.priority_get()
+        done = threading.Event()
+        result = [None, None, ""]
+        self.requests.put((priority, next(self.requestSeq), [func, args, done, result]))
+        done.wait()
+        value, exception, self.mcuResponse = result
+        if exception is not None:
+            raise exception
+        return value
+
+
+
+    # Send a MCU command and return the status and the full response of this
+    # command.
+    def request(self, cmd, priority=None):
+        return self.call(lambda: (self.send(cmd), self.get_full()), priority=priority)
+
+
+
+    # Use the serial port object ser instead of the serial device, e.g. a
+    # simulated MCU (see McuSim). It must provide the pyserial interface.
+    def attach(self, ser):
+        ser.baudrate = self.ser.baudrate
+        ser.timeout = self.ser.timeout
+        self.ser = ser
+        self.simulateHwAccess = False
+        self.mcuEcho = True
+        self.cmdLenQueried = False
+        self.binActive = False
+        return 0
+
+
+
+    # Enable the tracing of the I2C transactions. The transactions are
+    # appended to the file, or kept in memory if no file name is given.
+    def trace_enable(self, fileName=None):
+        # Import here, so that the module is only loaded when required.
+        McuTrace = importlib.import_module("McuTrace")
+        if self.tracer:
+            self.tracer.close()
+        self.tracer = McuTrace.McuTrace(fileName)
+        if fileName and not self.tracer.fileName:
+            self.tracer = None
+            return -1
+        return 0
+
+
+
+    # Disable the tracing of the I2C transactions.
+    def trace_disable(self):
+        if self.tracer:
+            self.tracer.close()
+            self.tracer = None
+        return 0
+
+
+
     # Print details.
     def print_details(self):
         if self.simulateHwAccess:
@@ -101,6 +325,15 @@ class McuSerial:
         if self.debugLevel >= 1:
             print(self.separatorDetails + "Bytes read: {0:d}".format(self.bytesRead), end='')
             print(self.separatorDetails + "Bytes written: {0:d}".format(self.bytesWritten), end='')
+        print(self.separatorDetails + "Echo: " + ("enabled" if self.mcuEcho else "disabled"), end='')
+        print(self.separatorDetails + "Binary frame mode: " + ("enabled" if self.binEnable else "disabled"), end='')
+        if self.debugLevel >= 1 and self.binEnable:
+            print(self.separatorDetails + "Binary frames: {0:d}".format(self.binFrames), end='')
+        if self.debugLevel >= 1:
+            print(self.separatorDetails + "Timeouts: {0:d}".format(self.timeoutCount), end='')
+        print(self.separatorDetails + "Thread-safe access: " + ("enabled" if self.owner else "disabled"), end='')
+        if self.debugLevel >= 1 and self.owner:
+            print(self.separatorDetails + "Requests served: {0:d}".format(self.requestCount), end='')
         print()
         return 0
 
@@ -108,6 +341,8 @@ class McuSerial:
 
     # Clear data from the serial port.
     def clear(self):
+        if self.owner_required():
+            return self.call(self.clear)
         if self.debugLevel >= 2:
             print(self.prefixDebug + "Clearing data from the serial port.")
         if self.simulateHwAccess:
@@ -185,14 +420,44 @@ class McuSerial:
 
 
 
-    # Send a MCU command to the serial port.
-    def send(self, cmd):
+    # Send a MCU command to the serial port. The MCU takes the additional time
+    # delay in seconds before it responds, e.g. for the delays of a
+    # transaction program.
+    def send(self, cmd, delay=0):
+        if self.owner_required():
+            return self.call(self.send, cmd, delay)
         # Clear previous MCU response.
         self.mcuResponse = ""
+        # The MCU would silently truncate a too long command line.
+        if len(cmd) > self.cmdLenMax:
+            self.errorCount += 1
+            print(self.prefixError + "MCU command too long: {0:d} characters, but at most {1:d} are supported!".format(len(cmd), self.cmdLenMax))
+            return -1
         if self.simulateHwAccess:
             print(self.simulateHwAccessMsg + " Sending MCU command: " + cmd)
             self.mcuResponse = self.mcuResponseOk + " (simulated hardware access)"
             return self.mcuResponseCodeOk
+        # Return to the ASCII command console.
+        if self.binActive:
+            self.bin_exit()
+        timeStart = time.time()
+        bytesWritten = self.bytesWritten
+        bytesRead = self.bytesRead
+        timeoutCount = self.timeoutCount
+        ret = self.send_line(cmd, delay)
+        self.stats.record("serial", cmd.split(" ", 1)[0], "", time.time() - timeStart,
+                          self.bytesWritten - bytesWritten, self.bytesRead - bytesRead,
+                          error=ret != 0 or not self.mcuResponse.startswith(self.mcuResponseOk),
+                          timeout=self.timeoutCount != timeoutCount, timeEcho=self.timeEcho)
+        return ret
+
+
+
+    # Write a command line to the serial port and read the response of the
+    # MCU until the command prompt.
+    def send_line(self, cmd, delay=0):
+        timeStart = time.time()
+        self.timeEcho = 0.0
         try:
             if self.debugLevel >= 2:
                 print(self.prefixDebug + "Sending MCU command: " + cmd)
@@ -223,16 +488,23 @@ class McuSerial:
             # Remove the echo of the command.
             cnt = 0
             line = ""
-            serTimeoutBackup = self.ser.timeout
-            # Temporarily set a longer timeout.
-            self.ser.timeout = 0.05
-            while line.find('\n') < 0:
-                cnt += 1
-                line = self.ser.readline().decode('utf-8')
-                self.bytesRead += len(line)
-                if cnt > self.mcuReadLineMax:
-                    break
-            self.ser.timeout = serTimeoutBackup
+            if self.mcuEcho:
+                serTimeoutBackup = self.ser.timeout
+                # Temporarily set a longer timeout.
+                self.ser.timeout = 0.05
+                while line.find('\n') < 0:
+                    cnt += 1
+                    line = self.ser.readline().decode('utf-8')
+                    self.bytesRead += len(line)
+                    if cnt > self.mcuReadLineMax:
+                        break
+                self.ser.timeout = serTimeoutBackup
+                self.timeEcho = time.time() - timeStart
+            # Wait until the MCU starts to respond after the delay.
+            if delay:
+                timeEnd = time.time() + delay
+                while not self.ser.in_waiting and time.time() < timeEnd:
+                    time.sleep(0.001)
             # Read the response of the MCU and check for errors.
             self.mcuResponse = ""
             while line != self.mcuCmdPrompt:
@@ -243,6 +515,7 @@ class McuSerial:
                     return 0
                 if cnt > self.mcuReadLineMax:
                     self.errorCount += 1
+                    self.timeoutCount += 1
                     print(self.prefixError + "Incomplete response received from the MCU!")
                     return 1
                 if line != "":
@@ -255,3 +528,372 @@ class McuSerial:
             print(self.prefixError + "Error reading from serial port `" + self.ser.portstr + "': " + str(e))
             return -1
 
+
+
+    # Get the maximum length of a command line. It is read from the firmware
+    # information on first use. Older firmware versions do not show it, so
+    # the default is kept.
+    def get_cmd_len_max(self):
+        if self.owner_required():
+            return self.call(self.get_cmd_len_max)
+        if self.cmdLenQueried or self.simulateHwAccess:
+            return self.cmdLenMax
+        self.cmdLenQueried = True
+        self.send("info")
+        for line in self.mcuResponse.splitlines():
+            markPos = line.find(self.mcuMarkCmdLen)
+            if markPos >= 0:
+                try:
+                    self.cmdLenMax = int(line[markPos+len(self.mcuMarkCmdLen):].split()[0])
+                except (IndexError, ValueError):
+                    pass
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Maximum length of a command line: {0:d}".format(self.cmdLenMax))
+        return self.cmdLenMax
+
+
+
+    # Pack the parts of a command into as few command lines as possible. Each
+    # command line starts with the prefix and contains at most partsMax parts,
+    # if partsMax is not 0. Returns an empty list if a part does not fit into
+    # a command line.
+    def pack_cmds(self, prefix, parts, partsMax=0):
+        cmdLenMax = self.get_cmd_len_max()
+        cmds = []
+        cmd = prefix
+        cnt = 0
+        for part in parts:
+            if len(prefix) + len(part) > cmdLenMax:
+                return []
+            if len(cmd) + len(part) > cmdLenMax or (partsMax and cnt >= partsMax):
+                cmds.append(cmd)
+                cmd = prefix
+                cnt = 0
+            cmd += part
+            cnt += 1
+        if cnt:
+            cmds.append(cmd)
+        return cmds
+
+
+
+    # Calculate the CRC-16/CCITT-FALSE of the data bytes.
+    @classmethod
+    def crc16(cls, data):
+        crc = 0xffff
+        for datum in data:
+            crc ^= (datum & 0xff) << 8
+            for _ in range(8):
+                if crc & 0x8000:
+                    crc = ((crc << 1) ^ 0x1021) & 0xffff
+                else:
+                    crc = (crc << 1) & 0xffff
+        return crc
+
+
+
+    # Enable or disable the binary frame mode. If it is disabled while being
+    # active, the MCU returns to the ASCII command console.
+    def bin_enable(self, enable):
+        if self.owner_required():
+            return self.call(self.bin_enable, enable)
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + ("Enabling" if enable else "Disabling") + " the binary frame mode.")
+        if not enable and self.binActive:
+            self.bin_exit()
+        self.binEnable = enable and not self.simulateHwAccess
+        return 0
+
+
+
+    # Check if the binary frame mode can be used. Enter it if it is enabled,
+    # but not active yet.
+    def bin_check(self):
+        if self.owner_required():
+            return self.call(self.bin_check)
+        if self.binEnable and not self.binActive:
+            self.bin_enter()
+        return self.binActive
+
+
+
+    # Read lines from the serial port until the command prompt is received.
+    # The lines are stored as MCU response.
+    def read_prompt(self):
+        cnt = 0
+        line = ""
+        self.mcuResponse = ""
+        serTimeoutBackup = self.ser.timeout
+        # Temporarily set a longer timeout.
+        self.ser.timeout = 0.05
+        while line != self.mcuCmdPrompt:
+            cnt += 1
+            line = self.ser.readline().decode('utf-8', 'replace')
+            self.bytesRead += len(line)
+            if cnt > self.mcuReadLineMax:
+                break
+            if line != self.mcuCmdPrompt and line.strip():
+                self.mcuResponse += line.rstrip('\n\r') + '\n'
+        self.ser.timeout = serTimeoutBackup
+        return 0 if line == self.mcuCmdPrompt else -1
+
+
+
+    # Send a MCU command and read only the first line of the response. This is
+    # used for commands which change the communication with the MCU, so that
+    # the rest of the response must be read differently.
+    def send_first_line(self, cmd):
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Sending MCU command: " + cmd)
+        try:
+            self.ser.write(cmd.encode('utf-8'))
+            self.ser.flush()
+            self.ser.write("\r".encode('utf-8'))
+            self.ser.flush()
+            self.accessWrite += 1
+            self.bytesWritten += len(cmd) + 1
+            # Wait for the response, which follows the echo of the command.
+            self.accessRead += 1
+            cnt = 0
+            line = ""
+            serTimeoutBackup = self.ser.timeout
+            # Temporarily set a longer timeout.
+            self.ser.timeout = 0.05
+            while not line.startswith(self.mcuResponseOk) and not line.startswith(self.mcuResponseError):
+                cnt += 1
+                line = self.ser.readline().decode('utf-8', 'replace')
+                self.bytesRead += len(line)
+                if cnt > self.mcuReadLineMax:
+                    break
+            self.ser.timeout = serTimeoutBackup
+        except Exception as e:
+            self.errorCount += 1
+            print(self.prefixError + "Error accessing serial port `" + self.ser.portstr + "': " + str(e))
+            return -1, ""
+        return 0, line
+
+
+
+    # Enter the binary frame mode and verify it with a ping frame. If the
+    # firmware does not support the binary frame mode, it is disabled and the
+    # ASCII command console is used.
+    def bin_enter(self):
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Entering the binary frame mode.")
+        self.binActive = False
+        ret, line = self.send_first_line(self.mcuCmdBin)
+        if ret:
+            self.binEnable = False
+            return -1
+        if not line.startswith(self.mcuResponseOk) or line.find(self.mcuBinMark) < 0:
+            # The firmware does not support the binary frame mode.
+            self.read_prompt()
+            self.binEnable = False
+            if self.debugLevel >= 1:
+                print(self.prefixDebug + "The MCU firmware does not support the binary frame mode. Using the ASCII command console.")
+            return -1
+        self.binActive = True
+        ping = [0x55, 0xaa, 0x00, 0xff]
+        ret, status, data = self.bin_transfer(self.mcuBinOpPing, 0, 0, 0, ping)
+        if ret or status != self.mcuBinStatusOk or data != ping:
+            self.errorCount += 1
+            print(self.prefixError + "Error verifying the binary frame mode. Using the ASCII command console.")
+            if self.binActive:
+                self.bin_resync()
+            self.binEnable = False
+            return -1
+        return 0
+
+
+
+    # Leave the binary frame mode and return to the ASCII command console.
+    def bin_exit(self):
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Leaving the binary frame mode.")
+        ret, status, _ = self.bin_transfer(self.mcuBinOpExit, 0, 0, 0, [])
+        if ret:
+            return ret
+        self.binActive = False
+        if status != self.mcuBinStatusOk or self.read_prompt():
+            self.errorCount += 1
+            print(self.prefixError + "Error leaving the binary frame mode!")
+            self.bin_resync()
+            return -1
+        return 0
+
+
+
+    # Bring the MCU back to the ASCII command console after a transmission
+    # error: Wait until the MCU drops the incomplete frame, then send the
+    # escape character, which also terminates a pending ASCII command line.
+    def bin_resync(self):
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Resynchronizing the communication with the MCU.")
+        self.binActive = False
+        try:
+            time.sleep(self.mcuBinTimeout)
+            self.ser.reset_input_buffer()
+            self.ser.write(bytes([self.mcuBinCharEsc]))
+            self.ser.flush()
+            self.read_prompt()
+        except Exception as e:
+            self.errorCount += 1
+            print(self.prefixError + "Error accessing serial port `" + self.ser.portstr + "': " + str(e))
+            return -1
+        return 0
+
+
+
+    # Send a request frame and receive the response frame. Returns the status
+    # and the data of the response.
+    def bin_transfer(self, opcode, bus, addr, flags, data):
+        if self.owner_required():
+            return self.call(self.bin_transfer, opcode, bus, addr, flags, data)
+        # Another thread may have returned to the ASCII command console.
+        if not self.binActive and self.binEnable:
+            self.bin_enter()
+        if not self.binActive or len(data) > self.mcuBinDataMax:
+            # Do not increase the error counter here!
+            print(self.prefixError + "Error sending a binary frame: The binary frame mode must be active and at most {0:d} data bytes can be sent!".format(self.mcuBinDataMax))
+            return -1, 0, []
+        frame = [self.mcuBinHeaderLen + len(data), opcode & 0xff, bus & 0xff, addr & 0xff, flags & 0xff] + [datum & 0xff for datum in data]
+        crc = self.crc16(frame)
+        frame = bytes([self.mcuBinSofReq] + frame + [crc >> 8, crc & 0xff])
+        if self.debugLevel >= 3:
+            print(self.prefixDebug + "Sending binary frame:" + "".join(" 0x{0:02x}".format(datum) for datum in frame))
+        opName = self.mcuBinOpNames.get(opcode, "0x{0:02x}".format(opcode))
+        timeStart = time.time()
+        try:
+            self.ser.write(frame)
+            self.ser.flush()
+            self.accessWrite += 1
+            self.bytesWritten += len(frame)
+            self.binFrames += 1
+            self.accessRead += 1
+            serTimeoutBackup = self.ser.timeout
+            self.ser.timeout = self.mcuBinTimeout
+            # Skip bytes before the start of the frame.
+            cnt = 0
+            sof = self.ser.read(1)
+            while sof and sof[0] != self.mcuBinSofRsp and cnt < self.mcuBinDataMax:
+                cnt += 1
+                sof = self.ser.read(1)
+            length = self.ser.read(1)
+            rsp = self.ser.read(length[0] + 2) if length else b""
+            self.ser.timeout = serTimeoutBackup
+            self.bytesRead += cnt + len(sof) + len(length) + len(rsp)
+        except Exception as e:
+            self.errorCount += 1
+            print(self.prefixError + "Error accessing serial port `" + self.ser.portstr + "': " + str(e))
+            self.stats.record("serial", "bin", opName, time.time() - timeStart, len(frame), 0, error=True, resync=True)
+            self.bin_resync()
+            return -1, 0, []
+        bytesIn = cnt + len(sof) + len(length) + len(rsp)
+        if self.debugLevel >= 3:
+            print(self.prefixDebug + "Received binary frame:" + "".join(" 0x{0:02x}".format(datum) for datum in sof + length + rsp))
+        if not sof or sof[0] != self.mcuBinSofRsp or not length or length[0] < 2 or len(rsp) != length[0] + 2 or \
+                self.crc16(length + rsp[:-2]) != (rsp[-2] << 8 | rsp[-1]) or rsp[0] != opcode & 0xff:
+            self.errorCount += 1
+            print(self.prefixError + "Invalid or incomplete binary frame received from the MCU!")
+            timeout = not sof or not length or len(rsp) != length[0] + 2
+            if timeout:
+                self.timeoutCount += 1
+            self.stats.record("serial", "bin", opName, time.time() - timeStart, len(frame), bytesIn, error=True, timeout=timeout, resync=True)
+            self.bin_resync()
+            return -1, 0, []
+        self.stats.record("serial", "bin", opName, time.time() - timeStart, len(frame), bytesIn, error=rsp[1] != self.mcuBinStatusOk)
+        return 0, rsp[1], list(rsp[2:-2])
+
+
+
+    # Enable or disable the echo of the MCU console. If the firmware does not
+    # support it, the echo stays enabled.
+    def echo_set(self, enable):
+        if self.owner_required():
+            return self.call(self.echo_set, enable)
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + ("Enabling" if enable else "Disabling") + " the echo of the MCU console.")
+        if self.simulateHwAccess:
+            if self.debugLevel >= 2:
+                print(self.simulateHwAccessMsg)
+            return 0
+        cmd = "{0:s} {1:d}".format(self.mcuCmdEcho, 1 if enable else 0)
+        # The command itself is still sent with the current echo setting.
+        self.send(cmd)
+        if self.eval():
+            self.errorCount += 1
+            print(self.prefixError + "Error {0:s} the echo of the MCU console!".format("enabling" if enable else "disabling"))
+            if self.debugLevel >= 1:
+                print(self.prefixError + "Command sent to MCU: " + cmd)
+                print(self.prefixError + "Response from MCU:")
+                print(self.get_full())
+            return -1
+        self.mcuEcho = enable
+        return 0
+
+
+
+    # Get the baud rate of the serial port.
+    def get_baudrate(self):
+        return self.ser.baudrate
+
+
+
+    # Switch the baud rate of the MCU UART and of the serial port. After both
+    # sides have switched, a ping is sent to the MCU at the new baud rate. If
+    # it is not answered, both sides fall back to the previous baud rate.
+    def baud_switch(self, baud):
+        if self.owner_required():
+            return self.call(self.baud_switch, baud)
+        if self.debugLevel >= 2:
+            print(self.prefixDebug + "Switching the baud rate to {0:d}.".format(baud))
+        if self.simulateHwAccess:
+            if self.debugLevel >= 2:
+                print(self.simulateHwAccessMsg)
+            return 0
+        if baud == self.ser.baudrate:
+            return 0
+        if self.binActive:
+            self.bin_exit()
+        baudOld = self.ser.baudrate
+        ret, line = self.send_first_line("{0:s} {1:d}".format(self.mcuCmdBaud, baud))
+        if ret:
+            return -1
+        try:
+            if not line.startswith(self.mcuResponseOk):
+                self.read_prompt()
+                self.errorCount += 1
+                print(self.prefixError + "Error switching the baud rate to {0:d}: The MCU rejected it.".format(baud))
+                if self.debugLevel >= 1:
+                    print(self.prefixError + "Response from MCU:")
+                    print(line.rstrip('\n\r'))
+                return -1
+            # Switch the serial port and ping the MCU at the new baud rate.
+            # Give the MCU some time to switch its UART first.
+            timeStart = time.time()
+            self.ser.baudrate = baud
+            time.sleep(0.01)
+            self.ser.reset_input_buffer()
+            self.ser.write((self.mcuBaudPing + "\r").encode('utf-8'))
+            self.ser.flush()
+            self.accessWrite += 1
+            self.bytesWritten += len(self.mcuBaudPing) + 1
+            if not self.read_prompt() and not self.eval():
+                if self.debugLevel >= 1:
+                    print(self.prefixDebug + "Baud rate switched from {0:d} to {1:d}.".format(baudOld, baud))
+                return 0
+        except Exception as e:
+            self.errorCount += 1
+            print(self.prefixError + "Error switching the baud rate of serial port `" + self.ser.portstr + "' to {0:d}: ".format(baud) + str(e))
+            timeStart = time.time()
+        # Fall back to the previous baud rate after the MCU timed out.
+        self.errorCount += 1
+        print(self.prefixError + "Error switching the baud rate to {0:d}. Falling back to {1:d}.".format(baud, baudOld))
+        try:
+            self.ser.baudrate = baudOld
+            time.sleep(max(0, self.mcuBaudTimeout - (time.time() - timeStart)))
+            self.read_prompt()
+        except Exception as e:
+            self.errorCount += 1
+            print(self.prefixError + "Error accessing serial port `" + self.ser.portstr + "': " + str(e))
+        return -1
@@ -0,0 +1,666 @@
+# File: McuSim.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 19 Oct 2026
+# Rev.: 19 Oct 2026
+#
+# Python class for simulating the TM4C1290NCPDT MCU with the hardware test
+# firmware behind a serial port, including timing models of the UART and of
+# the I2C master ports.
+#
+# Hints:
+# - The object replaces the pyserial object of McuSerial (see
+#   McuSerial.attach()), so that the complete software stack is exercised
+#   without hardware.
+# - Supported firmware commands: info, echo, baud (with ping), bin (binary
+#   frame mode), delay, gpio, power, i2c, i2c-br, i2c-bw, i2c-det, i2c-ml and
+#   prog. The responses follow the firmware in
+#   Firmware/Projects/cm_mcu_hwtest.
+# - UART timing: Every byte takes 10 bit times at the current baud rate in
+#   each direction. The echo is sent while the command is received. The host
+#   reads with the inter-byte timeout semantics of pyserial.
+# - I2C timing: Every byte takes 9 bit times (8 data bits and ACK) at the I2C
+#   clock, plus start, stop and a fixed firmware overhead per transaction.
+#   The transaction lists of `i2c-ml' run concurrently across the ports.
+# - Devices: Only registered slave addresses acknowledge. A device has 256
+#   8-bit registers with an auto-incremented register pointer, which is set
+#   by the first byte written. A multiplexer has one control register.
+# - The delays are real (time.sleep()), so that the wall clock time of an
+#   operation on the simulated MCU includes the modeled link and bus times.
+#
+
+
+
+import time
+
+
+
+class McuSim:
+
+    # Message prefixes and separators.
+    prefixDetails       = " - "
+    separatorDetails    = " - "
+    prefixError         = "ERROR: {0:s}: ".format(__file__)
+    prefixDebug         = "DEBUG: {0:s}: ".format(__file__)
+
+    # Debug configuration.
+    debugLevel = 0                 # Debug verbosity.
+
+    # Firmware parameters.
+    fwPrompt            = "> "
+    fwCmdLenMax         = 255       # Maximum length of a command line.
+    fwI2CPorts          = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
+    fwBlockLineBytes    = 32        # Data bytes per response line of a block read.
+    fwBinSofReq         = 0xa5
+    fwBinSofRsp         = 0x5a
+    fwBinCharEsc        = 0x1b
+    fwBinOpPing         = 0x00
+    fwBinOpI2C          = 0x01
+    fwBinOpExit         = 0x7f
+    fwBinStatusOk       = 0x00
+    fwBinStatusCrc      = 0x01
+    fwBinStatusOpcode   = 0x03
+    fwBinStatusParam    = 0x04
+    fwBinStatusI2C      = 0x05
+    fwI2CStatusNack     = 0x00000004
+
+    # Timing model in seconds.
+    timeCmdOverhead     = 20e-6     # Parsing and dispatching a command line.
+    timeI2COverhead     = 15e-6     # Firmware overhead per I2C transaction.
+    i2cClock            = 100000    # I2C clock frequency in Hz.
+
+
+
+    # Initialize the simulated MCU. The port settings are the attributes of a
+    # pyserial object.
+    def __init__(self, port="sim"):
+        self.port = port
+        self.portstr = port
+        self.baudrate = 115200
+        self.bytesize = 8
+        self.parity = "N"
+        self.stopbits = 1
+        self.timeout = None
+        self.xonxoff = False
+        self.rtscts = False
+        self.dsrdtr = False
+        self.writeTimeout = 2
+        self.echo = True
+        self.binMode = False
+        self.baudPending = 0
+        self.baudOld = self.baudrate
+        self.lineBuf = b""
+        self.frameBuf = b""
+        self.outData = bytearray()
+        self.outTimes = []
+        self.timeRxFree = 0.0
+        self.timeTxFree = 0.0
+        self.devices = {}
+        self.gpios = {"power-good": 0x3ff, "power-ctrl": 0xff, "led-user": 0x00}
+        self.reset_counters()
+
+
+
+    # Reset the access counters.
+    def reset_counters(self):
+        self.cmdCount = 0
+        self.frameCount = 0
+        self.bytesRx = 0
+        self.bytesTx = 0
+        self.i2cTransCount = 0
+        self.i2cBytes = 0
+        self.i2cNackCount = 0
+        self.i2cTime = 0.0
+        return 0
+
+
+
+    # Register an I2C device on the port. A multiplexer has only a control
+    # register. The register contents can be preset with a dictionary.
+    def device_add(self, port, slaveAddr, mux=False, regs=None):
+        device = {"mux": mux, "ptr": 0, "regs": bytearray(256)}
+        for reg, value in (regs or {}).items():
+            device["regs"][reg & 0xff] = value & 0xff
+        self.devices[(port, slaveAddr & 0x7f)] = device
+        return 0
+
+
+
+    # Time of one byte on the UART.
+    def uart_byte_time(self):
+        return 10 / self.baudrate
+
+
+
+    # ===============================================================
+    # pyserial interface.
+    # ===============================================================
+
+    # Open the port. Nothing to do.
+    def open(self):
+        return None
+
+
+
+    # Close the port. Nothing to do.
+    def close(self):
+        return None
+
+
+
+    # Bytes received by the host, which are available now.
+    @property
+    def in_waiting(self):
+        now = time.perf_counter()
+        return sum(1 for t in self.outTimes if t <= now)
+
+
+
+    # Wait until all bytes written by the host have been received by the MCU.
+    def flush(self):
+        self.sleep_until(self.timeRxFree)
+
+
+
+    # Drop all bytes sent by the MCU.
+    def reset_input_buffer(self):
+        self.outData = bytearray()
+        self.outTimes = []
+
+
+
+    # Receive bytes from the host. The bytes arrive at the MCU one after the
+    # other at the current baud rate.
+    def write(self, data):
+        byteTime = self.uart_byte_time()
+        timeStart = max(time.perf_counter(), self.timeRxFree)
+        self.timeRxFree = timeStart + len(data) * byteTime
+        self.bytesRx += len(data)
+        for i in range(len(data)):
+            self.receive(data[i:i+1], timeStart + (i + 1) * byteTime)
+        return len(data)
+
+
+
+    # Read up to cnt bytes within the timeout.
+    def read(self, cnt=1):
+        timeStart = time.perf_counter()
+        deadline = timeStart + self.timeout if self.timeout is not None else float("inf")
+        num = 0
+        while num < cnt and num < len(self.outTimes) and self.outTimes[num] <= deadline:
+            num += 1
+        if num and num == cnt:
+            self.sleep_until(self.outTimes[num - 1])
+        elif deadline != float("inf"):
+            self.sleep_until(deadline)
+        return self.pop(num)
+
+
+
+    # Read a line. Like pyserial, the timeout applies to every single byte,
+    # so that a partial line is returned if the MCU pauses.
+    def readline(self):
+        timeCur = time.perf_counter()
+        num = 0
+        timeEnd = None
+        while num < len(self.outTimes):
+            if self.timeout is not None and self.outTimes[num] > timeCur + self.timeout:
+                break
+            timeCur = max(timeCur, self.outTimes[num])
+            num += 1
+            if self.outData[num - 1] == ord("\n"):
+                timeEnd = timeCur
+                break
+        if timeEnd is None and self.timeout is not None:
+            timeEnd = timeCur + self.timeout
+        if timeEnd is not None:
+            self.sleep_until(timeEnd)
+        return self.pop(num)
+
+
+
+    # ===============================================================
+    # Auxiliary functions.
+    # ===============================================================
+
+    # Wait until the given time.
+    @classmethod
+    def sleep_until(cls, timeEnd):
+        delay = timeEnd - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+
+    # Remove the first bytes from the output queue.
+    def pop(self, num):
+        data = bytes(self.outData[:num])
+        del self.outData[:num]
+        del self.outTimes[:num]
+        return data
+
+
+
+    # Send bytes to the host, starting at the given time or as soon as the
+    # UART transmitter is free. Returns the time when the last byte is sent.
+    def transmit(self, data, timeStart):
+        byteTime = self.uart_byte_time()
+        timeCur = max(timeStart, self.timeTxFree)
+        for datum in data:
+            timeCur += byteTime
+            self.outData.append(datum)
+            self.outTimes.append(timeCur)
+        self.timeTxFree = timeCur
+        self.bytesTx += len(data)
+        return timeCur
+
+
+
+    # Send a text with the new line conversion of the firmware.
+    def transmit_str(self, s, timeStart):
+        return self.transmit(s.replace("\n", "\r\n").encode("utf-8"), timeStart)
+
+
+
+    # CRC-16/CCITT-FALSE as used by the binary frame mode.
+    @classmethod
+    def crc16(cls, data):
+        crc = 0xffff
+        for datum in data:
+            crc ^= datum << 8
+            for _ in range(8):
+                crc = ((crc << 1) ^ 0x1021) & 0xffff if crc & 0x8000 else (crc << 1) & 0xffff
+        return crc
+
+
+
+    # Process a byte received at the given time.
+    def receive(self, byte, timeRx):
+        if self.binMode:
+            self.receive_bin(byte, timeRx)
+            return
+        # Wait for the ping after switching the baud rate.
+        if self.baudPending:
+            if byte in b"\r\n":
+                self.baud_ping(self.lineBuf.decode("utf-8", "replace").strip(), timeRx)
+                self.lineBuf = b""
+            else:
+                self.lineBuf += byte
+            return
+        if byte == b"\n":
+            return
+        if byte == b"\x1b":
+            self.lineBuf = b""
+            return
+        if self.echo:
+            self.transmit(b"\r\n" if byte == b"\r" else byte, timeRx)
+        if byte != b"\r":
+            if len(self.lineBuf) < self.fwCmdLenMax:
+                self.lineBuf += byte
+            return
+        line = self.lineBuf.decode("utf-8", "replace")
+        self.lineBuf = b""
+        self.execute(line, timeRx)
+
+
+
+    # ===============================================================
+    # Command console.
+    # ===============================================================
+
+    # Execute a command line and send the response followed by the prompt.
+    def execute(self, line, timeRx):
+        tokens = line.split()
+        if not tokens:
+            self.transmit_str(self.fwPrompt, timeRx)
+            return
+        self.cmdCount += 1
+        cmd = tokens[0].lower()
+        params = tokens[1:]
+        timeDone = timeRx + self.timeCmdOverhead
+        try:
+            if cmd == "info":
+                rsp = "MDT-TP CM prototype MCU `cm_mcu_hwtest' firmware version (simulated).\n" + \
+                      "Command line length: {0:d} characters.\n".format(self.fwCmdLenMax) + \
+                      "It was compiled using the McuSim class."
+            elif cmd == "echo":
+                if params:
+                    self.echo = bool(int(params[0], 0))
+                    rsp = "OK. Echo {0:s}.".format("enabled" if self.echo else "disabled")
+                else:
+                    rsp = "OK. Echo: {0:d}".format(1 if self.echo else 0)
+            elif cmd == "baud":
+                if not params:
+                    rsp = "OK. Baud rate: {0:d}".format(self.baudrate)
+                else:
+                    self.baudPending = int(params[0], 0)
+                    self.baudOld = self.baudrate
+                    self.transmit_str("OK. Switching the baud rate to {0:d}. Send `ping' within 1000 ms.\n".format(self.baudPending), timeDone)
+                    return
+            elif cmd == "bin":
+                self.binMode = True
+                self.frameBuf = b""
+                self.transmit_str("OK. Entering binary frame mode.\n", timeDone)
+                return
+            elif cmd == "delay":
+                timeDone += int(params[0], 0) * 1e-6
+                rsp = "OK."
+            elif cmd == "gpio":
+                rsp = self.cmd_gpio(params)
+            elif cmd == "power":
+                rsp = self.cmd_power(params)
+            elif cmd == "i2c":
+                rsp, duration = self.cmd_i2c(params)
+                timeDone += duration
+            elif cmd == "i2c-br":
+                rsp, duration = self.cmd_i2c_br(params)
+                timeDone += duration
+            elif cmd == "i2c-bw":
+                rsp, duration = self.cmd_i2c_bw(line)
+                timeDone += duration
+            elif cmd == "i2c-det":
+                rsp, duration = self.cmd_i2c_det(params)
+                timeDone += duration
+            elif cmd == "i2c-ml":
+                rsp, duration = self.cmd_i2c_ml(line)
+                timeDone += duration
+            elif cmd == "prog":
+                rsp, duration = self.cmd_prog(line)
+                timeDone += duration
+            else:
+                rsp = "ERROR: Unknown command `{0:s}'.".format(tokens[0])
+        except (IndexError, ValueError):
+            rsp = "ERROR: Invalid parameters for command `{0:s}'.".format(tokens[0])
+        self.transmit_str(rsp + "\n" + self.fwPrompt, timeDone)
+
+
+
+    # Check the ping after switching the baud rate.
+    def baud_ping(self, line, timeRx):
+        if not line:
+            return
+        if line.lower() == "ping" and self.baudrate == self.baudPending:
+            rsp = "OK. Baud rate set to {0:d}.".format(self.baudPending)
+        else:
+            self.baudrate = self.baudOld
+            rsp = "WARNING: No `ping' received within 1000 ms. Baud rate restored to {0:d}.".format(self.baudOld)
+        self.baudPending = 0
+        self.transmit_str(rsp + "\n" + self.fwPrompt, timeRx + self.timeCmdOverhead)
+
+
+
+    # Get or set a GPIO type.
+    def cmd_gpio(self, params):
+        gpioType = params[0]
+        if len(params) > 1:
+            self.gpios[gpioType] = int(params[1], 0)
+            return "OK: GPIO {0:s} set to 0x{1:02x}.".format(gpioType, self.gpios[gpioType])
+        return "OK: Current GPIO {0:s} value: 0x{1:02x}".format(gpioType, self.gpios.get(gpioType, 0))
+
+
+
+    # Get or set a power domain.
+    def cmd_power(self, params):
+        if len(params) > 1:
+            return "OK."
+        return "OK: Power domain {0:s} is ON.".format(params[0])
+
+
+
+    # ===============================================================
+    # I2C master ports.
+    # ===============================================================
+
+    # Time of an I2C transaction with the given number of bytes (including
+    # the address bytes) in seconds.
+    def i2c_time(self, cntBytes):
+        return self.timeI2COverhead + (cntBytes * 9 + 2) / self.i2cClock
+
+
+
+    # Execute an I2C transaction: Write the data bytes (if any), then read
+    # cntRd bytes (if any) with repeated start. Returns the status, the data
+    # read and the duration.
+    def i2c_transfer(self, port, slaveAddr, dataWr, cntRd, quick=False):
+        self.i2cTransCount += 1
+        device = self.devices.get((port, slaveAddr & 0x7f))
+        if port not in self.fwI2CPorts or device is None:
+            self.i2cNackCount += 1
+            duration = self.i2c_time(1)
+            self.i2cTime += duration
+            return self.fwI2CStatusNack, [], duration
+        dataRd = []
+        if device["mux"]:
+            if dataWr:
+                device["regs"][0] = dataWr[-1] & 0xff
+            dataRd = [device["regs"][0]] * cntRd
+        else:
+            if dataWr:
+                device["ptr"] = dataWr[0] & 0xff
+                for datum in dataWr[1:]:
+                    device["regs"][device["ptr"]] = datum & 0xff
+                    device["ptr"] = (device["ptr"] + 1) & 0xff
+            for _ in range(cntRd):
+                dataRd.append(device["regs"][device["ptr"]])
+                device["ptr"] = (device["ptr"] + 1) & 0xff
+        cntBytes = 0 if quick else len(dataWr) + cntRd
+        cntBytes += 1 + (1 if dataWr and cntRd else 0)
+        duration = self.i2c_time(cntBytes)
+        self.i2cBytes += len(dataWr) + cntRd
+        self.i2cTime += duration
+        return 0, dataRd, duration
+
+
+
+    # Format the error message of an I2C master port.
+    @classmethod
+    def i2c_error_str(cls, port, status):
+        return "ERROR: Error flags from I2C the master {0:d}: 0x{1:08x}\nERROR: NACK received.".format(port, status)
+
+
+
+    # Command `i2c PORT SLV-ADR ACC NUM|DATA'.
+    def cmd_i2c(self, params):
+        port, slaveAddr, accMode = [int(param, 0) for param in params[:3]]
+        data = [int(param, 0) for param in params[3:]]
+        if accMode & 0x08:
+            status, dataRd, duration = self.i2c_transfer(port, slaveAddr, [], 0, quick=True)
+        elif accMode & 0x01:
+            status, dataRd, duration = self.i2c_transfer(port, slaveAddr, [], data[0] if data else 1)
+        else:
+            status, dataRd, duration = self.i2c_transfer(port, slaveAddr, data, 0)
+        if status:
+            return self.i2c_error_str(port, status), duration
+        if accMode & 0x01 and not accMode & 0x08:
+            return "OK. Data:" + "".join(" 0x{0:02x}".format(datum) for datum in dataRd), duration
+        return "OK.", duration
+
+
+
+    # Command `i2c-br PORT SLV-ADR CMD NUM'.
+    def cmd_i2c_br(self, params):
+        port, slaveAddr, cmdCode, cnt = [int(param, 0) for param in params[:4]]
+        if cnt == 0:
+            # SMBus block read: The first byte read is the byte count.
+            device = self.devices.get((port, slaveAddr & 0x7f))
+            cnt = 1 + (device["regs"][cmdCode & 0xff] if device and not device["mux"] else 0)
+        status, dataRd, duration = self.i2c_transfer(port, slaveAddr, [cmdCode], cnt)
+        if status:
+            return self.i2c_error_str(port, status), duration
+        lines = ["".join(" 0x{0:02x}".format(datum) for datum in dataRd[i:i+self.fwBlockLineBytes])
+                 for i in range(0, len(dataRd), self.fwBlockLineBytes)]
+        return "OK. Data:" + "\n".join(lines), duration
+
+
+
+    # Command `i2c-bw PORT SLV-ADR DATA [,DATA]'.
+    def cmd_i2c_bw(self, line):
+        tokens = line.split(None, 3)
+        port, slaveAddr = int(tokens[1], 0), int(tokens[2], 0)
+        duration = 0.0
+        for block in tokens[3].replace(";", ",").split(","):
+            data = [int(datum, 0) for datum in block.split()]
+            if not data:
+                continue
+            status, _, durationBlock = self.i2c_transfer(port, slaveAddr, data, 0)
+            duration += durationBlock
+            if status:
+                return self.i2c_error_str(port, status) + "\nERROR: Burst write failed!", duration
+        return "OK.", duration
+
+
+
+    # Command `i2c-det PORT [MODE]'.
+    def cmd_i2c_det(self, params):
+        port = int(params[0], 0)
+        rsp = "OK. I2C device(s) found at slave address:"
+        duration = 0.0
+        for slaveAddr in range(1, 0x80):
+            if 0x30 <= slaveAddr <= 0x37 or 0x50 <= slaveAddr <= 0x5f:
+                status, _, durationAddr = self.i2c_transfer(port, slaveAddr, [], 1)
+            else:
+                status, _, durationAddr = self.i2c_transfer(port, slaveAddr, [], 0, quick=True)
+            duration += durationAddr
+            if not status:
+                rsp += " 0x{0:02x}".format(slaveAddr)
+        return rsp, duration
+
+
+
+    # Command `i2c-ml PORT SLV-ADR NUM [DATA] [,PORT SLV-ADR NUM [DATA]]'. The
+    # transactions of different ports run concurrently.
+    def cmd_i2c_ml(self, line):
+        rsp = "OK. Data:"
+        durationPorts = {}
+        for i, trans in enumerate(line.split(None, 1)[1].replace(";", ",").split(",")):
+            tokens = trans.split()
+            if not tokens:
+                continue
+            port, slaveAddr, cntRd = [int(token, 0) for token in tokens[:3]]
+            dataWr = [int(token, 0) for token in tokens[3:]]
+            status, dataRd, duration = self.i2c_transfer(port, slaveAddr, dataWr, cntRd)
+            durationPorts[port] = durationPorts.get(port, 0.0) + duration
+            rsp += "\n#{0:d} {1:d}".format(i, port)
+            if status:
+                rsp += " ERROR 0x{0:08x}".format(status)
+            else:
+                rsp += "".join(" 0x{0:02x}".format(datum) for datum in dataRd)
+        return rsp, max(durationPorts.values()) if durationPorts else 0.0
+
+
+
+    # Command `prog OP [,OP]'. The operations run one after the other.
+    def cmd_prog(self, line):
+        rsp = "OK. Data:"
+        duration = 0.0
+        for i, op in enumerate(line.split(None, 1)[1].replace(";", ",").split(",")):
+            tokens = op.split()
+            if not tokens:
+                continue
+            if tokens[0] == "i2c":
+                port, slaveAddr, cntRd = [int(token, 0) for token in tokens[1:4]]
+                dataWr = [int(token, 0) for token in tokens[4:]]
+                status, dataRd, durationOp = self.i2c_transfer(port, slaveAddr, dataWr, cntRd)
+                duration += durationOp
+                if status:
+                    return "ERROR: Operation {0:d}: Error flags from I2C the master {1:d}: 0x{2:08x}".format(i, port, status), duration
+                rsp += "\n#{0:d}".format(i) + "".join(" 0x{0:02x}".format(datum) for datum in dataRd)
+            elif tokens[0] == "gpio":
+                if len(tokens) > 2:
+                    self.gpios[tokens[1]] = int(tokens[2], 0)
+                rsp += "\n#{0:d} 0x{1:02x}".format(i, self.gpios.get(tokens[1], 0))
+            elif tokens[0] == "delay":
+                duration += int(tokens[1], 0) * 1e-6
+                rsp += "\n#{0:d}".format(i)
+            else:
+                return "ERROR: Unknown operation `{0:s}' at index {1:d}.".format(tokens[0], i), duration
+        return rsp, duration
+
+
+
+    # ===============================================================
+    # Binary frame mode.
+    # ===============================================================
+
+    # Process a byte in the binary frame mode.
+    def receive_bin(self, byte, timeRx):
+        if not self.frameBuf:
+            if byte[0] == self.fwBinCharEsc:
+                self.bin_leave(timeRx)
+            elif byte[0] == self.fwBinSofReq:
+                self.frameBuf = byte
+            return
+        self.frameBuf += byte
+        # Start of frame, length, payload and CRC.
+        if len(self.frameBuf) < 2 or len(self.frameBuf) < self.frameBuf[1] + 4:
+            return
+        frame = self.frameBuf[1:]
+        self.frameBuf = b""
+        self.frameCount += 1
+        opcode = frame[1]
+        timeDone = timeRx + self.timeCmdOverhead
+        data = []
+        if self.crc16(frame[:-2]) != (frame[-2] << 8 | frame[-1]):
+            status = self.fwBinStatusCrc
+        elif opcode == self.fwBinOpPing:
+            status = self.fwBinStatusOk
+            data = list(frame[5:-2])
+        elif opcode == self.fwBinOpI2C:
+            status, data, duration = self.bin_i2c(frame[2], frame[3], frame[4], list(frame[5:-2]))
+            timeDone += duration
+        elif opcode == self.fwBinOpExit:
+            self.bin_send(opcode, self.fwBinStatusOk, [], timeDone)
+            self.bin_leave(timeDone)
+            return
+        else:
+            status = self.fwBinStatusOpcode
+        self.bin_send(opcode, status, data, timeDone)
+
+
+
+    # Execute an I2C access of the binary frame mode.
+    def bin_i2c(self, port, slaveAddr, flags, data):
+        if port not in self.fwI2CPorts:
+            return self.fwBinStatusParam, [], 0.0
+        if flags & 0x08:
+            status, dataRd, duration = self.i2c_transfer(port, slaveAddr, [], 0, quick=True)
+        elif flags & 0x01:
+            status, dataRd, duration = self.i2c_transfer(port, slaveAddr, [], data[0] if data else 1)
+        elif data:
+            status, dataRd, duration = self.i2c_transfer(port, slaveAddr, data, 0)
+        else:
+            return self.fwBinStatusParam, [], 0.0
+        if status:
+            return self.fwBinStatusI2C, list(status.to_bytes(4, "big")), duration
+        return self.fwBinStatusOk, dataRd, duration
+
+
+
+    # Send a response frame.
+    def bin_send(self, opcode, status, data, timeStart):
+        frame = [len(data) + 2, opcode, status] + data
+        crc = self.crc16(frame)
+        self.transmit(bytes([self.fwBinSofRsp] + frame + [crc >> 8, crc & 0xff]), timeStart)
+
+
+
+    # Leave the binary frame mode and return to the command console.
+    def bin_leave(self, timeStart):
+        self.binMode = False
+        self.frameBuf = b""
+        self.transmit_str("OK. Leaving binary frame mode.\n" + self.fwPrompt, timeStart)
+
+
+
+    # Print details.
+    def print_details(self):
+        print(self.prefixDetails, end='')
+        print("Simulated MCU: " + self.port, end='')
+        print(self.separatorDetails + "Baud rate: {0:d}".format(self.baudrate), end='')
+        print(self.separatorDetails + "I2C clock: {0:d} Hz".format(self.i2cClock), end='')
+        print(self.separatorDetails + "I2C devices: {0:d}".format(len(self.devices)), end='')
+        print(self.separatorDetails + "Commands: {0:d}".format(self.cmdCount), end='')
+        print(self.separatorDetails + "Binary frames: {0:d}".format(self.frameCount), end='')
+        print(self.separatorDetails + "I2C transactions: {0:d}".format(self.i2cTransCount), end='')
+        print()
+        return 0
@@ -0,0 +1,196 @@
+# File: McuStats.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 19 Oct 2026
+# Rev.: 19 Oct 2026
+#
+# Python class for collecting latency and throughput statistics of the
+# accesses to the TM4C1290NCPDT MCU.
+#
+# Hints:
+# - Every access is recorded with a category, a name and an operation, e.g.
+#   ("serial", "i2c", ""), ("i2c", "port 4", "read") or
+#   ("device", "IC26 (LTM4700)", "write_read"). The categories are the layers
+#   of the software: MCU commands on the serial link, I2C master ports and
+#   I2C devices. One access appears once in every layer it passes, so the
+#   numbers must only be added up within a category.
+# - The latencies are stored in log-linear histograms with 32 sub-buckets per
+#   power of two (like HDR histograms), i.e. with a relative resolution of
+#   about 3%, independent of the number of samples.
+# - The time of a serial command is split into the time until the echo of the
+#   command is received and the time for the response.
+# - Accesses can be recorded from several threads.
+#
+
+
+
+import threading
+import time
+
+
+
+class McuStats:
+
+    # Message prefixes and separators.
+    prefixDetails       = " - "
+    separatorDetails    = " - "
+    prefixDebug         = "DEBUG: {0:s}: ".format(__file__)
+
+    # Debug configuration.
+    debugLevel = 0                 # Debug verbosity.
+
+    # Histogram parameters.
+    histSubBits         = 5         # 2^histSubBits sub-buckets per power of two.
+    histUnit            = 1e-6      # Resolution of the latencies in seconds.
+
+    # Percentiles shown in the summary.
+    percentiles         = [50, 90, 99]
+
+
+
+    # Initialize the statistics.
+    def __init__(self):
+        self.enabled = True
+        self.timeStart = time.time()
+        self.entries = {}
+        self.lock = threading.Lock()
+
+
+
+    # Remove all recorded accesses.
+    def reset(self):
+        self.timeStart = time.time()
+        self.entries = {}
+        return 0
+
+
+
+    # Get the histogram bucket of a latency in units of histUnit.
+    @classmethod
+    def hist_bucket(cls, value):
+        if value < 2 << cls.histSubBits:
+            return value
+        shift = value.bit_length() - cls.histSubBits - 1
+        return (shift << (cls.histSubBits + 1)) | (value >> shift)
+
+
+
+    # Get the value in the middle of a histogram bucket in seconds.
+    @classmethod
+    def hist_value(cls, bucket):
+        if bucket < 2 << cls.histSubBits:
+            return bucket * cls.histUnit
+        shift = bucket >> (cls.histSubBits + 1)
+        value = (bucket & ((2 << cls.histSubBits) - 1)) << shift
+        return (value + (1 << shift) / 2) * cls.histUnit
+
+
+
+    # Get a percentile (0..100) of a histogram in seconds.
+    @classmethod
+    def hist_percentile(cls, hist, percentile):
+        count = sum(hist.values())
+        if not count:
+            return 0.0
+        threshold = count * percentile / 100
+        cnt = 0
+        for bucket in sorted(hist):
+            cnt += hist[bucket]
+            if cnt >= threshold:
+                return cls.hist_value(bucket)
+        return cls.hist_value(max(hist))
+
+
+
+    # Record an access.
+    # category, name, op: Layer, object and operation of the access.
+    # duration: Latency in seconds.
+    # bytesOut, bytesIn: Bytes sent and received.
+    # error: The access failed.
+    # timeout: The access failed, because the response did not arrive in time.
+    # resync: The communication had to be resynchronized after the access.
+    # timeEcho: Time until the echo of a serial command was received.
+    def record(self, category, name, op, duration, bytesOut=0, bytesIn=0, error=False, timeout=False, resync=False, timeEcho=0.0):
+        if not self.enabled:
+            return 0
+        key = (category, name, op)
+        bucket = self.hist_bucket(int(duration / self.histUnit))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = {"count": 0, "errors": 0, "timeouts": 0, "resyncs": 0,
+                                             "bytesOut": 0, "bytesIn": 0, "time": 0.0, "timeEcho": 0.0,
+                                             "min": duration, "max": duration, "hist": {}}
+            entry["count"] += 1
+            entry["errors"] += 1 if error else 0
+            entry["timeouts"] += 1 if timeout else 0
+            entry["resyncs"] += 1 if resync else 0
+            entry["bytesOut"] += bytesOut
+            entry["bytesIn"] += bytesIn
+            entry["time"] += duration
+            entry["timeEcho"] += timeEcho
+            entry["min"] = min(entry["min"], duration)
+            entry["max"] = max(entry["max"], duration)
+            entry["hist"][bucket] = entry["hist"].get(bucket, 0) + 1
+        return 0
+
+
+
+    # Get the statistics of all accesses as a dictionary: category -> name ->
+    # operation -> values. Times are given in seconds.
+    def get(self, category=None):
+        stats = {}
+        with self.lock:
+            entries = {key: dict(entry, hist=dict(entry["hist"])) for key, entry in self.entries.items()}
+        for (cat, name, op), entry in sorted(entries.items()):
+            if category is not None and cat != category:
+                continue
+            values = {"count": entry["count"],
+                      "errors": entry["errors"],
+                      "timeouts": entry["timeouts"],
+                      "resyncs": entry["resyncs"],
+                      "bytes_out": entry["bytesOut"],
+                      "bytes_in": entry["bytesIn"],
+                      "time": entry["time"],
+                      "time_echo": entry["timeEcho"],
+                      "time_response": entry["time"] - entry["timeEcho"],
+                      "mean": entry["time"] / entry["count"],
+                      "min": entry["min"],
+                      "max": entry["max"]}
+            for percentile in self.percentiles:
+                # The bucket resolution must not exceed the exact extremes.
+                values["p{0:d}".format(percentile)] = min(max(self.hist_percentile(entry["hist"], percentile), entry["min"]), entry["max"])
+            stats.setdefault(cat, {}).setdefault(name, {})[op] = values
+        return stats
+
+
+
+    # Print a summary table per category. The rows are sorted by the total
+    # time, so that the dominating devices and operations come first.
+    def print_summary(self, category=None):
+        stats = self.get(category)
+        print("Access statistics over {0:.3f} s:".format(time.time() - self.timeStart))
+        for cat in sorted(stats):
+            rows = [[name, op, values] for name, ops in stats[cat].items() for op, values in ops.items()]
+            rows.sort(key=lambda row: row[2]["time"], reverse=True)
+            print("{0:s}:".format(cat))
+            print("  {0:32s} {1:>7s} {2:>5s} {3:>5s} {4:>5s} {5:>9s} {6:>9s} {7:>9s} {8:>9s} {9:>9s} {10:>9s} {11:>9s} {12:>9s} {13:>9s}".format(
+                  "Name/operation", "Count", "Err", "T/O", "Sync", "Out [B]", "In [B]", "Total [s]", "Echo [s]",
+                  "Min [ms]", "p50 [ms]", "p90 [ms]", "p99 [ms]", "Max [ms]"))
+            for name, op, v in rows:
+                print("  {0:32s} {1:7d} {2:5d} {3:5d} {4:5d} {5:9d} {6:9d} {7:9.3f} {8:9.3f} {9:9.3f} {10:9.3f} {11:9.3f} {12:9.3f} {13:9.3f}".format(
+                      (name + " " + op).strip()[:32], v["count"], v["errors"], v["timeouts"], v["resyncs"],
+                      v["bytes_out"], v["bytes_in"], v["time"], v["time_echo"],
+                      v["min"] * 1e3, v["p50"] * 1e3, v["p90"] * 1e3, v["p99"] * 1e3, v["max"] * 1e3))
+        return 0
+
+
+
+    # Print details.
+    def print_details(self):
+        print(self.prefixDetails, end='')
+        print("Access statistics", end='')
+        print(self.separatorDetails + "Recording: " + ("enabled" if self.enabled else "disabled"), end='')
+        print(self.separatorDetails + "Entries: {0:d}".format(len(self.entries)), end='')
+        print()
+        return 0
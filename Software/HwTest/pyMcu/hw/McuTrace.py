@@ -0,0 +1,178 @@
+# File: McuTrace.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 19 Oct 2026
+# Rev.: 19 Oct 2026
+#
+# Python class for tracing the I2C transactions executed by the TM4C1290NCPDT
+# MCU.
+#
+# Hints:
+# - Every I2C transaction is logged with the I2C port, the path through the
+#   I2C multiplexers, the slave address, the register, the data written and
+#   read, the status, the latency and the call site.
+# - A write without stop condition followed by a read with repeated start to
+#   the same slave address is logged as one `write_read' transaction.
+# - The path through the I2C multiplexers is the list of [slave address,
+#   control register] of all enabled multiplexers on the same port. The
+#   multiplexers are known from the slave addresses registered in muxAddrs of
+#   the I2C port.
+# - The call site is the outermost method of the Command Module class, e.g.
+#   `read_ff_status' or `mon_temp'. Every call of it is numbered as one
+#   invocation, so that repeated transactions within one command can be told
+#   apart from transactions of different commands.
+# - With a file name, the transactions are appended to the file as one JSON
+#   document per line (NDJSON) for the offline analysis with
+#   analyze_trace.py. Otherwise they are kept in the list entries.
+#
+
+
+
+import atexit
+import inspect
+import json
+import threading
+
+
+
+class McuTrace:
+
+    # Message prefixes and separators.
+    prefixDetails       = " - "
+    separatorDetails    = " - "
+    prefixError         = "ERROR: {0:s}: ".format(__file__)
+    prefixDebug         = "DEBUG: {0:s}: ".format(__file__)
+
+    # Debug configuration.
+    debugLevel = 0                 # Debug verbosity.
+
+    # Source file of the methods used as call sites.
+    callSiteFile        = "MdtTp_CM.py"
+
+
+
+    # Initialize the trace.
+    def __init__(self, fileName=None):
+        self.fileName = fileName
+        self.file = None
+        self.entries = []
+        self.muxState = {}
+        self.pending = {}
+        self.siteFrame = None
+        self.invocation = 0
+        self.traceCount = 0
+        self.lock = threading.Lock()
+        if fileName:
+            try:
+                self.file = open(fileName, "a", encoding="UTF-8")
+                # Close the trace file also if the tracing is not disabled.
+                atexit.register(self.close)
+            except OSError as e:
+                print(self.prefixError + "Cannot open the trace file `{0:s}': {1:s}".format(fileName, str(e)))
+                self.fileName = None
+
+
+
+    # Get the call site of the current transaction and its frame.
+    @classmethod
+    def call_site(cls):
+        site = ""
+        siteFrame = None
+        frame = inspect.currentframe().f_back
+        while frame:
+            if frame.f_code.co_filename.endswith(cls.callSiteFile):
+                site = frame.f_code.co_name
+                siteFrame = frame
+            frame = frame.f_back
+        return site, siteFrame
+
+
+
+    # Record an I2C transaction.
+    # mcuI2C: I2C port.
+    # slaveAddr: 7 bit slave address.
+    # op: Type of the transaction: write, read, write_read, read_long, quick.
+    # dataWr, dataRd: Data bytes written and read.
+    # ret: Status of the transaction.
+    # duration: Latency in seconds.
+    # stop: A write is terminated with a stop condition.
+    # repeatedStart: A read starts with a repeated start condition.
+    def record(self, mcuI2C, slaveAddr, op, dataWr, dataRd, ret, duration, timestamp, stop=True, repeatedStart=False):
+        site, siteFrame = self.call_site()
+        with self.lock:
+            # A new frame of the call site starts a new invocation.
+            if siteFrame is not self.siteFrame:
+                self.siteFrame = siteFrame
+                self.invocation += 1
+            port = mcuI2C.port
+            pending = self.pending.pop(port, None)
+            # Combine a write without stop and a read with repeated start.
+            if pending and op == "read" and repeatedStart and pending["addr"] == slaveAddr:
+                pending["op"] = "write_read"
+                pending["rd"] = list(dataRd)
+                pending["ok"] = ret == 0
+                pending["dur"] += duration
+                self.output(pending)
+                return 0
+            if pending:
+                self.output(pending)
+            # Path through the enabled I2C multiplexers, without the
+            # multiplexer accessed.
+            mux = [[addr, value] for (muxPort, addr), value in sorted(self.muxState.items())
+                   if muxPort == port and value and addr != slaveAddr]
+            entry = {"t": timestamp,
+                     "port": port,
+                     "mux": mux,
+                     "addr": slaveAddr,
+                     "op": op,
+                     "reg": dataWr[0] if dataWr else None,
+                     "wr": list(dataWr),
+                     "rd": list(dataRd),
+                     "ok": ret == 0,
+                     "dur": duration,
+                     "site": site,
+                     "inv": self.invocation}
+            # Keep track of the control registers of the multiplexers.
+            if op == "write" and not ret and slaveAddr in mcuI2C.muxAddrs and len(dataWr) == 1:
+                self.muxState[(port, slaveAddr)] = dataWr[0]
+            if op == "write" and not ret and not stop:
+                self.pending[port] = entry
+                return 0
+            self.output(entry)
+        return 0
+
+
+
+    # Write a transaction to the trace file or keep it in the list.
+    def output(self, entry):
+        self.traceCount += 1
+        if self.file:
+            self.file.write(json.dumps(entry) + "\n")
+        else:
+            self.entries.append(entry)
+        return 0
+
+
+
+    # Write the pending transactions and close the trace file.
+    def close(self):
+        with self.lock:
+            for port in sorted(self.pending):
+                self.output(self.pending[port])
+            self.pending = {}
+            if self.file:
+                self.file.close()
+                self.file = None
+                atexit.unregister(self.close)
+        return 0
+
+
+
+    # Print details.
+    def print_details(self):
+        print(self.prefixDetails, end='')
+        print("I2C transaction trace", end='')
+        print(self.separatorDetails + "File: " + (self.fileName if self.fileName else "(memory)"), end='')
+        print(self.separatorDetails + "Transactions: {0:d}".format(self.traceCount), end='')
+        print()
+        return 0
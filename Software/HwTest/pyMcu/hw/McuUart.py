@@ -2,7 +2,7 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 31 Mar 2020
-# Rev.: 04 Aug 2020
+# Rev.: 19 Oct 2026
 #
 # Python class for using the UART ports of the TM4C1290NCPDT MCU.
 #
@@ -29,6 +29,7 @@ class McuUart:
     hwBaudMax           = 15000000
     hwParity            = ['none', 'even', 'odd', 'one', 'zero']
     hwMarkData          = "Data:"
+    hwWriteLenMax       = 30        # Maximum number of data bytes per write command (uart).
 
     # Default values.
     hwBaudDefault       = 115200
@@ -138,7 +139,8 @@ class McuUart:
 
 
 
-    # Write data to the UART port.
+    # Write data to the UART port. Long data are split into several write
+    # commands, each as long as the MCU allows.
     def write(self, data):
         if len(data) < 1:
             # Do not increase the error counter here!
@@ -146,20 +148,23 @@ class McuUart:
             if self.debugLevel >= 1:
                 print(self.prefixError + "At least one data byte must be provided!")
             return -1
-        cmd = "uart {0:d} 0".format(self.port)
-        for datum in data:
-            cmd += " 0x{0:02x}".format(datum & 0xff)
+        cmds = self.mcuSer.pack_cmds("uart {0:d} 0".format(self.port),
+                                     [" 0x{0:02x}".format(datum & 0xff) for datum in data], self.hwWriteLenMax)
         if self.debugLevel >= 2:
             print(self.prefixDebug + "Writing data to the UART port {0:d}.".format(self.port), end='')
+            print(self.separatorDetails + "Commands: {0:d}".format(len(cmds)), end='')
             print(self.separatorDetails + "Data:", end='')
             for datum in data:
                 print(" 0x{0:02x}".format(datum & 0xff), end='')
             print()
-        # Send command.
-        ret = self.send_cmd(cmd)
-        self.accessWrite += 1
-        self.bytesWritten += len(data)
-        return ret
+        # Send commands.
+        for cmd in cmds:
+            ret = self.send_cmd(cmd)
+            if ret:
+                return ret
+            self.accessWrite += 1
+            self.bytesWritten += cmd.count(" 0x")
+        return 0
 
 
 
@@ -4,7 +4,7 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 26 Jul 2022
-# Rev.: 12 Jun 2026
+# Rev.: 19 Oct 2026
 #
 # Python class for accessing the ATLAS MDT Trigger Processor (TP) Command
 # Module (CM) Prototype via the TI Tiva TM4C1290 MCU UART.
@@ -12,10 +12,14 @@
 
 
 
+import importlib
 import os
+import threading
 import time
 import McuGpio
 import McuI2C
+import McuI2CMulti
+import McuProg
 import McuSerial
 import McuUart
 import I2C_DS28CM00
@@ -47,6 +51,24 @@ class MdtTp_CM:
     i2cBusNum           = 10
     i2cBusActive        = [1, 2, 3, 4, 5, 6, 7, 8]
     fireFlyNum          = 10
+    powerUpDelay        = 0.2       # Time for the devices to get ready after power up in seconds.
+    clkResetDelay       = 0.1       # Duration of the clock chip reset in seconds.
+
+    # Device groups, which are defined on first access: group name, define
+    # function and attributes set by the define function.
+    hwGroups = {
+        "sensor":   ["i2c_sensor_define",   ["i2cDevice_IC22_DS28CM00", "i2cDevice_SM_DS28CM00",
+                                             "i2cDevice_IC60_MCP9902", "i2cDevice_IC61_MCP9902", "i2cDevice_IC62_MCP9902"]],
+        "power":    ["i2c_power_define",    ["i2cDevice_IC26_LTM4700", "i2cDevice_IC27_LTM4700",
+                                             "i2cDevice_IC58_LTC2977", "i2cDevice_IC59_LTC2977"]],
+        "clock":    ["i2c_clk_define",      ["i2cDevice_IC36_PCA9545APW"] +
+                                            ["i2cDevice_IC{0:d}_Si5345A".format(ic) for ic in [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 12]] +
+                                            ["i2cDevice_IC11_Si598"]],
+        "io_exp":   ["i2c_io_exp_define",   ["i2cDevice_IC{0:d}_PCA9535BS".format(ic) for ic in range(39, 47)] +
+                                            ["i2cIOExpDevs"]],
+        "firefly":  ["i2c_ff_define",       ["i2cDevice_FF_I2CMUX_0x70", "i2cDevice_FF_I2CMUX_0x71", "i2cDevice_FF_I2CMUX_0x72",
+                                             "i2cDevice_FF_tx", "i2cDevice_FF_rx", "ffMuxSelected"]],
+    }
 
 
 
@@ -56,11 +78,58 @@ class MdtTp_CM:
         self.debugLevel = debugLevel
         self.warningCount = 0
         self.errorCount = 0
+        self.results = []
+        self.resultsEnable = False
+        self.hwGroupsDefined = []
+        self.hwGroupsDefining = []
+        self.hwGroupsLock = threading.RLock()
         self.define_hw()
 
 
 
-    # Define the hardware components.
+    # Define a device group on the first access to one of its devices.
+    def __getattr__(self, name):
+        # Only called for attributes not found the usual way.
+        if name not in ["hwGroupsDefined", "hwGroupsDefining", "hwGroupsLock"]:
+            for group, (_, attrs) in self.hwGroups.items():
+                if name in attrs:
+                    self.define_hw_group(group)
+                    # The attribute is still missing if it is accessed by the
+                    # define function of its own group before it is set.
+                    if name in vars(self):
+                        return vars(self)[name]
+        raise AttributeError("'{0:s}' object has no attribute '{1:s}'".format(type(self).__name__, name))
+
+
+
+    # Define a device group, unless it is already defined. Other threads
+    # accessing the group wait until its definition is complete.
+    def define_hw_group(self, group):
+        with self.hwGroupsLock:
+            if group in self.hwGroupsDefined or group in self.hwGroupsDefining:
+                return 0
+            if self.debugLevel >= 3:
+                print(self.prefixDebug + "Defining the device group `{0:s}'.".format(group))
+            self.hwGroupsDefining.append(group)
+            try:
+                getattr(self, self.hwGroups[group][0])()
+            finally:
+                self.hwGroupsDefining.remove(group)
+            self.hwGroupsDefined.append(group)
+        return 0
+
+
+
+    # Define all device groups.
+    def define_hw_all(self):
+        for group in self.hwGroups:
+            self.define_hw_group(group)
+        return 0
+
+
+
+    # Define the hardware components. The device groups are defined on
+    # first access.
     def define_hw(self):
         # Define the MCU I2C peripherals.
         self.define_hw_i2c()
@@ -92,21 +161,57 @@ class MdtTp_CM:
 
 
 
+    # Add a value to the results of the current command. The results are
+    # used for the machine-readable output and are only collected while it is
+    # enabled, so that they do not pile up in long-running commands.
+    def result_add(self, name, value, unit="", device="", timestamp=None):
+        if not self.resultsEnable:
+            return
+        result = {"name": name, "value": value, "unit": unit, "device": device}
+        if timestamp is not None:
+            result["timestamp"] = timestamp
+        self.results.append(result)
+
+
+
+    # Split a measurement key of the format `NAME [UNIT]' into the name and
+    # the unit.
+    @classmethod
+    def result_key_split(cls, key):
+        if key.endswith("]") and " [" in key:
+            name, unit = key.rsplit(" [", 1)
+            return name, unit[:-1]
+        return key, ""
+
+
+
+    # Get and clear the results of the current command.
+    def result_pop(self):
+        results = self.results
+        self.results = []
+        return results
+
+
+
     # ===============================================================
     # Basic monitoring and control functions.
     # ===============================================================
 
-    # Power up the CM.
-    def power_up(self):
+    # Power up the CM. If wait is False, the caller must wait powerUpDelay
+    # seconds before accessing the newly powered devices.
+    def power_up(self, wait=True):
         if self.debugLevel >= 1:
             print(self.prefixDebug + "Powering up the CM.")
         cmd = "power all 1"
         ret = self.mcu_cmd_raw(cmd)[0]
+        # Switching the power may reset the FireFly multiplexers.
+        self.ff_select_invalidate()
         if ret:
             self.errorCount += 1
             print(self.prefixError + "CM power up failed!")
         # Wait some time so that the newly powered devices are ready for operation.
-        time.sleep(0.2)
+        if wait:
+            time.sleep(self.powerUpDelay)
         return ret
 
 
@@ -117,6 +222,8 @@ class MdtTp_CM:
             print(self.prefixDebug + "Powering down the CM.")
         cmd = "power all 0"
         ret = self.mcu_cmd_raw(cmd)[0]
+        # Switching the power may reset the FireFly multiplexers.
+        self.ff_select_invalidate()
         if ret:
             self.errorCount += 1
             print(self.prefixError + "CM power down failed!")
@@ -124,23 +231,38 @@ class MdtTp_CM:
 
 
 
+    # Power a single domain of the CM up (value = 1) or down (value = 0).
+    # Domains: all, clock, fpga, firefly.
+    def power_domain(self, domain, value):
+        if self.debugLevel >= 1:
+            print(self.prefixDebug + "Powering {0:s} the CM power domain `{1:s}'.".format("up" if value else "down", domain))
+        cmd = "power {0:s} {1:d}".format(domain, 1 if value else 0)
+        ret = self.mcu_cmd_raw(cmd)[0]
+        # Switching the power may reset the FireFly multiplexers.
+        self.ff_select_invalidate()
+        if ret:
+            self.errorCount += 1
+            print(self.prefixError + "Powering {0:s} the CM power domain `{1:s}' failed!".format("up" if value else "down", domain))
+        return ret
+
+
+
     # Read the power status of the CM.
     def power_status(self):
         if self.debugLevel >= 1:
             print(self.prefixDebug + "Reading the power status of the CM.")
-        cmd = "power clock"
-        ret, powerStatusStr = self.mcu_cmd_raw(cmd)
-        print(powerStatusStr)
-        cmd = "power fpga"
-        ret, powerStatusStr = self.mcu_cmd_raw(cmd)
-        print(powerStatusStr)
-        cmd = "power firefly"
-        ret, powerStatusStr = self.mcu_cmd_raw(cmd)
-        print(powerStatusStr)
+        for domain in ["clock", "fpga", "firefly"]:
+            cmd = "power " + domain
+            ret, powerStatusStr = self.mcu_cmd_raw(cmd)
+            print(powerStatusStr)
+            self.result_add("Power " + domain, powerStatusStr)
         cmd = "gpio power-good"
         ret, powerGoodStr = self.mcu_cmd_raw(cmd)
         ret, powerGood = self.mcu_str2int(powerGoodStr)
         print("Power good: 0x{0:03x}".format(powerGood))
+        self.result_add("Power good", powerGood)
+        for mask, name in self.powerGoodBits:
+            self.result_add("Power good " + name, 1 if powerGood & mask else 0)
         print(self.prefixStatus + "P0V85 (FPGA core, 0.85 V) : " + ("OK" if (powerGood & 0x001) else "-"))
         print(self.prefixStatus + "P1V8_FPGA (FPGA 1.8V)     : " + ("OK" if (powerGood & 0x002) else "-"))
         print(self.prefixStatus + "P1V8_MISC (Misc 1.8V)     : " + ("OK" if (powerGood & 0x004) else "-"))
@@ -153,6 +275,32 @@ class MdtTp_CM:
         print(self.prefixStatus + "LTC2977_2 (P1V8_MISC, P3V3_MISC, P5V_MISC, P3V3_FF) : " + ("OK" if (powerGood & 0x200) else "-"))
         return ret
 
+    # Power good signals: bit mask and name.
+    powerGoodBits = [
+        [0x001, "P0V85"],
+        [0x002, "P1V8_FPGA"],
+        [0x004, "P1V8_MISC"],
+        [0x008, "P0V9_MGT"],
+        [0x010, "P1V2_MGT"],
+        [0x020, "P3V3_MISC"],
+        [0x040, "P3V3_FF"],
+        [0x080, "P5V_MISC"],
+        [0x100, "LTC2977_1"],
+        [0x200, "LTC2977_2"]]
+
+
+
+    # Get the power good signals of the CM.
+    def power_good_get(self):
+        cmd = "gpio power-good"
+        ret = self.mcu_cmd_raw(cmd)[0]
+        if ret:
+            return ret, 0
+        # The full response includes the status required by mcu_str2int.
+        return self.mcu_str2int(self.mcuSer.get_full())
+
+
+
     # Read the power status of the CM.
     def power_check(self):
         if self.debugLevel >= 1:
@@ -161,6 +309,7 @@ class MdtTp_CM:
         ret, powerGoodStr = self.mcu_cmd_raw(cmd)
         print('response from ' + cmd + ' is: ' + powerGoodStr )
         ret, powerGood = self.mcu_str2int(powerGoodStr)
+        self.result_add("Power good", powerGood)
         return ret + (powerGood!=0x3ff)
 
     # Read the serial number of the board.
@@ -174,6 +323,8 @@ class MdtTp_CM:
         print("Device family code: 0x{0:02x}".format(deviceFamilyCode))
         print("Serial number: 0x{0:012x}".format(serialNumber))
         print("CRC: 0x{0:02x}".format(crc))
+        for name, value in [["Device family code", deviceFamilyCode], ["Serial number", serialNumber], ["CRC", crc], ["CRC error", int(crcError)]]:
+            self.result_add(name, value, "", self.i2cDevice_IC22_DS28CM00.deviceName)
         if crcError:
             self.errorCount += 1
             print(self.prefixError + "CRC error detected!")
@@ -191,6 +342,8 @@ class MdtTp_CM:
         print("Device family code: 0x{0:02x}".format(deviceFamilyCode))
         print("Serial number: 0x{0:012x}".format(serialNumber))
         print("CRC: 0x{0:02x}".format(crc))
+        for name, value in [["Device family code", deviceFamilyCode], ["Serial number", serialNumber], ["CRC", crc], ["CRC error", int(crcError)]]:
+            self.result_add(name, value, "", self.i2cDevice_SM_DS28CM00.deviceName)
         if crcError:
             self.errorCount += 1
             print(self.prefixError + "CRC error detected!")
@@ -199,16 +352,23 @@ class MdtTp_CM:
 
 
 
+    # Print a temperature and add it to the results.
+    def mon_temp_print(self, name, i2cDevice, value):
+        print("{0:24s} - {1:15s}: {2:6.3f} degC".format(name, i2cDevice.deviceName, value))
+        self.result_add(name, value, "degC", i2cDevice.deviceName)
+
+
+
     # Monitor the temperatures.
     def mon_temp(self):
         # Power modules.
         # LTM47000 core power.
         if self.debugLevel >= 1:
             print(self.prefixDebug + "Reading the temperatures of the LTM4700 power modules for the VU13P core power.")
-        print("VU13P core power 1 (ext) - {0:15s}: {1:6.3f} degC".format(self.i2cDevice_IC26_LTM4700.deviceName, self.i2cDevice_IC26_LTM4700.read_temp_ext()[1]))
-        print("VU13P core power 1 (int) - {0:15s}: {1:6.3f} degC".format(self.i2cDevice_IC26_LTM4700.deviceName, self.i2cDevice_IC26_LTM4700.read_temp_int()[1]))
-        print("VU13P core power 2 (ext) - {0:15s}: {1:6.3f} degC".format(self.i2cDevice_IC27_LTM4700.deviceName, self.i2cDevice_IC27_LTM4700.read_temp_ext()[1]))
-        print("VU13P core power 2 (int) - {0:15s}: {1:6.3f} degC".format(self.i2cDevice_IC27_LTM4700.deviceName, self.i2cDevice_IC27_LTM4700.read_temp_int()[1]))
+        self.mon_temp_print("VU13P core power 1 (ext)", self.i2cDevice_IC26_LTM4700, self.i2cDevice_IC26_LTM4700.read_temp_ext()[1])
+        self.mon_temp_print("VU13P core power 1 (int)", self.i2cDevice_IC26_LTM4700, self.i2cDevice_IC26_LTM4700.read_temp_int()[1])
+        self.mon_temp_print("VU13P core power 2 (ext)", self.i2cDevice_IC27_LTM4700, self.i2cDevice_IC27_LTM4700.read_temp_ext()[1])
+        self.mon_temp_print("VU13P core power 2 (int)", self.i2cDevice_IC27_LTM4700, self.i2cDevice_IC27_LTM4700.read_temp_int()[1])
         # LTM4662 MGT power.
         if self.debugLevel >= 1:
             print(self.prefixDebug + "Reading the temperatures of the power modules providing the MGT power.")
@@ -218,14 +378,14 @@ class MdtTp_CM:
             print(self.prefixDebug + "{0:s} manufacturer ID: 0x{1:02x}".format(self.i2cDevice_IC61_MCP9902.deviceName, self.i2cDevice_IC61_MCP9902.read_manufacturer_id()[1]))
             print(self.prefixDebug + "{0:s} revision: 0x{1:02x}".format(self.i2cDevice_IC61_MCP9902.deviceName, self.i2cDevice_IC61_MCP9902.read_revision()[1]))
         # Read the temperature.
-        print("MGT 0.9 V power          - {0:15s}: {1:6.3f} degC".format(self.i2cDevice_IC61_MCP9902.deviceName, self.i2cDevice_IC61_MCP9902.read_temp_ext()[1]))
+        self.mon_temp_print("MGT 0.9 V power", self.i2cDevice_IC61_MCP9902, self.i2cDevice_IC61_MCP9902.read_temp_ext()[1])
         if self.debugLevel >= 2:
             # Read the product ID, the manufacturer ID and the revision.
             print(self.prefixDebug + "{0:s} product ID: 0x{1:02x}".format(self.i2cDevice_IC62_MCP9902.deviceName, self.i2cDevice_IC62_MCP9902.read_product_id()[1]))
             print(self.prefixDebug + "{0:s} manufacturer ID: 0x{1:02x}".format(self.i2cDevice_IC62_MCP9902.deviceName, self.i2cDevice_IC62_MCP9902.read_manufacturer_id()[1]))
             print(self.prefixDebug + "{0:s} revision: 0x{1:02x}".format(self.i2cDevice_IC62_MCP9902.deviceName, self.i2cDevice_IC62_MCP9902.read_revision()[1]))
         # Read the temperature.
-        print("MGT 1.2 V power          - {0:15s}: {1:6.3f} degC".format(self.i2cDevice_IC62_MCP9902.deviceName, self.i2cDevice_IC62_MCP9902.read_temp_ext()[1]))
+        self.mon_temp_print("MGT 1.2 V power", self.i2cDevice_IC62_MCP9902, self.i2cDevice_IC62_MCP9902.read_temp_ext()[1])
         # VU13P FPGA temperature.
         if self.debugLevel >= 1:
             print(self.prefixDebug + "Reading the temperatures of the VU13P.")
@@ -235,7 +395,7 @@ class MdtTp_CM:
             print(self.prefixDebug + "{0:s} manufacturer ID: 0x{1:02x}".format(self.i2cDevice_IC60_MCP9902.deviceName, self.i2cDevice_IC60_MCP9902.read_manufacturer_id()[1]))
             print(self.prefixDebug + "{0:s} revision: 0x{1:02x}".format(self.i2cDevice_IC60_MCP9902.deviceName, self.i2cDevice_IC60_MCP9902.read_revision()[1]))
         # Read the temperature.
-        print("VU13P FPGA               - {0:15s}: {1:6.3f} degC".format(self.i2cDevice_IC60_MCP9902.deviceName, self.i2cDevice_IC60_MCP9902.read_temp_ext()[1]))
+        self.mon_temp_print("VU13P FPGA", self.i2cDevice_IC60_MCP9902, self.i2cDevice_IC60_MCP9902.read_temp_ext()[1])
         # Board temperatures.
         boardTempSensors = [self.i2cDevice_IC60_MCP9902, self.i2cDevice_IC61_MCP9902, self.i2cDevice_IC62_MCP9902]
         sensorNum = 1
@@ -247,13 +407,79 @@ class MdtTp_CM:
                 print(self.prefixDebug + "{0:s} product ID: 0x{1:02x}".format(sensor.deviceName, sensor.read_product_id()[1]))
                 print(self.prefixDebug + "{0:s} manufacturer ID: 0x{1:02x}".format(sensor.deviceName, sensor.read_manufacturer_id()[1]))
                 print(self.prefixDebug + "{0:s} revision: 0x{1:02x}".format(sensor.deviceName, sensor.read_revision()[1]))
-            print("Board {0:d}                  - {1:15s}: {2:6.3f} degC".format(sensorNum, sensor.deviceName, sensor.read_temp_int()[1]))
+            self.mon_temp_print("Board {0:d}".format(sensorNum), sensor, sensor.read_temp_int()[1])
             if self.debugLevel >= 2:
                 print("Board {0:d}                  - {1:15s}: status 0x{2:02x}".format(sensorNum, sensor.deviceName, sensor.read_status()[1]))
             sensorNum += 1
 
 
 
+    # Monitor the temperatures by reading the sensors on all I2C buses
+    # concurrently with I2C transaction lists. The power modules on I2C port 1
+    # and the temperature sensors on I2C port 4 are read in parallel.
+    def mon_temp_multi(self):
+        timeStart = time.time()
+        tags = {}
+        # Power modules: READ_TEMPERATURE_1 (external) and READ_TEMPERATURE_2
+        # (internal) in L11 format.
+        for i2cDevice in [self.i2cDevice_IC26_LTM4700, self.i2cDevice_IC27_LTM4700]:
+            for cmdCode in [i2cDevice.hwCmdCodeReadTempExt, i2cDevice.hwCmdCodeReadTempInt]:
+                tags[i2cDevice.deviceName, cmdCode] = self.mcuI2CMulti.add(i2cDevice.mcuI2C, i2cDevice.slaveAddr, [cmdCode], 2)[1]
+        for i2cDevice in [self.i2cDevice_IC58_LTC2977, self.i2cDevice_IC59_LTC2977]:
+            cmdCode = i2cDevice.hwCmdCodeReadTemp
+            tags[i2cDevice.deviceName, cmdCode] = self.mcuI2CMulti.add(i2cDevice.mcuI2C, i2cDevice.slaveAddr, [cmdCode], 2)[1]
+        # Temperature sensors: Configuration, internal and external diode
+        # registers.
+        mcp9902Regs = [0x03, 0x00, 0x29, 0x09, 0x01, 0x10]
+        for i2cDevice in [self.i2cDevice_IC60_MCP9902, self.i2cDevice_IC61_MCP9902, self.i2cDevice_IC62_MCP9902]:
+            for regAdr in mcp9902Regs:
+                tags[i2cDevice.deviceName, regAdr] = self.mcuI2CMulti.add(i2cDevice.mcuI2C, i2cDevice.slaveAddr, [regAdr], 1)[1]
+        ret, results = self.mcuI2CMulti.execute()
+        timeSweep = time.time() - timeStart
+        if ret:
+            self.errorCount += 1
+            print(self.prefixError + "Error reading the temperatures with I2C transaction lists!")
+        # Print the temperatures.
+        for i2cDevice, cmdCode, name in [[self.i2cDevice_IC26_LTM4700, I2C_LTM4700.I2C_LTM4700.hwCmdCodeReadTempExt, "VU13P core power 1 (ext)"],
+                                         [self.i2cDevice_IC26_LTM4700, I2C_LTM4700.I2C_LTM4700.hwCmdCodeReadTempInt, "VU13P core power 1 (int)"],
+                                         [self.i2cDevice_IC27_LTM4700, I2C_LTM4700.I2C_LTM4700.hwCmdCodeReadTempExt, "VU13P core power 2 (ext)"],
+                                         [self.i2cDevice_IC27_LTM4700, I2C_LTM4700.I2C_LTM4700.hwCmdCodeReadTempInt, "VU13P core power 2 (int)"],
+                                         [self.i2cDevice_IC58_LTC2977, I2C_LTC2977.I2C_LTC2977.hwCmdCodeReadTemp, "Power manager 1"],
+                                         [self.i2cDevice_IC59_LTC2977, I2C_LTC2977.I2C_LTC2977.hwCmdCodeReadTemp, "Power manager 2"]]:
+            retRead, data = results[tags[i2cDevice.deviceName, cmdCode]]
+            if retRead:
+                continue
+            self.mon_temp_print(name, i2cDevice, i2cDevice.l11_to_float((data[1] << 8) + data[0]))
+        for i2cDevice, name in [[self.i2cDevice_IC61_MCP9902, "MGT 0.9 V power"],
+                                [self.i2cDevice_IC62_MCP9902, "MGT 1.2 V power"],
+                                [self.i2cDevice_IC60_MCP9902, "VU13P FPGA"]]:
+            values = [results[tags[i2cDevice.deviceName, regAdr]] for regAdr in mcp9902Regs[3:]]
+            if any(retRead for retRead, data in values):
+                continue
+            self.mon_temp_print(name, i2cDevice, self.mcp9902_temperature(*[data[0] for retRead, data in values]))
+        for sensorNum, i2cDevice in enumerate([self.i2cDevice_IC60_MCP9902, self.i2cDevice_IC61_MCP9902, self.i2cDevice_IC62_MCP9902], 1):
+            values = [results[tags[i2cDevice.deviceName, regAdr]] for regAdr in mcp9902Regs[:3]]
+            if any(retRead for retRead, data in values):
+                continue
+            self.mon_temp_print("Board {0:d}".format(sensorNum), i2cDevice, self.mcp9902_temperature(*[data[0] for retRead, data in values]))
+        if self.debugLevel >= 1:
+            print(self.prefixDebug + "Temperature sweep with I2C transaction lists: {0:.3f} s".format(timeSweep))
+            self.mcuI2CMulti.print_details()
+        return ret
+
+
+
+    # Convert the configuration, integer and fractional register values of an
+    # MCP9902 diode channel to a temperature.
+    @classmethod
+    def mcp9902_temperature(cls, valueCfg, valueInt, valueFract):
+        # Check if the measurement range is default (0 .. 127 °C) or extended (-64 .. 191 °C).
+        if valueCfg & 0x04:
+            return I2C_MCP9902.I2C_MCP9902.raw_to_temperature_extended(valueInt, valueFract)
+        return I2C_MCP9902.I2C_MCP9902.raw_to_temperature(valueInt, valueFract)
+
+
+
     # Print details.
     def print_details(self):
         print(self.prefixDetails, end='')
@@ -283,7 +509,14 @@ class MdtTp_CM:
         for i in range(0, self.i2cBusNum):
             self.mcuI2C.append(McuI2C.McuI2C(self.mcuSer, i))
             self.mcuI2C[i].debugLevel = self.debugLevel
+        # Transaction lists for concurrent accesses to several I2C buses.
+        self.mcuI2CMulti = McuI2CMulti.McuI2CMulti(self.mcuSer)
+        self.mcuI2CMulti.debugLevel = self.debugLevel
+
 
+
+    # Define the board sensors: serial number and temperature sensor ICs.
+    def i2c_sensor_define(self):
         # IC22: DS28CM00 silicon serial number IC.
         # I2C port 4, slave address 0x50.
         self.i2cDevice_IC22_DS28CM00 = I2C_DS28CM00.I2C_DS28CM00(self.mcuI2C[4], 0x50, "IC22 (DS28CM00)")
@@ -304,7 +537,12 @@ class MdtTp_CM:
         # IC62: I2C port 4, slave address 0x7c, clock generator ICs column 1.
         self.i2cDevice_IC62_MCP9902 = I2C_MCP9902.I2C_MCP9902(self.mcuI2C[4], 0x7c, "IC62 (MCP9902)")
         self.i2cDevice_IC62_MCP9902.debugLevel = self.debugLevel
+        return 0
+
 
+
+    # Define the power modules.
+    def i2c_power_define(self):
         # Power modules.
         # IC26: LTM4700 regulator with digital power system management IC (VU13P core voltage).
         self.i2cDevice_IC26_LTM4700 = I2C_LTM4700.I2C_LTM4700(self.mcuI2C[1], 0x40, "IC26 (LTM4700)")
@@ -314,29 +552,39 @@ class MdtTp_CM:
         self.i2cDevice_IC58_LTC2977 = I2C_LTC2977.I2C_LTC2977(self.mcuI2C[1], 0x5c, "IC58 (LTC2977)")
         # IC59: LTC2977 8-channel PMBus power system manager IC (1.8 V misc, 3.3 V misc, 5.0 V misc, 3.3. V FireFly).
         self.i2cDevice_IC59_LTC2977 = I2C_LTC2977.I2C_LTC2977(self.mcuI2C[1], 0x5d, "IC59 (LTC2977)")
+        return 0
 
-        # Define the I2C clock devices.
-        self.i2c_clk_define()
 
-        # Define the I2C I/O expander devices.
-        self.i2c_io_exp_define()
 
+    # Define the FireFly modules and their I2C multiplexers.
+    def i2c_ff_define(self):
         # FireFly modules.
         self.i2cDevice_FF_I2CMUX_0x70 = I2C_PCA9545.I2C_PCA9545(self.mcuI2C[2], 0x70, "FF_MUX_0x70");
         self.i2cDevice_FF_I2CMUX_0x71 = I2C_PCA9545.I2C_PCA9545(self.mcuI2C[2], 0x71, "FF_MUX_0x71");
         self.i2cDevice_FF_I2CMUX_0x72 = I2C_PCA9545.I2C_PCA9545(self.mcuI2C[2], 0x72, "FF_MUX_0x72");
         self.i2cDevice_FF_tx = I2C_FireFly.I2C_FireFly(self.mcuI2C[2], 0x50, "FF_TX", 'tx');
         self.i2cDevice_FF_rx = I2C_FireFly.I2C_FireFly(self.mcuI2C[2], 0x54, "FF_RX", 'rx');
+        self.ffMuxSelected = None
+        return 0
 
     # Read FF status.
     def read_ff(self, ff):
         iret, temp = self.i2cDevice_FF_tx.read_temperature();
         iret, vcc = self.i2cDevice_FF_tx.read_vcc();
         print("FF%d TX: %d degC %.2f V" % (ff, temp, vcc));
+        self.result_add("FF%d TX temperature" % ff, temp, "degC", self.i2cDevice_FF_tx.deviceName)
+        self.result_add("FF%d TX Vcc" % ff, vcc, "V", self.i2cDevice_FF_tx.deviceName)
         iret, temp = self.i2cDevice_FF_rx.read_temperature();
         iret, vcc = self.i2cDevice_FF_rx.read_vcc();
         print("FF%d RX: %d degC %.2f V" % (ff,temp, vcc));
+        self.result_add("FF%d RX temperature" % ff, temp, "degC", self.i2cDevice_FF_rx.deviceName)
+        self.result_add("FF%d RX Vcc" % ff, vcc, "V", self.i2cDevice_FF_rx.deviceName)
     def read_ff_status(self):
+        if self.mcuSer.owner_required():
+            self.mcuSer.call(self.read_ff_status)
+            return
+        # The multiplexers are set directly, not with ff_select.
+        self.ff_select_invalidate()
         self.i2cDevice_FF_I2CMUX_0x70.disable();
         self.i2cDevice_FF_I2CMUX_0x71.disable();
         self.i2cDevice_FF_I2CMUX_0x72.disable();
@@ -414,6 +662,7 @@ class MdtTp_CM:
             for adr in devAdr:
                 print(" 0x{0:02x}".format(adr), end='')
             print()
+            self.result_add("Bus {0:d}".format(i), devAdr)
 
 
 
@@ -422,14 +671,18 @@ class MdtTp_CM:
         resetMask &= 0x0f   # Only 4 reset signals are available.
         if self.debugLevel >= 1:
             print(self.prefixDebug + "Resetting the I2C bus multiplexers with reset bit mask 0x{0:x}.".format(resetMask))
-        # Assert reset.
-        cmd = "gpio i2c-reset 0x{0:x}".format(resetMask)
-        ret = self.mcu_cmd_raw(cmd)[0]
-        # Wait some time.
-        time.sleep(0.1)
-        # De-assert reset.
-        cmd = "gpio i2c-reset 0x0"
-        ret |= self.mcu_cmd_raw(cmd)[0]
+        # Assert reset, wait some time and de-assert reset in one transaction
+        # program on the MCU.
+        mcuProg = McuProg.McuProg(self.mcuSer)
+        mcuProg.debugLevel = self.debugLevel
+        ret = mcuProg.gpio("i2c-reset", resetMask)[0]
+        ret |= mcuProg.delay(0.1)[0]
+        ret |= mcuProg.gpio("i2c-reset", 0x0)[0]
+        # Do not run an incomplete program, which could leave the reset asserted.
+        if not ret:
+            ret = mcuProg.run()[0]
+        # The reset disables all channels of the multiplexers.
+        self.ff_select_invalidate()
         if ret:
             print(self.prefixError + "Error resetting the I2C bus multiplexers with reset bit mask 0x{0:x}!".format(resetMask))
         return ret
@@ -523,8 +776,11 @@ class MdtTp_CM:
         print("Status of the power module {0:s} on I2C port {1:d}:".format(i2cDevice.deviceName, i2cDevice.mcuI2C.port))
         print(self.prefixStatus + "{0:18s}: {1:5.2f} degC".format("Temperature", data[0]))
         print(self.prefixStatus + "{0:18s}: {1:5.2f} V".format("V_in", data[1]))
+        self.result_add("Temperature", data[0], "degC", i2cDevice.deviceName)
+        self.result_add("V_in", data[1], "V", i2cDevice.deviceName)
         for channel in range(i2cDevice.hwChannels):
             print(self.prefixStatus + "Channel {0:d}: {1:7s}: {2:5.2f} V".format(channel, "V_out", data[2][channel]))
+            self.result_add("Channel {0:d} V_out".format(channel), data[2][channel], "V", i2cDevice.deviceName)
         return 0
 
 
@@ -549,6 +805,8 @@ class MdtTp_CM:
         print("Status of the power module {0:s} on I2C port {1:d}:".format(i2cDevice.deviceName, i2cDevice.mcuI2C.port))
         print(self.prefixStatus + "{0:26s}: {1:5.2f} degC".format("Temperature", data[0]))
         print(self.prefixStatus + "{0:26s}: {1:5.2f} V".format("V_in", data[1]))
+        self.result_add("Temperature", data[0], "degC", i2cDevice.deviceName)
+        self.result_add("V_in", data[1], "V", i2cDevice.deviceName)
         for channel in range(i2cDevice.hwChannels):
             if currentSenseShunts[channel] != 0:
                 value = data[2][channel] / currentSenseShunts[channel]
@@ -557,6 +815,7 @@ class MdtTp_CM:
                 value = data[2][channel]
                 unit = "V"
             print(self.prefixStatus + "{0:d}: {1:23s}: {2:5.2f} {3:s}".format(channel, measurementNames[channel], value, unit))
+            self.result_add("{0:d}: {1:s}".format(channel, measurementNames[channel]), value, unit, i2cDevice.deviceName)
         return 0
 
 
@@ -575,12 +834,16 @@ class MdtTp_CM:
         #print(self.prefixStatus + "{0:18s}: {1:5.2f} degC".format("Temperature (ext)", data[0]))
         print(self.prefixStatus + "{0:18s}: {1:5.2f} degC".format("Temperature (int)", data[1]))
         print(self.prefixStatus + "{0:18s}: {1:5.2f} V".format("V_in", data[2]))
+        self.result_add("Temperature (int)", data[1], "degC", i2cDevice.deviceName)
+        self.result_add("V_in", data[2], "V", i2cDevice.deviceName)
         # Measurement of the input current is not supported on the CM demonstrator.
         #print(self.prefixStatus + "{0:18s}: {1:5.2f} A".format("I_in", data[3]))
         for channel in range(i2cDevice.hwChannels):
             print(self.prefixStatus + "Channel {0:d}: {1:7s}: {2:5.2f} V".format(channel, "V_out", data[4][channel]))
             print(self.prefixStatus + "Channel {0:d}: {1:7s}: {2:5.2f} A".format(channel, "I_out", data[5][channel]))
-            if debugLevel >= 1:
+            self.result_add("Channel {0:d} V_out".format(channel), data[4][channel], "V", i2cDevice.deviceName)
+            self.result_add("Channel {0:d} I_out".format(channel), data[5][channel], "A", i2cDevice.deviceName)
+            if self.debugLevel >= 1:
                 print(self.prefixStatus + "Channel {0:d}: {1:7s}: {2:5.2f} V".format(channel, "VOUT_FAULT_LIMIT", data[6][channel]))
                 print(self.prefixStatus + "Channel {0:d}: {1:7s}: {0:d} ".format(channel, "VOUT_FAULT_RESPONSE", data[7][channel]))
                 print(self.prefixStatus + "STATUS_WORD: " + str(data[8][channel]))
@@ -595,6 +858,8 @@ class MdtTp_CM:
 
 
     # Print the status of an LTM4700 regulator with digital power system management IC.
+    # Only the live telemetry is read from the device. The configuration is
+    # taken from the cached snapshot of the driver.
     def power_ltm4700_status(self, i2cDevice, measurementNames):
         if len(measurementNames) != i2cDevice.hwChannels:
             self.errorCount += 1
@@ -602,30 +867,36 @@ class MdtTp_CM:
             return -1
         if self.debugLevel >= 1:
             print(self.prefixDebug + "Reading the status of the power module {0:s} on I2C port {1:d}.".format(i2cDevice.deviceName, i2cDevice.mcuI2C.port))
-        ret, data = i2cDevice.read_status()
+        ret, data = i2cDevice.read_telemetry()
         if ret:
             self.errorCount += 1
             print(self.prefixError + "Error reading the status of the power module {0:s} on I2C port {1:d}!".format(i2cDevice.deviceName, i2cDevice.mcuI2C.port))
             return -1
+        if self.debugLevel >= 1:
+            ret, config = i2cDevice.read_config()
+            if ret:
+                self.errorCount += 1
+                print(self.prefixError + "Error reading the configuration of the power module {0:s} on I2C port {1:d}!".format(i2cDevice.deviceName, i2cDevice.mcuI2C.port))
+                return -1
         print("Status of the power module {0:s} on I2C port {1:d}:".format(i2cDevice.deviceName, i2cDevice.mcuI2C.port))
         # Measurement of the external temperature is not supported on the CM demonstrator.
         #print(self.prefixStatus + "{0:18s}: {1:5.2f} degC".format("Temperature (ext)", data[0]))
         print(self.prefixStatus + "{0:18s}: {1:5.2f} degC".format("Temperature (int)", data[1]))
         print(self.prefixStatus + "{0:18s}: {1:5.2f} V".format("V_in", data[2]))
-        # Measurement of the input current is not supported on the CM demonstrator.
-        #print(self.prefixStatus + "{0:18s}: {1:5.2f} A".format("I_in", data[3]))
+        self.result_add("Temperature (int)", data[1], "degC", i2cDevice.deviceName)
+        self.result_add("V_in", data[2], "V", i2cDevice.deviceName)
         for channel in range(i2cDevice.hwChannels):
-            print(self.prefixStatus + "{0:d}: {1:23s}: {2:5.2f} V".format(channel, measurementNames[channel], data[4][channel]))
-            print(self.prefixStatus + "{0:d}: {1:23s}: {2:5.2f} A".format(channel, measurementNames[channel], data[5][channel]))
-            if debugLevel >= 1:
-                print(self.prefixStatus + "{0:d}: {1:7s}: {2:5.2f} V".format(channel, "VOUT_FAULT_LIMIT", data[6][channel]))
-                print(self.prefixStatus + "{0:d}: {1:7s}: {0:d} ".format(channel, "VOUT_FAULT_RESPONSE", data[7][channel]))
-                print(self.prefixStatus + "STATUS_WORD: " + str(data[8][channel]))
-                print(self.prefixStatus + "status_mfr_specific: " + str(data[9][channel]))
-                print(self.prefixStatus + "status_vout: " + str(data[10][channel]))
-                print(self.prefixStatus + "mfr_pwr_comp: " + str(data[11][channel]))
-                print(self.prefixStatus + "mfr_pwr_mode: " + str(data[12][channel]))
-                print(self.prefixStatus + "mfr_pwr_config: " + str(data[13][channel]))
+            print(self.prefixStatus + "{0:d}: {1:23s}: {2:5.2f} V".format(channel, measurementNames[channel], data[3][channel]))
+            print(self.prefixStatus + "{0:d}: {1:23s}: {2:5.2f} A".format(channel, measurementNames[channel], data[4][channel]))
+            self.result_add("{0:d}: {1:s} voltage".format(channel, measurementNames[channel]), data[3][channel], "V", i2cDevice.deviceName)
+            self.result_add("{0:d}: {1:s} current".format(channel, measurementNames[channel]), data[4][channel], "A", i2cDevice.deviceName)
+            if self.debugLevel >= 1:
+                print(self.prefixStatus + "{0:d}: {1:23s}: 0x{2:04x}".format(channel, "STATUS_WORD", data[5][channel]))
+                print(self.prefixStatus + "{0:d}: {1:23s}: {2:5.2f} V".format(channel, "VOUT_OV_FAULT_LIMIT", config[0][channel]))
+                print(self.prefixStatus + "{0:d}: {1:23s}: 0x{2:02x}".format(channel, "VOUT_OV_FAULT_RESPONSE", config[1][channel]))
+                print(self.prefixStatus + "{0:d}: {1:23s}: 0x{2:02x}".format(channel, "MFR_PWM_COMP", config[2][channel]))
+                print(self.prefixStatus + "{0:d}: {1:23s}: 0x{2:02x}".format(channel, "MFR_PWM_MODE", config[3][channel]))
+                print(self.prefixStatus + "{0:d}: {1:23s}: 0x{2:02x}".format(channel, "MFR_PWM_CONFIG", config[4][channel]))
         print("\n")
         return 0
 
@@ -663,6 +934,161 @@ class MdtTp_CM:
 
 
 
+    # Get the labels [rail, quantity, unit] of the values returned by
+    # pm_get_peaks for a power module.
+    def pm_peak_labels(self, i2cDevice):
+        labels = []
+        if isinstance(i2cDevice, I2C_LTC2977.I2C_LTC2977):
+            if i2cDevice is self.i2cDevice_IC58_LTC2977:
+                names, shunts = self.IC58_LTC2977_measurementNames, self.IC58_LTC2977_currentSenseShunts
+            else:
+                names, shunts = self.IC59_LTC2977_measurementNames, self.IC59_LTC2977_currentSenseShunts
+            labels.append(["", "temperature_peak", "degC"])
+            labels.append(["", "temperature_min", "degC"])
+            labels.append(["", "vin_peak", "V"])
+            labels.append(["", "vin_min", "V"])
+            for channel in range(i2cDevice.hwChannels):
+                if names[channel] == "<unused>":
+                    continue
+                quantity, unit = ["current", "A"] if shunts[channel] > 0 else ["voltage", "V"]
+                labels.append([names[channel], quantity + "_peak", unit])
+                labels.append([names[channel], quantity + "_min", unit])
+        else:
+            if i2cDevice is self.i2cDevice_IC26_LTM4700:
+                names = self.IC26_LTM4700_measurementNames
+            else:
+                names = self.IC27_LTM4700_measurementNames
+            labels.append(["", "temperature_peak", "degC"])
+            labels.append(["", "vin_peak", "V"])
+            for channel in range(i2cDevice.hwChannels):
+                labels.append([names[channel], "voltage_peak", "V"])
+                labels.append([names[channel], "current_peak", "A"])
+        return labels
+
+
+
+    # Read and clear the hardware peak (and min) registers of a power module.
+    # Returns a flat list of values as described by pm_peak_labels. Shunt
+    # voltages of the LTC2977 are converted to currents.
+    def pm_get_peaks(self, i2cDevice):
+        ret, data = i2cDevice.read_peaks(True)
+        if ret:
+            self.errorCount += 1
+            print(self.prefixError + "Error reading the peak values of the power module {0:s} on I2C port {1:d}!".format(i2cDevice.deviceName, i2cDevice.mcuI2C.port))
+            return -1, []
+        values = []
+        if isinstance(i2cDevice, I2C_LTC2977.I2C_LTC2977):
+            if i2cDevice is self.i2cDevice_IC58_LTC2977:
+                names, shunts = self.IC58_LTC2977_measurementNames, self.IC58_LTC2977_currentSenseShunts
+            else:
+                names, shunts = self.IC59_LTC2977_measurementNames, self.IC59_LTC2977_currentSenseShunts
+            values += data[0:4]
+            voutPeak, voutMin = data[4], data[5]
+            for channel in range(i2cDevice.hwChannels):
+                if names[channel] == "<unused>":
+                    continue
+                if shunts[channel] > 0:
+                    values += [voutPeak[channel] / shunts[channel], voutMin[channel] / shunts[channel]]
+                else:
+                    values += [voutPeak[channel], voutMin[channel]]
+        else:
+            values += [data[0], data[1]]
+            for channel in range(i2cDevice.hwChannels):
+                values += [data[2][channel], data[3][channel]]
+        return 0, values
+
+
+
+    # Print the peak values of all power modules since the last clear and
+    # clear them.
+    def pm_peak_status(self):
+        ret = 0
+        for i2cDevice in [self.i2cDevice_IC58_LTC2977, self.i2cDevice_IC59_LTC2977, self.i2cDevice_IC26_LTM4700, self.i2cDevice_IC27_LTM4700]:
+            retTmp, values = self.pm_get_peaks(i2cDevice)
+            if retTmp:
+                ret = -1
+                continue
+            print("Peak values of the power module {0:s} on I2C port {1:d}:".format(i2cDevice.deviceName, i2cDevice.mcuI2C.port))
+            for (rail, quantity, unit), value in zip(self.pm_peak_labels(i2cDevice), values):
+                print(self.prefixStatus + "{0:23s}: {1:16s}: {2:7.3f} {3:s}".format(rail, quantity, value, unit))
+                self.result_add("{0:s} {1:s}".format(rail, quantity).strip(), value, unit, i2cDevice.deviceName)
+        return ret
+
+
+
+    # Print the manufacturer ID and model of all power modules.
+    def pm_info(self):
+        ret = 0
+        for i2cDevice in [self.i2cDevice_IC58_LTC2977, self.i2cDevice_IC59_LTC2977, self.i2cDevice_IC26_LTM4700, self.i2cDevice_IC27_LTM4700]:
+            retId, mfrId = i2cDevice.read_mfr_id()
+            retModel, mfrModel = i2cDevice.read_mfr_model()
+            if retId or retModel:
+                self.errorCount += 1
+                print(self.prefixError + "Error reading the manufacturer information of the power module {0:s} on I2C port {1:d}!".format(i2cDevice.deviceName, i2cDevice.mcuI2C.port))
+                ret = -1
+                continue
+            print("Power module {0:s} on I2C port {1:d}:".format(i2cDevice.deviceName, i2cDevice.mcuI2C.port))
+            print(self.prefixStatus + "{0:18s}: {1:s}".format("MFR_ID", mfrId))
+            print(self.prefixStatus + "{0:18s}: {1:s}".format("MFR_MODEL", mfrModel))
+            self.result_add("MFR_ID", mfrId, "", i2cDevice.deviceName)
+            self.result_add("MFR_MODEL", mfrModel, "", i2cDevice.deviceName)
+        return ret
+
+
+
+    # Print the fault log of an LTC2977 power system manager.
+    def pm_fault_log_print(self, i2cDevice, measurementNames, faultLog):
+        print("Fault log of the power module {0:s} on I2C port {1:d}:".format(i2cDevice.deviceName, i2cDevice.mcuI2C.port))
+        print(self.prefixStatus + "{0:23s}: {1:.4f} s".format("Time stamp", faultLog["time"]))
+        print(self.prefixStatus + "{0:23s}: {1:d}".format("Loop position", faultLog["position"]))
+        print(self.prefixStatus + "{0:23s}: {1:7.3f} V, min. {2:7.3f} V".format("V_in peak", faultLog["vinPeak"], faultLog["vinMin"]))
+        print(self.prefixStatus + "{0:23s}: {1:7.3f} degC, min. {2:7.3f} degC".format("Temperature peak", faultLog["tempPeak"], faultLog["tempMin"]))
+        for channel in range(i2cDevice.hwChannels):
+            if measurementNames[channel] == "<unused>":
+                continue
+            print(self.prefixStatus + "{0:d}: {1:20s}: V_out peak {2:7.3f} V, min. {3:7.3f} V".format(channel, measurementNames[channel], faultLog["voutPeak"][channel], faultLog["voutMin"][channel]))
+        for i, loop in enumerate(faultLog["loops"]):
+            print(self.prefixStatus + "Loop -{0:d}: V_in {1:7.3f} V, temperature {2:7.3f} degC".format(i, loop["vin"], loop["temp"]))
+            for channel in range(i2cDevice.hwChannels):
+                if measurementNames[channel] == "<unused>":
+                    continue
+                print(self.prefixStatus + "  {0:d}: {1:20s}: V_out {2:7.3f} V, STATUS_VOUT 0x{3:02x}".format(channel, measurementNames[channel], loop["vout"][channel], loop["statusVout"][channel]))
+        return 0
+
+
+
+    # Dump the fault logs of all LTC2977 power system managers.
+    def pm_fault_log_dump(self):
+        ret = 0
+        for i2cDevice, measurementNames in [[self.i2cDevice_IC58_LTC2977, self.IC58_LTC2977_measurementNames],
+                                            [self.i2cDevice_IC59_LTC2977, self.IC59_LTC2977_measurementNames]]:
+            retTmp, status = i2cDevice.read_fault_log_status()
+            if retTmp:
+                ret = -1
+                continue
+            if not status & i2cDevice.hwFaultLogPresent:
+                print("No fault log present in the power module {0:s} on I2C port {1:d}.".format(i2cDevice.deviceName, i2cDevice.mcuI2C.port))
+                continue
+            mfrConfigs = []
+            for channel in range(i2cDevice.hwChannels):
+                retTmp, mfrConfig = i2cDevice.read_mfr_config(channel)
+                if retTmp:
+                    break
+                mfrConfigs.append(mfrConfig)
+            if retTmp:
+                ret = -1
+                continue
+            retTmp, data = i2cDevice.read_fault_log()
+            if retTmp:
+                self.errorCount += 1
+                print(self.prefixError + "Error reading the fault log of the power module {0:s} on I2C port {1:d}!".format(i2cDevice.deviceName, i2cDevice.mcuI2C.port))
+                ret = -1
+                continue
+            self.pm_fault_log_print(i2cDevice, measurementNames, i2cDevice.fault_log_decode(data, mfrConfigs))
+        return ret
+
+
+
     # Detailed power status of the CM.
     def power_status_detail(self):
         if self.debugLevel >= 1:
@@ -723,6 +1149,18 @@ class MdtTp_CM:
         print("Miscellaneous")
         print(self.prefixStatus + "{0:18s}: {1:5.2f} V, {2:5.2f} A".format("5.0V",              P5V_MISC_Voltage,   P5V_MISC_Current    ))
         print(self.prefixStatus + "{0:18s}: {1:5.1f} W".format("Total power",  miscPower))
+        for name, voltage, current in [["VU13P 0.85V core", fpgaCoreVoltage, fpgaCoreCurrent],
+                                       ["VU13P 1.8V IO", P1V8_FPGA_Voltage, P1V8_FPGA_Current],
+                                       ["VU13P 1.2V MGT", P1V2_MGT_Voltage, P1V2_MGT_Current],
+                                       ["VU13P 0.9V MGT", P0V9_MGT_Voltage, P0V9_MGT_Current],
+                                       ["1.8V clock/misc", P1V8_MISC_Voltage, P1V8_MISC_Current],
+                                       ["3.3V clock/misc", P3V3_MISC_Voltage, P3V3_MISC_Current],
+                                       ["3.3V FireFly", P3V3_FF_Voltage, P3V3_FF_Current],
+                                       ["5.0V misc", P5V_MISC_Voltage, P5V_MISC_Current]]:
+            self.result_add(name + " voltage", voltage, "V")
+            self.result_add(name + " current", current, "A")
+        for name, power in [["VU13P", fpgaPower], ["Clock / Miscellaneous", clockMiscPower], ["FireFly Modules", fireflyPower], ["Miscellaneous", miscPower]]:
+            self.result_add(name + " total power", power, "W")
 
 
 
@@ -850,20 +1288,32 @@ class MdtTp_CM:
 
 
 
+    # Get the list of clock devices that can be programmed by their name.
+    def clk_get_device_list(self):
+        return [self.i2cDevice_IC1_Si5345A,
+                self.i2cDevice_IC2_Si5345A,
+                self.i2cDevice_IC3_Si5345A,
+                self.i2cDevice_IC4_Si5345A,
+                self.i2cDevice_IC5_Si5345A,
+                self.i2cDevice_IC6_Si5345A,
+                self.i2cDevice_IC7_Si5345A,
+                self.i2cDevice_IC8_Si5345A,
+                self.i2cDevice_IC9_Si5345A,
+                self.i2cDevice_IC10_Si5345A,
+                self.i2cDevice_IC11_Si598,
+                self.i2cDevice_IC12_Si5345A]
+
+
+
+    # Get the names of the clock devices, e.g. `IC1'.
+    def clk_get_device_names(self):
+        return [dev.deviceName.split(' ')[0] for dev in self.clk_get_device_list()]
+
+
+
     # Program a single Silicon Labs clock IC from a register map file by its name.
     def clk_prog_device_by_name(self, clkDevName, regMapFile):
-        clkDeviceList = [self.i2cDevice_IC1_Si5345A,
-                         self.i2cDevice_IC2_Si5345A,
-                         self.i2cDevice_IC3_Si5345A,
-                         self.i2cDevice_IC4_Si5345A,
-                         self.i2cDevice_IC5_Si5345A,
-                         self.i2cDevice_IC6_Si5345A,
-                         self.i2cDevice_IC7_Si5345A,
-                         self.i2cDevice_IC8_Si5345A,
-                         self.i2cDevice_IC9_Si5345A,
-                         self.i2cDevice_IC10_Si5345A,
-                         self.i2cDevice_IC11_Si598,
-                         self.i2cDevice_IC12_Si5345A]
+        clkDeviceList = self.clk_get_device_list()
         clkDevice = None
         for dev in clkDeviceList:
             if clkDevName.lower() == dev.deviceName.split(' ')[0].lower():
@@ -918,6 +1368,7 @@ class MdtTp_CM:
         else:
             print("Status read from {0:s} on I2C port {1:d}: {2:s}".\
             format(i2cDevice.deviceName, i2cDevice.mcuI2C.port, status))
+            self.result_add("Status", status, "", i2cDevice.deviceName)
 
 
 
@@ -1183,6 +1634,12 @@ class MdtTp_CM:
 
 
 
+    # Get the names of all signals of the I2C I/O expander devices.
+    def i2c_io_exp_get_signal_names(self):
+        return [ioMap[0] for dev in self.i2cIOExpDevs for ioMap in dev.ioMap if ioMap[0]]
+
+
+
     # Get the status of all I2C I/O expander devices:
     # - input level
     # - configuration register
@@ -1201,6 +1658,8 @@ class MdtTp_CM:
             print(self.prefixDetails + "Configuration register      : 0x{0:04x}".format(regConfig))
             print(self.prefixDetails + "Output register             : 0x{0:04x}".format(regOutput))
             print(self.prefixDetails + "Polarity inversion register : 0x{0:04x}".format(regPolarity))
+            for name, value in [["Input level register", regInput], ["Configuration register", regConfig], ["Output register", regOutput], ["Polarity inversion register", regPolarity]]:
+                self.result_add(name, value, "", dev.deviceName)
         return 0
 
 
@@ -1228,6 +1687,8 @@ class MdtTp_CM:
         print(self.prefixDetails + "Configuration register      : {0:d}".format((regConfig >> ioIdx) & 0x1))
         print(self.prefixDetails + "Output register             : {0:d}".format((regOutput >> ioIdx) & 0x1))
         print(self.prefixDetails + "Polarity inversion register : {0:d}".format((regPolarity >> ioIdx) & 0x1))
+        for name, value in [["input", regInput], ["configuration", regConfig], ["output", regOutput], ["polarity inversion", regPolarity]]:
+            self.result_add(signalName + " " + name, (value >> ioIdx) & 0x1, "", dev.deviceName)
         return 0
 
 
@@ -1241,6 +1702,7 @@ class MdtTp_CM:
             ret, regInput = dev.read_input()
             for ioIdx, ioMap in enumerate(dev.ioMap):
                 print(self.prefixDetails + "I/O {0:2d}, {1:28s} : {2:d}".format(ioIdx, "`" + ioMap[0] + "'", (regInput >> ioIdx) & 0x1))
+                self.result_add(ioMap[0] if ioMap[0] else "I/O {0:d}".format(ioIdx), (regInput >> ioIdx) & 0x1, "", dev.deviceName)
         return 0
 
 
@@ -1257,6 +1719,7 @@ class MdtTp_CM:
             print(self.prefixError + "Error reading the input level of signal `" + signalName + "'!")
             return ret
         print("Input level of {0:s}, I/O {1:2d}, {2:s}: {3:d}".format(dev.deviceName, ioIdx, '"' + signalName + '"', (regInput >> ioIdx) & 0x1))
+        self.result_add(signalName, (regInput >> ioIdx) & 0x1, "", dev.deviceName)
         return 0
 
 
@@ -1270,6 +1733,7 @@ class MdtTp_CM:
             ret, regOutput = dev.read_output()
             for ioIdx, ioMap in enumerate(dev.ioMap):
                 print(self.prefixDetails + "I/O {0:2d}, {1:28s} : {2:d}".format(ioIdx, "`" + ioMap[0] + "'", (regOutput >> ioIdx) & 0x1))
+                self.result_add(ioMap[0] if ioMap[0] else "I/O {0:d}".format(ioIdx), (regOutput >> ioIdx) & 0x1, "", dev.deviceName)
         return 0
 
 
@@ -1286,6 +1750,7 @@ class MdtTp_CM:
             print(self.prefixError + "Error reading the output value of signal `" + signalName + "'!")
             return ret
         print("Output value of {0:s}, I/O {1:2d}, {2:s}: {3:d}".format(dev.deviceName, ioIdx, '"' + signalName + '"', (regOutput >> ioIdx) & 0x1))
+        self.result_add(signalName, (regOutput >> ioIdx) & 0x1, "", dev.deviceName)
         return 0
 
 
@@ -1329,47 +1794,575 @@ class MdtTp_CM:
 
 
 
+    # Reset signals of the clock chips (active low).
+    clkResetSignals = [
+        "CLK_EXT_DBG_CLEAN_nRST",
+        "CLK_FF_135_0_RSTb",
+        "CLK_FF_135_1_RSTb",
+        "CLK_FF_79_0_RSTb",
+        "CLK_FF_79_1_RSTb",
+        "CLK_FF_024_0_RSTb",
+        "CLK_FF_024_1_RSTb",
+        "CLK_FF_68_0_RSTb",
+        "CLK_FF_68_1_RSTb",
+        "FF_CLK_RSTb",
+        "CLK_FF_TD_0_RSTb",
+        "SM_RSTb"
+    ]
+
+    # Assert (reset = True) or de-assert (reset = False) the reset of all
+    # clock chips using the I2C I/O expander devices.
+    def i2c_io_exp_set_clk_reset(self, reset):
+        ret = 0
+        for signal in self.clkResetSignals:
+            # Active low.
+            if self.i2c_io_exp_set_output(signal, 0 if reset else 1):
+                ret = -1
+        return ret
+
+
+
     # Reset all clock chips using the I2C I/O expander devices.
     def i2c_io_exp_reset_clk(self):
-        clkResetSignals = [
-            "CLK_EXT_DBG_CLEAN_nRST",
-            "CLK_FF_135_0_RSTb",
-            "CLK_FF_135_1_RSTb",
-            "CLK_FF_79_0_RSTb",
-            "CLK_FF_79_1_RSTb",
-            "CLK_FF_024_0_RSTb",
-            "CLK_FF_024_1_RSTb",
-            "CLK_FF_68_0_RSTb",
-            "CLK_FF_68_1_RSTb",
-            "FF_CLK_RSTb",
-            "CLK_FF_TD_0_RSTb",
-            "SM_RSTb"
-        ]
-        # Assert reset (active low).
-        for signal in clkResetSignals:
-            self.i2c_io_exp_set_output(signal, 0)
+        # Assert reset.
+        ret = self.i2c_io_exp_set_clk_reset(True)
         # Wait some time.
-        time.sleep(0.1)
-        # De-assert reset (active low).
-        for signal in clkResetSignals:
-            self.i2c_io_exp_set_output(signal, 1)
+        time.sleep(self.clkResetDelay)
+        # De-assert reset.
+        if self.i2c_io_exp_set_clk_reset(False):
+            ret = -1
+        return ret
 
-    def i2c_io_exp_status_clk(self):
-        clkstatusSignals = {
-            "IC1":"FF_CLK_LOLb",
-            "IC2":"CLK_FF_024_0_LOLb",
-            "IC3":"CLK_FF_024_1_LOLb",
-            "IC4":"CLK_FF_68_0_LOLb",
-            "IC5":"CLK_FF_68_1_LOLb",
-            "IC6":"CLK_FF_135_0_LOLb",
-            "IC7":"CLK_FF_135_1_LOLb",
-            "IC8":"CLK_FF_79_0_LOLb",
-            "IC9":"CLK_FF_79_1_LOLb",
-            "IC10":"CLK_FF_TD_0_LOLb",
-            "IC12":"SM_LOLb"}
+    # Loss of lock (LOL) signals of the clock chips (active low).
+    clkLolSignals = {
+        "IC1":"FF_CLK_LOLb",
+        "IC2":"CLK_FF_024_0_LOLb",
+        "IC3":"CLK_FF_024_1_LOLb",
+        "IC4":"CLK_FF_68_0_LOLb",
+        "IC5":"CLK_FF_68_1_LOLb",
+        "IC6":"CLK_FF_135_0_LOLb",
+        "IC7":"CLK_FF_135_1_LOLb",
+        "IC8":"CLK_FF_79_0_LOLb",
+        "IC9":"CLK_FF_79_1_LOLb",
+        "IC10":"CLK_FF_TD_0_LOLb",
+        "IC12":"SM_LOLb"}
 
+    def i2c_io_exp_status_clk(self):
         # Read LOL for all clock chips.
-        for ic in clkstatusSignals.keys():
+        for ic in self.clkLolSignals.keys():
             print(ic)
-            self.i2c_io_exp_get_input(clkstatusSignals[ic])
+            self.i2c_io_exp_get_input(self.clkLolSignals[ic])
+
+
+
+    # Get the loss of lock state of all clock chips. Each I/O expander is read
+    # only once. Returns a dictionary with 1 for clock chips which lost lock.
+    def clk_lol_get(self):
+        ret = 0
+        regInputs = {}
+        clkLol = {}
+        for ic, signalName in self.clkLolSignals.items():
+            retTmp, dev, ioIdx = self.i2c_io_exp_signal2dev_io(signalName)
+            if retTmp:
+                ret = -1
+                continue
+            if dev.deviceName not in regInputs:
+                retTmp, regInputs[dev.deviceName] = dev.read_input()
+                if retTmp:
+                    ret = -1
+                    continue
+            clkLol[ic] = 0 if (regInputs[dev.deviceName] >> ioIdx) & 0x1 else 1
+        return ret, clkLol
+
+
+
+    # ===============================================================
+    # Monitoring scheduler.
+    # ===============================================================
+
+    # Scheduler parameters.
+    monSchedTickPeriod      = 0.5   # Scheduler tick period in seconds.
+    monSchedPeriodCurrent   = 1     # Rail currents change fast, e.g. during FPGA configuration.
+    monSchedPeriodVoltage   = 5
+    monSchedPeriodTemp      = 10    # Temperatures change slowly.
+    monSchedPeriodFireFly   = 30
+    monSchedPeriodStatus    = 10    # Power good and clock loss of lock.
+    monSchedPeriodPeak      = 10    # Readout of the hardware peak registers of the power modules.
+    monSchedPeriodAlarm     = 0.5   # Values with alarm limits are sampled as an urgent group.
+    monAlarmLatencyMax      = 1.0   # Maximum latency from sample to protective action in seconds.
+    monHistoryDuration      = 600   # Time span kept in the ring buffers in seconds.
+
+    # Alarm limits: key, lower limit, upper limit, hysteresis, max. rate of
+    # change per second, power domain to switch off ("all" = power down).
+    monAlarmLimits = [
+        ["IC60 (MCP9902) VU13P FPGA [degC]",            None,   90,     5,      10,     "fpga"],
+        ["IC61 (MCP9902) Board [degC]",                 None,   75,     5,      None,   "all"],
+        ["IC26 (LTM4700) FPGA 0.85V core 1/4 [A]",      None,   40,     2,      None,   "fpga"],
+        ["IC26 (LTM4700) FPGA 0.85V core 2/4 [A]",      None,   40,     2,      None,   "fpga"],
+        ["IC27 (LTM4700) FPGA 0.85V core 3/4 [A]",      None,   40,     2,      None,   "fpga"],
+        ["IC27 (LTM4700) FPGA 0.85V core 4/4 [A]",      None,   40,     2,      None,   "fpga"],
+        ["IC58 (LTC2977) P1V2_MGT [A]",                 None,   10,     0.5,    None,   "fpga"],
+        ["IC58 (LTC2977) P0V9_MGT [A]",                 None,   15,     0.5,    None,   "fpga"],
+        ["IC59 (LTC2977) P3V3_FF [A]",                  None,   5,      0.5,    None,   "firefly"],
+    ]
+
+    # Rails exported with their output power: rail, output voltage and output
+    # currents of all channels supplying the rail.
+    monExportRails = [
+        ["P1V8_FPGA",       "IC58 (LTC2977) P1V8_FPGA [V]",         ["IC58 (LTC2977) P1V8_FPGA [A]"]],
+        ["P1V2_MGT",        "IC58 (LTC2977) P1V2_MGT [V]",          ["IC58 (LTC2977) P1V2_MGT [A]"]],
+        ["P0V9_MGT",        "IC58 (LTC2977) P0V9_MGT [V]",          ["IC58 (LTC2977) P0V9_MGT [A]"]],
+        ["P1V8_MISC",       "IC59 (LTC2977) P1V8_MISC [V]",         ["IC59 (LTC2977) P1V8_MISC [A]"]],
+        ["P3V3_MISC",       "IC59 (LTC2977) P3V3_MISC [V]",         ["IC59 (LTC2977) P3V3_MISC [A]"]],
+        ["P5V_MISC",        "IC59 (LTC2977) P5V_MISC [V]",          ["IC59 (LTC2977) P5V_MISC [A]"]],
+        ["P3V3_FF",         "IC59 (LTC2977) P3V3_FF [V]",           ["IC59 (LTC2977) P3V3_FF [A]"]],
+        ["FPGA 0.85V core", "IC26 (LTM4700) FPGA 0.85V core [V]",   ["IC26 (LTM4700) FPGA 0.85V core 1/4 [A]", "IC26 (LTM4700) FPGA 0.85V core 2/4 [A]",
+                                                                     "IC27 (LTM4700) FPGA 0.85V core 3/4 [A]", "IC27 (LTM4700) FPGA 0.85V core 4/4 [A]"]],
+    ]
+
+    # I2C multiplexer and channel for each FireFly module.
+    ffMuxMap = [[0x70, 0], [0x71, 0], [0x70, 1], [0x71, 1], [0x70, 2],
+                [0x71, 2], [0x70, 3], [0x71, 3], [0x72, 0], [0x72, 1]]
+
+
+
+    # Select the I2C multiplexer channel of a FireFly module. Only the
+    # previously selected multiplexer is disabled to save I2C transactions.
+    def ff_select(self, ff):
+        muxes = {0x70: self.i2cDevice_FF_I2CMUX_0x70, 0x71: self.i2cDevice_FF_I2CMUX_0x71, 0x72: self.i2cDevice_FF_I2CMUX_0x72}
+        muxAdr, channel = self.ffMuxMap[ff]
+        ret = 0
+        if self.ffMuxSelected is None:
+            for mux in muxes.values():
+                ret |= mux.disable()
+        elif self.ffMuxSelected[0] != muxAdr:
+            ret |= muxes[self.ffMuxSelected[0]].disable()
+        if self.ffMuxSelected != [muxAdr, channel]:
+            ret |= muxes[muxAdr].set_channels([channel])
+        self.ffMuxSelected = [muxAdr, channel] if not ret else None
+        return ret
+
+
+
+    # Forget the selected multiplexer channel of the FireFly modules, e.g.
+    # after the multiplexers were accessed directly, reset or powered. The next
+    # selection sets all multiplexers.
+    def ff_select_invalidate(self):
+        self.ffMuxSelected = None
+        return 0
+
+
+
+    # Read the temperatures and supply voltages of a FireFly module. Selecting
+    # the multiplexer channel and reading the module is one transaction, so
+    # that another thread cannot select a different module in between.
+    def read_ff_values(self, ff):
+        if self.mcuSer.owner_required():
+            return self.mcuSer.call(self.read_ff_values, ff)
+        if self.ff_select(ff):
+            self.errorCount += 1
+            print(self.prefixError + "Error selecting the I2C multiplexer channel of FireFly module {0:d}!".format(ff))
+            return -1, []
+        ret = 0
+        values = []
+        for device in [self.i2cDevice_FF_tx, self.i2cDevice_FF_rx]:
+            retTmp, temp = device.read_temperature()
+            ret |= retTmp
+            retTmp, vcc = device.read_vcc()
+            ret |= retTmp
+            values += [temp, vcc]
+        return ret, values
+
+
+
+    # Print the values of a measurement group.
+    def mon_sched_print(self, group, timestamp):
+        print("{0:s} - {1:s}".format(time.strftime("%d.%m.%Y %H:%M:%S", time.localtime(timestamp)), group["name"]))
+        for key, value in group["values"].items():
+            if isinstance(value, list):
+                print(self.prefixStatus + "{0:40s}: ".format(key) + ", ".join("{0:6.3f}".format(v) for v in value))
+            else:
+                print(self.prefixStatus + "{0:40s}: {1:6.3f}".format(key, value))
+            name, unit = self.result_key_split(key)
+            self.result_add(name, value, unit, "", timestamp)
+
+
+
+    # Print the power good and clock loss of lock status.
+    def mon_sched_print_status(self, group, timestamp):
+        print("{0:s} - {1:s}".format(time.strftime("%d.%m.%Y %H:%M:%S", time.localtime(timestamp)), group["name"]))
+        if "Power good" in group["values"]:
+            print(self.prefixStatus + "{0:40s}: 0x{1:03x}".format("Power good", group["values"]["Power good"]))
+            self.result_add("Power good", group["values"]["Power good"], "", "", timestamp)
+        if "Clock LOL" in group["values"]:
+            clkLol = [ic for ic, lol in group["values"]["Clock LOL"].items() if lol]
+            print(self.prefixStatus + "{0:40s}: {1:s}".format("Clock LOL", ", ".join(clkLol) if clkLol else "-"))
+            self.result_add("Clock LOL", group["values"]["Clock LOL"], "", "", timestamp)
+
 
+
+    # I2C transactions of the monitoring scheduler for reading a PMBus word
+    # with the command code, optionally after setting the page. The word is
+    # converted with the function convert.
+    @classmethod
+    def mon_batch_word(cls, i2cDevice, cmdCode, page, convert):
+        transactions = [[i2cDevice.slaveAddr, [cmdCode], 2]]
+        if page is not None:
+            transactions.insert(0, [i2cDevice.slaveAddr, [i2cDevice.hwCmdCodePage, page], 0])
+        return transactions, lambda data: (0, convert((data[-1][1] << 8) + data[-1][0]))
+
+
+
+    # I2C transactions of the monitoring scheduler for reading the output
+    # voltage of a channel of an LTC2977 like read_vout: Set the page, read
+    # MFR_CONFIG_LTC2977 and READ_VOUT. The voltage is divided by divisor,
+    # e.g. the current sense shunt.
+    @classmethod
+    def mon_batch_ltc2977_vout(cls, i2cDevice, channel, divisor):
+        transactions = [[i2cDevice.slaveAddr, [i2cDevice.hwCmdCodePage, channel], 0],
+                        [i2cDevice.slaveAddr, [i2cDevice.hwCmdCodeMfrConfigChan], 2],
+                        [i2cDevice.slaveAddr, [i2cDevice.hwCmdCodeReadVout], 2]]
+        def decode(data):
+            mfrConfig = (data[1][1] << 8) + data[1][0]
+            vout = i2cDevice.vout_decode([(data[2][1] << 8) + data[2][0]], [channel], [mfrConfig])[0]
+            return 0, vout / divisor
+        return transactions, decode
+
+
+
+    # I2C transactions of the monitoring scheduler for reading a diode
+    # temperature of an MCP9902 from its configuration, integer and
+    # fractional registers.
+    @classmethod
+    def mon_batch_mcp9902(cls, i2cDevice, regAdrs):
+        transactions = [[i2cDevice.slaveAddr, [regAdr], 1] for regAdr in regAdrs]
+        return transactions, lambda data: (0, cls.mcp9902_temperature(*[datum[0] for datum in data]))
+
+
+
+    # Define the monitoring scheduler and its measurement groups. The reads of
+    # the power modules and temperature sensors are also defined as I2C
+    # transactions, so that the scheduler executes them with I2C transaction
+    # lists. The FireFly reads depend on the selected multiplexer channel and
+    # the status reads access the GPIOs and I/O expanders, so they call their
+    # functions.
+    def mon_sched_define(self):
+        # Import here, so that the module is only loaded when required.
+        MonScheduler = importlib.import_module("MonScheduler")
+        self.monSched = MonScheduler.MonScheduler(self.mcuSer, self.monSchedTickPeriod)
+        self.monSched.debugLevel = self.debugLevel
+        i2cPortPm = self.i2cDevice_IC58_LTC2977.mcuI2C
+        # Rail currents.
+        reads = []
+        for device, names, shunts in [[self.i2cDevice_IC58_LTC2977, self.IC58_LTC2977_measurementNames, self.IC58_LTC2977_currentSenseShunts],
+                                      [self.i2cDevice_IC59_LTC2977, self.IC59_LTC2977_measurementNames, self.IC59_LTC2977_currentSenseShunts]]:
+            for channel in range(device.hwChannels):
+                if shunts[channel] > 0:
+                    key = "{0:s} {1:s} [A]".format(device.deviceName, names[channel])
+                    reads.append([key, i2cPortPm, lambda d=device, c=channel, s=shunts[channel]: self.pm_get_current(d, c, s)])
+                    self.monSched.add_batch(key, *self.mon_batch_ltc2977_vout(device, channel, shunts[channel]))
+        for device, names in [[self.i2cDevice_IC26_LTM4700, self.IC26_LTM4700_measurementNames],
+                              [self.i2cDevice_IC27_LTM4700, self.IC27_LTM4700_measurementNames]]:
+            for channel in range(device.hwChannels):
+                key = "{0:s} {1:s} [A]".format(device.deviceName, names[channel])
+                reads.append([key, i2cPortPm, lambda d=device, c=channel: d.read_iout(c)])
+                self.monSched.add_batch(key, *self.mon_batch_word(device, device.hwCmdCodeReadIout, channel, device.l11_to_float))
+        self.monSched.add_group("currents", self.monSchedPeriodCurrent, 0, reads, self.mon_sched_print)
+        # Rail voltages.
+        reads = []
+        for device, names, shunts in [[self.i2cDevice_IC58_LTC2977, self.IC58_LTC2977_measurementNames, self.IC58_LTC2977_currentSenseShunts],
+                                      [self.i2cDevice_IC59_LTC2977, self.IC59_LTC2977_measurementNames, self.IC59_LTC2977_currentSenseShunts]]:
+            for channel in range(device.hwChannels):
+                if shunts[channel] == 0 and names[channel] != "<unused>":
+                    key = "{0:s} {1:s} [V]".format(device.deviceName, names[channel])
+                    reads.append([key, i2cPortPm, lambda d=device, c=channel: d.read_vout(c)])
+                    self.monSched.add_batch(key, *self.mon_batch_ltc2977_vout(device, channel, 1))
+        device = self.i2cDevice_IC26_LTM4700
+        key = "{0:s} FPGA 0.85V core [V]".format(device.deviceName)
+        reads.append([key, i2cPortPm, lambda: self.i2cDevice_IC26_LTM4700.read_vout(0)])
+        self.monSched.add_batch(key, *self.mon_batch_word(device, device.hwCmdCodeReadVout, 0, device.l16_to_float))
+        self.monSched.add_group("voltages", self.monSchedPeriodVoltage, 1, reads, self.mon_sched_print)
+        # Temperatures.
+        reads = []
+        for device, name in [[self.i2cDevice_IC60_MCP9902, "VU13P FPGA"],
+                             [self.i2cDevice_IC61_MCP9902, "MGT 0.9 V power"],
+                             [self.i2cDevice_IC62_MCP9902, "MGT 1.2 V power"]]:
+            key = "{0:s} {1:s} [degC]".format(device.deviceName, name)
+            reads.append([key, device.mcuI2C, device.read_temp_ext])
+            self.monSched.add_batch(key, *self.mon_batch_mcp9902(device, [0x09, 0x01, 0x10]))
+            key = "{0:s} Board [degC]".format(device.deviceName)
+            reads.append([key, device.mcuI2C, device.read_temp_int])
+            self.monSched.add_batch(key, *self.mon_batch_mcp9902(device, [0x03, 0x00, 0x29]))
+        for device in [self.i2cDevice_IC26_LTM4700, self.i2cDevice_IC27_LTM4700]:
+            key = "{0:s} int [degC]".format(device.deviceName)
+            reads.append([key, i2cPortPm, device.read_temp_int])
+            self.monSched.add_batch(key, *self.mon_batch_word(device, device.hwCmdCodeReadTempInt, None, device.l11_to_float))
+        for device in [self.i2cDevice_IC58_LTC2977, self.i2cDevice_IC59_LTC2977]:
+            key = "{0:s} [degC]".format(device.deviceName)
+            reads.append([key, i2cPortPm, device.read_temp])
+            self.monSched.add_batch(key, *self.mon_batch_word(device, device.hwCmdCodeReadTemp, None, device.l11_to_float))
+        self.monSched.add_group("temperatures", self.monSchedPeriodTemp, 2, reads, self.mon_sched_print)
+        # FireFly modules: TX temperature, TX Vcc, RX temperature, RX Vcc.
+        reads = []
+        for ff in range(self.fireFlyNum):
+            reads.append(["FF{0:d} [degC, V, degC, V]".format(ff), self.i2cDevice_FF_tx.mcuI2C,
+                          lambda f=ff: self.read_ff_values(f), 4])
+        self.monSched.add_group("firefly", self.monSchedPeriodFireFly, 3, reads, self.mon_sched_print)
+        # Power good and clock loss of lock.
+        reads = [["Power good", None, self.power_good_get],
+                 ["Clock LOL", self.i2cIOExpDevs[0].mcuI2C, self.clk_lol_get, 0]]
+        self.monSched.add_group("status", self.monSchedPeriodStatus, 3, reads, self.mon_sched_print_status)
+        return 0
+
+
+
+    # Print the peak values of the power modules.
+    def mon_sched_print_peaks(self, group, timestamp):
+        print("{0:s} - {1:s}".format(time.strftime("%d.%m.%Y %H:%M:%S", time.localtime(timestamp)), group["name"]))
+        for i2cDevice in [self.i2cDevice_IC58_LTC2977, self.i2cDevice_IC59_LTC2977, self.i2cDevice_IC26_LTM4700, self.i2cDevice_IC27_LTM4700]:
+            key = "{0:s} peaks".format(i2cDevice.deviceName)
+            if key not in group["values"]:
+                continue
+            for (rail, quantity, unit), value in zip(self.pm_peak_labels(i2cDevice), group["values"][key]):
+                print(self.prefixStatus + "{0:s} {1:s} {2:s}".format(i2cDevice.deviceName, rail, quantity).ljust(40) + ": {0:6.3f} {1:s}".format(value, unit))
+                self.result_add("{0:s} {1:s}".format(rail, quantity).strip(), value, unit, i2cDevice.deviceName, timestamp)
+
+
+
+    # Enable the peak capture mode: The hardware peak registers of the power
+    # modules are read and cleared once per slow sample interval. They capture
+    # transients between the samples, so that the rail currents need not be
+    # polled fast anymore.
+    def mon_peak_define(self):
+        if not hasattr(self, "monSched"):
+            self.mon_sched_define()
+        reads = []
+        for i2cDevice in [self.i2cDevice_IC58_LTC2977, self.i2cDevice_IC59_LTC2977, self.i2cDevice_IC26_LTM4700, self.i2cDevice_IC27_LTM4700]:
+            reads.append(["{0:s} peaks".format(i2cDevice.deviceName), i2cDevice.mcuI2C,
+                          lambda d=i2cDevice: self.pm_get_peaks(d), len(self.pm_peak_labels(i2cDevice))])
+        self.monSched.add_group("peaks", self.monSchedPeriodPeak, 0, reads, self.mon_sched_print_peaks)
+        ret, group = self.monSched.get_group("currents")
+        if not ret:
+            group["period"] = self.monSchedPeriodPeak
+        return 0
+
+
+
+    # Define the alarm engine. The values with alarm limits are sampled in an
+    # urgent measurement group, which the scheduler services even between
+    # the reads of routine groups. Every sample is evaluated directly after
+    # its read.
+    def mon_alarm_define(self):
+        # Import here, so that the module is only loaded when required.
+        MonAlarm = importlib.import_module("MonAlarm")
+        if not hasattr(self, "monSched"):
+            self.mon_sched_define()
+        self.monAlarm = MonAlarm.MonAlarm(self.monAlarmLatencyMax)
+        self.monAlarm.debugLevel = self.debugLevel
+        reads = {}
+        for group in self.monSched.groups:
+            for read in group["reads"]:
+                reads[read[0]] = read
+        readsAlarm = []
+        for key, low, high, hysteresis, rateMax, domain in self.monAlarmLimits:
+            if key not in reads:
+                self.errorCount += 1
+                print(self.prefixError + "Error defining the alarm for `{0:s}': No such monitored value!".format(key))
+                return -1
+            if domain == "all":
+                actions = [["power_down", self.power_down]]
+            else:
+                actions = [["power {0:s} 0".format(domain), lambda d=domain: self.power_domain(d, 0)]]
+            self.monAlarm.add_limit(key, low, high, hysteresis, rateMax, actions)
+            readsAlarm.append(reads[key])
+        self.monSched.add_group("alarms", self.monSchedPeriodAlarm, self.monSched.priorityUrgent - 1, readsAlarm)
+        self.monSched.readHook = self.monAlarm.evaluate
+        return 0
+
+
+
+    # Define the OpenMetrics exporter. The exporter cache is refreshed after
+    # each readout of a measurement group, so HTTP scrapes never access the
+    # MCU.
+    def mon_export_define(self, address, port):
+        # Import here, so that the module is only loaded when required.
+        MonExporter = importlib.import_module("MonExporter")
+        if not hasattr(self, "monSched"):
+            self.mon_sched_define()
+        self.monExporter = MonExporter.MonExporter(address, port)
+        self.monExporter.debugLevel = self.debugLevel
+        self.monExporter.define("cm_temperature_celsius",           "gauge",    "Temperature of on-board sensors.", "celsius")
+        self.monExporter.define("cm_rail_voltage_volts",            "gauge",    "Output voltage of power rails.", "volts")
+        self.monExporter.define("cm_rail_current_amperes",          "gauge",    "Output current of power rails.", "amperes")
+        self.monExporter.define("cm_rail_power_watts",              "gauge",    "Output power of power rails.", "watts")
+        self.monExporter.define("cm_pm_peak",                       "gauge",    "Peak and min values of the power modules since the previous readout.")
+        self.monExporter.define("cm_power_good",                    "gauge",    "Power good signals (1 = good).")
+        self.monExporter.define("cm_firefly_temperature_celsius",   "gauge",    "Temperature of FireFly modules.", "celsius")
+        self.monExporter.define("cm_firefly_vcc_volts",             "gauge",    "Supply voltage of FireFly modules.", "volts")
+        self.monExporter.define("cm_clock_lol",                     "gauge",    "Loss of lock of clock chips (1 = lost lock).")
+        self.monExporter.define("cm_i2c_errors",                    "counter",  "Errors on the MCU I2C master ports.")
+        self.monExporter.define("cm_serial_errors",                 "counter",  "Errors on the serial link to the MCU.")
+        self.monSched.groupHooks.append(self.mon_export_update)
+        return 0
+
+
+
+    # Update the exporter cache from the values of a measurement group. The
+    # samples are stamped with the time of the readout.
+    def mon_export_update(self, group, timestamp):
+        exporter = self.monExporter
+        for key, value in group["values"].items():
+            if key == "Power good":
+                for mask, name in self.powerGoodBits:
+                    exporter.set("cm_power_good", [["signal", name]], 1 if value & mask else 0, timestamp)
+            elif key == "Clock LOL":
+                for ic, lol in value.items():
+                    exporter.set("cm_clock_lol", [["device", ic]], lol, timestamp)
+            elif key.endswith(" peaks"):
+                device = key[:-len(" peaks")]
+                for i2cDevice in [self.i2cDevice_IC58_LTC2977, self.i2cDevice_IC59_LTC2977, self.i2cDevice_IC26_LTM4700, self.i2cDevice_IC27_LTM4700]:
+                    if i2cDevice.deviceName == device:
+                        for (rail, quantity, unit), v in zip(self.pm_peak_labels(i2cDevice), value):
+                            exporter.set("cm_pm_peak", [["device", device], ["rail", rail], ["quantity", quantity], ["unit", unit]], v, timestamp)
+            elif key.startswith("FF"):
+                module = key.split(" ")[0]
+                for i, deviceType in enumerate(["tx", "rx"]):
+                    exporter.set("cm_firefly_temperature_celsius", [["module", module], ["type", deviceType]], value[2 * i], timestamp)
+                    exporter.set("cm_firefly_vcc_volts", [["module", module], ["type", deviceType]], value[2 * i + 1], timestamp)
+            else:
+                name, unit = key.rsplit(" [", 1)
+                device = name[:name.find(")") + 1]
+                channel = name[len(device):].strip()
+                if unit == "degC]":
+                    exporter.set("cm_temperature_celsius", [["device", device], ["sensor", channel if channel else "die"]], value, timestamp)
+                elif unit == "V]":
+                    exporter.set("cm_rail_voltage_volts", [["device", device], ["rail", channel]], value, timestamp)
+                elif unit == "A]":
+                    exporter.set("cm_rail_current_amperes", [["device", device], ["rail", channel]], value, timestamp)
+        # Rail power from the latest voltage and the sum of the latest currents
+        # of all channels supplying the rail. It is stamped with the time of
+        # the latest of these reads.
+        for rail, voltageKey, currentKeys in self.monExportRails:
+            results = [self.monSched.results.get(key) for key in [voltageKey] + currentKeys]
+            if any(result is None or result[0] for result in results):
+                continue
+            power = results[0][1] * sum(result[1] for result in results[1:])
+            exporter.set("cm_rail_power_watts", [["rail", rail]], abs(power), max(result[2] for result in results))
+        # Error counters.
+        for mcuI2C in self.mcuI2C:
+            exporter.set("cm_i2c_errors", [["port", mcuI2C.port]], mcuI2C.errorCount)
+        exporter.set("cm_serial_errors", [], self.mcuSer.errorCount)
+
+
+
+    # Serve the telemetry in the OpenMetrics format on the given address and
+    # port while the monitoring scheduler runs for the given duration.
+    def mon_export_run(self, address, port, duration):
+        ret = self.mon_export_define(address, port)
+        if ret:
+            return ret
+        # Do not print the values of each measurement group.
+        if self.debugLevel < 2:
+            for group in self.monSched.groups:
+                group["callback"] = None
+        ret = self.monExporter.start()
+        if ret:
+            return ret
+        ret = self.mon_sched_run(duration)
+        self.monExporter.stop()
+        self.monExporter.print_details()
+        return ret
+
+
+
+    # Define ring buffers holding the recent history of each measurement
+    # group. The capacity is derived from the group period, so that the
+    # memory stays constant regardless of the monitoring duration.
+    def mon_history_define(self, duration):
+        # Import here, so that NumPy is only required for the history.
+        self.monRingBuffer = importlib.import_module("MonRingBuffer")
+        if not hasattr(self, "monSched"):
+            self.mon_sched_define()
+        self.monHistoryDuration = duration
+        self.monHistory = {}
+        self.monSched.groupHooks.append(self.mon_history_update)
+        return 0
+
+
+
+    # Append the values of a measurement group to its ring buffer. The
+    # channels are given by the reads of the group and their value counts:
+    # Reads returning a list are stored as one channel per element, reads
+    # with non-numeric values are not stored. Failed reads are stored as NaN.
+    def mon_history_update(self, group, timestamp):
+        if group["name"] not in self.monHistory:
+            channels = []
+            for read in group["reads"]:
+                count = read[3] if len(read) > 3 else 1
+                if len(read) > 3 and count:
+                    channels += ["{0:s} #{1:d}".format(read[0], i) for i in range(count)]
+                elif count:
+                    channels.append(read[0])
+            if not channels:
+                return
+            capacity = max(int(self.monHistoryDuration / group["period"]), 1)
+            self.monHistory[group["name"]] = self.monRingBuffer.MonRingBuffer(channels, capacity)
+        ringBuffer = self.monHistory[group["name"]]
+        values = []
+        for read in group["reads"]:
+            count = read[3] if len(read) > 3 else 1
+            if not count:
+                continue
+            value = group["values"].get(read[0])
+            if group["status"].get(read[0], -1):
+                value = None
+            elif len(read) <= 3:
+                value = [value]
+            if not isinstance(value, list) or len(value) != count:
+                value = [None] * count
+            values += [datum if isinstance(datum, (int, float)) else float("nan") for datum in value]
+        ringBuffer.append(timestamp, values)
+
+
+
+    # Print the rolling statistics over the given time window in seconds.
+    def mon_history_print(self, window):
+        for groupName, ringBuffer in self.monHistory.items():
+            _, stats = ringBuffer.stats(window)
+            print("History of group `{0:s}' ({1:d} samples):".format(groupName, stats["samples"]))
+            print(self.prefixStatus + "{0:40s}  {1:>10s} {2:>10s} {3:>10s} {4:>10s}".format("", "min", "max", "mean", "std"))
+            for i, channel in enumerate(ringBuffer.channels):
+                print(self.prefixStatus + "{0:40s}: {1:10.3f} {2:10.3f} {3:10.3f} {4:10.3f}".format(
+                    channel, stats["min"][i], stats["max"][i], stats["mean"][i], stats["std"][i]))
+                name, unit = self.result_key_split(channel)
+                self.result_add(name, {stat: float(stats[stat][i]) for stat in ["min", "max", "mean", "std"]}, unit)
+        return 0
+
+
+
+    # Run the monitoring scheduler for the given duration in seconds. A
+    # duration of 0 runs until interrupted.
+    def mon_sched_run(self, duration):
+        if not hasattr(self, "monSched"):
+            self.mon_sched_define()
+        # The serial port may be shared with the threads of other clients,
+        # e.g. MdtTp_CM_Async. The thread-safe access lets urgent reads
+        # preempt their requests.
+        threadsafeOld = self.mcuSer.threadsafe_get()
+        self.mcuSer.threadsafe_enable(True)
+        try:
+            self.monSched.run(duration)
+        except KeyboardInterrupt:
+            print()
+        finally:
+            self.mcuSer.threadsafe_enable(threadsafeOld)
+        print("Monitoring scheduler summary:")
+        self.monSched.print_details()
+        ret = self.monSched.check_rates()[0]
+        if self.monSched.errorCount:
+            ret = -1
+        if hasattr(self, "monAlarm"):
+            self.monAlarm.print_details()
+            if self.monAlarm.alarmCount or self.monAlarm.errorCount:
+                ret = -1
+        return ret
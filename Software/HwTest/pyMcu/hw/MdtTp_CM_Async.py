@@ -0,0 +1,135 @@
+# File: MdtTp_CM_Async.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 19 Oct 2026
+# Rev.: 19 Oct 2026
+#
+# Python class for accessing the ATLAS MDT Trigger Processor (TP) Command
+# Module (CM) Prototype from an asyncio event loop.
+#
+# Hints:
+# - Every Command Module gets its own I/O thread, which owns the serial
+#   session and executes the blocking accesses one after the other. The event
+#   loop is never blocked by the serial communication, so that one event loop
+#   can drive many boards, a metrics endpoint and an alarm engine
+#   concurrently.
+# - Every method of MdtTp_CM is available as a coroutine with the same name
+#   and parameters, e.g. `await cm.power_status()'.
+# - Delays on the host are awaited in the event loop instead of blocking the
+#   I/O thread with time.sleep(): power_up(), i2c_io_exp_reset_clk() and
+#   sleep(). Delays inside a register map file of a clock chip only block
+#   the I/O thread of this board.
+# - Example:
+#     cms = [(await MdtTp_CM_Async.open(dev, 0))[1] for dev in devices]
+#     rets = await asyncio.gather(*[cm.power_up() for cm in cms])
+# - The thread-safe access of the serial port is enabled, so that the
+#   transactions of the devices are not interleaved if the Command Module is
+#   also accessed from other threads, e.g. a shared executor with several
+#   workers or a monitoring scheduler.
+#
+
+
+
+import asyncio
+import concurrent.futures
+import functools
+import MdtTp_CM
+
+
+
+class MdtTp_CM_Async:
+
+    # Message prefixes and separators.
+    prefixError         = "ERROR: {0:s}: ".format(__file__)
+    prefixDebug         = "DEBUG: {0:s}: ".format(__file__)
+
+    # Debug configuration.
+    debugLevel = 0                 # Debug verbosity.
+
+
+
+    # Initialize the asynchronous access to the Command Module object
+    # mdtTp_CM. All accesses are executed by the I/O thread of the executor.
+    def __init__(self, mdtTp_CM, executor=None):
+        self.cm = mdtTp_CM
+        self.debugLevel = mdtTp_CM.debugLevel
+        if executor is None:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="MdtTp_CM")
+        self.executor = executor
+        self.cm.mcuSer.threadsafe_enable(True)
+
+
+
+    # Open a session to the Command Module on the serial device. Opening the
+    # serial device is done in the I/O thread, too.
+    @classmethod
+    async def open(cls, serialDevice, debugLevel):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="MdtTp_CM")
+        try:
+            mdtTp_CM = await asyncio.get_running_loop().run_in_executor(executor, MdtTp_CM.MdtTp_CM, serialDevice, debugLevel)
+        # Opening the serial device exits on error.
+        except SystemExit:
+            executor.shutdown(wait=False)
+            print(cls.prefixError + "Error opening a session to the Command Module on the serial device `{0:s}'!".format(serialDevice))
+            return -1, None
+        return 0, cls(mdtTp_CM, executor)
+
+
+
+    # Execute a blocking function in the I/O thread and await its result.
+    async def call(self, func, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+
+
+    # Provide every method of the Command Module object as a coroutine.
+    # Other attributes are returned unchanged.
+    def __getattr__(self, name):
+        attr = getattr(self.cm, name)
+        if not callable(attr):
+            return attr
+        async def method(*args, **kwargs):
+            return await self.call(attr, *args, **kwargs)
+        method.__name__ = name
+        return method
+
+
+
+    # Wait without blocking the event loop or the I/O thread.
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+        return 0
+
+
+
+    # Power up the CM and wait until the devices are ready for operation.
+    async def power_up(self):
+        ret = await self.call(self.cm.power_up, False)
+        await asyncio.sleep(self.cm.powerUpDelay)
+        return ret
+
+
+
+    # Reset all clock chips using the I2C I/O expander devices.
+    async def i2c_io_exp_reset_clk(self):
+        ret = await self.call(self.cm.i2c_io_exp_set_clk_reset, True)
+        await asyncio.sleep(self.cm.clkResetDelay)
+        if await self.call(self.cm.i2c_io_exp_set_clk_reset, False):
+            ret = -1
+        return ret
+
+
+
+    # Return the MCU to the ASCII command console with echo and the default
+    # baud rate, and stop the I/O thread and the owner thread of the serial
+    # port.
+    async def close(self):
+        def cleanup(mcuSer):
+            mcuSer.bin_enable(False)
+            if not mcuSer.mcuEcho:
+                mcuSer.echo_set(True)
+            mcuSer.baud_switch(mcuSer.mcuBaudDefault)
+            mcuSer.threadsafe_enable(False)
+        await self.call(cleanup, self.cm.mcuSer)
+        self.executor.shutdown(wait=True)
+        return 0
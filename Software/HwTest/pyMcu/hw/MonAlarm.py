@@ -0,0 +1,159 @@
+# File: MonAlarm.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 19 Oct 2026
+# Rev.: 19 Oct 2026
+#
+# Python class for evaluating limits, hysteresis and rate of change of
+# monitored values and triggering protective actions.
+#
+
+
+
+import time
+
+
+
+class MonAlarm:
+
+    # Message prefixes and separators.
+    prefixDetails       = " - "
+    separatorDetails    = " - "
+    prefixInfo          = "INFO: {0:s}: ".format(__file__)
+    prefixAlarm         = "ALARM: {0:s}: ".format(__file__)
+    prefixError         = "ERROR: {0:s}: ".format(__file__)
+    prefixDebug         = "DEBUG: {0:s}: ".format(__file__)
+
+    # Debug configuration.
+    debugLevel = 0                 # Debug verbosity.
+
+    # Alarm reasons.
+    reasonLow           = "low"
+    reasonHigh          = "high"
+    reasonRate          = "rate"
+
+
+
+    # Initialize the alarm engine.
+    # latencyMax: Maximum allowed latency from the sample to the completion
+    #             of the actions in seconds. Exceeding it is reported.
+    def __init__(self, latencyMax):
+        self.latencyMax = latencyMax
+        self.limits = {}
+        self.alarmCount = 0
+        self.actionCount = 0
+        self.errorCount = 0
+        self.latencies = []
+
+
+
+    # Add limits for a monitored value.
+    # key: Key of the monitored value.
+    # low, high: Lower and upper limit. None disables the limit.
+    # hysteresis: The value must return this far inside the limits to clear
+    #             the alarm.
+    # rateMax: Maximum absolute rate of change per second. None disables the
+    #          rate-of-change detection.
+    # actions: List of actions [name, function] executed once when the alarm
+    #          is raised. The function returns 0 on success.
+    def add_limit(self, key, low, high, hysteresis, rateMax, actions):
+        self.limits[key] = {
+            "low":          low,
+            "high":         high,
+            "hysteresis":   hysteresis,
+            "rateMax":      rateMax,
+            "actions":      actions,
+            "active":       False,
+            "reason":       "",
+            "count":        0,
+            "lastValue":    None,
+            "lastTime":     None,
+        }
+        return 0
+
+
+
+    # Evaluate a new sample of a monitored value. The time stamp is the time
+    # when the sample was taken, so that the latency includes the readout.
+    def evaluate(self, key, value, timestamp):
+        if key not in self.limits:
+            return 0
+        limit = self.limits[key]
+        # Rate of change.
+        rate = 0
+        if limit["lastTime"] is not None and timestamp > limit["lastTime"]:
+            rate = (value - limit["lastValue"]) / (timestamp - limit["lastTime"])
+        limit["lastValue"] = value
+        limit["lastTime"] = timestamp
+        reason = ""
+        if limit["high"] is not None and value > limit["high"]:
+            reason = self.reasonHigh
+        elif limit["low"] is not None and value < limit["low"]:
+            reason = self.reasonLow
+        elif limit["rateMax"] is not None and abs(rate) > limit["rateMax"]:
+            reason = self.reasonRate
+        if reason and not limit["active"]:
+            return self.raise_alarm(key, limit, reason, value, rate, timestamp)
+        if limit["active"] and not reason:
+            # Clear the alarm only after the value returned inside the limits
+            # by the hysteresis.
+            if limit["high"] is not None and value > limit["high"] - limit["hysteresis"]:
+                return 0
+            if limit["low"] is not None and value < limit["low"] + limit["hysteresis"]:
+                return 0
+            limit["active"] = False
+            print(self.prefixInfo + "Alarm `{0:s}' cleared: value {1:.3f}.".format(key, value))
+        return 0
+
+
+
+    # Raise an alarm and execute its actions.
+    def raise_alarm(self, key, limit, reason, value, rate, timestamp):
+        limit["active"] = True
+        limit["reason"] = reason
+        limit["count"] += 1
+        self.alarmCount += 1
+        print(self.prefixAlarm + "`{0:s}' {1:s}: value {2:.3f}, rate {3:.3f}/s, limits {4:s} .. {5:s}, max. rate {6:s}.".format(
+            key, reason, value, rate, str(limit["low"]), str(limit["high"]), str(limit["rateMax"])))
+        ret = 0
+        for name, func in limit["actions"]:
+            if self.debugLevel >= 1:
+                print(self.prefixDebug + "Executing action `{0:s}' for alarm `{1:s}'.".format(name, key))
+            self.actionCount += 1
+            if func():
+                self.errorCount += 1
+                print(self.prefixError + "Error executing action `{0:s}' for alarm `{1:s}'!".format(name, key))
+                ret = -1
+        latency = time.time() - timestamp
+        self.latencies.append(latency)
+        print(self.prefixAlarm + "`{0:s}': {1:d} action(s) executed, latency from sample to action: {2:.3f} s.".format(key, len(limit["actions"]), latency))
+        if latency > self.latencyMax:
+            self.errorCount += 1
+            print(self.prefixError + "Alarm latency {0:.3f} s exceeds the maximum of {1:.3f} s!".format(latency, self.latencyMax))
+            ret = -1
+        return ret
+
+
+
+    # Get the keys of all active alarms.
+    def get_active(self):
+        return [key for key, limit in self.limits.items() if limit["active"]]
+
+
+
+    # Print details.
+    def print_details(self):
+        print(self.prefixDetails, end='')
+        print("Alarm engine with {0:d} limit(s)".format(len(self.limits)), end='')
+        print(self.separatorDetails + "Alarms: {0:d}".format(self.alarmCount), end='')
+        print(self.separatorDetails + "Actions: {0:d}".format(self.actionCount), end='')
+        print(self.separatorDetails + "Active: {0:d}".format(len(self.get_active())), end='')
+        if self.latencies:
+            print(self.separatorDetails + "Latency mean: {0:.3f} s".format(sum(self.latencies) / len(self.latencies)), end='')
+            print(self.separatorDetails + "Latency max.: {0:.3f} s".format(max(self.latencies)), end='')
+        if self.debugLevel >= 1:
+            print(self.separatorDetails + "Error count: {0:d}".format(self.errorCount), end='')
+        print()
+        for key in self.get_active():
+            print(self.prefixDetails + "Active alarm `{0:s}': {1:s}".format(key, self.limits[key]["reason"]))
+        return 0
@@ -0,0 +1,167 @@
+# File: MonExporter.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 19 Oct 2026
+# Rev.: 19 Oct 2026
+#
+# Python class for serving the latest telemetry snapshot in the OpenMetrics
+# text format over HTTP. Scrapes are served from an in-memory cache only and
+# never access the MCU.
+#
+
+
+
+import http.server
+import threading
+import time
+
+
+
+class MonExporter:
+
+    # Message prefixes and separators.
+    prefixDetails       = " - "
+    separatorDetails    = " - "
+    prefixInfo          = "INFO: {0:s}: ".format(__file__)
+    prefixError         = "ERROR: {0:s}: ".format(__file__)
+    prefixDebug         = "DEBUG: {0:s}: ".format(__file__)
+
+    # Debug configuration.
+    debugLevel = 0                 # Debug verbosity.
+
+    # OpenMetrics parameters.
+    contentType         = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+    metricTypes         = ["gauge", "counter"]
+
+
+
+    # Initialize the exporter.
+    def __init__(self, address, port):
+        self.address = address
+        self.port = port
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.server = None
+        self.thread = None
+        self.scrapeCount = 0
+        self.updateCount = 0
+        self.errorCount = 0
+
+
+
+    # Define a metric.
+    def define(self, name, metricType, helpText, unit=""):
+        if metricType not in self.metricTypes:
+            self.errorCount += 1
+            print(self.prefixError + "Metric type `{0:s}' of metric `{1:s}' not supported!".format(metricType, name))
+            return -1
+        with self.lock:
+            self.metrics[name] = {
+                "type":     metricType,
+                "help":     helpText,
+                "unit":     unit,
+                "samples":  {},
+            }
+        return 0
+
+
+
+    # Set the value of a metric sample. Labels are given as list of
+    # [name, value] pairs. The sample is stamped with the given time, or with
+    # the current time if none is given.
+    def set(self, name, labels, value, timestamp=None):
+        if name not in self.metrics:
+            self.errorCount += 1
+            print(self.prefixError + "Metric `{0:s}' not defined!".format(name))
+            return -1
+        labelStr = ",".join("{0:s}=\"{1:s}\"".format(label, self.escape(str(labelValue))) for label, labelValue in labels)
+        with self.lock:
+            self.metrics[name]["samples"][labelStr] = [float(value), time.time() if timestamp is None else timestamp]
+            self.updateCount += 1
+        return 0
+
+
+
+    # Escape a label value.
+    @classmethod
+    def escape(cls, s):
+        return s.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+
+    # Render all metrics in the OpenMetrics text format.
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, metric in self.metrics.items():
+                lines.append("# TYPE {0:s} {1:s}".format(name, metric["type"]))
+                if metric["unit"]:
+                    lines.append("# UNIT {0:s} {1:s}".format(name, metric["unit"]))
+                lines.append("# HELP {0:s} {1:s}".format(name, metric["help"]))
+                sampleName = name + "_total" if metric["type"] == "counter" else name
+                for labelStr, (value, timestamp) in metric["samples"].items():
+                    if labelStr:
+                        lines.append("{0:s}{{{1:s}}} {2:s} {3:.3f}".format(sampleName, labelStr, repr(value), timestamp))
+                    else:
+                        lines.append("{0:s} {1:s} {2:.3f}".format(sampleName, repr(value), timestamp))
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+
+    # Start the HTTP server in a background thread.
+    def start(self):
+        exporter = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ["/", "/metrics"]:
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode("utf-8")
+                exporter.scrapeCount += 1
+                self.send_response(200)
+                self.send_header("Content-Type", exporter.contentType)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                if exporter.debugLevel >= 2:
+                    print(exporter.prefixDebug + format % args)
+
+        try:
+            self.server = http.server.ThreadingHTTPServer((self.address, self.port), Handler)
+        except Exception as e:
+            self.errorCount += 1
+            print(self.prefixError + "Error starting the HTTP server on {0:s}:{1:d}: {2:s}".format(self.address, self.port, str(e)))
+            return -1
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        print(self.prefixInfo + "Serving OpenMetrics on http://{0:s}:{1:d}/metrics".format(self.address, self.port))
+        return 0
+
+
+
+    # Stop the HTTP server.
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        return 0
+
+
+
+    # Print details.
+    def print_details(self):
+        print(self.prefixDetails, end='')
+        print("OpenMetrics exporter on {0:s}:{1:d}".format(self.address, self.port), end='')
+        print(self.separatorDetails + "Metrics: {0:d}".format(len(self.metrics)), end='')
+        print(self.separatorDetails + "Updates: {0:d}".format(self.updateCount), end='')
+        print(self.separatorDetails + "Scrapes: {0:d}".format(self.scrapeCount), end='')
+        if self.debugLevel >= 1:
+            print(self.separatorDetails + "Error count: {0:d}".format(self.errorCount), end='')
+        print()
+        return 0
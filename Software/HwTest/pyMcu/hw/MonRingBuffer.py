@@ -0,0 +1,127 @@
+# File: MonRingBuffer.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 19 Oct 2026
+# Rev.: 19 Oct 2026
+#
+# Python class implementing a fixed-capacity ring buffer for the recent
+# samples of a measurement group with rolling window statistics.
+#
+
+
+
+import numpy as np
+
+
+
+class MonRingBuffer:
+
+    # Message prefixes and separators.
+    prefixDetails       = " - "
+    separatorDetails    = " - "
+    prefixError         = "ERROR: {0:s}: ".format(__file__)
+    prefixDebug         = "DEBUG: {0:s}: ".format(__file__)
+
+    # Debug configuration.
+    debugLevel = 0                 # Debug verbosity.
+
+
+
+    # Initialize the ring buffer.
+    # The storage is preallocated twice the capacity. Each sample is written
+    # at its position and at its position plus the capacity, so that the
+    # last samples in chronological order are always available as a
+    # contiguous slice. This allows to return views instead of copies.
+    def __init__(self, channels, capacity):
+        self.channels = list(channels)
+        self.capacity = capacity
+        self.timestamps = np.full(2 * capacity, np.nan)
+        self.data = np.full((2 * capacity, len(self.channels)), np.nan)
+        self.index = 0          # Position for the next sample.
+        self.count = 0          # Number of valid samples.
+        self.errorCount = 0
+
+
+
+    # Append a sample. Missing values must be given as NaN.
+    def append(self, timestamp, values):
+        if len(values) != len(self.channels):
+            self.errorCount += 1
+            print(self.prefixError + "Error appending a sample: {0:d} values must be provided, but {1:d} were given!".format(len(self.channels), len(values)))
+            return -1
+        i = self.index
+        self.timestamps[i] = timestamp
+        self.timestamps[i + self.capacity] = timestamp
+        self.data[i] = values
+        self.data[i + self.capacity] = values
+        self.index = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        return 0
+
+
+
+    # Get views of the time stamps and the data of the last samples in
+    # chronological order. The views become invalid when new samples are
+    # appended.
+    def get_view(self, samples=None):
+        if samples is None or samples > self.count:
+            samples = self.count
+        end = self.index + self.capacity
+        return self.timestamps[end - samples:end], self.data[end - samples:end]
+
+
+
+    # Get the view of the samples within the last time window in seconds.
+    def get_view_window(self, window):
+        timestamps, data = self.get_view()
+        if len(timestamps) == 0:
+            return timestamps, data
+        first = np.searchsorted(timestamps, timestamps[-1] - window, side='left')
+        return timestamps[first:], data[first:]
+
+
+
+    # Get the index of a channel by its name.
+    def channel_index(self, channel):
+        if channel not in self.channels:
+            return -1
+        return self.channels.index(channel)
+
+
+
+    # Calculate min, max, mean and standard deviation of all channels over
+    # the given time window in seconds (None: all samples). NaN values are
+    # ignored.
+    def stats(self, window=None):
+        if window is None:
+            timestamps, data = self.get_view()
+        else:
+            timestamps, data = self.get_view_window(window)
+        nan = np.full(len(self.channels), np.nan)
+        if len(timestamps) == 0:
+            return 0, {"samples": 0, "min": nan, "max": nan, "mean": nan, "std": nan}
+        # Channels without any valid sample in the window yield NaN.
+        valid = np.any(~np.isnan(data), axis=0)
+        stats = {"samples": len(timestamps), "min": nan.copy(), "max": nan.copy(), "mean": nan.copy(), "std": nan.copy()}
+        if np.any(valid):
+            dataValid = data[:, valid]
+            stats["min"][valid] = np.nanmin(dataValid, axis=0)
+            stats["max"][valid] = np.nanmax(dataValid, axis=0)
+            stats["mean"][valid] = np.nanmean(dataValid, axis=0)
+            stats["std"][valid] = np.nanstd(dataValid, axis=0)
+        return 0, stats
+
+
+
+    # Print details.
+    def print_details(self):
+        print(self.prefixDetails, end='')
+        print("Ring buffer with {0:d} channel(s)".format(len(self.channels)), end='')
+        print(self.separatorDetails + "Capacity: {0:d}".format(self.capacity), end='')
+        print(self.separatorDetails + "Samples: {0:d}".format(self.count), end='')
+        print(self.separatorDetails + "Memory: {0:d} bytes".format(self.data.nbytes + self.timestamps.nbytes), end='')
+        if self.debugLevel >= 1:
+            print(self.separatorDetails + "Error count: {0:d}".format(self.errorCount), end='')
+        print()
+        return 0
@@ -0,0 +1,415 @@
+# File: MonScheduler.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 19 Oct 2026
+# Rev.: 19 Oct 2026
+#
+# Python class for scheduling the readout of measurement groups with
+# individual sampling periods and priorities over the MCU UART.
+#
+# Hints:
+# - Reads with I2C transactions added with add_batch() are executed together
+#   with I2C transaction lists (see McuI2CMulti): All batched reads of the
+#   groups due in a tick are packed into as few MCU commands as the command
+#   line length allows, and the I2C ports are accessed in parallel. The
+#   other reads call their function one after the other.
+#
+
+
+
+import time
+import McuSerial
+import McuI2CMulti
+
+
+
+class MonScheduler:
+
+    # Message prefixes and separators.
+    prefixDetails       = " - "
+    separatorDetails    = " - "
+    prefixWarning       = "WARNING: {0:s}: ".format(__file__)
+    prefixError         = "ERROR: {0:s}: ".format(__file__)
+    prefixDebug         = "DEBUG: {0:s}: ".format(__file__)
+
+    # Debug configuration.
+    debugLevel = 0                 # Debug verbosity.
+
+    # Hardware parameters.
+    hwI2CBitRate        = 100000    # All MCU I2C masters run at 100 kbps.
+    hwI2CBitsPerByte    = 9         # 8 data bits + ACK/NACK.
+    hwI2CBitsOverhead   = 11        # Start, address byte with ACK, stop.
+    hwUartBitsPerChar   = 10        # 8N1: start bit, 8 data bits, stop bit.
+    hwUartLoadMax       = 0.9       # Maximum usable fraction of the UART link.
+
+    # Scheduler parameters.
+    priorityUrgent      = 0         # Groups with a lower priority value are urgent.
+
+
+
+    # Initialize the scheduler.
+    def __init__(self, mcuSer, tickPeriod):
+        self.mcuSer = mcuSer
+        self.tickPeriod = tickPeriod
+        self.groups = []
+        self.results = {}
+        self.tickCount = 0
+        self.overrunCount = 0
+        self.deferCount = 0
+        self.errorCount = 0
+        self.busTime = {}
+        self.uartTime = 0
+        self.timeStart = None
+        self.readHook = None        # Function called with key, value and time stamp after each successful read.
+        self.groupHooks = []        # Functions called with group and time stamp after each group readout.
+        self.batches = {}           # I2C transactions and decode function per read key.
+        self.mcuI2CMulti = McuI2CMulti.McuI2CMulti(mcuSer)
+
+
+
+    # Add a measurement group.
+    # name: Name of the group.
+    # period: Sampling period in seconds.
+    # priority: Priority of the group. Lower values are read out first.
+    #           Urgent groups (priority < priorityUrgent) are also serviced
+    #           between the individual reads of routine groups.
+    # reads: List of reads. Each read is a list [key, mcuI2C, function] or
+    #        [key, mcuI2C, function, count], where the key identifies the
+    #        measurement, mcuI2C is the I2C port used (None if no I2C access)
+    #        and the function returns a tuple (ret, value). The optional count
+    #        is the number of values of a read returning a list of numbers. It
+    #        is 1 for a single number (default) and 0 for other values. Reads
+    #        with the same key which are due in the same tick are executed
+    #        only once.
+    # callback: Optional function called with the group and the time stamp
+    #           after each readout of the group.
+    def add_group(self, name, period, priority, reads, callback=None):
+        if period <= 0:
+            self.errorCount += 1
+            print(self.prefixError + "Error adding measurement group `{0:s}': The period must be positive!".format(name))
+            return -1
+        group = {
+            "name":         name,
+            "period":       period,
+            "priority":     priority,
+            "reads":        reads,
+            "callback":     callback,
+            "nextDue":      0,
+            "samples":      0,
+            "deferred":     0,
+            "uartTime":     0,      # UART time of the last readout in seconds.
+            "busTime":      {},     # I2C bus time of the last readout per port in seconds.
+            "values":       {},     # Last valid value per read.
+            "status":       {},     # Status of each read of the last readout.
+        }
+        self.groups.append(group)
+        self.groups.sort(key=lambda g: g["priority"])
+        if self.debugLevel >= 1:
+            print(self.prefixDebug + "Added measurement group `{0:s}' with period {1:.3f} s, priority {2:d} and {3:d} read(s).".format(name, period, priority, len(reads)))
+        return 0
+
+
+
+    # Add the I2C transactions of a read, so that it is executed with I2C
+    # transaction lists together with the other due reads instead of calling
+    # its function.
+    # key: Key of the read.
+    # transactions: List of transactions [slaveAddr, dataWr, cntRd] on the I2C
+    #               port of the read, which are executed in this order.
+    # decode: Function called with the list of the data read by the
+    #         transactions. It returns a tuple (ret, value) like the function
+    #         of the read.
+    def add_batch(self, key, transactions, decode):
+        self.batches[key] = [transactions, decode]
+        return 0
+
+
+
+    # Get a measurement group by its name.
+    def get_group(self, name):
+        for group in self.groups:
+            if group["name"] == name:
+                return 0, group
+        return -1, None
+
+
+
+    # Estimate the I2C bus time from the transaction and byte counts.
+    @classmethod
+    def i2c_bus_time(cls, transactions, bytesCnt):
+        return (transactions * cls.hwI2CBitsOverhead + bytesCnt * cls.hwI2CBitsPerByte) / cls.hwI2CBitRate
+
+
+
+    # Estimate the UART time from the number of characters sent and received.
+    def uart_time(self, chars):
+        return chars * self.hwUartBitsPerChar / self.mcuSer.ser.baudrate
+
+
+
+    # Execute a single read and account for the UART and I2C bus time. Reads
+    # without I2C port (None), e.g. GPIO reads, only account for UART time.
+    # If the serial port is shared with other threads, the read is executed as
+    # one transaction, so that the accounting only covers its own accesses.
+    def exec_read(self, read):
+        if self.mcuSer.owner_required():
+            return self.mcuSer.call(self.exec_read, read)
+        key, mcuI2C, func = read[0:3]
+        serChars = self.mcuSer.bytesWritten + self.mcuSer.bytesRead
+        if mcuI2C:
+            i2cTransactions = mcuI2C.accessRead + mcuI2C.accessWrite
+            i2cBytes = mcuI2C.bytesRead + mcuI2C.bytesWritten
+        ret, value = func()
+        uartTime = self.uart_time(self.mcuSer.bytesWritten + self.mcuSer.bytesRead - serChars)
+        busTime = 0
+        if mcuI2C:
+            busTime = self.i2c_bus_time(mcuI2C.accessRead + mcuI2C.accessWrite - i2cTransactions,
+                                        mcuI2C.bytesRead + mcuI2C.bytesWritten - i2cBytes)
+            self.busTime[mcuI2C.port] = self.busTime.get(mcuI2C.port, 0) + busTime
+        if ret:
+            self.errorCount += 1
+            print(self.prefixError + "Error reading `{0:s}'!".format(str(key)))
+        self.uartTime += uartTime
+        return ret, value, uartTime, busTime
+
+
+
+    # Execute the batched reads of the measurement groups, which are not yet
+    # in tickResults or batchResults, with I2C transaction lists. The results
+    # [ret, value, uartTime, busTime, timeRead] are stored in batchResults.
+    # The UART time is shared by the reads according to their number of
+    # transactions.
+    def exec_batch(self, groups, tickResults, batchResults):
+        if self.mcuSer.owner_required():
+            return self.mcuSer.call(self.exec_batch, groups, tickResults, batchResults)
+        tags = {}
+        for group in groups:
+            for read in group["reads"]:
+                key, mcuI2C = read[0:2]
+                if key in tickResults or key in batchResults or key in tags or key not in self.batches or not mcuI2C:
+                    continue
+                tags[key] = [mcuI2C, []]
+                for slaveAddr, dataWr, cntRd in self.batches[key][0]:
+                    ret, tag = self.mcuI2CMulti.add(mcuI2C, slaveAddr, dataWr, cntRd)
+                    if ret:
+                        self.errorCount += 1
+                        self.mcuI2CMulti.clear()
+                        print(self.prefixError + "Error adding the I2C transactions of `{0:s}'!".format(str(key)))
+                        return -1
+                    tags[key][1].append(tag)
+        if not tags:
+            return 0
+        serChars = self.mcuSer.bytesWritten + self.mcuSer.bytesRead
+        timeRead = time.time()
+        _, results = self.mcuI2CMulti.execute()
+        uartTime = self.uart_time(self.mcuSer.bytesWritten + self.mcuSer.bytesRead - serChars)
+        self.uartTime += uartTime
+        transCount = sum(len(tagsRead) for _, tagsRead in tags.values())
+        for key, (mcuI2C, tagsRead) in tags.items():
+            transactions, decode = self.batches[key]
+            resultsRead = [results[tag] for tag in tagsRead]
+            if any(retRead for retRead, _ in resultsRead):
+                ret, value = -1, None
+            else:
+                ret, value = decode([data for _, data in resultsRead])
+            busTime = self.i2c_bus_time(sum(bool(dataWr) + bool(cntRd) for _, dataWr, cntRd in transactions),
+                                        sum(len(dataWr) + cntRd for _, dataWr, cntRd in transactions))
+            self.busTime[mcuI2C.port] = self.busTime.get(mcuI2C.port, 0) + busTime
+            if ret:
+                self.errorCount += 1
+                print(self.prefixError + "Error reading `{0:s}'!".format(str(key)))
+            batchResults[key] = [ret, value, uartTime * len(tagsRead) / transCount, busTime, timeRead]
+        return 0
+
+
+
+    # Get the MCU request priority of a measurement group.
+    def group_priority(self, group):
+        return self.mcuSer.mcuPriorityAlarm if group["priority"] < self.priorityUrgent else self.mcuSer.mcuPriorityPoll
+
+
+
+    # Get the measurement groups due at the given time, ordered by priority.
+    def get_due(self, now):
+        return [group for group in self.groups if group["nextDue"] <= now]
+
+
+
+    # Read out a measurement group. Reads already executed in this tick are
+    # taken from tickResults, batched reads executed in advance from
+    # batchResults. The remaining batched reads of the group are executed
+    # first. Between the reads of routine groups, urgent groups which became
+    # due are serviced immediately. If the serial port is shared with other
+    # threads, the reads of urgent groups and the actions triggered by them
+    # preempt other requests, while routine reads yield.
+    def read_group(self, group, now, tickResults, batchResults=None):
+        if batchResults is None:
+            batchResults = {}
+        priorityOld = self.mcuSer.priority_set(self.group_priority(group))
+        try:
+            group["uartTime"] = 0
+            group["busTime"] = {}
+            self.exec_batch([group], tickResults, batchResults)
+            for read in group["reads"]:
+                if group["priority"] >= self.priorityUrgent:
+                    self.service_urgent()
+                key = read[0]
+                if key not in tickResults:
+                    if key in batchResults:
+                        ret, value, uartTime, busTime, timeRead = batchResults.pop(key)
+                    else:
+                        timeRead = time.time()
+                        ret, value, uartTime, busTime = self.exec_read(read)
+                    tickResults[key] = [ret, value]
+                    self.results[key] = [ret, value, timeRead]
+                    group["uartTime"] += uartTime
+                    if read[1]:
+                        port = read[1].port
+                        group["busTime"][port] = group["busTime"].get(port, 0) + busTime
+                    if not ret and self.readHook:
+                        self.readHook(key, value, timeRead)
+                ret, value = tickResults[key]
+                group["status"][key] = ret
+                if not ret:
+                    group["values"][key] = value
+            group["samples"] += 1
+            # Schedule the next readout. Skip missed slots instead of bursting
+            # to catch up.
+            group["nextDue"] += group["period"]
+            if group["nextDue"] <= now:
+                group["nextDue"] = now + group["period"]
+            if group["callback"]:
+                group["callback"](group, now)
+            for groupHook in self.groupHooks:
+                groupHook(group, now)
+        # Restore the priority also if a read, callback or hook fails.
+        finally:
+            self.mcuSer.priority_set(priorityOld)
+        return 0
+
+
+
+    # Read out all urgent groups which are due now.
+    def service_urgent(self):
+        for group in self.groups:
+            if group["priority"] >= self.priorityUrgent:
+                break
+            now = time.time()
+            if group["nextDue"] <= now:
+                self.read_group(group, now, {})
+        return 0
+
+
+
+    # Execute one scheduler tick: read out all due groups by priority. Reads
+    # shared between due groups are executed once. The batched reads of all
+    # due groups are executed first with I2C transaction lists. When the tick
+    # period is exhausted, lower-priority groups are deferred to the next
+    # tick.
+    def tick(self, now=None):
+        if now is None:
+            now = time.time()
+        self.tickCount += 1
+        tickStart = time.time()
+        tickResults = {}
+        batchResults = {}
+        groupsDue = self.get_due(now)
+        if groupsDue:
+            priorityOld = self.mcuSer.priority_set(self.group_priority(groupsDue[0]))
+            try:
+                self.exec_batch(groupsDue, tickResults, batchResults)
+            finally:
+                self.mcuSer.priority_set(priorityOld)
+        for group in groupsDue:
+            # Urgent groups may already have been serviced during this tick.
+            if group["nextDue"] > now:
+                continue
+            # Defer lower-priority groups when the tick period is exhausted.
+            # The highest-priority due group is always read out.
+            if tickResults and time.time() - tickStart > self.tickPeriod:
+                group["deferred"] += 1
+                self.deferCount += 1
+                if self.debugLevel >= 1:
+                    print(self.prefixDebug + "Deferring measurement group `{0:s}' to the next tick.".format(group["name"]))
+                continue
+            self.read_group(group, now, tickResults, batchResults)
+        tickTime = time.time() - tickStart
+        if tickTime > self.tickPeriod:
+            self.overrunCount += 1
+            print(self.prefixWarning + "Scheduler tick {0:d} overrun: {1:.3f} s used, {2:.3f} s available.".format(self.tickCount, tickTime, self.tickPeriod))
+        return 0
+
+
+
+    # Check whether the requested sampling rates fit into the capacity of the
+    # UART link and of the I2C buses. Uses the costs measured during the last
+    # readout of each group.
+    def check_rates(self):
+        ret = 0
+        uartLoad = 0
+        busLoad = {}
+        for group in self.groups:
+            uartLoad += group["uartTime"] / group["period"]
+            for port, busTime in group["busTime"].items():
+                busLoad[port] = busLoad.get(port, 0) + busTime / group["period"]
+        if uartLoad > self.hwUartLoadMax:
+            ret = -1
+            print(self.prefixWarning + "Requested sampling rates exceed the UART link capacity: {0:.1f}% load at {1:d} baud (max. {2:.1f}%).".format(uartLoad * 100, self.mcuSer.ser.baudrate, self.hwUartLoadMax * 100))
+        for port in sorted(busLoad):
+            if busLoad[port] > 1:
+                ret = -1
+                print(self.prefixWarning + "Requested sampling rates exceed the capacity of I2C port {0:d}: {1:.1f}% load.".format(port, busLoad[port] * 100))
+        if self.debugLevel >= 1:
+            print(self.prefixDebug + "UART load: {0:.1f}%".format(uartLoad * 100), end='')
+            for port in sorted(busLoad):
+                print(self.separatorDetails + "I2C port {0:d} load: {1:.1f}%".format(port, busLoad[port] * 100), end='')
+            print()
+        return ret, uartLoad, busLoad
+
+
+
+    # Run the scheduler for the given duration in seconds. A duration of 0
+    # runs forever.
+    def run(self, duration):
+        self.timeStart = time.time()
+        ratesChecked = False
+        while True:
+            now = time.time()
+            if 0 < duration <= now - self.timeStart:
+                break
+            self.tick(now)
+            # Check the rates once all groups have been read out at least once.
+            if not ratesChecked and all(group["samples"] for group in self.groups):
+                self.check_rates()
+                ratesChecked = True
+            nextDue = min([group["nextDue"] for group in self.groups] + [now + self.tickPeriod])
+            delay = nextDue - time.time()
+            if delay > 0:
+                time.sleep(delay)
+        return 0
+
+
+
+    # Print details.
+    def print_details(self):
+        print(self.prefixDetails, end='')
+        print("Monitoring scheduler with {0:d} group(s)".format(len(self.groups)), end='')
+        print(self.separatorDetails + "Tick period: {0:.3f} s".format(self.tickPeriod), end='')
+        print(self.separatorDetails + "Ticks: {0:d}".format(self.tickCount), end='')
+        print(self.separatorDetails + "Overruns: {0:d}".format(self.overrunCount), end='')
+        print(self.separatorDetails + "Deferred: {0:d}".format(self.deferCount), end='')
+        if self.debugLevel >= 1:
+            print(self.separatorDetails + "Error count: {0:d}".format(self.errorCount), end='')
+            print(self.separatorDetails + "UART time: {0:.3f} s".format(self.uartTime), end='')
+            print(self.separatorDetails + "Transaction list commands: {0:d}".format(self.mcuI2CMulti.cmdCount), end='')
+            for port in sorted(self.busTime):
+                print(self.separatorDetails + "I2C port {0:d} time: {1:.3f} s".format(port, self.busTime[port]), end='')
+        print()
+        for group in self.groups:
+            print(self.prefixDetails + "Group `{0:s}'".format(group["name"]), end='')
+            print(self.separatorDetails + "Period: {0:.3f} s".format(group["period"]), end='')
+            print(self.separatorDetails + "Priority: {0:d}".format(group["priority"]), end='')
+            print(self.separatorDetails + "Samples: {0:d}".format(group["samples"]), end='')
+            print(self.separatorDetails + "Deferred: {0:d}".format(group["deferred"]), end='')
+            print()
+        return 0
@@ -0,0 +1,123 @@
+# File: PmbusCodec.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 19 Oct 2026
+# Rev.: 19 Oct 2026
+#
+# Python class for decoding PMBus data formats. The scalar decoders are used
+# for single readings. The batch decoders operate on arrays of raw words, e.g.
+# bulk sweeps of a power module or recorded traces.
+#
+# Hints:
+# - See the "PMBus Power System Management Protocol Specification Part II",
+#   section 7 "Data Formats" for details.
+# - The batch decoders use NumPy if it is available and fall back to plain
+#   Python otherwise. They always return lists of floats.
+#
+
+
+
+import importlib
+
+
+
+class PmbusCodec:
+
+    # Data format parameters.
+    l11ExponentBits     = 5
+    l11MantissaBits     = 11
+
+    # NumPy module, imported on first use of a batch decoder. None if NumPy is
+    # not available.
+    numpy = None
+    numpyChecked = False
+
+
+
+    # Calculate a float value from an L11 (Linear_5s_11s) value.
+    @classmethod
+    def l11_to_float(cls, b):
+        # PMBus data field b[15:0]
+        # Value = Y * 2**N
+        # where N = b[15:11] is a 5-bit two’s complement integer
+        #   and Y = b[10:0] is an 11-bit two’s complement integer.
+        n = (b >> 11) & 0x1f
+        if n & 0x10:
+            n -= 0x20
+        y = b & 0x7ff
+        if y & 0x400:
+            y -= 0x800
+        return float(y * 2.0**n)
+
+
+
+    # Calculate a float value from an L16 (Linear_16u) value.
+    @classmethod
+    def l16_to_float(cls, b, exponent):
+        # PMBus data field b[15:0]
+        # Value = Y * 2**N
+        # where Y = b[15:0] is an unsigned integer
+        #   and N = exponent is the 5-bit two’s complement VOUT_MODE exponent.
+        return float((b & 0xffff) * 2.0**exponent)
+
+
+
+    # Calculate a float value from a direct format value.
+    @classmethod
+    def direct_to_float(cls, b, m, offset, r):
+        # X = (Y * 10**-R - b) / m
+        # where Y = b[15:0] is a 16-bit two’s complement integer.
+        y = b & 0xffff
+        if y & 0x8000:
+            y -= 0x10000
+        return float((y * 10.0**-r - offset) / m)
+
+
+
+    # Get the NumPy module. Returns None if NumPy is not available.
+    @classmethod
+    def numpy_get(cls):
+        if not cls.numpyChecked:
+            cls.numpyChecked = True
+            try:
+                cls.numpy = importlib.import_module("numpy")
+            except ImportError:
+                cls.numpy = None
+        return cls.numpy
+
+
+
+    # Decode a list of L11 (Linear_5s_11s) words.
+    @classmethod
+    def l11_decode(cls, words):
+        np = cls.numpy_get()
+        if not np:
+            return [cls.l11_to_float(word) for word in words]
+        words = np.asarray(words, dtype=np.uint16)
+        # Sign extend the exponent and the mantissa by shifting them into the
+        # most significant bits of a signed 16-bit integer and back.
+        n = (words.view(np.int16) >> cls.l11MantissaBits).astype(np.int32)
+        y = ((words << cls.l11ExponentBits).view(np.int16) >> cls.l11ExponentBits).astype(np.float64)
+        return np.ldexp(y, n).tolist()
+
+
+
+    # Decode a list of L16 (Linear_16u) words with the VOUT_MODE exponent.
+    @classmethod
+    def l16_decode(cls, words, exponent):
+        np = cls.numpy_get()
+        if not np:
+            return [cls.l16_to_float(word, exponent) for word in words]
+        return np.ldexp(np.asarray(words, dtype=np.uint16).astype(np.float64), exponent).tolist()
+
+
+
+    # Decode a list of direct format words with the coefficients m, b (offset)
+    # and R.
+    @classmethod
+    def direct_decode(cls, words, m, offset, r):
+        np = cls.numpy_get()
+        if not np:
+            return [cls.direct_to_float(word, m, offset, r) for word in words]
+        y = np.asarray(words, dtype=np.uint16).view(np.int16).astype(np.float64)
+        return ((y * 10.0**-r - offset) / m).tolist()
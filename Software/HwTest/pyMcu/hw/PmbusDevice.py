@@ -0,0 +1,105 @@
+# File: PmbusDevice.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 19 Oct 2026
+# Rev.: 19 Oct 2026
+#
+# Python class with the PMBus accesses shared by the drivers of PMBus
+# devices.
+#
+# Hints:
+# - The drivers derive from this class. They set the I2C device, the error
+#   counter and the message prefixes of the device in their constructor and
+#   override cmd_to_name with the command names of the device.
+#
+
+
+
+class PmbusDevice:
+
+    # Message prefixes of the device.
+    prefixDebugDevice   = ""
+    prefixErrorDevice   = ""
+
+    # Debug configuration.
+    debugLevel          = 0     # Debug verbosity.
+
+    # Hardware parameters.
+    hwCmdCodeMfrId      = 0x99
+    hwCmdCodeMfrModel   = 0x9a
+
+    # I2C device and error counter of the device.
+    i2cDevice           = None
+    errorCount          = 0
+
+
+
+    # Return the name of a command code.
+    @classmethod
+    def cmd_to_name(cls, cmdCode):
+        return "0x{0:02x}".format(cmdCode)
+
+
+
+    # Send a command without data (PMBus send byte).
+    def send_byte(self, cmdCode):
+        self.i2cDevice.debugLevel = self.debugLevel
+        cmdCode &= 0xff
+        cmdName = self.cmd_to_name(cmdCode)
+        # Debug info.
+        if self.debugLevel >= 2:
+            print(self.prefixDebugDevice + "Sending command 0x{0:02x} ({1:s}).".format(cmdCode, cmdName), end='')
+            self.i2cDevice.print_details()
+        ret = self.i2cDevice.write([cmdCode])
+        # Evaluate response.
+        if ret:
+            print(self.prefixErrorDevice + "Error sending command 0x{0:02x} ({1:s})!".format(cmdCode, cmdName), end='')
+            self.i2cDevice.print_details()
+            print(self.prefixErrorDevice + "Error code: {0:d}: ".format(ret))
+            return -1
+        return 0
+
+
+
+    # Read command data with an SMBus block read in one round trip.
+    def read_block(self, cmdCode):
+        self.i2cDevice.debugLevel = self.debugLevel
+        cmdCode &= 0xff
+        cmdName = self.cmd_to_name(cmdCode)
+        # Debug info.
+        if self.debugLevel >= 2:
+            print(self.prefixDebugDevice + "Reading the command 0x{0:02x} ({1:s}) block data.".format(cmdCode, cmdName), end='')
+            self.i2cDevice.print_details()
+        ret, dataRd = self.i2cDevice.block_read(cmdCode)
+        # Evaluate response.
+        if ret:
+            self.errorCount += 1
+            print(self.prefixErrorDevice + "Error reading the command 0x{0:02x} ({1:s}) block data!".format(cmdCode, cmdName), end='')
+            self.i2cDevice.print_details()
+            print(self.prefixErrorDevice + "Error code: {0:d}: ".format(ret))
+            return -1, []
+        # Debug info.
+        if self.debugLevel >= 2:
+            print(self.prefixDebugDevice + "Read the command 0x{0:02x} ({1:s}) block data: ".format(cmdCode, cmdName), end='')
+            for datum in dataRd:
+                print("0x{0:02x} ".format(datum), end='')
+            self.i2cDevice.print_details()
+        return 0, dataRd
+
+
+
+    # Read the manufacturer ID.
+    def read_mfr_id(self):
+        ret, data = self.read_block(self.hwCmdCodeMfrId)
+        if ret:
+            return -1, ""
+        return 0, bytes(data).decode("ascii", "replace")
+
+
+
+    # Read the manufacturer model.
+    def read_mfr_model(self):
+        ret, data = self.read_block(self.hwCmdCodeMfrModel)
+        if ret:
+            return -1, ""
+        return 0, bytes(data).decode("ascii", "replace")
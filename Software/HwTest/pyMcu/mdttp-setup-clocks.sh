@@ -3,7 +3,7 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 23 Mar 2021
-# Rev.: 27 Feb 2023
+# Rev.: 19 Oct 2026
 #
 # Simple script to set up the ATLAS MDT Trigger Processor (TP) Command Module
 # for Xilinx IBERT tests, using the recovered clock from the FELIX IBERT module
@@ -62,23 +62,17 @@ done
 
 # sleep 5
 echo "Program the clock synthesizer chip IC11 for clock recovery"
-${PY_MCU_CM} -d ${SERIAL_DEVICE} -v ${VERBOSITY} -c clk_setup -p IC11 "240.474"
-
-${PY_MCU_CM} -d ${SERIAL_DEVICE} -v ${VERBOSITY} -c clk_setup -p IC10 clocks_proto/ibert-240.474/IC10_240.474IN0_40.079OUT0,1,2,3_FB-Registers_OOF500.txt
-
-${PY_MCU_CM} -d ${SERIAL_DEVICE} -v ${VERBOSITY} -c clk_setup -p IC1 clocks_proto/ibert-240.474/IC1_40.079IN1_40.079_OUT0,1,2,3,4,5,6,7,8,FB-Registers_OOF500.txt
-
-${PY_MCU_CM} -d ${SERIAL_DEVICE} -v ${VERBOSITY} -c clk_setup -p IC2 clocks_proto/ibert-240.474/IC2,3,6,7_40.079IN0_240.474_FB-Registers_OOF500.txt
-
-${PY_MCU_CM} -d ${SERIAL_DEVICE} -v ${VERBOSITY} -c clk_setup -p IC6 clocks_proto/ibert-240.474/IC2,3,6,7_40.079IN0_240.474_FB-Registers_OOF500.txt
-
-${PY_MCU_CM} -d ${SERIAL_DEVICE} -v ${VERBOSITY} -c clk_setup -p IC7 clocks_proto/ibert-240.474/IC2,3,6,7_40.079IN0_240.474_FB-Registers_OOF500.txt
-
-${PY_MCU_CM} -d ${SERIAL_DEVICE} -v ${VERBOSITY} -c clk_setup -p IC4 clocks_proto/ibert-240.474/IC2,3,6,7_40.079IN0_240.474_FB-Registers_OOF500.txt
-
-${PY_MCU_CM} -d ${SERIAL_DEVICE} -v ${VERBOSITY} -c clk_setup -p IC8 clocks_proto/ibert-240.474/IC2,3,6,7_40.079IN0_240.474_FB-Registers_OOF500.txt
-
-${PY_MCU_CM} -d ${SERIAL_DEVICE} -v ${VERBOSITY} -c clk_setup -p IC12 clocks_proto/IBERT-TEST/IC12_INT_200_200_NA-Registers.txt
+# Program all clock synthesizer chips in one session.
+${PY_MCU_CM} -d ${SERIAL_DEVICE} -v ${VERBOSITY} -k -s \
+    "clk_setup IC11 240.474" \
+    "clk_setup IC10 clocks_proto/ibert-240.474/IC10_240.474IN0_40.079OUT0,1,2,3_FB-Registers_OOF500.txt" \
+    "clk_setup IC1 clocks_proto/ibert-240.474/IC1_40.079IN1_40.079_OUT0,1,2,3,4,5,6,7,8,FB-Registers_OOF500.txt" \
+    "clk_setup IC2 clocks_proto/ibert-240.474/IC2,3,6,7_40.079IN0_240.474_FB-Registers_OOF500.txt" \
+    "clk_setup IC6 clocks_proto/ibert-240.474/IC2,3,6,7_40.079IN0_240.474_FB-Registers_OOF500.txt" \
+    "clk_setup IC7 clocks_proto/ibert-240.474/IC2,3,6,7_40.079IN0_240.474_FB-Registers_OOF500.txt" \
+    "clk_setup IC4 clocks_proto/ibert-240.474/IC2,3,6,7_40.079IN0_240.474_FB-Registers_OOF500.txt" \
+    "clk_setup IC8 clocks_proto/ibert-240.474/IC2,3,6,7_40.079IN0_240.474_FB-Registers_OOF500.txt" \
+    "clk_setup IC12 clocks_proto/IBERT-TEST/IC12_INT_200_200_NA-Registers.txt"
 
 
 # echo "Program the clock synthesizer chip IC2 (Si5345A) for FELIX communication."
@@ -1,15 +1,11 @@
 #!/usr/bin/env python3
 
 import argparse
-from asyncio import sleep
 import csv
 import re
 import subprocess
 from datetime import datetime
 from pathlib import Path
-
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 import time
 
 #SERIAL_DEVICE = "/dev/ttyUL1"
@@ -164,6 +160,9 @@ try:
 except KeyboardInterrupt:
     print("\nStopped.")
     if len(all_rows) >= 2:
+        # Import matplotlib only for plotting, as it takes long to load.
+        import matplotlib.pyplot as plt
+        import matplotlib.dates as mdates
         times = [datetime.strptime(r["timestamp"], "%d.%m.%Y %H:%M:%S") for r in all_rows]
         temp_cols = [h for h in headers if h.endswith("[degC]") and not re.match(r'^FF\d+', h)]
         ff_temp_cols = [h for h in headers if re.match(r'^FF\d+', h) and h.endswith("[degC]")]
@@ -4,7 +4,7 @@
 # Auth: M. Fras, Electronics Division, MPI for Physics, Munich
 # Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
 # Date: 26 Jul 2022
-# Rev.: 12 Jun 2026
+# Rev.: 19 Oct 2026
 #
 # Python script to access the ATLAS MDT Trigger Processor (TP) Command Module
 # (CM) Prototype via the TI Tiva TM4C1290 MCU.
@@ -20,6 +20,12 @@ sys.path.append(os.path.relpath(os.path.join(os.path.dirname(os.path.realpath(__
 
 
 # System modules.
+import cmd
+import contextlib
+import glob
+import io
+import json
+import shlex
 import time
 
 
@@ -35,50 +41,25 @@ prefixError             = "ERROR: {0:s}: ".format(__file__)
 
 
 
-# ===================================================================
-# Access the Command Module.
-# ===================================================================
+# Supported commands.
+commands = ['power_up', 'power_down', 'power_detail', 'power_check',
+            'sn', 'sn_sm', 'status', 'mon_temp', 'mon_temp_ml', 'mon_sched', 'mon_alarm', 'mon_export', 'mon_history', 'mon_peak',
+            'init',
+            'mcu_cmd_raw', 'mcu_led_user',
+            'i2c_reset', 'i2c_detect', "i2c_mux_reset",
+            'i2c_io_exp_init', 'i2c_io_exp_status', 'i2c_io_exp_get_input', 'i2c_io_exp_get_output', 'i2c_io_exp_set_output',
+            'pm_status', 'pm_status_raw', 'pm_peaks', 'pm_fault_log', 'pm_info',
+            'clk_setup', 'clk_reset', 'clk_status', 'ff_status','clk_status_regs']
 
-if __name__ == "__main__":
-    # Command line arguments.
-    import argparse
-    parser = argparse.ArgumentParser(description='Run an automated set of MCU tests.')
-    parser.add_argument('-c', '--command', action='store', type=str,
-                        choices=['power_up', 'power_down', 'power_detail', 'power_check',
-                                 'sn', 'sn_sm', 'status', 'mon_temp',
-                                 'init',
-                                 'mcu_cmd_raw', 'mcu_led_user',
-                                 'i2c_reset', 'i2c_detect', "i2c_mux_reset",
-                                 'i2c_io_exp_init', 'i2c_io_exp_status', 'i2c_io_exp_get_input', 'i2c_io_exp_get_output', 'i2c_io_exp_set_output',
-                                 'pm_status', 'pm_status_raw',
-                                 'clk_setup', 'clk_reset', 'clk_status', 'ff_status','clk_status_regs'],
-                        dest='command', default='status',
-                        help='Command to execute on the CM.')
-    parser.add_argument('-d', '--device', action='store', type=str,
-                        dest='serialDevice', default='/dev/ttyUL1', metavar='SERIAL_DEVICE',
-                        help='Serial device to access the MCU. Hint: An empty device string ("") enables simulated access.')
-    parser.add_argument('-p', '--parameters', action='store', type=str, nargs='*',
-                        dest='commandParameters', default=None, metavar='PARAMETER',
-                        help='Parameter(s) for the selected command.')
-    parser.add_argument('-v', '--verbosity', action='store', type=int,
-                        dest='verbosity', default="1", choices=range(0, 5),
-                        help='Set the verbosity level. The default is 1.')
-    args = parser.parse_args()
 
-    command = args.command
-    commandParameters = args.commandParameters
-    serialDevice = args.serialDevice
-    verbosity = args.verbosity
 
-    # Define the Command Module object.
-    mdtTp_CM = MdtTp_CM.MdtTp_CM(serialDevice, verbosity)
+# ===================================================================
+# Execute a command on the Command Module.
+# ===================================================================
 
+def run_command(mdtTp_CM, command, commandParameters):
     ret = 0
-    # Execute requested command.
-    if not command:
-        print("Please specify a command using the `-c' option.")
-        ret = -1
-    elif command == "power_up":
+    if command == "power_up":
         ret = mdtTp_CM.power_up()
     elif command == "power_down":
         ret = mdtTp_CM.power_down()
@@ -88,7 +69,7 @@ if __name__ == "__main__":
         ret = mdtTp_CM.power_check()
         if ret != 0:
             print ('FAIL! Power no completely on!')
-            sys.exit(1)
+            ret = 1
     elif command == "sn":
         ret = mdtTp_CM.serial_number()
     elif command == "sn_sm":
@@ -111,10 +92,66 @@ if __name__ == "__main__":
         ret = mdtTp_CM.mon_temp()
     elif command == "mon_temp":
         ret = mdtTp_CM.mon_temp()
+    elif command == "mon_temp_ml":
+        ret = mdtTp_CM.mon_temp_multi()
+    elif command == "mon_sched":
+        if commandParameters:
+            duration = float(commandParameters[0])
+        else:
+            duration = 0
+        ret = mdtTp_CM.mon_sched_run(duration)
+    elif command == "mon_alarm":
+        if commandParameters:
+            duration = float(commandParameters[0])
+        else:
+            duration = 0
+        ret = mdtTp_CM.mon_alarm_define()
+        if not ret:
+            ret = mdtTp_CM.mon_sched_run(duration)
+    elif command == "mon_export":
+        # Parameters: [port [duration [address]]]
+        port = 9100
+        duration = 0
+        address = "127.0.0.1"
+        if commandParameters:
+            port = int(commandParameters[0], 0)
+        if commandParameters and len(commandParameters) >= 2:
+            duration = float(commandParameters[1])
+        if commandParameters and len(commandParameters) >= 3:
+            address = commandParameters[2]
+        ret = mdtTp_CM.mon_export_run(address, port, duration)
+    elif command == "mon_peak":
+        if commandParameters:
+            duration = float(commandParameters[0])
+        else:
+            duration = 0
+        ret = mdtTp_CM.mon_peak_define()
+        if not ret:
+            ret = mdtTp_CM.mon_sched_run(duration)
+    elif command == "mon_history":
+        # Parameters: [duration [statistics window]]
+        duration = 0
+        window = None
+        if commandParameters:
+            duration = float(commandParameters[0])
+        if commandParameters and len(commandParameters) >= 2:
+            window = float(commandParameters[1])
+        ret = mdtTp_CM.mon_history_define(mdtTp_CM.monHistoryDuration)
+        if not ret:
+            ret = mdtTp_CM.mon_sched_run(duration)
+            mdtTp_CM.mon_history_print(window)
     elif command == "mcu_cmd_raw":
         if commandParameters:
             ret, response = mdtTp_CM.mcu_cmd_raw(" ".join(commandParameters))
             print(response)
+            mdtTp_CM.result_add("Response", response)
+            # Data returned by the MCU, e.g. by an I2C read access.
+            dataPos = response.find("Data:")
+            if dataPos >= 0:
+                try:
+                    mdtTp_CM.result_add("Data", [int(datum, 0) for datum in response[dataPos+len("Data:"):].split()])
+                except ValueError:
+                    pass
         else:
             print(prefixError, "Please specify the raw MCU command.")
     elif command == "mcu_led_user":
@@ -129,6 +166,7 @@ if __name__ == "__main__":
                 print(prefixError, "Error reading the MCU user LED value!")
             else:
                 print("MCU user LED value: 0x{0:03x}".format(value))
+                mdtTp_CM.result_add("MCU user LED value", value)
     elif command == "i2c_reset":
         ret = mdtTp_CM.i2c_reset()
     elif command == "i2c_detect":
@@ -172,6 +210,12 @@ if __name__ == "__main__":
         ret = mdtTp_CM.power_module_status()
     elif command == "pm_status_raw":
         ret = mdtTp_CM.power_module_status_raw()
+    elif command == "pm_peaks":
+        ret = mdtTp_CM.pm_peak_status()
+    elif command == "pm_fault_log":
+        ret = mdtTp_CM.pm_fault_log_dump()
+    elif command == "pm_info":
+        ret = mdtTp_CM.pm_info()
     elif command == "clk_setup":
         if commandParameters:
             if len(commandParameters) != 2:
@@ -195,7 +239,366 @@ if __name__ == "__main__":
         print(prefixError + "Command `{0:s}' not supported!".format(command))
         ret = -1
 
-    if ret == 0:
+    # Some functions have no return value.
+    if ret is None:
+        ret = 0
+    return ret
+
+
+
+# Execute a command and report an exception, e.g. due to an invalid
+# parameter, as a failed command instead of aborting the session.
+def run_command_checked(mdtTp_CM, command, commandParameters):
+    try:
+        return run_command(mdtTp_CM, command, commandParameters)
+    except Exception as e:
+        print(prefixError + "Command `{0:s}' failed with an exception: {1:s}: {2:s}".format(command, type(e).__name__, str(e)))
+        return -1
+
+
+
+# ===================================================================
+# Machine-readable output.
+# ===================================================================
+
+# Execute a command and get a JSON document with the status, the run time,
+# the values and the messages of the command. The messages printed by the
+# command are captured, so that they do not interfere with the JSON output.
+def run_command_json(mdtTp_CM, command, commandParameters):
+    output = io.StringIO()
+    mdtTp_CM.result_pop()
+    mdtTp_CM.resultsEnable = True
+    timeStart = time.time()
+    try:
+        with contextlib.redirect_stdout(output):
+            ret = run_command_checked(mdtTp_CM, command, commandParameters)
+    finally:
+        mdtTp_CM.resultsEnable = False
+    doc = {"command": command,
+           "parameters": commandParameters or [],
+           "status": ret,
+           "ok": ret == 0,
+           "timestamp": timeStart,
+           "duration": time.time() - timeStart,
+           "values": mdtTp_CM.result_pop(),
+           "messages": [line for line in output.getvalue().splitlines() if line.strip()]}
+    return ret, doc
+
+
+
+# Print a JSON document on one line (NDJSON).
+def print_json(doc):
+    print(json.dumps(doc), flush=True)
+
+
+
+# ===================================================================
+# Parse a batch step or a batch file.
+# ===================================================================
+
+# A batch step is a command followed by its parameters, separated by white
+# space. Quotes can be used for parameters containing white space.
+def parse_step(stepStr):
+    try:
+        tokens = shlex.split(stepStr, comments=True)
+    except ValueError as e:
+        print(prefixError + "Error parsing the batch step `{0:s}': {1:s}".format(stepStr, str(e)))
+        return -1, None
+    if not tokens:
+        return 0, None
+    if tokens[0] not in commands:
+        print(prefixError + "Command `{0:s}' in `{1:s}' not supported!".format(tokens[0], stepStr.strip()))
+        return -1, None
+    return 0, [tokens[0], tokens[1:]]
+
+
+
+# A batch file contains one batch step per line. Empty lines and comments
+# starting with `#' are ignored.
+def load_batch_file(fileName):
+    steps = []
+    try:
+        with open(fileName, "r") as f:
+            lines = f.readlines()
+    except OSError as e:
+        print(prefixError + "Cannot read the batch file `{0:s}': {1:s}".format(fileName, str(e)))
+        return -1, []
+    for lineNum, line in enumerate(lines, 1):
+        ret, step = parse_step(line)
+        if ret:
+            print(prefixError + "Error in line {0:d} of the batch file `{1:s}'!".format(lineNum, fileName))
+            return -1, []
+        if step:
+            steps.append(step)
+    return 0, steps
+
+
+
+# ===================================================================
+# Interactive shell with a persistent session.
+# ===================================================================
+
+class McuCmShell(cmd.Cmd):
+
+    intro = "Interactive shell for the Command Module. Type `help' for a list of commands, `exit' to quit."
+    prompt = "pyMcuCm> "
+
+    # Commands with an I2C I/O expander signal name as first parameter.
+    commandsSignal = ['i2c_io_exp_status', 'i2c_io_exp_get_input', 'i2c_io_exp_get_output', 'i2c_io_exp_set_output']
+
+
+
+    # Initialize the shell.
+    def __init__(self, mdtTp_CM, jsonOutput=False):
+        super().__init__()
+        self.mdtTp_CM = mdtTp_CM
+        self.jsonOutput = jsonOutput
+        # Only JSON documents are printed in JSON mode, e.g. for use as a
+        # co-process.
+        if jsonOutput:
+            self.intro = None
+            self.prompt = ""
+        self.signalNames = mdtTp_CM.i2c_io_exp_get_signal_names()
+        self.clkDeviceNames = mdtTp_CM.clk_get_device_names()
+
+
+
+    # Split the command line only at white space, so that signal names and
+    # file names are completed as a whole.
+    def preloop(self):
+        try:
+            import readline
+            readline.set_completer_delims(" \t\n")
+        except ImportError:
+            pass
+
+
+
+    # Execute a Command Module command and show its latency.
+    def default(self, line):
+        ret, step = parse_step(line)
+        if ret or not step:
+            return False
+        timeStart = time.time()
+        try:
+            if self.jsonOutput:
+                ret, doc = run_command_json(self.mdtTp_CM, step[0], step[1])
+                print_json(doc)
+                return False
+            ret = run_command(self.mdtTp_CM, step[0], step[1])
+        except KeyboardInterrupt:
+            print()
+            print(prefixError + "Command `{0:s}' interrupted!".format(step[0]))
+            ret = -1
+        except ValueError as e:
+            print(prefixError + "Invalid parameter for the command `{0:s}': {1:s}".format(step[0], str(e)))
+            ret = -1
+        print("Command `{0:s}' {1:s} after {2:.3f} s.".format(step[0], "failed" if ret else "done", time.time() - timeStart))
+        return False
+
+
+
+    # Do not repeat the last command on an empty line.
+    def emptyline(self):
+        return False
+
+
+
+    # Complete the command names.
+    def completenames(self, text, *ignored):
+        return [c for c in commands + ['exit', 'help'] if c.startswith(text)]
+
+
+
+    # Complete the parameters: signal names of the I2C I/O expanders, clock
+    # device names and register map files.
+    def completedefault(self, text, line, begidx, endidx):
+        tokens = line[:begidx].split()
+        if not tokens:
+            return []
+        paramIdx = len(tokens) - 1
+        if tokens[0] in self.commandsSignal and paramIdx == 0:
+            return [n for n in self.signalNames if n.startswith(text)]
+        if tokens[0] == 'clk_setup' and paramIdx == 0:
+            return [n for n in self.clkDeviceNames if n.lower().startswith(text.lower())]
+        if tokens[0] == 'clk_setup' and paramIdx == 1:
+            return [f + "/" if os.path.isdir(f) else f for f in glob.glob(glob.escape(text) + "*")]
+        return []
+
+
+
+    # Show the help.
+    def do_help(self, arg):
+        print("Commands: " + ", ".join(commands))
+        print("Parameters are given after the command, separated by white space, e.g. `clk_setup IC1 FILE'.")
+        print("Press TAB to complete commands, signal names and clock device names.")
+        print("Type `exit' or press Ctrl-D to quit.")
+
+
+
+    # Leave the shell.
+    def do_exit(self, arg):
+        return True
+
+
+
+    # Leave the shell on end of file (Ctrl-D).
+    def do_EOF(self, arg):
+        print()
+        return True
+
+
+
+# ===================================================================
+# Access the Command Module.
+# ===================================================================
+
+if __name__ == "__main__":
+    # Command line arguments.
+    import argparse
+    parser = argparse.ArgumentParser(description='Run an automated set of MCU tests.')
+    parser.add_argument('-c', '--command', action='store', type=str,
+                        choices=commands,
+                        dest='command', default=None,
+                        help='Command to execute on the CM. The default is `status\', unless batch steps are given.')
+    parser.add_argument('-d', '--device', action='store', type=str,
+                        dest='serialDevice', default='/dev/ttyUL1', metavar='SERIAL_DEVICE',
+                        help='Serial device to access the MCU. Hint: An empty device string ("") enables simulated access.')
+    parser.add_argument('-p', '--parameters', action='store', type=str, nargs='*',
+                        dest='commandParameters', default=None, metavar='PARAMETER',
+                        help='Parameter(s) for the selected command.')
+    parser.add_argument('-s', '--steps', action='store', type=str, nargs='+',
+                        dest='steps', default=None, metavar='STEP',
+                        help='Batch steps to execute in one session. Each step is a command followed by its parameters, e.g. "clk_setup IC1 FILE".')
+    parser.add_argument('-f', '--batch-file', action='store', type=str,
+                        dest='batchFile', default=None, metavar='BATCH_FILE',
+                        help='File with batch steps to execute in one session, one step per line. Lines starting with `#\' are ignored.')
+    parser.add_argument('-i', '--interactive', action='store_true',
+                        dest='interactive', default=False,
+                        help='Start an interactive shell, which keeps the session open between commands.')
+    parser.add_argument('-j', '--json', action='store_true',
+                        dest='json', default=False,
+                        help='Machine-readable output: Print one JSON document per command (NDJSON) with the status, the run time, the values and the messages of the command.')
+    parser.add_argument('-k', '--keep-going', action='store_true',
+                        dest='keepGoing', default=False,
+                        help='Continue with the next batch step if a step fails. By default, the batch stops at the first failed step.')
+    parser.add_argument('-t', '--stats', action='store_true',
+                        dest='stats', default=False,
+                        help='Show the latency and throughput statistics of the MCU commands, the I2C ports and the I2C devices at exit.')
+    parser.add_argument('-T', '--trace', action='store', type=str,
+                        dest='traceFile', default=None, metavar='TRACE_FILE',
+                        help='Append every I2C transaction to this file (NDJSON) for the analysis with analyze_trace.py.')
+    parser.add_argument('-b', '--binary', action='store_true',
+                        dest='binary', default=False,
+                        help='Use the binary frame mode of the MCU for I2C accesses, if supported by the firmware.')
+    parser.add_argument('-e', '--no-echo', action='store_true',
+                        dest='noEcho', default=False,
+                        help='Disable the echo of the MCU console to reduce the UART traffic.')
+    parser.add_argument('-r', '--baud-rate', action='store', type=int,
+                        dest='baudRate', default=None, metavar='BAUD_RATE',
+                        help='Switch the MCU UART to this baud rate. Falls back to the default baud rate on failure.')
+    parser.add_argument('-v', '--verbosity', action='store', type=int,
+                        dest='verbosity', default="1", choices=range(0, 5),
+                        help='Set the verbosity level. The default is 1.')
+    args = parser.parse_args()
+
+    command = args.command
+    commandParameters = args.commandParameters
+    serialDevice = args.serialDevice
+    verbosity = args.verbosity
+
+    # Collect the steps to execute. The steps are checked before the serial
+    # device is opened, so that a typo does not abort a batch half way.
+    steps = []
+    batchMode = args.steps is not None or args.batchFile is not None
+    if command or not (batchMode or args.interactive):
+        steps.append([command if command else 'status', commandParameters])
+    if args.batchFile:
+        ret, fileSteps = load_batch_file(args.batchFile)
+        if ret:
+            sys.exit(ret)
+        steps += fileSteps
+    for stepStr in args.steps or []:
+        ret, step = parse_step(stepStr)
+        if ret:
+            sys.exit(ret)
+        if step:
+            steps.append(step)
+
+    # Define the Command Module object.
+    mdtTp_CM = MdtTp_CM.MdtTp_CM(serialDevice, verbosity)
+    if args.traceFile and mdtTp_CM.mcuSer.trace_enable(args.traceFile):
+        sys.exit(-1)
+    if args.baudRate:
+        mdtTp_CM.mcuSer.baud_switch(args.baudRate)
+    if args.noEcho:
+        mdtTp_CM.mcuSer.echo_set(False)
+    if args.binary:
+        mdtTp_CM.mcuSer.bin_enable(True)
+
+    # Execute the requested command(s) in one session.
+    ret = 0
+    stepsFailed = 0
+    stepNum = 0
+    timeStart = time.time()
+    for stepNum, (stepCommand, stepParameters) in enumerate(steps, 1):
+        stepStr = " ".join([stepCommand] + (stepParameters or []))
+        if args.json:
+            stepRet, doc = run_command_json(mdtTp_CM, stepCommand, stepParameters)
+            if batchMode:
+                doc["step"] = stepNum
+            print_json(doc)
+        else:
+            if batchMode:
+                print("Batch step {0:d}/{1:d}: {2:s}".format(stepNum, len(steps), stepStr))
+            timeStep = time.time()
+            stepRet = run_command_checked(mdtTp_CM, stepCommand, stepParameters)
+            if batchMode:
+                print("Batch step {0:d}/{1:d} {2:s} after {3:.3f} s.".format(stepNum, len(steps),
+                      "failed" if stepRet else "done", time.time() - timeStep))
+        if stepRet:
+            ret = stepRet
+            stepsFailed += 1
+            if not args.keepGoing and stepNum < len(steps):
+                if not args.json:
+                    print(prefixError + "Stopping the batch after the failed step {0:d}/{1:d}: {2:s}".format(stepNum, len(steps), stepStr))
+                break
+    if batchMode and args.json:
+        print_json({"summary": {"steps": len(steps), "executed": stepNum, "failed": stepsFailed, "duration": time.time() - timeStart}})
+    elif batchMode:
+        print("Batch summary: {0:d} step(s), {1:d} failed, total time {2:.3f} s.".format(len(steps), stepsFailed, time.time() - timeStart))
+
+    # Run the interactive shell. The serial session and the device objects
+    # are kept alive between the commands.
+    if args.interactive:
+        shell = McuCmShell(mdtTp_CM, args.json)
+        while True:
+            try:
+                shell.cmdloop()
+                break
+            except KeyboardInterrupt:
+                print()
+                shell.intro = None
+
+    # Access statistics of the session.
+    if args.stats and args.json:
+        print_json({"stats": mdtTp_CM.mcuSer.stats.get()})
+    elif args.stats:
+        print()
+        mdtTp_CM.mcuSer.stats.print_summary()
+
+    # Return the MCU to the ASCII command console with echo and the default
+    # baud rate. Messages go to stderr in JSON mode.
+    with contextlib.redirect_stdout(sys.stderr if args.json else sys.stdout):
+        mdtTp_CM.mcuSer.bin_enable(False)
+        if not mdtTp_CM.mcuSer.mcuEcho:
+            mdtTp_CM.mcuSer.echo_set(True)
+        mdtTp_CM.mcuSer.baud_switch(mdtTp_CM.mcuSer.mcuBaudDefault)
+    mdtTp_CM.mcuSer.trace_disable()
+
+    if args.json:
+        sys.exit(ret)
+    elif ret == 0:
         print("\nBye-bye!")
     else:
         sys.exit(ret)
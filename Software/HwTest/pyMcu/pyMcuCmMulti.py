@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+#
+# File: pyMcuCmMulti.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 19 Oct 2026
+# Rev.: 19 Oct 2026
+#
+# Python script to run the same commands on several ATLAS MDT Trigger
+# Processor (TP) Command Modules (CMs) concurrently, each one accessed via its
+# own serial device.
+#
+# Hints:
+# - Every board is handled by its own worker process with its own MdtTp_CM
+#   object and serial session. The boards are independent of each other, so
+#   that the bring-up of N boards takes about as long as the slowest board.
+# - The commands and batch steps are the same as for pyMcuCm.py. The messages
+#   of each board are collected and printed per board after it has finished,
+#   so that the output of different boards is not interleaved.
+# - A board that cannot be accessed is reported as failed. The other boards
+#   are not affected.
+#
+
+
+
+# Append hardware classes folder to Python path.
+import os
+import sys
+sys.path.append(os.path.relpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), 'hw')))
+
+
+
+# System modules.
+import concurrent.futures
+import contextlib
+import io
+import time
+
+
+
+# Command Module commands and batch steps.
+import pyMcuCm
+from hw import MdtTp_CM
+
+
+
+# Message prefixes and separators.
+prefixDebug             = "DEBUG: {0:s}: ".format(__file__)
+prefixError             = "ERROR: {0:s}: ".format(__file__)
+
+
+
+# ===================================================================
+# Run the steps on one board.
+# ===================================================================
+
+# Open a session to the board on the serial device, execute the steps and
+# return a document with the results of all steps, the messages of the
+# session and the timing. This function runs in a worker process.
+def run_board(serialDevice, steps, options):
+    doc = {"device": serialDevice,
+           "status": 0,
+           "ok": False,
+           "timestamp": time.time(),
+           "duration_open": 0.0,
+           "duration": 0.0,
+           "steps": [],
+           "messages": []}
+    output = io.StringIO()
+    timeStart = time.time()
+    try:
+        with contextlib.redirect_stdout(output):
+            mdtTp_CM = MdtTp_CM.MdtTp_CM(serialDevice, options["verbosity"])
+            if options["baudRate"]:
+                mdtTp_CM.mcuSer.baud_switch(options["baudRate"])
+            if options["noEcho"]:
+                mdtTp_CM.mcuSer.echo_set(False)
+            if options["binary"]:
+                mdtTp_CM.mcuSer.bin_enable(True)
+        doc["duration_open"] = time.time() - timeStart
+        for stepNum, (stepCommand, stepParameters) in enumerate(steps, 1):
+            stepRet, stepDoc = pyMcuCm.run_command_json(mdtTp_CM, stepCommand, stepParameters)
+            stepDoc["step"] = stepNum
+            doc["steps"].append(stepDoc)
+            if stepRet:
+                doc["status"] = stepRet
+                if not options["keepGoing"]:
+                    break
+        # Return the MCU to the ASCII command console with echo and the
+        # default baud rate.
+        with contextlib.redirect_stdout(output):
+            mdtTp_CM.mcuSer.bin_enable(False)
+            if not mdtTp_CM.mcuSer.mcuEcho:
+                mdtTp_CM.mcuSer.echo_set(True)
+            mdtTp_CM.mcuSer.baud_switch(mdtTp_CM.mcuSer.mcuBaudDefault)
+    # Opening the serial device exits on error.
+    except SystemExit as e:
+        doc["status"] = e.code if isinstance(e.code, int) and e.code else -1
+    except Exception as e:
+        doc["status"] = -1
+        output.write(prefixError + "Exception on the serial device `{0:s}': {1:s}\n".format(serialDevice, repr(e)))
+    doc["ok"] = doc["status"] == 0
+    doc["duration"] = time.time() - timeStart
+    doc["messages"] = [line for line in output.getvalue().splitlines() if line.strip()]
+    return doc
+
+
+
+# ===================================================================
+# Run the steps on all boards concurrently.
+# ===================================================================
+
+# Start one worker per board and yield the document of each board as soon as
+# it has finished.
+def run_boards(serialDevices, steps, options, workers=0):
+    workers = workers or len(serialDevices)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_board, serialDevice, steps, options): serialDevice for serialDevice in serialDevices}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield {"device": futures[future], "status": -1, "ok": False,
+                       "timestamp": time.time(), "duration_open": 0.0, "duration": 0.0, "steps": [],
+                       "messages": [prefixError + "Worker for the serial device `{0:s}' failed: {1:s}".format(futures[future], repr(e))]}
+
+
+
+# Print the results of a board in human-readable form.
+def print_board(doc, stepsNum):
+    print("Board `{0:s}': {1:s} after {2:.3f} s (session opened after {3:.3f} s).".format(
+          doc["device"], "done" if doc["ok"] else "FAILED", doc["duration"], doc["duration_open"]))
+    for line in doc["messages"]:
+        print("    " + line)
+    for stepDoc in doc["steps"]:
+        stepStr = " ".join([stepDoc["command"]] + stepDoc["parameters"])
+        print("  Step {0:d}/{1:d} {2:s} {3:s} after {4:.3f} s.".format(stepDoc["step"], stepsNum, stepStr,
+              "done" if stepDoc["ok"] else "FAILED", stepDoc["duration"]))
+        for line in stepDoc["messages"]:
+            print("    " + line)
+    if len(doc["steps"]) < stepsNum:
+        print("  {0:d} of {1:d} step(s) not executed.".format(stepsNum - len(doc["steps"]), stepsNum))
+
+
+
+# Print the summary table of all boards.
+def print_summary(docs, stepsNum, duration):
+    print()
+    print("Summary: {0:d} board(s), {1:d} failed, total time {2:.3f} s.".format(
+          len(docs), sum(1 for doc in docs if not doc["ok"]), duration))
+    print("{0:24s}  {1:6s}  {2:>8s}  {3:>8s}  {4:>9s}".format("Device", "Status", "Executed", "Failed", "Time [s]"))
+    for doc in docs:
+        print("{0:24s}  {1:6s}  {2:>8s}  {3:8d}  {4:9.3f}".format(
+              doc["device"] if doc["device"] else "(simulated)", "ok" if doc["ok"] else "FAILED",
+              "{0:d}/{1:d}".format(len(doc["steps"]), stepsNum),
+              sum(1 for stepDoc in doc["steps"] if not stepDoc["ok"]), doc["duration"]))
+
+
+
+# ===================================================================
+# Access the Command Modules.
+# ===================================================================
+
+if __name__ == "__main__":
+    # Command line arguments.
+    import argparse
+    parser = argparse.ArgumentParser(description='Run the same commands on several Command Modules concurrently.')
+    parser.add_argument('-d', '--devices', action='store', type=str, nargs='+',
+                        dest='serialDevices', required=True, metavar='SERIAL_DEVICE',
+                        help='Serial devices to access the MCUs, one per board. Hint: An empty device string ("") enables simulated access.')
+    parser.add_argument('-c', '--command', action='store', type=str,
+                        choices=pyMcuCm.commands,
+                        dest='command', default=None,
+                        help='Command to execute on the CMs. The default is `status\', unless batch steps are given.')
+    parser.add_argument('-p', '--parameters', action='store', type=str, nargs='*',
+                        dest='commandParameters', default=None, metavar='PARAMETER',
+                        help='Parameter(s) for the selected command.')
+    parser.add_argument('-s', '--steps', action='store', type=str, nargs='+',
+                        dest='steps', default=None, metavar='STEP',
+                        help='Batch steps to execute on every board. Each step is a command followed by its parameters, e.g. "clk_setup IC1 FILE".')
+    parser.add_argument('-f', '--batch-file', action='store', type=str,
+                        dest='batchFile', default=None, metavar='BATCH_FILE',
+                        help='File with batch steps to execute on every board, one step per line. Lines starting with `#\' are ignored.')
+    parser.add_argument('-n', '--workers', action='store', type=int,
+                        dest='workers', default=0, metavar='WORKERS',
+                        help='Maximum number of boards accessed concurrently. The default is all boards.')
+    parser.add_argument('-j', '--json', action='store_true',
+                        dest='json', default=False,
+                        help='Machine-readable output: Print one JSON document per board (NDJSON) with the results of all steps, followed by a summary document.')
+    parser.add_argument('-k', '--keep-going', action='store_true',
+                        dest='keepGoing', default=False,
+                        help='Continue with the next batch step on a board if a step fails. By default, a board stops at its first failed step.')
+    parser.add_argument('-b', '--binary', action='store_true',
+                        dest='binary', default=False,
+                        help='Use the binary frame mode of the MCUs for I2C accesses, if supported by the firmware.')
+    parser.add_argument('-e', '--no-echo', action='store_true',
+                        dest='noEcho', default=False,
+                        help='Disable the echo of the MCU consoles to reduce the UART traffic.')
+    parser.add_argument('-r', '--baud-rate', action='store', type=int,
+                        dest='baudRate', default=None, metavar='BAUD_RATE',
+                        help='Switch the MCU UARTs to this baud rate. Falls back to the default baud rate on failure.')
+    parser.add_argument('-v', '--verbosity', action='store', type=int,
+                        dest='verbosity', default="1", choices=range(0, 5),
+                        help='Set the verbosity level. The default is 1.')
+    args = parser.parse_args()
+
+    # Collect the steps to execute. The steps are checked before any serial
+    # device is opened.
+    steps = []
+    if args.command or not (args.steps or args.batchFile):
+        steps.append([args.command if args.command else 'status', args.commandParameters])
+    if args.batchFile:
+        ret, fileSteps = pyMcuCm.load_batch_file(args.batchFile)
+        if ret:
+            sys.exit(ret)
+        steps += fileSteps
+    for stepStr in args.steps or []:
+        ret, step = pyMcuCm.parse_step(stepStr)
+        if ret:
+            sys.exit(ret)
+        if step:
+            steps.append(step)
+    for serialDevice in set(args.serialDevices):
+        if serialDevice and args.serialDevices.count(serialDevice) > 1:
+            print(prefixError + "Serial device `{0:s}' given more than once!".format(serialDevice))
+            sys.exit(-1)
+
+    options = {"verbosity": args.verbosity,
+               "keepGoing": args.keepGoing,
+               "binary": args.binary,
+               "noEcho": args.noEcho,
+               "baudRate": args.baudRate}
+
+    # Run the steps on all boards and report each board when it is finished.
+    if not args.json:
+        print("Running {0:d} step(s) on {1:d} board(s).".format(len(steps), len(args.serialDevices)))
+    timeStart = time.time()
+    docs = []
+    for doc in run_boards(args.serialDevices, steps, options, args.workers):
+        docs.append(doc)
+        if args.json:
+            pyMcuCm.print_json(doc)
+        else:
+            print_board(doc, len(steps))
+    duration = time.time() - timeStart
+
+    # Keep the order of the devices in the summary.
+    docs.sort(key=lambda doc: args.serialDevices.index(doc["device"]))
+    boardsFailed = [doc["device"] for doc in docs if not doc["ok"]]
+    if args.json:
+        pyMcuCm.print_json({"summary": {"boards": len(docs), "failed": len(boardsFailed), "failed_devices": boardsFailed,
+                                        "steps": len(steps), "duration": duration}})
+    else:
+        print_summary(docs, len(steps), duration)
+
+    sys.exit(-1 if boardsFailed else 0)
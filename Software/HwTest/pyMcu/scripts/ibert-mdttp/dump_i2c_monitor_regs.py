@@ -44,13 +44,16 @@ for pin_name, pin_data in data.items():
     subprocess.run(['../../pyMcuCm.py', '-d', device, '-c', 'mcu_cmd_raw', '-p', f"i2c 8 0x08 0x4 " + '0x{:02X}'.format(reg) ], stdout=subprocess.PIPE)
 
     # Read four bytes                                                                                                      
-    result = subprocess.run(['../../pyMcuCm.py', '-d', device, '-c', 'mcu_cmd_raw', '-p', f"i2c 8 0x08 0x3 4 "], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    output_hex = result.stdout.strip().decode('utf-8')
-
-    # Define a regular expression pattern to match the relevant part of the output
-    res = output_hex.split(" ") 
-    # Extract the matched string and remove any spaces
-    result = f" {res[1]}{res[2][2:4]}{res[3][2:4]}{res[4][2:4]}"
+    result = subprocess.run(['../../pyMcuCm.py', '-d', device, '-j', '-c', 'mcu_cmd_raw', '-p', f"i2c 8 0x08 0x3 4 "], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    doc = json.loads(result.stdout.decode('utf-8').splitlines()[0])
+
+    # Get the data bytes from the JSON output (MSB first)
+    dataBytes = [v['value'] for v in doc['values'] if v['name'] == 'Data']
+    if not dataBytes:
+        print(pin_name, "ERROR: No data read from the MCU:", " ".join(doc['messages']))
+        previous_mux = -1
+        continue
+    result = " 0x" + "".join('{:02x}'.format(d) for d in dataBytes[0])
 
     # Print the result
     print(pin_name, result, "value in MHz:", int(result,16)/1e6)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+#
+# File: test_threadsafe_cm.py
+# Auth: M. Fras, Electronics Division, MPI for Physics, Munich
+# Mod.: M. Fras, Electronics Division, MPI for Physics, Munich
+# Date: 19 Oct 2026
+# Rev.: 19 Oct 2026
+#
+# Python script to test the thread-safe access of the ATLAS MDT Trigger
+# Processor (TP) Command Module (CM) against a simulated MCU.
+#
+# Hints:
+# - Two threads share one Command Module with the thread-safe access of the
+#   serial port enabled. Both read different registers of the same I2C device
+#   with a write without stop condition, which sets the register pointer,
+#   followed by a read with repeated start.
+# - Reference: The two MCU commands of a register read are sent separately.
+#   Every MCU command is atomic, but the register pointer of one thread may
+#   be overwritten by the other thread before the read. The wrong values
+#   returned are counted.
+# - Transaction: The registers are read with the device driver, which
+#   executes the write and the read as one transaction. No wrong value must
+#   be returned.
+# - The script exits with a non-zero status if a transaction returned a wrong
+#   value or failed.
+#
+
+
+
+# Append hardware classes folder to Python path.
+import os
+import sys
+sys.path.append(os.path.relpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), 'hw')))
+
+
+
+# System modules.
+import contextlib
+import io
+import threading
+
+
+
+# Command Module and simulated MCU.
+import benchmark_cm
+from hw import MdtTp_CM
+from hw import McuSim
+
+
+
+# Message prefixes and separators.
+prefixError             = "ERROR: {0:s}: ".format(__file__)
+
+# Registers of the MCP9902 IC60 read by the threads and their values.
+registers = {0x00: 0x11, 0x01: 0x22}
+
+
+
+# Open a session to the Command Module on a simulated MCU with the thread-safe
+# access enabled.
+def open_session():
+    mcuSim = McuSim.McuSim()
+    for port, slaveAddr, mux in benchmark_cm.get_devices():
+        mcuSim.device_add(port, slaveAddr, mux)
+    with contextlib.redirect_stdout(io.StringIO()):
+        mdtTp_CM = MdtTp_CM.MdtTp_CM("", 0)
+        mdtTp_CM.mcuSer.attach(mcuSim)
+    device = mdtTp_CM.i2cDevice_IC60_MCP9902
+    for regAdr, value in registers.items():
+        mcuSim.devices[(device.mcuI2C.port, device.slaveAddr & 0x7f)]["regs"][regAdr] = value
+    mdtTp_CM.mcuSer.threadsafe_enable(True)
+    return mdtTp_CM
+
+
+
+# Read a register with two separate MCU commands.
+def read_reg_commands(device, regAdr):
+    ret = device.mcuI2C.ms_write_adv(device.slaveAddr, [regAdr], False, False)
+    if ret:
+        return ret, 0xff
+    ret, dataRd = device.mcuI2C.ms_read_adv(device.slaveAddr, 1, True, True)
+    if ret or len(dataRd) != 1:
+        return -1, 0xff
+    return 0, dataRd[0]
+
+
+
+# Read a register with the device driver.
+def read_reg_driver(device, regAdr):
+    return device.read_reg(regAdr)
+
+
+
+# Read a register repeatedly from two threads and count the errors and the
+# wrong values.
+def run_threads(mdtTp_CM, readFunc, iterations):
+    device = mdtTp_CM.i2cDevice_IC60_MCP9902
+    counts = {"errors": 0, "wrong": 0}
+    lock = threading.Lock()
+    def worker(regAdr):
+        for _ in range(iterations):
+            ret, value = readFunc(device, regAdr)
+            with lock:
+                if ret:
+                    counts["errors"] += 1
+                elif value != registers[regAdr]:
+                    counts["wrong"] += 1
+    threads = [threading.Thread(target=worker, args=(regAdr,)) for regAdr in registers]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return counts
+
+
+
+# ===================================================================
+# Run the test.
+# ===================================================================
+
+if __name__ == "__main__":
+    # Command line arguments.
+    import argparse
+    parser = argparse.ArgumentParser(description='Test the thread-safe access of the Command Module against a simulated MCU.')
+    parser.add_argument('-n', '--iterations', action='store', type=int,
+                        dest='iterations', default=50, metavar='ITERATIONS',
+                        help='Number of register reads per thread. The default is 50.')
+    args = parser.parse_args()
+
+    if args.iterations < 1:
+        print(prefixError + "At least one register read per thread is required!")
+        sys.exit(-1)
+    ret = 0
+    for name, readFunc in [["Reference", read_reg_commands], ["Transaction", read_reg_driver]]:
+        mdtTp_CM = open_session()
+        counts = run_threads(mdtTp_CM, readFunc, args.iterations)
+        mdtTp_CM.mcuSer.threadsafe_enable(False)
+        print("{0:12s}: {1:d} reads, {2:d} errors, {3:d} wrong values".format(name, len(registers) * args.iterations, counts["errors"], counts["wrong"]))
+        if readFunc is read_reg_driver and (counts["errors"] or counts["wrong"]):
+            print(prefixError + "Register reads of two threads were interleaved!")
+            ret = -1
+    sys.exit(ret)